@@ -0,0 +1,113 @@
+"""Chargement « sans interface » de l'application pour les benchmarks et les tests.
+
+Rien du script streamlit_app.py n'est exécuté : les fonctions mesurées sont
+importées par leur nom depuis les modules du paquet urc (stockage, domaine,
+documents), et un nom introuvable fait échouer le chargement. L'état de session
+est un simple dictionnaire, partagé par tous les modules : chaque benchmark le
+remplit avec son jeu de données.
+
+Le paquet streamlit (et les dépendances de requirements.txt) doit être
+installé ; Supabase n'est jamais contacté — SUPABASE_URL/SUPABASE_KEY sont
+retirés de l'environnement avant le chargement.
+"""
+import importlib
+import logging
+import os
+import sys
+from pathlib import Path
+
+APP_PATH = Path(__file__).resolve().parent.parent / "streamlit_app.py"
+# Fichiers dont dépend une mesure (empreinte du rapport)
+APP_FILES = (APP_PATH, *sorted((APP_PATH.parent / "urc").glob("*.py")))
+
+# Noms repris de chaque module du paquet urc
+NAMES = {
+    "perf": ("_count_io", "_prof_begin", "_run_bound"),
+    "constants": (
+        "DEFAULT_GERMS", "DEFAULT_MEASURES", "DEFAULT_ORIGIN_MEASURES",
+        "DEFAULT_THRESHOLDS", "SURV_SNAPSHOT_FILE",
+    ),
+    "workdays": ("get_holidays_cached", "is_working_day"),
+    "storage": (
+        "OUTBOX_MAX_ATTEMPTS", "ROW_COLLECTIONS", "_Outbox", "_SurvJournal", "_export_cache",
+        "_flush_pending_writes", "_merge_record", "_months_between", "_rebase_records",
+        "_repo", "_supa_rows_apply", "_surv_bootstrap", "build_export",
+        "ensure_surveillance_months", "find_germ_match", "load_pending_identifications",
+        "save_schedules", "save_surveillance",
+    ),
+    "readings": ("_reading_badges", "_reading_due_date", "_reschedule_sample"),
+    "planning": (
+        "_balance_weeks", "_capacity_overflows", "_compute_planning", "_monthly_plan", "_planning_anchor",
+        "_planning_inputs", "_planning_memo", "_redistribute_skips", "_replan",
+    ),
+    "analysis": (
+        "_records_in_period", "_stats_par_germe", "_stats_par_point",
+        "_stats_par_preleveur",
+    ),
+    "documents": (
+        "_generate_excel_planning", "_generate_mc_pdf", "_generate_pdf_etiquettes",
+    ),
+}
+# Modules dont l'état de session est remplacé (tous ceux du paquet)
+MODULES = ("perf", "constants", "workdays", "storage", "readings", "planning",
+           "analysis", "documents")
+
+
+class SessionState(dict):
+    """st.session_state réduit à un dictionnaire avec accès par attribut."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+    def __delattr__(self, name):
+        self.pop(name, None)
+
+
+class HeadlessStreamlit:
+    """Module streamlit dont seul l'état de session est remplacé."""
+
+    def __init__(self, module):
+        self._module = module
+        self.session_state = SessionState()
+
+    def __getattr__(self, name):
+        return getattr(self._module, name)
+
+
+def _quiet_streamlit():
+    # Hors `streamlit run`, chaque accès au cache ou à l'état avertit : inutile ici
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+
+def load_app(path=APP_PATH):
+    """Espace de noms de l'application (dict), prêt pour les benchmarks."""
+    os.environ.pop("SUPABASE_URL", None)
+    os.environ.pop("SUPABASE_KEY", None)
+    root = str(Path(path).parent)
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    import streamlit
+    _quiet_streamlit()
+    st = HeadlessStreamlit(streamlit)
+    modules = {}
+    for name in MODULES:
+        modules[name] = importlib.import_module(f"urc.{name}")
+        modules[name].st = st
+    ns, missing = {"st": st}, []
+    for name, wanted in NAMES.items():
+        for attr in wanted:
+            if hasattr(modules[name], attr):
+                ns[attr] = getattr(modules[name], attr)
+            else:
+                missing.append(f"urc.{name}.{attr}")
+    if missing:
+        raise LookupError("noms introuvables dans l'application : " + ", ".join(missing))
+    return ns
@@ -0,0 +1,214 @@
+"""Jeux de données synthétiques, proches de ceux d'une URC en production.
+
+generate() produit toutes les collections de l'application : points aux
+fréquences mixtes (/ jour, / semaine, / mois), plusieurs années de
+prélèvements avec leurs lectures J2/J7, historique de surveillance avec des
+entrées multi-germes, identifications en attente, skips et semaines gelées du
+mois de référence, capacités journalières par classe. Le résultat ne dépend que de (scale, seed, today).
+"""
+import random
+from datetime import date, timedelta
+
+SCALES = {
+    "petit": {"points": 20,  "years": 1},
+    "moyen": {"points": 80,  "years": 3},
+    "grand": {"points": 150, "years": 4},
+}
+
+OPERATORS = ["Maria", "Julien", "Sophie", "Karim", "Élise", "Thomas", "Nadia", "Paul"]
+ROOM_CLASSES = ["A", "B", "C", "D"]
+GELOSES = ["Gélose contact TSA", "Gélose sédimentation TSA", "Gélose Sabouraud"]
+
+# (unité, fréquences possibles, poids)
+FREQUENCIES = [
+    ("/ jour",    (1, 2),    0.10),
+    ("/ semaine", (1, 2, 3), 0.60),
+    ("/ mois",    (1, 2),    0.30),
+]
+
+
+def _working_days(start, end):
+    d = start
+    while d <= end:
+        if d.weekday() < 5:
+            yield d
+        d += timedelta(days=1)
+
+
+def _points(rng, n):
+    points = []
+    units = [f[0] for f in FREQUENCIES]
+    weights = [f[2] for f in FREQUENCIES]
+    for i in range(n):
+        unit = rng.choices(units, weights)[0]
+        freq = rng.choice(next(f[1] for f in FREQUENCIES if f[0] == unit))
+        rc = rng.choice(ROOM_CLASSES)
+        points.append({
+            "id":             f"p{i + 1}_bench",
+            "label":          f"Point {i + 1:03d} — salle {rc}{i % 7 + 1}",
+            "type":           rng.choice(["Air", "Surface"]),
+            "room_class":     rc,
+            "gelose":         rng.choice(GELOSES),
+            "risk_level":     rng.randint(1, 5),
+            "frequency":      freq,
+            "frequency_unit": unit,
+            "poste_type":     "specifique" if rc == "A" and rng.random() < 0.5 else "non_applicable",
+        })
+    return points
+
+
+def _daily_probability(pt):
+    freq = pt["frequency"]
+    if pt["frequency_unit"] == "/ jour":
+        return 1.0
+    if pt["frequency_unit"] == "/ semaine":
+        return freq / 5
+    return freq / 21
+
+
+def _germ_entry(rng, germs):
+    name = rng.choice(germs)
+    return {"name": name, "germ_saisi": name, "match_score": 1.0,
+            "ufc": rng.randint(1, 80), "germ_score": rng.randint(1, 5)}
+
+
+def _surveillance_record(rng, p, germs):
+    roll = rng.random()
+    if roll < 0.85:
+        entries = []
+    elif roll < 0.95:
+        entries = [_germ_entry(rng, germs)]
+    else:
+        entries = [_germ_entry(rng, germs) for _ in range(rng.randint(2, 3))]
+    worst = max(entries, key=lambda e: e["ufc"]) if entries else None
+    status = "ok"
+    if worst:
+        status = rng.choices(["ok", "alert", "action"], [0.6, 0.3, 0.1])[0]
+    rec = {
+        "id":               "r_" + p["id"],
+        "date":             p["date"],
+        "date_prelevement": p["date"],
+        "prelevement":      p["label"],
+        "sample_id":        p["id"],
+        "germ_saisi":       worst["germ_saisi"] if worst else "Négatif",
+        "germ_match":       worst["name"] if worst else "Négatif",
+        "ufc":              worst["ufc"] if worst else 0,
+        "ufc_48h":          worst["ufc"] if worst and rng.random() < 0.7 else 0,
+        "ufc_5j":           worst["ufc"] if worst else 0,
+        "ufc_total":        sum(e["ufc"] for e in entries),
+        "germs_detail":     [dict(e, is_worst=e is worst) for e in entries],
+        "multi_germ":       len(entries) > 1,
+        "total_score":      rng.randint(1, 50) if worst else 0,
+        "room_class":       p["room_class"],
+        "operateur":        p["operateur"],
+        "status":           status,
+    }
+    if status in ("alert", "action"):
+        rec["mc_statut"] = rng.choice(["fait", "en_attente"])
+        rec["mc_detail"] = "Bionettoyage renforcé" if rec["mc_statut"] == "fait" else ""
+    return rec
+
+
+def _frozen_weeks(rng, points, today):
+    """Snapshots gelés des semaines déjà passées du mois de référence."""
+    frozen = {}
+    first = today.replace(day=1)
+    monday = first - timedelta(days=first.weekday())
+    while monday + timedelta(days=4) < today:
+        snap = {}
+        for i in range(5):
+            d = monday + timedelta(days=i)
+            tasks = [{
+                "label":       pt["label"],
+                "type":        pt["type"],
+                "risk":        pt["risk_level"],
+                "room_class":  pt["room_class"],
+                "max_per_day": 1,
+                "_freq_unit":  pt["frequency_unit"],
+            } for pt in rng.sample(points, min(len(points), 6))]
+            snap[d.isoformat()] = sorted(tasks, key=lambda t: (-t["risk"], t["label"]))
+        frozen[monday.isoformat()] = snap
+        monday += timedelta(weeks=1)
+    return frozen
+
+
+def generate(scale, germs, seed=0, today=None):
+    """Collections de l'application pour l'échelle demandée (voir SCALES).
+
+    germs : noms de germes utilisables dans l'historique.
+    today : date de référence (fin de l'historique, mois du planning).
+    """
+    cfg = SCALES[scale]
+    rng = random.Random(f"{scale}:{seed}")
+    today = today or date.today()
+    points = _points(rng, cfg["points"])
+    start = today - timedelta(days=365 * cfg["years"])
+
+    prelevements, schedules, surveillance, pending = [], [], [], []
+    n = 0
+    for d in _working_days(start, today):
+        age = (today - d).days
+        for pt in points:
+            prob = _daily_probability(pt)
+            if rng.random() >= prob:
+                continue
+            n += 1
+            p = {
+                "id":         f"s{n}_bench",
+                "label":      pt["label"],
+                "type":       pt["type"],
+                "gelose":     pt["gelose"],
+                "room_class": pt["room_class"],
+                "operateur":  rng.choice(OPERATORS),
+                "date":       d.isoformat(),
+                "archived":   age > 9,
+            }
+            prelevements.append(p)
+            for when, offset in (("J2", 2), ("J7", 7)):
+                due = d + timedelta(days=offset)
+                schedules.append({
+                    "id":        f"sch_{p['id']}_{when}",
+                    "sample_id": p["id"],
+                    "label":     p["label"],
+                    "due_date":  due.isoformat(),
+                    "when":      when,
+                    "status":    "done" if due < today else "pending",
+                })
+            if age > 7:
+                surveillance.append(_surveillance_record(rng, p, germs))
+            elif age > 2 and rng.random() < 0.1:
+                pending.append({"sample_id": p["id"], "label": p["label"], "when": "J2",
+                                "colonies": rng.randint(1, 5), "date": p["date"],
+                                "status": "pending"})
+
+    # Skips du mois de référence : ~5 % des points sur les jours déjà passés
+    skips = {}
+    for d in _working_days(today.replace(day=1), today - timedelta(days=1)):
+        labels = [pt["label"] for pt in points if rng.random() < 0.05]
+        if labels:
+            skips[d.isoformat()] = labels
+
+    # Capacités journalières par classe : ~30 % au-dessus de la charge moyenne
+    per_day = {}
+    for pt in points:
+        per_day[pt["room_class"]] = per_day.get(pt["room_class"], 0) + _daily_probability(pt)
+    capacities = {c: max(1, round(v * 1.3 + 0.5)) for c, v in sorted(per_day.items())}
+
+    return {
+        "today":                   today,
+        "points":                  points,
+        "prelevements":            prelevements,
+        "schedules":               schedules,
+        "surveillance":            surveillance,
+        "pending_identifications": pending,
+        "archived_samples":        [dict(p) for p in prelevements if p["archived"]][-500:],
+        "operators":               [{"id": f"op{i}", "nom": o} for i, o in enumerate(OPERATORS)],
+        "planning_skips":          skips,
+        "planning_frozen_weeks":   _frozen_weeks(rng, points, today),
+        "class_constraints":       capacities,
+    }
+
+
+def sizes(data):
+    """Taille de chaque collection (pour le rapport)."""
+    return {k: len(v) for k, v in data.items() if isinstance(v, (list, dict))}
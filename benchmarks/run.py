@@ -0,0 +1,408 @@
+"""Benchmarks des traitements lourds de l'application.
+
+    python benchmarks/run.py                          # petit + moyen, 5 mesures
+    python benchmarks/run.py --scales petit,moyen,grand --repeat 10
+    python benchmarks/run.py --baseline benchmarks/results/reference.json
+
+Chaque cas est mesuré sur les jeux de données de benchmarks/datagen.py ; les
+résultats (min/médiane/moyenne/max en ms, tailles des jeux de données, commit)
+sont écrits en JSON. Avec --baseline, toute médiane qui dépasse la référence
+de plus de --tolerance (et de plus de --floor-ms) est signalée et le script
+sort avec le code 1 ; un cas en erreur donne le code 2.
+"""
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from appload import APP_FILES, APP_PATH, load_app   # noqa: E402
+from datagen import SCALES, generate, sizes   # noqa: E402
+
+DEFAULT_OUT = Path(__file__).resolve().parent / "results" / "latest.json"
+# Date de référence fixe : les mesures restent comparables d'un jour à l'autre
+DEFAULT_TODAY = "2025-03-19"
+
+CASES = []
+
+
+def case(name):
+    def register(factory):
+        CASES.append((name, factory))
+        return factory
+    return register
+
+
+# ── mise en place d'un jeu de données ─────────────────────────────────────────
+def install(app, data):
+    """Remplit l'état de session et le stockage local (dossier courant)."""
+    st = app["st"]
+    st.cache_resource.clear()     # modèle partagé, boîte d'envoi, caches d'export
+    ss = st.session_state
+    ss.clear()
+    ss.update({
+        "_run_id":                 1,
+        "germs":                   [dict(g) for g in app["DEFAULT_GERMS"]],
+        "thresholds":              {k: dict(v) for k, v in app["DEFAULT_THRESHOLDS"].items()},
+        "measures":                {k: dict(v) for k, v in app["DEFAULT_MEASURES"].items()},
+        "origin_measures":         [dict(m) for m in app["DEFAULT_ORIGIN_MEASURES"]],
+        "points":                  data["points"],
+        "prelevements":            data["prelevements"],
+        "schedules":               data["schedules"],
+        "pending_identifications": data["pending_identifications"],
+        "archived_samples":        data["archived_samples"],
+        "operators":               data["operators"],
+        "plans":                   [],
+        "planning_skips":          data["planning_skips"],
+        "planning_frozen_weeks":   data["planning_frozen_weeks"],
+        "planning_overrides":      {},
+        **{f"class_max_{c}": v for c, v in data["class_constraints"].items()},
+    })
+    Path(app["SURV_SNAPSHOT_FILE"]).write_text(
+        json.dumps(data["surveillance"], ensure_ascii=False), encoding="utf-8")
+    ss.surveillance = app["_surv_bootstrap"]()
+    # tout l'historique en mémoire, comme après un filtre « depuis le début »
+    dates = [r["date"] for r in data["surveillance"]]
+    if dates:
+        app["ensure_surveillance_months"](app["_months_between"](
+            date.fromisoformat(min(dates)), date.fromisoformat(max(dates))))
+
+
+def _period_plan(app, data, months):
+    hol = set().union(*(app["get_holidays_cached"](y) for y in {y for y, _ in months}))
+    caps = data["class_constraints"]
+    raw = app["_compute_planning"](
+        months, hol, prelevements=data["prelevements"], points=data["points"],
+        capacities=caps)
+    plan = app["_redistribute_skips"](
+        raw, data["planning_skips"], hol,
+        frozen=data["planning_frozen_weeks"], today=data["today"], capacities=caps)
+    plan = app["_balance_weeks"](
+        plan, hol, frozen=data["planning_frozen_weeks"], today=data["today"], capacities=caps)
+    return raw, plan
+
+
+def _month_plan(app, data, year, month):
+    return _period_plan(app, data, [(year, month)])
+
+
+def _next_months(today, n):
+    return [((today.month - 1 + i) // 12 + today.year, (today.month - 1 + i) % 12 + 1)
+            for i in range(n)]
+
+
+# ── cas mesurés ───────────────────────────────────────────────────────────────
+@case("planning_mois")
+def _planning_month(app, data):
+    today = data["today"]
+    return lambda: _month_plan(app, data, today.year, today.month)
+
+
+@case("planning_mois_memoire")
+def _planning_memo(app, data):
+    # rerun de l'onglet : empreinte des entrées puis plan repris de la mémoire
+    today = data["today"]
+    hol = app["get_holidays_cached"](today.year)
+    return lambda: app["_monthly_plan"](
+        today.year, today.month, hol, points=data["points"],
+        prelevements=data["prelevements"], skips=data["planning_skips"],
+        frozen=data["planning_frozen_weeks"], today=today,
+        capacities=data["class_constraints"])
+
+
+@case("replanification_skip")
+def _replan_skip(app, data):
+    # « Tout reporter » sur un jour : ancrage déjà en mémoire, seul le report est refait
+    today = data["today"]
+    caps, frozen = data["class_constraints"], data["planning_frozen_weeks"]
+    months = [(today.year, today.month)]
+    base = app["_planning_anchor"](
+        months, app["get_holidays_cached"](today.year), data["points"],
+        data["prelevements"], data["planning_skips"], frozen, today, caps)
+    skips = dict(data["planning_skips"])
+    skips[today.isoformat()] = [t["label"] for t in base["plan"].get(today, [])]
+    new = app["_planning_inputs"](months, data["points"], data["prelevements"], skips, frozen)
+    return lambda: app["_replan"](base, new, data["points"], today, caps)
+
+
+@case("replanification_point")
+def _replan_point(app, data):
+    # fréquence d'un point modifiée : seul ce point est replacé sur les jours ouverts
+    today = data["today"]
+    caps, frozen = data["class_constraints"], data["planning_frozen_weeks"]
+    months = [(today.year, today.month)]
+    base = app["_planning_anchor"](
+        months, app["get_holidays_cached"](today.year), data["points"],
+        data["prelevements"], data["planning_skips"], frozen, today, caps)
+    pt = next(p for p in data["points"] if p["frequency_unit"] == "/ semaine")
+    points = [dict(p, frequency=int(p["frequency"]) + 1) if p is pt else p
+              for p in data["points"]]
+    new = app["_planning_inputs"](months, points, data["prelevements"],
+                                  data["planning_skips"], frozen)
+    return lambda: app["_replan"](base, new, points, today, caps)
+
+
+@case("planning_12_mois")
+def _planning_year(app, data):
+    months = _next_months(data["today"], 12)
+    return lambda: [_month_plan(app, data, y, m) for y, m in months]
+
+
+@case("planning_horizon_12_mois")
+def _planning_horizon(app, data):
+    # les mêmes 12 mois en une passe (reports et espacement d'un mois à l'autre)
+    months = _next_months(data["today"], 12)
+    return lambda: _period_plan(app, data, months)
+
+
+@case("echeances_j2_j7")
+def _due_dates(app, data):
+    # échéances J2/J7 de tout l'historique (calendrier des jours ouvrés du site)
+    dates = [p["date"] for p in data["prelevements"]]
+    due = app["_reading_due_date"]
+    return lambda: [(due(d, "J2"), due(d, "J7")) for d in dates]
+
+
+@case("find_germ_match")
+def _germ_match(app, data):
+    germs = app["st"].session_state.germs
+    queries = []
+    for i, g in enumerate(germs * 3):
+        name = g["name"]
+        variant = i % 3
+        if variant == 0:
+            queries.append(name.lower())
+        elif variant == 1:
+            queries.append(name[:-2] if len(name) > 4 else name)   # saisie tronquée
+        else:
+            queries.append(name.split()[0])                        # genre seul
+    return lambda: [app["find_germ_match"](q, germs) for q in queries]
+
+
+@case("analyse_agregations")
+def _analyse(app, data):
+    ss = app["st"].session_state
+    repo = app["_repo"]
+
+    def criticite(name):
+        g = repo().germ(name)
+        return int(g.get("criticite", 0) or 0) if g else 0
+
+    def run():
+        recs = app["_records_in_period"](ss.surveillance, date(2000, 1, 1), data["today"])
+        app["_stats_par_point"](recs)
+        app["_stats_par_germe"](recs, criticite)
+        app["_stats_par_preleveur"](recs)
+    return run
+
+
+@case("save_surveillance")
+def _save(app, data):
+    ss = app["st"].session_state
+
+    def run():
+        # une lecture corrigée sur l'entrée la plus récente, puis enregistrement
+        rec = ss.surveillance[-1]
+        rec["mc_detail"] = "benchmark " + str(time.perf_counter_ns())
+        app["save_surveillance"](ss.surveillance)
+        app["_flush_pending_writes"]()
+    return run
+
+
+@case("export")
+def _export(app, data):
+    def run():
+        app["_export_cache"]().clear()
+        return app["build_export"]()
+    return run
+
+
+@case("export_gzip")
+def _export_gzip(app, data):
+    def run():
+        app["_export_cache"]().clear()
+        return app["build_export"](compress=True)
+    return run
+
+
+def _require(*modules):
+    """Cas ignoré (ImportError) si une bibliothèque optionnelle manque ; elle n'est
+    pas importée ici, seulement cherchée."""
+    for name in modules:
+        if importlib.util.find_spec(name) is None:
+            raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+
+
+@case("excel_planning")
+def _excel(app, data):
+    _require("openpyxl")
+    today = data["today"]
+    raw, plan = _month_plan(app, data, today.year, today.month)
+    first = today.replace(day=1)
+    days = [first + timedelta(days=i) for i in range(31)
+            if (first + timedelta(days=i)).month == today.month]
+    days = [d for d in days if app["is_working_day"](d)]
+    return lambda: app["_generate_excel_planning"](days, plan, raw, today)
+
+
+@case("pdf_etiquettes")
+def _labels(app, data):
+    _require("reportlab", "qrcode")
+    today = data["today"]
+    _, plan = _month_plan(app, data, today.year, today.month)
+    monday = today - timedelta(days=today.weekday())
+    week = [(d, plan[d]) for d in sorted(plan) if monday <= d <= monday + timedelta(days=4)]
+    return lambda: app["_generate_pdf_etiquettes"](None, week)
+
+
+@case("pdf_mesures_correctives")
+def _mc_pdf(app, data):
+    _require("reportlab")
+    ss = app["st"].session_state
+    alerts = [r for r in ss.surveillance if r.get("status") in ("alert", "action")]
+    rec = max(alerts, key=lambda r: len(r.get("germs_detail") or []), default=ss.surveillance[-1])
+    return lambda: app["_generate_mc_pdf"](rec, ss.origin_measures, ss.germs)
+
+
+# ── mesure et rapport ─────────────────────────────────────────────────────────
+def measure(fn, repeat):
+    fn()   # échauffement : imports paresseux, caches de police, index
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - t0) * 1000)
+    return {
+        "runs":      len(runs),
+        "min_ms":    round(min(runs), 3),
+        "median_ms": round(statistics.median(runs), 3),
+        "mean_ms":   round(statistics.fmean(runs), 3),
+        "max_ms":    round(max(runs), 3),
+    }
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_PATH.parent,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(results, baseline, tolerance, floor_ms):
+    """Cas dont la médiane dépasse la référence au-delà de la tolérance."""
+    ref = {(r["case"], r["scale"]): r for r in baseline.get("results", [])
+           if r.get("status") == "ok"}
+    regressions = []
+    for r in results:
+        b = ref.get((r["case"], r["scale"]))
+        if r.get("status") != "ok" or b is None:
+            continue
+        delta = r["median_ms"] - b["median_ms"]
+        if delta > floor_ms and r["median_ms"] > b["median_ms"] * (1 + tolerance):
+            regressions.append({"case": r["case"], "scale": r["scale"],
+                                "baseline_ms": b["median_ms"], "median_ms": r["median_ms"],
+                                "ratio": round(r["median_ms"] / b["median_ms"], 3)
+                                if b["median_ms"] else None})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scales", default="petit,moyen",
+                        help="échelles, séparées par des virgules : " + ", ".join(SCALES))
+    parser.add_argument("--cases", default="",
+                        help="cas à mesurer (tous par défaut) : " + ", ".join(n for n, _ in CASES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--today", default=DEFAULT_TODAY, help="date de référence AAAA-MM-JJ")
+    parser.add_argument("--out", default=str(DEFAULT_OUT))
+    parser.add_argument("--baseline", help="résultats de référence (JSON d'un run précédent)")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="hausse relative de la médiane tolérée (0.25 = +25 %%)")
+    parser.add_argument("--floor-ms", type=float, default=2.0,
+                        help="écart absolu en dessous duquel on ne signale rien")
+    args = parser.parse_args(argv)
+
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        parser.error("échelle inconnue : " + ", ".join(unknown))
+    wanted = {c.strip() for c in args.cases.split(",") if c.strip()}
+    cases = [(n, f) for n, f in CASES if not wanted or n in wanted]
+    today = date.fromisoformat(args.today)
+    out_path = Path(args.out).resolve()
+    baseline_path = Path(args.baseline).resolve() if args.baseline else None
+
+    app = load_app()
+    germ_names = [g["name"] for g in app["DEFAULT_GERMS"]]
+    results, datasets = [], {}
+    cwd = os.getcwd()
+    for scale in scales:
+        data = generate(scale, germ_names, seed=args.seed, today=today)
+        datasets[scale] = sizes(data)
+        with tempfile.TemporaryDirectory(prefix=f"urc_bench_{scale}_") as tmp:
+            os.chdir(tmp)   # fichiers locaux de l'application : jamais ceux du dépôt
+            try:
+                install(app, data)
+                for name, factory in cases:
+                    row = {"case": name, "scale": scale}
+                    try:
+                        row.update(status="ok", **measure(factory(app, data), args.repeat))
+                    except ImportError as e:
+                        row.update(status="skipped", reason=f"{type(e).__name__}: {e}")
+                    except Exception as e:
+                        row.update(status="error", reason=f"{type(e).__name__}: {e}",
+                                   traceback=traceback.format_exc())
+                    results.append(row)
+                    shown = (f"{row['median_ms']:>10.1f} ms" if row["status"] == "ok"
+                             else f"{row['status']:>13} ({row['reason']})")
+                    print(f"{scale:<6} {name:<24} {shown}", flush=True)
+            finally:
+                app["_flush_pending_writes"]()
+                os.chdir(cwd)
+
+    report = {
+        "meta": {
+            "created":    datetime.now().isoformat(timespec="seconds"),
+            "commit":     _git_commit(),
+            "app_sha256": hashlib.sha256(
+                b"".join(p.read_bytes() for p in APP_FILES)).hexdigest(),
+            "python":     platform.python_version(),
+            "platform":   platform.platform(),
+            "seed":       args.seed,
+            "today":      today.isoformat(),
+            "repeat":     args.repeat,
+        },
+        "datasets": datasets,
+        "results":  results,
+    }
+    code = 2 if any(r["status"] == "error" for r in results) else 0
+    if baseline_path:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        report["regressions"] = compare(results, baseline, args.tolerance, args.floor_ms)
+        for r in report["regressions"]:
+            print(f"RÉGRESSION {r['scale']} {r['case']} : "
+                  f"{r['baseline_ms']:.1f} → {r['median_ms']:.1f} ms (×{r['ratio']})")
+        if report["regressions"] and code == 0:
+            code = 1
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"→ {out_path}")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""Application chargée sans interface (voir benchmarks/appload.py), une fois par
+session de tests ; chaque test repart d'un état de session vide dans un dossier
+temporaire (fichiers locaux de l'application). Le client Supabase factice
+(fixture supabase) remplace get_supabase_client pour les tests de stockage."""
+import copy
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from appload import load_app   # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def _loaded_app():
+    return load_app()
+
+
+@pytest.fixture
+def app(_loaded_app, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    st = _loaded_app["st"]
+    st.cache_resource.clear()
+    st.session_state.clear()
+    st.session_state.update({"_run_id": 1, "prelevements": [], "schedules": [],
+                             "pending_identifications": []})
+    yield _loaded_app
+    _loaded_app["_flush_pending_writes"]()
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    """Requête PostgREST réduite à ce qu'utilise urc.storage."""
+
+    def __init__(self, db, table):
+        self.db, self.table = db, table
+        self.op, self.payload, self.options = "select", None, {}
+        self.filters, self.columns, self.bounds = [], None, None
+
+    def select(self, columns="*"):
+        self.columns = None if columns == "*" else columns.split(",")
+        return self
+
+    def eq(self, key, value):
+        self.filters.append(lambda row: row.get(key) == value)
+        return self
+
+    def in_(self, key, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(key) in values)
+        return self
+
+    def order(self, key, desc=False):
+        return self
+
+    def limit(self, n):
+        self.bounds = (0, n - 1)
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False):
+        self.op, self.payload = "upsert", rows if isinstance(rows, list) else [rows]
+        self.options = {"key": on_conflict or "id", "ignore": ignore_duplicates}
+        return self
+
+    def update(self, values):
+        self.op, self.payload = "update", values
+        return self
+
+    def delete(self):
+        self.op = "delete"
+        return self
+
+    def execute(self):
+        if self.table not in self.db.tables:
+            raise Exception(f'relation "{self.table}" does not exist')
+        rows = self.db.tables[self.table]
+        self.db.before_execute(self)
+        if self.op == "upsert":
+            out = []
+            for row in self.payload:
+                key = row[self.options["key"]]
+                if key in rows and self.options["ignore"]:
+                    continue
+                rows[key] = dict(rows.get(key, {}), **copy.deepcopy(row))
+                out.append(copy.deepcopy(rows[key]))
+            return _Result(out)
+        hits = [k for k, row in rows.items() if all(f(row) for f in self.filters)]
+        if self.op == "update":
+            for k in hits:
+                rows[k].update(copy.deepcopy(self.payload))
+            return _Result([copy.deepcopy(rows[k]) for k in hits])
+        if self.op == "delete":
+            return _Result([rows.pop(k) for k in hits])
+        out = [copy.deepcopy(rows[k]) for k in hits]
+        if self.bounds:
+            out = out[self.bounds[0]:self.bounds[1] + 1]
+        if self.columns:
+            out = [{c: row.get(c) for c in self.columns} for row in out]
+        return _Result(out)
+
+
+class FakeSupabase:
+    """Client Supabase en mémoire : {table: {clé: ligne}}, tables absentes =
+    relation inexistante. before_execute permet d'intercaler une écriture
+    concurrente juste avant une requête."""
+
+    def __init__(self, *tables):
+        self.tables = {name: {} for name in ("app_state",) + tables}
+        self.before_execute = lambda query: None
+
+    def table(self, name):
+        return _Query(self, name)
+
+
+@pytest.fixture
+def supabase(app, monkeypatch):
+    """Client Supabase factice branché sur urc.storage (toutes les tables rec_*)."""
+    client = FakeSupabase(*(f"rec_{c}" for c in app["ROW_COLLECTIONS"]))
+    monkeypatch.setattr(sys.modules["urc.storage"], "get_supabase_client", lambda: client)
+    return client
@@ -0,0 +1,54 @@
+"""Budget d'import : les imports de streamlit_app.py (paquet urc compris) tiennent
+dans IMPORT_BUDGET_MS et ne chargent aucune bibliothèque lourde (PDF, Excel, QR,
+images) ni aucun module d'onglet, mesurés dans un interpréteur neuf."""
+import ast
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# streamlit est déjà chargé quand `streamlit run` exécute le script : hors budget
+PROBE = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+import streamlit
+before = set(sys.modules)
+t0 = time.perf_counter()
+exec(compile(sys.argv[2], "streamlit_app.py", "exec"), {"__name__": "streamlit_app"})
+ms = (time.perf_counter() - t0) * 1000
+from urc.perf import HEAVY_MODULES, IMPORT_BUDGET_MS
+print(json.dumps({"ms": ms, "budget": IMPORT_BUDGET_MS, "heavy": HEAVY_MODULES,
+                  "loaded": sorted(set(sys.modules) - before)}))
+"""
+
+
+def _script_imports():
+    tree = ast.parse((ROOT / "streamlit_app.py").read_text(encoding="utf-8"))
+    return "\n".join(ast.unparse(node) for node in tree.body
+                     if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def _measure():
+    out = subprocess.run([sys.executable, "-c", PROBE, str(ROOT), _script_imports()],
+                         cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_script_imports_fit_the_budget():
+    m = _measure()
+    assert "urc.storage" in m["loaded"] and "urc.tabs" in m["loaded"]
+    assert m["ms"] <= m["budget"], f"imports : {m['ms']:.0f}ms (max {m['budget']}ms)"
+
+
+def test_no_heavy_library_at_startup():
+    m = _measure()
+    heavy = [name for name in m["loaded"] if name.split(".")[0] in m["heavy"]]
+    assert not heavy, "chargés au démarrage : " + ", ".join(heavy)
+
+
+def test_tabs_are_imported_on_first_render():
+    m = _measure()
+    tabs = [name for name in m["loaded"] if name.startswith("urc.tabs.")]
+    assert not tabs, "onglets chargés au démarrage : " + ", ".join(tabs)
@@ -0,0 +1,23 @@
+"""Profil d'un rerun : seuls les appels de la session lui sont comptés."""
+import threading
+
+
+def _in_thread(fn):
+    t = threading.Thread(target=fn)
+    t.start()
+    t.join()
+
+
+def test_background_threads_are_not_charged_to_the_rerun(app):
+    ss = app["st"].session_state
+    app["_prof_begin"]()
+    app["_count_io"]("lecture", "points.json", 100)
+    _in_thread(lambda: app["_count_io"]("écriture", "points.json", 5000))   # thread d'écriture
+    _in_thread(app["_run_bound"](lambda: app["_count_io"]("lecture", "germs.json", 20)))
+    app["_prof_begin"]()
+    assert ss["_prof_last"]["fichiers"] == {
+        "lecture points.json": {"opérations": 1, "octets": 100},
+        "lecture germs.json":  {"opérations": 1, "octets": 20},
+    }
+    app["_prof_begin"]()
+    assert ss["_prof_last"]["fichiers"] == {}
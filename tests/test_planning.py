@@ -0,0 +1,136 @@
+"""Planning : même planning pour les mêmes entrées, quel que soit le chemin de calcul ;
+la re-planification incrémentale garde les occurrences d'un calcul complet."""
+import sys
+from collections import Counter
+from datetime import date, timedelta
+
+import pytest
+from datagen import generate
+from run import install
+
+TODAY = date(2025, 3, 19)
+
+
+@pytest.fixture
+def data(app):
+    data = generate("petit", [g["name"] for g in app["DEFAULT_GERMS"]], today=TODAY)
+    install(app, data)
+    return data
+
+
+def _plan(app, data, prelevements=None, skips=None, today=TODAY, points=None):
+    raw, plan = app["_monthly_plan"](
+        today.year, today.month, app["get_holidays_cached"](today.year),
+        points=data["points"] if points is None else points,
+        prelevements=data["prelevements"] if prelevements is None else prelevements,
+        skips=data["planning_skips"] if skips is None else skips,
+        frozen=data["planning_frozen_weeks"], today=today,
+        capacities=data["class_constraints"])
+    return raw, plan
+
+
+def _forget(app):
+    app["_planning_memo"]()["plans"].clear()
+
+
+def _from_scratch(app, data, prelevements, points=None):
+    """Placement complet (_place_occurrences via _compute_planning) sur les entrées finales."""
+    return app["_compute_planning"](
+        [(TODAY.year, TODAY.month)], app["get_holidays_cached"](TODAY.year), prelevements,
+        data["points"] if points is None else points, data["class_constraints"])
+
+
+def _fresh_month(data):
+    """Mois sans prélèvement, skip ni semaine gelée : seuls ceux du test comptent."""
+    month = TODAY.isoformat()[:7]
+    data["prelevements"] = [p for p in data["prelevements"] if p["date"][:7] != month]
+    data["planning_skips"], data["planning_frozen_weeks"] = {}, {}
+
+
+def _coverage(plan, prelevements):
+    """Passages du mois par point : prélèvements réalisés et occurrences planifiées,
+    une occurrence planifiée le jour d'un prélèvement de ce point comptant pour lui."""
+    done = Counter((p["label"], p["date"][:10]) for p in prelevements
+                   if p["date"][:7] == TODAY.isoformat()[:7] and not p.get("archived"))
+    for d, ts in plan.items():
+        done |= Counter((t["label"], d.isoformat()) for t in ts)
+    out = Counter()
+    for (lbl, _), n in done.items():
+        out[lbl] += n
+    return out
+
+
+def _day_inputs(data, plan):
+    """Prélèvement d'un point non planifié aujourd'hui, et report d'un point planifié."""
+    planned = {t["label"] for t in plan[TODAY]}
+    weekly = [p for p in data["points"] if p["frequency_unit"] == "/ semaine"]
+    done = next(p for p in weekly if p["label"] not in planned)
+    skipped = next(t["label"] for t in plan[TODAY] if "/ jour" not in t["_freq_unit"])
+    prelevements = data["prelevements"] + [{"id": "s_new", "label": done["label"],
+                                            "date": TODAY.isoformat()}]
+    skips = dict(data["planning_skips"])
+    skips[TODAY.isoformat()] = [skipped]
+    return prelevements, skips
+
+
+def test_incremental_keeps_full_compute_occurrences(app, data):
+    _fresh_month(data)
+    _, before = _plan(app, data)
+    prelevements, skips = _day_inputs(data, before)
+
+    _, incremental = _plan(app, data, prelevements, skips)   # ancrage repris de la mémoire
+    full = _from_scratch(app, data, prelevements)
+    assert incremental != before
+    assert _coverage(incremental, prelevements) == _coverage(full, prelevements)
+    assert all(incremental[d] == before[d] for d in before if d < TODAY)
+
+
+def test_point_edit_replans_only_that_point(app, data, monkeypatch):
+    _fresh_month(data)
+    weekly = next(p for p in data["points"]
+                  if p["frequency_unit"] == "/ semaine" and p["frequency"] == 1)
+    data["prelevements"].append({"id": "s_past", "label": weekly["label"],
+                                 "date": (TODAY - timedelta(days=1)).isoformat()})
+    _, before = _plan(app, data)
+    points = [dict(p, frequency=2) if p is weekly else p for p in data["points"]]
+    monkeypatch.setattr(sys.modules["urc.planning"], "_compute_planning",
+                        lambda *a, **k: pytest.fail("point modifié : calcul complet"))
+    _, after = _plan(app, data, points=points)   # ancrage des autres entrées repris
+    monkeypatch.undo()
+
+    prelevements = data["prelevements"]
+    full = _from_scratch(app, data, prelevements, points)
+    assert _coverage(after, prelevements) == _coverage(full, prelevements)
+    assert (_coverage(after, prelevements)[weekly["label"]]
+            > _coverage(before, prelevements)[weekly["label"]])
+    for d in before:
+        assert ([t for t in after[d] if t["label"] != weekly["label"]]
+                == [t for t in before[d] if t["label"] != weekly["label"]])
+    assert all(after[d] == before[d] for d in before if d <= TODAY)
+
+
+def test_plan_does_not_depend_on_history(app, data):
+    _, before = _plan(app, data)
+    prelevements, skips = _day_inputs(data, before)
+    other = dict(data["planning_skips"])
+    other[(TODAY + timedelta(days=1)).isoformat()] = [t["label"] for t in before[TODAY]]
+
+    _plan(app, data, skips=other)                  # un autre planning servi entre-temps
+    after_other = _plan(app, data, prelevements, skips)
+    _forget(app)
+    assert after_other == _plan(app, data, prelevements, skips)
+
+
+def test_new_day_is_recomputed(app, data):
+    _plan(app, data)
+    tomorrow = TODAY + timedelta(days=1)
+    carried = _plan(app, data, today=tomorrow)
+    _forget(app)
+    assert carried == _plan(app, data, today=tomorrow)
+
+
+def test_feasible_capacities_are_never_exceeded(app, data):
+    # Capacités serrées, mais que les jours ouverts du mois peuvent tenir
+    caps = data["class_constraints"] = {"A": 1, "B": 2, "C": 2, "D": 3}
+    _, plan = _plan(app, data)
+    assert [o for o in app["_capacity_overflows"](plan, caps) if o[0] > TODAY] == []
@@ -0,0 +1,41 @@
+"""Échéances des lectures J2/J7."""
+from datetime import date
+
+
+def _sample(app, sample_date):
+    ss = app["st"].session_state
+    ss.prelevements = [{"id": "s1", "label": "Point 1", "date": sample_date}]
+    ss.schedules = [
+        {"id": f"sch_s1_{w}", "sample_id": "s1", "label": "Point 1", "when": w,
+         "status": "pending",
+         "due_date": app["_reading_due_date"](sample_date, w)}
+        for w in ("J2", "J7")
+    ]
+    return ss
+
+
+def test_editing_sample_date_recomputes_due_dates(app):
+    ss = _sample(app, "2025-03-10")
+    smp = ss.prelevements[0]
+    smp["date"] = "2025-03-14"   # vendredi : J2 tombe un dimanche, reporté au lundi
+    assert app["_reschedule_sample"](smp, "Point 1 bis")
+    by_when = {s["when"]: s for s in ss.schedules}
+    assert by_when["J2"]["due_date"] == "2025-03-17"
+    assert by_when["J7"]["due_date"] == "2025-03-21"
+    assert {s["label"] for s in ss.schedules} == {"Point 1 bis"}
+    assert not app["_reschedule_sample"](smp, "Point 1 bis")
+
+
+def test_badges_fill_missing_due_dates(app):
+    ss = _sample(app, "2025-03-10")
+    for s in ss.schedules:
+        del s["due_date"]
+    ss.schedules.append({"id": "orphan", "sample_id": "s1", "when": "J2",
+                         "status": "pending", "due_date": ""})
+    ss.prelevements.append({"id": "s2", "date": ""})
+    ss.schedules.append({"id": "nodate", "sample_id": "s2", "when": "J7", "status": "pending"})
+    counts = app["_reading_badges"](date(2025, 3, 13))
+    assert counts == (2, 0, 0, 1, 0)
+    assert ss.schedules[0]["due_date"] == "2025-03-12"
+    assert ss.schedules[1]["due_date"] == "2025-03-17"
+    assert "due_date" not in ss.schedules[3]
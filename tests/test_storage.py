@@ -0,0 +1,265 @@
+"""Stockage : lecture des collections (Supabase fait foi dès qu'il répond) et index
+de la session."""
+import json
+import sys
+import time
+
+import pytest
+
+STALE = [{"id": "p_old", "germe": "Aspergillus", "status": "pending"}]
+
+
+def _stale_local_copy(tmp_path):
+    (tmp_path / "pending_identifications.json").write_text(json.dumps(STALE), encoding="utf-8")
+
+
+def test_empty_table_is_an_empty_collection(app, supabase, tmp_path):
+    _stale_local_copy(tmp_path)
+    supabase.tables["app_state"]["pending_identifications"] = {
+        "key": "pending_identifications",
+        "value": json.dumps({"migrated_to": "rec_pending_identifications"})}
+    assert app["load_pending_identifications"]() == []
+
+
+def test_unreachable_supabase_falls_back_to_local_files(app, tmp_path):
+    _stale_local_copy(tmp_path)
+    assert app["load_pending_identifications"]() == STALE
+
+
+class _NoScan(list):
+    """Liste que l'index ne doit jamais comparer élément par élément."""
+
+    def __eq__(self, other):
+        raise AssertionError("index : comparaison de toute la liste")
+
+    __ne__ = __eq__
+
+
+def _schedules(n):
+    return [{"id": f"sch{i}", "sample_id": f"s{i // 2}"} for i in range(n)]
+
+
+def test_index_lookups_do_not_scan_the_list(app):
+    ss = app["st"].session_state
+    ss.schedules = _NoScan(_schedules(10))
+    repo = app["_repo"]()
+    assert repo.schedule("sch3")["sample_id"] == "s1"
+    ss.schedules.append({"id": "sch10", "sample_id": "s1"})
+    assert [s["id"] for s in repo.schedules_for("s1")] == ["sch2", "sch3", "sch10"]
+    assert repo.schedule("sch10") is ss.schedules[-1]
+
+
+def test_index_follows_saved_replacements(app):
+    ss = app["st"].session_state
+    ss.schedules = _schedules(10)
+    repo = app["_repo"]()
+    assert [s["id"] for s in repo.schedules_for("s4")] == ["sch8", "sch9"]
+    ss.schedules[2] = {"id": "sch2", "sample_id": "s4"}   # même longueur, remplacé sur place
+    app["save_schedules"](ss.schedules)
+    assert [s["id"] for s in repo.schedules_for("s4")] == ["sch2", "sch8", "sch9"]
+    assert [s["id"] for s in repo.schedules_for("s1")] == ["sch3"]
+
+
+# ── Journal de l'historique ──────────────────────────────────────────────────
+
+def _journal(app, tmp_path):
+    return app["_SurvJournal"](str(tmp_path / "snapshot.json"), str(tmp_path / "journal.jsonl"))
+
+
+def _journal_ops(tmp_path):
+    lines = (tmp_path / "journal.jsonl").read_text(encoding="utf-8").splitlines()
+    return [json.loads(line)["op"] for line in lines]
+
+
+def _history(app, tmp_path):
+    """Historique passé par put, patch (champ modifié et champ retiré) et del."""
+    journal = _journal(app, tmp_path)
+    a = {"id": "a", "date": "2026-09-01", "germe": "Bacillus", "ufc": 3}
+    b = {"id": "b", "date": "2026-09-02", "germe": "Aspergillus"}
+    journal.save([a, b])
+    journal.save([{"id": "a", "date": "2026-09-01", "germe": "Micrococcus"}])
+    journal.save([{"id": "a", "date": "2026-09-01", "germe": "Micrococcus"},
+                  {"id": "c", "date": "2026-10-01", "germe": "Penicillium"}])
+    assert _journal_ops(tmp_path) == ["put", "put", "patch", "del", "put"]
+    return journal, journal.load()
+
+
+def test_journal_replays_put_patch_and_del(app, tmp_path):
+    _, expected = _history(app, tmp_path)
+    assert _journal(app, tmp_path).load() == expected
+    assert {r["id"]: r for r in expected}["a"] == {
+        "id": "a", "date": "2026-09-01", "germe": "Micrococcus"}
+
+
+def test_journal_survives_a_crash_after_the_snapshot(app, tmp_path):
+    journal, expected = _history(app, tmp_path)
+    journal._write_snapshot()        # arrêt avant la remise à zéro du journal
+    assert _journal_ops(tmp_path)
+    reopened = _journal(app, tmp_path)
+    assert reopened.load() == expected
+    assert reopened.ops == 5
+
+
+def test_journal_survives_a_crash_during_the_snapshot(app, tmp_path, monkeypatch):
+    journal, expected = _history(app, tmp_path)
+
+    def crash(src, dst):
+        raise OSError("arrêt brutal")
+
+    monkeypatch.setattr(sys.modules["urc.storage"].os, "replace", crash)
+    with pytest.raises(OSError):
+        journal._compact()
+    monkeypatch.undo()
+    assert (tmp_path / "snapshot.json.tmp").exists()
+    assert _journal(app, tmp_path).load() == expected
+
+
+def test_journal_ignores_a_torn_last_line(app, tmp_path):
+    _, expected = _history(app, tmp_path)
+    with open(tmp_path / "journal.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"op": "del", "id": "a"')
+    assert _journal(app, tmp_path).load() == expected
+
+
+# ── Fusion à trois voies ─────────────────────────────────────────────────────
+
+def test_merge_keeps_each_side_and_local_wins_conflicts(app):
+    base   = {"id": "s1", "germe": "Bacillus", "ufc": 3, "note": "x", "lieu": "A"}
+    local  = {"id": "s1", "germe": "Micrococcus", "ufc": 5, "note": "x", "lieu": "A"}
+    remote = {"id": "s1", "germe": "Bacillus", "ufc": 4, "lieu": "B", "op": "M"}
+    assert app["_merge_record"](base, local, remote) == {
+        "id": "s1", "germe": "Micrococcus", "ufc": 5, "lieu": "B", "op": "M"}
+
+
+def test_merge_prefers_an_edit_to_a_removal(app):
+    base   = {"id": "s1", "note": "x", "ufc": 3}
+    local  = {"id": "s1", "note": "y"}
+    remote = {"id": "s1", "ufc": 3}
+    assert app["_merge_record"](base, local, remote) == {"id": "s1", "note": "y"}
+
+
+def test_rebase_replays_local_changes_on_the_latest_list(app):
+    base = [{"id": "both", "ufc": 1, "lieu": "A"}, {"id": "gone_here", "ufc": 1},
+            {"id": "gone_there", "ufc": 1}, {"id": "edit_vs_del", "ufc": 1},
+            {"id": "del_vs_edit", "ufc": 1}]
+    local = [{"id": "both", "ufc": 2, "lieu": "A"}, {"id": "gone_there", "ufc": 1},
+             {"id": "edit_vs_del", "ufc": 9}, {"id": "new_here"}]
+    latest = [{"id": "both", "ufc": 1, "lieu": "B"}, {"id": "gone_here", "ufc": 1},
+              {"id": "del_vs_edit", "ufc": 7}, {"id": "new_there"}]
+    out, merges = app["_rebase_records"]("surveillance", base, local, latest)
+    assert merges == 1
+    assert {r["id"]: r for r in out} == {
+        "both": {"id": "both", "ufc": 2, "lieu": "B"},
+        "del_vs_edit": {"id": "del_vs_edit", "ufc": 7},
+        "new_there": {"id": "new_there"},
+        "edit_vs_del": {"id": "edit_vs_del", "ufc": 9},
+        "new_here": {"id": "new_here"},
+    }
+
+
+# ── Boîte d'envoi Supabase ───────────────────────────────────────────────────
+
+def _wait(cond, timeout=5.0):
+    deadline = time.time() + timeout
+    while not cond():
+        assert time.time() < deadline, "délai dépassé"
+        time.sleep(0.01)
+
+
+def _sender(monkeypatch, ok):
+    """Remplace l'envoi des blobs ; retourne la liste des valeurs envoyées."""
+    sent = []
+
+    def send(key, value):
+        sent.append(value)
+        return ok
+
+    storage = sys.modules["urc.storage"]
+    monkeypatch.setattr(storage, "_supa_upsert_now", send)
+    monkeypatch.setattr(storage, "OUTBOX_BACKOFF_BASE", 0.0)
+    return sent
+
+
+def _outbox(app, tmp_path):
+    return app["_Outbox"](str(tmp_path / "outbox.jsonl"), str(tmp_path / "outbox_dead.jsonl"))
+
+
+def test_outbox_skips_a_torn_last_line(app, tmp_path, monkeypatch):
+    lines = [{"kind": "blob", "key": "k", "value": "v1", "seq": 1},
+             {"kind": "blob", "key": "k", "value": "v2", "seq": 2},
+             {"done": 1},
+             {"kind": "blob", "key": "k", "value": "v3", "seq": 3}]
+    text = "".join(json.dumps(e) + "\n" for e in lines)
+    (tmp_path / "outbox.jsonl").write_text(text + '{"kind": "blob", "key": "k", "val',
+                                           encoding="utf-8")
+    sent = _sender(monkeypatch, True)
+    box = _outbox(app, tmp_path)
+    assert box.flush(timeout=5)
+    assert sent == ["v2", "v3"]
+    assert not (tmp_path / "outbox.jsonl").exists()
+
+
+def test_outbox_buries_an_op_after_the_last_attempt(app, tmp_path, monkeypatch):
+    sent = _sender(monkeypatch, False)
+    box = _outbox(app, tmp_path)
+    box.add_blob("k", "v")
+    _wait(lambda: box.dead == 1)
+    assert len(sent) == app["OUTBOX_MAX_ATTEMPTS"]
+    assert box.pending() == 0
+    dead = [json.loads(line) for line in
+            (tmp_path / "outbox_dead.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [(e["key"], e["value"], e["attempts"]) for e in dead] == [
+        ("k", "v", app["OUTBOX_MAX_ATTEMPTS"])]
+    assert _outbox(app, tmp_path).pending() == 0   # plus repris au redémarrage
+
+
+def test_outbox_requeues_a_dead_op_exactly_once(app, tmp_path, monkeypatch):
+    _sender(monkeypatch, False)
+    box = _outbox(app, tmp_path)
+    box.add_blob("k", "v")
+    _wait(lambda: box.dead == 1)
+    sent = _sender(monkeypatch, True)
+    assert box.retry_dead() == 1
+    assert box.retry_dead() == 0
+    assert box.flush(timeout=5)
+    assert sent == ["v"] and box.dead == 0
+    assert not (tmp_path / "outbox_dead.jsonl").exists()
+    reopened = _outbox(app, tmp_path)
+    assert reopened.pending() == 0 and reopened.dead == 0
+    assert reopened.flush(timeout=1) and sent == ["v"]
+
+
+# ── Concurrence optimiste (Supabase) ─────────────────────────────────────────
+
+def _concurrent_edit(supabase, rid, data):
+    """Une autre session modifie la ligne juste avant la première écriture."""
+    table = supabase.tables["rec_surveillance"]
+
+    def edit(query):
+        if query.op in ("update", "delete") and table[rid]["version"] == 1:
+            table[rid].update(data=data, version=2)
+
+    supabase.before_execute = edit
+
+
+def test_stale_version_is_merged_and_retried(app, supabase):
+    base = {"id": "s1", "germe": "Bacillus", "ufc": 3, "lieu": "A"}
+    supabase.tables["rec_surveillance"]["s1"] = {"id": "s1", "data": dict(base), "version": 1}
+    _concurrent_edit(supabase, "s1", dict(base, ufc=4, lieu="B"))
+    local = dict(base, germe="Micrococcus", ufc=5)
+    versions, merged = app["_supa_rows_apply"](
+        "surveillance", [{"id": "s1", "data": local}], [], {}, {"s1": (None, None, 1, base)})
+    expected = {"id": "s1", "germe": "Micrococcus", "ufc": 5, "lieu": "B"}
+    assert versions == {"s1": 3} and merged == {"s1": expected}
+    row = supabase.tables["rec_surveillance"]["s1"]
+    assert (row["data"], row["version"]) == (expected, 3)
+
+
+def test_stale_delete_gives_way_to_the_remote_edit(app, supabase):
+    base = {"id": "s1", "germe": "Bacillus"}
+    supabase.tables["rec_surveillance"]["s1"] = {"id": "s1", "data": dict(base), "version": 1}
+    _concurrent_edit(supabase, "s1", dict(base, germe="Micrococcus"))
+    versions, merged = app["_supa_rows_apply"](
+        "surveillance", [], ["s1"], {}, {"s1": (None, None, 1, base)})
+    assert versions == {"s1": 2} and merged == {"s1": dict(base, germe="Micrococcus")}
+    assert supabase.tables["rec_surveillance"]["s1"]["version"] == 2
@@ -0,0 +1,6 @@
+"""Couches de l'application (streamlit_app.py) : mesures, constantes, stockage,
+domaine (jours ouvrés, lectures, planification, analyse), documents PDF/Excel et,
+dans urc.tabs, le rendu de chaque onglet.
+
+Les bibliothèques lourdes (reportlab, openpyxl, qrcode, PIL) n'y sont importées
+qu'à l'intérieur des fonctions qui s'en servent."""
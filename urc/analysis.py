@@ -0,0 +1,246 @@
+"""Agrégations de l'historique (onglet Analyse) et calcul des scores."""
+from datetime import datetime
+
+import streamlit as st
+
+from urc.storage import (
+    _repo, save_archived_samples, save_prelevements, save_schedules, save_surveillance,
+)
+
+# ── AGRÉGATIONS DE L'HISTORIQUE ───────────────────────────────────────────────
+# Statistiques de l'onglet Analyse, calculées sur une liste d'entrées déjà filtrée.
+def _records_in_period(records, debut, fin):
+    """Entrées de l'historique datées entre debut et fin (bornes incluses)."""
+    out = []
+    for r in records:
+        try:
+            d = datetime.strptime(r.get("date_prelevement", r.get("date", "")), "%Y-%m-%d").date()
+        except Exception:
+            continue
+        if debut <= d <= fin:
+            out.append(r)
+    return out
+
+def _stats_par_point(records):
+    """Compteurs positifs/négatifs, germes et UFC par point de prélèvement."""
+    from collections import defaultdict
+
+    pts_stats = defaultdict(lambda: {
+        "total":0,"positives":0,"negatives":0,
+        "alertes":0,"actions":0,
+        "germes":defaultdict(int),
+        "ufc_j2_list":[],"ufc_j7_list":[],
+    })
+    for r in records:
+        pt     = r.get("prelevement","—")
+        germ   = r.get("germ_saisi","") or r.get("germ_match","") or ""
+        st_r   = r.get("status","ok")
+        ufc_j2 = int(r.get("ufc_48h", r.get("ufc",0)) or 0)
+        ufc_j7 = int(r.get("ufc_5j",  r.get("ufc",0)) or 0)
+
+        j2_pos = ufc_j2 > 0 and germ not in ("Négatif","—","")
+        j7_pos = ufc_j7 > 0 and germ not in ("Négatif","—","")
+
+        if j2_pos:
+            pts_stats[pt]["total"]     += 1
+            pts_stats[pt]["positives"] += 1
+            pts_stats[pt]["germes"][germ] += 1
+            if st_r == "alert":    pts_stats[pt]["alertes"] += 1
+            elif st_r == "action": pts_stats[pt]["actions"] += 1
+            pts_stats[pt]["ufc_j2_list"].append(ufc_j2)
+            if ufc_j7 > 0:
+                pts_stats[pt]["ufc_j7_list"].append(ufc_j7)
+
+        elif not j2_pos and not j7_pos:
+            pts_stats[pt]["total"]     += 1
+            pts_stats[pt]["negatives"] += 1
+            if st_r == "alert":    pts_stats[pt]["alertes"] += 1
+            elif st_r == "action": pts_stats[pt]["actions"] += 1
+
+        else:
+            pts_stats[pt]["total"]     += 1
+            pts_stats[pt]["negatives"] += 1
+            pts_stats[pt]["total"]     += 1
+            pts_stats[pt]["positives"] += 1
+            pts_stats[pt]["germes"][germ] += 1
+            if st_r == "alert":    pts_stats[pt]["alertes"] += 1
+            elif st_r == "action": pts_stats[pt]["actions"] += 1
+            pts_stats[pt]["ufc_j7_list"].append(ufc_j7)
+    return pts_stats
+
+def _stats_par_germe(records, criticite):
+    """Occurrences, UFC cumulées et points touchés par germe positif.
+    Renvoie (stats, nombre de positifs) ; criticite(nom) donne la criticité du germe."""
+    from collections import defaultdict
+
+    germs_stats=defaultdict(lambda:{"count":0,"ufc_sum":0,"points":set(),"criticite":0})
+    total_pos=0
+    for r in records:
+        _gd_list = r.get("germs_detail", [])
+
+        if _gd_list:
+            # ── Multi-germes : chaque germe compté individuellement ──
+            for gde in _gd_list:
+                germ    = gde.get("name","")
+                ufc_val = int(gde.get("ufc",0) or 0)
+                if ufc_val > 0 and germ not in ("Négatif","—",""):
+                    total_pos += 1
+                    germs_stats[germ]["count"]   += 1
+                    germs_stats[germ]["ufc_sum"] += ufc_val
+                    germs_stats[germ]["points"].add(r.get("prelevement","—"))
+                    if germs_stats[germ]["criticite"] == 0:
+                        germs_stats[germ]["criticite"] = criticite(germ)
+        else:
+            # ── Mono-germe : logique d'origine ───────────────────────
+            germ   = r.get("germ_saisi","") or r.get("germ_match","") or ""
+            ufc_j2 = int(r.get("ufc_48h", r.get("ufc",0)) or 0)
+            ufc_j7 = int(r.get("ufc_5j",  r.get("ufc",0)) or 0)
+            j2_pos = ufc_j2 > 0 and germ not in ("Négatif","—","")
+            j7_pos = ufc_j7 > 0 and germ not in ("Négatif","—","")
+            if j2_pos:
+                total_pos += 1
+                germs_stats[germ]["count"]   += 1
+                germs_stats[germ]["ufc_sum"] += ufc_j2
+                germs_stats[germ]["points"].add(r.get("prelevement","—"))
+                if germs_stats[germ]["criticite"] == 0:
+                    germs_stats[germ]["criticite"] = criticite(germ)
+            elif not j2_pos and j7_pos:
+                total_pos += 1
+                germs_stats[germ]["count"]   += 1
+                germs_stats[germ]["ufc_sum"] += ufc_j7
+                germs_stats[germ]["points"].add(r.get("prelevement","—"))
+                if germs_stats[germ]["criticite"] == 0:
+                    germs_stats[germ]["criticite"] = criticite(germ)
+    return germs_stats, total_pos
+
+def _stats_par_preleveur(records):
+    """Répartition des résultats par préleveur."""
+    from collections import defaultdict
+
+    prev_stats=defaultdict(lambda:{
+        "total":0,"positives":0,"negatives":0,
+        "alertes":0,"actions":0,"germes":defaultdict(int)
+    })
+    for r in records:
+        op     = (r.get("operateur","") or "Non renseigné").strip() or "Non renseigné"
+        germ = (r.get("germ_saisi","") or "").strip()
+        if not germ or germ in ("—", "Négatif"):
+            germ = (r.get("germ_match","") or "").strip()
+        st_r   = r.get("status","ok")
+        ufc_j2 = int(r.get("ufc_48h", r.get("ufc",0)) or 0)
+        ufc_j7 = int(r.get("ufc_5j",  r.get("ufc",0)) or 0)
+
+        is_positive = (
+            (ufc_j2 > 0 or ufc_j7 > 0)
+            and germ not in ("Négatif","—","")
+        )
+
+        prev_stats[op]["total"] += 1
+        if is_positive:
+            prev_stats[op]["positives"]    += 1
+            prev_stats[op]["germes"][germ] += 1
+        else:
+            prev_stats[op]["negatives"]    += 1
+
+        if st_r == "alert":    prev_stats[op]["alertes"] += 1
+        elif st_r == "action": prev_stats[op]["actions"] += 1
+    return prev_stats
+
+# ── Helpers scoring ────────────────────────────────────────────────────────────
+def _get_location_criticality(sample):
+    if "location_criticality" in sample:
+        try:
+            return int(sample["location_criticality"])
+        except Exception:
+            pass
+    pt = _repo().point(sample.get("label"))
+    if pt and "location_criticality" in pt:
+        try:
+            return int(pt["location_criticality"])
+        except Exception:
+            pass
+    rc = str(sample.get("room_class", "")).strip().upper()
+    return {"A": 3, "B": 2, "C": 2, "D": 1}.get(rc, 1)
+
+def _get_germ_score(germ):
+    if all(k in germ for k in ("pathogenicity", "resistance", "dissemination")):
+        return int(germ["pathogenicity"]) * int(germ["resistance"]) * int(germ["dissemination"])
+    old = germ.get("risk", 1)
+    return {1: 1, 2: 2, 3: 6, 4: 12, 5: 18}.get(old, old)
+
+def compute_germ_score(g):
+    gobj = _repo().germ(g["germ"])
+    if gobj:
+        return (int(gobj.get('pathogenicity', 1))
+                * int(gobj.get('resistance', 1))
+                * int(gobj.get('dissemination', 1)))
+    return 1
+
+def _evaluate_score(total):
+    _sa = st.session_state.get("_seuil_alerte", 24)
+    _sc = st.session_state.get("_seuil_action", 36)
+    if total > _sc:  return "action", "🚨 ACTION",  "#ef4444"
+    if total >= _sa: return "alert",  "⚠️ ALERTE",  "#f59e0b"
+    return "ok", "✅ Conforme", "#22c55e"
+
+def _loc_crit_label(n):
+    return {1: "Limité", 2: "Modéré", 3: "Important", 4: "Critique"}.get(n, str(n))
+
+# ── HELPER : valider une lecture comme NÉGATIVE ────────────────────────────────
+def _valider_negatif(proc_id):
+    proc = _repo().schedule(proc_id)
+    if not proc:
+        return
+    smp = _repo().prelevement(proc['sample_id'])
+
+    proc["status"]    = "done"
+    proc["colonies"]  = 0
+    proc["date_read"] = str(datetime.today().date())
+
+    if proc["when"] == "J2":
+        pass
+
+    elif proc["when"] == "J7" and smp and not smp.get("archived"):
+        # ── Calcul criticité inline (évite dépendance à _get_location_criticality) ──
+        _lc = 1
+        _label_smp = smp.get("label", "")
+        if _label_smp:
+            _pt_fr = next(
+                (p for p in st.session_state.points if p.get("label") == _label_smp), None
+            )
+            if _pt_fr:
+                try:
+                    _lc = int(_pt_fr.get("location_criticality", 1))
+                except (ValueError, TypeError):
+                    _lc = 1
+        if _lc == 1:
+            try:
+                _lc = int(smp.get("location_criticality", 1) or 1)
+            except (ValueError, TypeError):
+                _lc = 1
+
+        smp["archived"] = True
+        st.session_state.archived_samples.append(smp)
+        save_archived_samples(st.session_state.archived_samples)
+        save_prelevements(st.session_state.prelevements)
+
+        st.session_state.surveillance.append({
+            "date":                 str(datetime.today().date()),
+            "prelevement":          smp.get("label", "?"),
+            "sample_id":            proc["sample_id"],
+            "germ_match":           "Négatif",
+            "germ_saisi":           "Négatif",
+            "ufc":                  0,
+            "ufc_total":            0,
+            "germ_score":           0,
+            "location_criticality": _lc,
+            "total_score":          0,
+            "status":               "ok",
+            "operateur":            smp.get("operateur", "?"),
+            "remarque":             "",
+            "readings":             "J7",
+            "room_class":           smp.get("room_class", ""),
+        })
+        save_surveillance(st.session_state.surveillance)
+
+    save_schedules(st.session_state.schedules)
@@ -0,0 +1,284 @@
+"""Constantes de l'application : fichiers locaux, seuils et mesures par défaut,
+FAQ et référentiel des germes livrés avec l'application."""
+import os
+
+# ── CONSTANTES ─────────────────────────────────────────────────────────────────
+RISK_COLORS = {1:"#22c55e",2:"#84cc16",3:"#f59e0b",4:"#f97316",5:"#ef4444"}
+RISK_LABELS = {1:"Limité",2:"Modéré",3:"Important",4:"Majeur",5:"Critique"}
+CSV_FILE          = "surveillance_data.csv"
+GERMS_FILE        = "germs_data.json"
+THRESHOLDS_FILE   = "thresholds_config.json"
+MEASURES_FILE     = "measures_config.json"
+POINTS_FILE       = "points.json"
+PRELEVEMENTS_FILE = "prelevements.json"
+SCHEDULES_FILE    = "schedules.json"
+PENDING_FILE      = "pending_identifications.json"
+ARCHIVED_FILE     = "archived_samples.json"
+OPERATORS_FILE    = "operators.json"
+PLANS_FILE        = "plans_data.json"
+SQLITE_FILE       = "urc_data.sqlite3"
+SURV_SNAPSHOT_FILE = "surveillance_snapshot.json"
+SURV_JOURNAL_FILE  = "surveillance_journal.jsonl"
+MIGRATIONS_FILE    = "migrations.json"
+
+# Tailles de page proposées pour les listes longues (lectures, prélèvements en cours)
+LIST_PAGE_SIZES = [10, 25, 50, 100]
+
+# Stockage local : "fichiers" (JSON/CSV historiques) ou "sqlite" (base unique, WAL)
+STORAGE_BACKEND = os.environ.get("URC_STORAGE", "fichiers").strip().lower()
+
+DEFAULT_THRESHOLDS = {
+    5: {"alert": 1,  "action": 1},
+    4: {"alert": 10, "action": 25},
+    3: {"alert": 25, "action": 40},
+    2: {"alert": 25, "action": 40},
+    1: {"alert": 40, "action": 50},
+}
+
+DEFAULT_MEASURES = {
+    5: {
+        "alert": "• Informer immédiatement le responsable qualité\n• Vérifier et renforcer le bionettoyage de la zone\n• Contrôler l'intégrité des filtres HEPA\n• Augmenter la fréquence de surveillance\n• Documenter l'événement dans le registre qualité",
+        "action": "• ARRÊT IMMÉDIAT des activités si possible\n• Alerter le pharmacien responsable et la direction\n• Isoler la zone contaminée\n• Décontamination renforcée avec désinfectant adapté\n• Recherche de la source de contamination\n• Bilan mycologique complet\n• Ne pas reprendre l'activité avant résultat conforme\n• Déclaration d'événement indésirable"
+    },
+    4: {
+        "alert": "• Informer le responsable qualité\n• Renforcer le bionettoyage de la zone concernée\n• Vérifier les procédures d'habillage et d'hygiène\n• Contrôler les flux d'air et la pression différentielle\n• Programmer un prélèvement de contrôle sous 48h",
+        "action": "• Alerter le pharmacien responsable\n• Suspendre les préparations critiques si nécessaire\n• Nettoyage et désinfection renforcés de la zone\n• Vérification complète de l'installation\n• Enquête sur l'origine de la contamination\n• Prélèvements de contrôle avant reprise\n• Enregistrement et analyse des causes"
+    },
+    3: {
+        "alert": "• Informer le responsable d'équipe\n• Renforcer les mesures d'hygiène du personnel\n• Vérifier le respect des procédures de bionettoyage\n• Programmer un prélèvement de contrôle\n• Surveiller l'évolution",
+        "action": "• Informer le responsable qualité\n• Nettoyage et désinfection de la zone\n• Vérification des procédures en vigueur\n• Renforcer la formation du personnel si nécessaire\n• Prélèvements de contrôle sous 72h\n• Documentation et analyse de tendance"
+    },
+    2: {
+        "alert": "• Surveiller l'évolution des résultats\n• Vérifier le respect des procédures de bionettoyage\n• Contrôler l'hygiène du personnel\n• Programmer un prélèvement de contrôle",
+        "action": "• Informer le responsable d'équipe\n• Renforcer le bionettoyage de la zone\n• Vérifier les procédures d'habillage\n• Prélèvements de contrôle sous 5 jours\n• Analyse de tendance sur les derniers résultats"
+    },
+    1: {
+        "alert": "• Surveiller l'évolution\n• Vérifier les procédures de nettoyage\n• Prélèvement de contrôle à planifier",
+        "action": "• Renforcer le bionettoyage\n• Vérifier l'hygiène du personnel\n• Prélèvement de contrôle sous 1 semaine\n• Documentation dans le registre de surveillance"
+    },
+}
+
+ALL_ORIGINS = [
+    "Air","Humidité","Flore fécale","Oropharynx / Gouttelettes",
+    "Peau / Muqueuse","Sol / Carton / Surface sèche",
+]
+
+# ── DONNÉES FAQ ────────────────────────────────────────────────────────────────
+FAQ_CATEGORIES = [
+    "Général", "Score & Seuils", "Prélèvements",
+    "Paramètres", "Données", "Mesures correctives",
+]
+
+DEFAULT_FAQ = [
+    {
+        "id": "faq_001", "category": "Général", "order": 0,
+        "question": "À quoi sert cette application ?",
+        "answer": (
+            "Cette application permet de **suivre la surveillance microbiologique** "
+            "de votre environnement pharmaceutique. Elle gère les prélèvements d'air "
+            "et de surface, l'identification des germes, le calcul automatique des scores "
+            "de criticité et le déclenchement des alertes et actions correctives."
+        ),
+    },
+    {
+        "id": "faq_002", "category": "Score & Seuils", "order": 1,
+        "question": "Comment est calculé le score de criticité ?",
+        "answer": (
+            "Le score total est calculé selon la formule :\n\n"
+            "**Score = Criticité lieu (1–4) × Pathogénicité (1–3) × Résistance (1–3) × Dissémination (1–3)**\n\n"
+            "- Score **< seuil alerte** → ✅ Conforme\n"
+            "- Score entre les deux seuils → ⚠️ Alerte\n"
+            "- Score **> seuil action** → 🚨 Action immédiate\n\n"
+            "Les seuils sont configurables dans **Paramètres → Seuils d'alerte**."
+        ),
+    },
+    {
+        "id": "faq_003", "category": "Score & Seuils", "order": 2,
+        "question": "Que signifie la criticité du lieu (1–3) ?",
+        "answer": (
+            "La criticité du lieu qualifie l'importance environnementale du point de prélèvement :\n\n"
+            "- **Niveau 1** 🟢 — Limité\n"
+            "- **Niveau 2** 🔵 — Modéré\n"
+            "- **Niveau 3** 🟠 — Important\n"
+            "- **Niveau 4** 🔴 — Critique\n"
+            "Ce niveau est défini dans **Paramètres → Points de prélèvement** et est "
+            "automatiquement repris lors de l'identification microbiologique."
+        ),
+    },
+    {
+        "id": "faq_004", "category": "Prélèvements", "order": 3,
+        "question": "Comment ajouter un nouveau prélèvement ?",
+        "answer": (
+            "Rendez-vous dans **Surveillance → Nouveau prélèvement**, puis :\n\n"
+            "1. Sélectionnez le point de prélèvement dans le menu déroulant\n"
+            "2. Choisissez l'opérateur et la date\n"
+            "4. Validez le formulaire\n\n"
+            "Le prélèvement apparaîtra dans la liste en attente d'identification microbiologique."
+        ),
+    },
+    {
+        "id": "faq_005", "category": "Prélèvements", "order": 4,
+        "question": "Qu'est-ce qu'une identification microbiologique ?",
+        "answer": (
+            "Après la lecture des géloses, vous saisissez les germes identifiés pour chaque prélèvement. "
+            "L'application calcule alors automatiquement le **score de criticité** pour chaque germe "
+            "trouvé et déclenche les alertes ou actions appropriées.\n\n"
+            "Accès : **Surveillance → Identifier** sur un prélèvement en attente."
+        ),
+    },
+    {
+        "id": "faq_006", "category": "Paramètres", "order": 5,
+        "question": "Comment configurer les points de prélèvement ?",
+        "answer": (
+            "Dans **Paramètres → Points de prélèvement** :\n\n"
+            "- Cliquez sur **➕ Ajouter** pour créer un nouveau point\n"
+            "- Renseignez le nom, le type (Air / Surface), la classe ISO/GMP, "
+            "la criticité du lieu, la gélose utilisée et la fréquence de prélèvement\n"
+            "- Modifiez (✏️) ou supprimez (🗑️) les points existants\n\n"
+            "Les points sont synchronisés automatiquement avec Supabase si configuré."
+        ),
+    },
+    {
+        "id": "faq_008", "category": "Données", "order": 7,
+        "question": "Comment sauvegarder et restaurer mes données ?",
+        "answer": (
+            "Dans **Paramètres → Sauvegarde** :\n\n"
+            "- **⬇️ Exporter** : télécharge un fichier JSON contenant toutes vos données "
+            "(germes, prélèvements, points, opérateurs, historique...)\n"
+            "- **⬆️ Restaurer** : importez un fichier de sauvegarde pour remplacer "
+            "toutes les données actuelles\n\n"
+            "⚠️ La restauration est irréversible — effectuez toujours une exportation avant."
+        ),
+    },
+    {
+        "id": "faq_009", "category": "Données", "order": 8,
+        "question": "Pourquoi configurer Supabase ?",
+        "answer": (
+            "Sans Supabase, les données sont **perdues à chaque redémarrage** de l'application "
+            "(mise à jour du code, timeout Streamlit Cloud...).\n\n"
+            "Supabase est une base de données cloud **gratuite** qui garantit la persistance. "
+            "Configuration dans **Paramètres → Base de données** — il suffit de coller "
+            "votre `SUPABASE_URL` et `SUPABASE_KEY` dans les secrets Streamlit."
+        ),
+    },
+    {
+        "id": "faq_010", "category": "Mesures correctives", "order": 9,
+        "question": "Comment fonctionnent les mesures correctives ?",
+        "answer": (
+            "Les mesures correctives sont des actions prédéfinies suggérées automatiquement "
+            "lors d'une alerte ou d'une action microbiologique.\n\n"
+            "Chaque mesure est associée à :\n"
+            "- Une **origine** (Air, Surface, Flore fécale...)\n"
+            "- Un **niveau de criticité** (1 à 5)\n"
+            "- Un **type** (⚠️ Alerte ou 🚨 Action)\n\n"
+            "Gérez-les dans **Paramètres → Mesures correctives**."
+        ),
+    },
+]
+
+DEFAULT_ORIGIN_MEASURES = [
+    {"id":"m001","text":"Documenter l'événement dans le registre qualité","scope":"all","risk":"all","type":"alert"},
+    {"id":"m002","text":"Programmer un prélèvement de contrôle","scope":"all","risk":"all","type":"alert"},
+    {"id":"m003","text":"Surveiller l'évolution des prochains résultats","scope":"all","risk":"all","type":"alert"},
+    {"id":"m004","text":"Informer le responsable qualité","scope":"all","risk":[3,4,5],"type":"alert"},
+    {"id":"m005","text":"Augmenter la fréquence de surveillance","scope":"all","risk":[3,4,5],"type":"alert"},
+    {"id":"m006","text":"Renforcer le bionettoyage de la zone concernée","scope":"all","risk":[3,4,5],"type":"alert"},
+    {"id":"m010","text":"Alerter le pharmacien responsable et la direction","scope":"all","risk":[4,5],"type":"action"},
+    {"id":"m011","text":"Isoler la zone contaminée","scope":"all","risk":[4,5],"type":"action"},
+    {"id":"m012","text":"ARRÊT des préparations critiques si nécessaire","scope":"all","risk":[4,5],"type":"action"},
+    {"id":"m013","text":"Décontamination renforcée avec désinfectant adapté (Surfa'Safe / APA)","scope":"all","risk":[4,5],"type":"action"},
+    {"id":"m014","text":"Ne pas reprendre l'activité avant résultat conforme","scope":"all","risk":[4,5],"type":"action"},
+    {"id":"m015","text":"Déclaration d'événement indésirable (fiche EI)","scope":"all","risk":[4,5],"type":"action"},
+    {"id":"m016","text":"Renforcer le bionettoyage de la zone","scope":"all","risk":[1,2,3],"type":"action"},
+    {"id":"m017","text":"Vérifier les procédures de bionettoyage en vigueur","scope":"all","risk":[1,2,3],"type":"action"},
+    {"id":"m018","text":"Informer le responsable d'équipe","scope":"all","risk":[1,2,3],"type":"action"},
+    {"id":"m020","text":"Contrôler l'intégrité des filtres HEPA","scope":"Air","risk":"all","type":"alert"},
+    {"id":"m021","text":"Vérifier les flux d'air et la pression différentielle","scope":"Air","risk":"all","type":"alert"},
+    {"id":"m022","text":"Contrôler les entrées / sorties de matériel (cartons, vêtements)","scope":"Air","risk":[3,4,5],"type":"alert"},
+    {"id":"m023","text":"Contrôler l'étanchéité des jonctions de filtres HEPA","scope":"Air","risk":[4,5],"type":"action"},
+    {"id":"m024","text":"Bilan fongique complet (Aspergillus, Fusarium, Penicillium)","scope":"Air","risk":[4,5],"type":"action"},
+    {"id":"m025","text":"Décontamination par nébulisation H2O2 si moisissure critique","scope":"Air","risk":[5],"type":"action"},
+    {"id":"m030","text":"Identifier et traiter les sources d'humidité","scope":"Humidité","risk":"all","type":"alert"},
+    {"id":"m031","text":"Vérifier l'étanchéité des canalisations et conduites d'eau","scope":"Humidité","risk":"all","type":"alert"},
+    {"id":"m032","text":"Contrôler le taux d'humidité relative de la salle","scope":"Humidité","risk":[3,4,5],"type":"alert"},
+    {"id":"m033","text":"Nettoyage et désinfection renforcés des surfaces humides","scope":"Humidité","risk":"all","type":"action"},
+    {"id":"m034","text":"Décontamination au peroxyde d'hydrogène si Pseudomonas/Mycobactérie","scope":"Humidité","risk":[4,5],"type":"action"},
+    {"id":"m035","text":"Recherche et élimination de tout biofilm résiduel","scope":"Humidité","risk":[4,5],"type":"action"},
+    {"id":"m040","text":"Contrôler les entrées de matières premières et emballages","scope":"Sol / Carton / Surface sèche","risk":"all","type":"alert"},
+    {"id":"m041","text":"Renforcer le bionettoyage des sols et surfaces","scope":"Sol / Carton / Surface sèche","risk":"all","type":"alert"},
+    {"id":"m042","text":"Vérifier le protocole de dé-cartonnage à l'entrée","scope":"Sol / Carton / Surface sèche","risk":[3,4,5],"type":"alert"},
+    {"id":"m043","text":"Retrait et destruction des cartons et emballages suspects","scope":"Sol / Carton / Surface sèche","risk":"all","type":"action"},
+    {"id":"m044","text":"Décontamination sporicide si spores détectées (Bacillus, Clostridium)","scope":"Sol / Carton / Surface sèche","risk":[4,5],"type":"action"},
+    {"id":"m045","text":"Bilan sporal complet de la zone","scope":"Sol / Carton / Surface sèche","risk":[5],"type":"action"},
+    {"id":"m050","text":"Vérifier les procédures d'habillage et port des EPI","scope":"Peau / Muqueuse","risk":"all","type":"alert"},
+    {"id":"m051","text":"Contrôler la technique de friction hydro-alcoolique","scope":"Peau / Muqueuse","risk":"all","type":"alert"},
+    {"id":"m052","text":"Renforcer la formation du personnel (hygiène des mains)","scope":"Peau / Muqueuse","risk":[3,4,5],"type":"action"},
+    {"id":"m053","text":"Vérifier l'absence de lésion cutanée chez le personnel","scope":"Peau / Muqueuse","risk":[4,5],"type":"action"},
+    {"id":"m054","text":"Enquête sur le personnel intervenant dans la zone","scope":"Peau / Muqueuse","risk":[4,5],"type":"action"},
+    {"id":"m060","text":"Vérifier les procédures de lavage des mains","scope":"Flore fécale","risk":"all","type":"alert"},
+    {"id":"m061","text":"Contrôler la chaîne de décontamination des équipements","scope":"Flore fécale","risk":"all","type":"alert"},
+    {"id":"m062","text":"Recherche de source de contamination fécale","scope":"Flore fécale","risk":[3,4,5],"type":"action"},
+    {"id":"m063","text":"Nettoyage désinfectant à spectre large (entérobactéries/ERV)","scope":"Flore fécale","risk":"all","type":"action"},
+    {"id":"m064","text":"Test de portage pour le personnel si E. coli / Entérocoque multirésistant","scope":"Flore fécale","risk":[4,5],"type":"action"},
+    {"id":"m070","text":"Vérifier le port correct du masque FFP2 ou chirurgical","scope":"Oropharynx / Gouttelettes","risk":"all","type":"alert"},
+    {"id":"m071","text":"Rappeler l'interdiction de parler dans la ZAC","scope":"Oropharynx / Gouttelettes","risk":"all","type":"alert"},
+    {"id":"m072","text":"Enquête sur le personnel présent lors du prélèvement positif","scope":"Oropharynx / Gouttelettes","risk":[3,4,5],"type":"action"},
+    {"id":"m073","text":"Contrôle de santé du personnel (angine, rhino-pharyngite)","scope":"Oropharynx / Gouttelettes","risk":[3,4,5],"type":"action"},
+    {"id":"m074","text":"Éviction temporaire du personnel symptomatique","scope":"Oropharynx / Gouttelettes","risk":[4,5],"type":"action"},
+]
+
+DEFAULT_GERMS = [
+    dict(name="Staphylococcus spp.",path=["Germes","Bactéries","Humains","Peau / Muqueuse"],notes=None,comment=None),
+    dict(name="Corynebacterium spp.",path=["Germes","Bactéries","Humains","Peau / Muqueuse"],notes=None,comment=None),
+    dict(name="Cutibacterium acnes",path=["Germes","Bactéries","Humains","Peau / Muqueuse"],notes=None,comment=None),
+    dict(name="Micrococcus spp.",path=["Germes","Bactéries","Humains","Peau / Muqueuse"],notes=None,comment=None),
+    dict(name="Dermabacter hominis",path=["Germes","Bactéries","Humains","Peau / Muqueuse"],notes=None,comment=None),
+    dict(name="Brevibacterium epidermidis",path=["Germes","Bactéries","Humains","Peau / Muqueuse"],notes=None,comment=None),
+    dict(name="Streptococcus mitis/salivarius/sanguinis/anginosus",path=["Germes","Bactéries","Humains","Oropharynx / Gouttelettes"],notes=None,comment=None),
+    dict(name="Streptococcus pyogenes/agalactiae/pneumoniae",path=["Germes","Bactéries","Humains","Oropharynx / Gouttelettes"],notes=None,comment=None),
+    dict(name="Escherichia coli",path=["Germes","Bactéries","Humains","Flore fécale"],notes=None,comment=None),
+    dict(name="Enterococcus spp.",path=["Germes","Bactéries","Humains","Flore fécale"],notes=None,comment=None),
+    dict(name="Enterobacter spp.",path=["Germes","Bactéries","Humains","Flore fécale"],notes=None,comment=None),
+    dict(name="Citrobacter spp.",path=["Germes","Bactéries","Humains","Flore fécale"],notes=None,comment=None),
+    dict(name="Klebsiella pneumoniae",path=["Germes","Bactéries","Humains","Flore fécale"],notes=None,comment=None),
+    dict(name="Proteus spp.",path=["Germes","Bactéries","Humains","Flore fécale"],notes=None,comment=None),
+    dict(name="Morganella spp.",path=["Germes","Bactéries","Humains","Flore fécale"],notes=None,comment=None),
+    dict(name="Providencia spp.",path=["Germes","Bactéries","Humains","Flore fécale"],notes=None,comment=None),
+    dict(name="Salmonella spp.",path=["Germes","Bactéries","Humains","Flore fécale"],notes=None,comment=None),
+    dict(name="Shigella spp.",path=["Germes","Bactéries","Humains","Flore fécale"],notes=None,comment=None),
+    dict(name="Yersinia enterocolitica",path=["Germes","Bactéries","Humains","Flore fécale"],notes=None,comment=None),
+    dict(name="Pseudomonas spp.",path=["Germes","Bactéries","Environnemental","Humidité"],notes=None,comment=None),
+    dict(name="Acinetobacter spp.",path=["Germes","Bactéries","Environnemental","Humidité"],notes=None,comment=None),
+    dict(name="Paenibacillus spp. (SPORULES)",path=["Germes","Bactéries","Environnemental","Sol / Carton / Surface sèche"],notes=None,comment=None),
+    dict(name="Hafnia alvei",path=["Germes","Bactéries","Humains","Flore fécale"],notes=None,comment=None),
+    dict(name="Sphingomonas paucimobilis",path=["Germes","Bactéries","Environnemental","Humidité"],notes=None,comment=None),
+    dict(name="Sphingobium spp.",path=["Germes","Bactéries","Environnemental","Humidité"],notes=None,comment=None),
+    dict(name="Methylobacterium spp.",path=["Germes","Bactéries","Environnemental","Humidité"],notes=None,comment=None),
+    dict(name="Caulobacter crescentus",path=["Germes","Bactéries","Environnemental","Humidité"],notes=None,comment=None),
+    dict(name="Mycobacterium non tuberculeux",path=["Germes","Bactéries","Environnemental","Humidité"],notes=None,comment=None),
+    dict(name="Burkholderia cepacia",path=["Germes","Bactéries","Environnemental","Sol / Carton / Surface sèche"],notes=None,comment=None),
+    dict(name="Massilia spp.",path=["Germes","Bactéries","Environnemental","Sol / Carton / Surface sèche"],notes=None,comment=None),
+    dict(name="Bacillus spp. (SPORULES)",path=["Germes","Bactéries","Environnemental","Sol / Carton / Surface sèche"],notes="Sporulé",comment=None),
+    dict(name="Clostridium spp. (SPORULES)",path=["Germes","Bactéries","Environnemental","Sol / Carton / Surface sèche"],notes="Sporulé",comment=None),
+    dict(name="Geobacillus stearothermophilus (SPORULES)",path=["Germes","Bactéries","Environnemental","Sol / Carton / Surface sèche"],notes="Sporulé thermophile",comment=None),
+    dict(name="Arthrobacter spp.",path=["Germes","Bactéries","Environnemental","Sol / Carton / Surface sèche"],notes=None,comment=None),
+    dict(name="Cellulomonas spp.",path=["Germes","Bactéries","Environnemental","Sol / Carton / Surface sèche"],notes=None,comment=None),
+    dict(name="Curtobacterium spp.",path=["Germes","Bactéries","Environnemental","Sol / Carton / Surface sèche"],notes=None,comment=None),
+    dict(name="Agrococcus spp.",path=["Germes","Bactéries","Environnemental","Sol / Carton / Surface sèche"],notes=None,comment=None),
+    dict(name="Microbacterium spp.",path=["Germes","Bactéries","Environnemental","Sol / Carton / Surface sèche"],notes=None,comment=None),
+    dict(name="Brevibacterium linens/casei",path=["Germes","Bactéries","Environnemental","Sol / Carton / Surface sèche"],notes=None,comment=None),
+    dict(name="Georgenia spp.",path=["Germes","Bactéries","Environnemental","Sol / Carton / Surface sèche"],notes=None,comment=None),
+    dict(name="Candida spp.",path=["Germes","Champignons","Humain","Peau / Muqueuse"],notes="Levure",comment="Levures = pas de production de spores"),
+    dict(name="Trichosporon spp.",path=["Germes","Champignons","Humain","Peau / Muqueuse"],notes="Levure",comment="Levures = pas de production de spores"),
+    dict(name="Rhodotorula spp.",path=["Germes","Champignons","Environnemental","Humidité"],notes="Levure",comment="Levures = pas de production de spores"),
+    dict(name="Fusarium spp.",path=["Germes","Champignons","Environnemental","Sol / Carton / Surface sèche"],notes="Conidies 2-4um",comment="Production de spores (conidies) => dissémination dans l'air facilitée par petite taille (2-4 µm) + Résistance aux agents oxydants"),
+    dict(name="Aureobasidium spp.",path=["Germes","Champignons","Environnemental","Humidité"],notes="Blastospores + biofilm",comment="Production de blastospores (moins résistante aux agents oxydants et ne se dissémine pas dans l'air comme les conidies d'Aspergillus ou Fusarium) et production de biofilm"),
+    dict(name="Mucorales",path=["Germes","Champignons","Environnemental","Sol / Carton / Surface sèche"],notes="Sporangiospores",comment="Production de sporangiospores (moins résistant aux agents oxydants que les conidies d'Aspergillus ou Fusarium)"),
+    dict(name="Alternaria spp.",path=["Germes","Champignons","Environnemental","Air"],notes="Conidies grandes",comment="Production de spores (conidies) mais de plus grande taille, moins déshydratées et moins mélanisées que celles de Fusarium ou Aspergillus => Moins résistante à l'oxydation"),
+    dict(name="Aspergillus spp.",path=["Germes","Champignons","Environnemental","Air"],notes="Conidies 2-4um",comment="Production de spores (conidies) => dissémination dans l'air facilitée par petite taille (2-4 µm) + Résistance aux agents oxydants"),
+    dict(name="Cladosporium spp.",path=["Germes","Champignons","Environnemental","Air"],notes="Conidies grandes",comment="Production de spores (conidies) mais de plus grande taille, moins déshydratées et moins mélanisées => Moins résistante à l'oxydation"),
+    dict(name="Penicillium spp.",path=["Germes","Champignons","Environnemental","Air"],notes="Conidies",comment="Production de spores (conidies) mais moins déshydratées et moins mélanisées que celles de Fusarium ou Aspergillus => Moins résistantes à l'oxydation"),
+    dict(name="Wallemia sebi",path=["Germes","Champignons","Environnemental","Air"],notes="Arthroconidies",comment=None),
+]
+
+DEFAULT_GERM_NAMES = {g["name"] for g in DEFAULT_GERMS}
@@ -0,0 +1,859 @@
+"""Documents produits à la demande depuis les onglets : étiquettes PDF avec QR code,
+classeur Excel du planning et PDF des mesures correctives. reportlab, openpyxl et
+qrcode ne sont importés qu'à l'appel."""
+from datetime import date as date_type, datetime, timedelta
+from io import BytesIO
+
+import streamlit as st
+
+from urc.storage import _repo
+
+# ── QR CODE D'UN POINT ────────────────────────────────────────────────────────
+def _make_qr_bytes(point_id) -> bytes:
+    import qrcode
+    qr = qrcode.QRCode(
+        version=None,
+        error_correction=qrcode.constants.ERROR_CORRECT_M,
+        box_size=4,
+        border=2,
+    )
+    qr.add_data(str(point_id))
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+# ── ÉTIQUETTES PDF ────────────────────────────────────────────────────────────
+def _generate_pdf_etiquettes(tasks, date_obj_or_list):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units     import cm as rl_cm
+    from reportlab.lib           import colors as rlc
+    from reportlab.platypus      import (
+        Table, TableStyle, Paragraph, HRFlowable,
+        BaseDocTemplate, Frame, PageTemplate, Image as RLImage,
+    )
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.enums  import TA_RIGHT
+    from io import BytesIO
+
+    A4_W, A4_H = A4
+    N_COLS = 4
+    W_ETQ  = 5.2  * rl_cm
+    H_ETQ  = 2.95 * rl_cm
+    buf    = BytesIO()
+
+    RISK_RL = {k: rlc.HexColor(v) for k, v in {
+        "1": "#22c55e", "2": "#84cc16",
+        "3": "#f59e0b", "4": "#f97316", "5": "#ef4444",
+    }.items()}
+
+    s_titre   = ParagraphStyle("et_t",  fontName="Helvetica-Bold",
+                               fontSize=7.5, leading=9, spaceAfter=2,
+                               textColor=rlc.HexColor("#0f172a"))
+    s_lbl     = ParagraphStyle("et_l",  fontName="Helvetica",
+                               fontSize=5.5, leading=7,
+                               textColor=rlc.HexColor("#64748b"))
+    s_date    = ParagraphStyle("et_d",  fontName="Helvetica-Bold",
+                               fontSize=9, leading=10,
+                               textColor=rlc.HexColor("#1e40af"))
+    s_logo    = ParagraphStyle("et_lo", fontName="Helvetica",
+                               fontSize=5, leading=6,
+                               textColor=rlc.HexColor("#94a3b8"),
+                               alignment=TA_RIGHT)
+    s_classea = ParagraphStyle("et_ca", fontName="Helvetica-Bold",
+                               fontSize=6, leading=7,
+                               textColor=rlc.HexColor("#854d0e"),
+                               spaceAfter=2)
+    s_val     = ParagraphStyle("et_v",  fontName="Helvetica-Bold",
+                               fontSize=7.5, leading=9,
+                               textColor=rlc.HexColor("#0f172a"))
+    s_day_sep = ParagraphStyle("et_ds", fontName="Helvetica-Bold",
+                               fontSize=11, leading=14,
+                               textColor=rlc.HexColor("#1a4e66"))
+
+    days_data = (
+        date_obj_or_list if isinstance(date_obj_or_list, list)
+        else [(date_obj_or_list, tasks)]
+    )
+
+    doc   = BaseDocTemplate(buf, pagesize=A4,
+                            leftMargin=0, rightMargin=0, topMargin=0, bottomMargin=0)
+    frame = Frame(x1=0, y1=0, width=A4_W, height=A4_H,
+                  leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0)
+    doc.addPageTemplates([PageTemplate(id="full", frames=[frame])])
+
+    def _build_cell(task, d_obj):
+        rv      = str(task.get("risk", ""))
+        rc_etiq = RISK_RL.get(rv, rlc.HexColor("#6366f1"))
+        lv      = task.get("label", "—")
+        dv      = d_obj.strftime("%d/%m/%Y")
+        W_QR    = 2.0 * rl_cm
+        W_INNER = W_ETQ - 0.55 * rl_cm
+        W_TEXT  = W_INNER - W_QR
+
+        _pt_data    = _repo().point(lv)
+        qr_flowable = None
+        if _pt_data:
+            try:
+                _qr_buf     = BytesIO(_make_qr_bytes(_pt_data["id"]))
+                qr_flowable = RLImage(_qr_buf, width=2.0 * rl_cm, height=2.0 * rl_cm)
+            except Exception:
+                qr_flowable = None
+
+        classea_rows = []
+        if task.get("room_class", "").strip().upper() == "A":
+            iso_display = task.get("_isolateur")
+            if not iso_display and _pt_data:
+                iso_display = _pt_data.get("num_isolateur", "—") or "—"
+            iso_display = iso_display or "—"
+            pst       = (_pt_data.get("poste", "") or "") if _pt_data else ""
+            label_iso = iso_display + (f" · {pst}" if pst else "")
+            classea_rows = [[Paragraph(label_iso, s_classea)]]
+
+        try:
+            left_tbl = Table(
+                [
+                    [Paragraph(lv, s_titre)],
+                    [HRFlowable(width=W_TEXT, thickness=0.6, color=rc_etiq, spaceAfter=2)],
+                    *classea_rows,
+                    [Paragraph("📅 Date", s_lbl)],
+                    [Paragraph(dv, s_date)],
+                    [Paragraph("👤 Préleveur :", s_lbl)],
+                    [Paragraph("", s_val)],
+                    [Paragraph("URC — MicroSurveillance", s_logo)],
+                ],
+                colWidths=[W_TEXT],
+            )
+            left_tbl.setStyle(TableStyle([
+                ("LEFTPADDING",   (0, 0), (-1, -1), 0),
+                ("RIGHTPADDING",  (0, 0), (-1, -1), 0),
+                ("TOPPADDING",    (0, 0), (-1, -1), 0),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 1),
+                ("TOPPADDING",    (0, -1), (0, -1), 4),
+            ]))
+        except Exception:
+            left_tbl = Table([[Paragraph(lv, s_titre)]], colWidths=[W_TEXT])
+
+        try:
+            if qr_flowable:
+                inner = Table([[left_tbl, qr_flowable]], colWidths=[W_TEXT, W_QR])
+                inner.setStyle(TableStyle([
+                    ("VALIGN",        (0, 0), (-1, -1), "MIDDLE"),
+                    ("LEFTPADDING",   (0, 0), (-1, -1), 0),
+                    ("RIGHTPADDING",  (0, 0), (-1, -1), 0),
+                    ("TOPPADDING",    (0, 0), (-1, -1), 0),
+                    ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
+                    ("ALIGN",         (1, 0), (1, 0),   "CENTER"),
+                ]))
+            else:
+                inner = left_tbl
+        except Exception:
+            inner = left_tbl
+
+        outer = Table([[inner]], colWidths=[W_ETQ], rowHeights=[H_ETQ])
+        outer.setStyle(TableStyle([
+            ("LINEBEFORE",    (0, 0), (0, 0), 1.2, rc_etiq),
+            ("LINEABOVE",     (0, 0), (0, 0), 1.2, rc_etiq),
+            ("LINEAFTER",     (0, 0), (0, 0), 5.5, rc_etiq),
+            ("LEFTPADDING",   (0, 0), (0, 0), 11),
+            ("RIGHTPADDING",  (0, 0), (0, 0), 11),
+            ("TOPPADDING",    (0, 0), (0, 0), 11),
+            ("BOTTOMPADDING", (0, 0), (0, 0), 11),
+            ("VALIGN",        (0, 0), (0, 0), "TOP"),
+            ("BACKGROUND",    (0, 0), (0, 0), rlc.white),
+        ]))
+        return outer
+
+    def _build_sep_cell(label):
+        sep_inner = Table(
+            [[Paragraph(label, s_day_sep)]],
+            colWidths=[W_ETQ - 0.55 * rl_cm],
+        )
+        sep_inner.setStyle(TableStyle([
+            ("LEFTPADDING",   (0, 0), (-1, -1), 0),
+            ("RIGHTPADDING",  (0, 0), (-1, -1), 0),
+            ("TOPPADDING",    (0, 0), (-1, -1), 0),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
+            ("VALIGN",        (0, 0), (-1, -1), "MIDDLE"),
+        ]))
+        outer = Table([[sep_inner]], colWidths=[W_ETQ], rowHeights=[H_ETQ])
+        outer.setStyle(TableStyle([
+            ("LINEBEFORE",    (0, 0), (0, 0), 1.2, rlc.HexColor("#1a4e66")),
+            ("LINEABOVE",     (0, 0), (0, 0), 1.2, rlc.HexColor("#1a4e66")),
+            ("LINEAFTER",     (0, 0), (0, 0), 5.5, rlc.HexColor("#1a4e66")),
+            ("LEFTPADDING",   (0, 0), (0, 0), 11),
+            ("RIGHTPADDING",  (0, 0), (0, 0), 11),
+            ("TOPPADDING",    (0, 0), (0, 0), 11),
+            ("BOTTOMPADDING", (0, 0), (0, 0), 11),
+            ("VALIGN",        (0, 0), (0, 0), "MIDDLE"),
+            ("BACKGROUND",    (0, 0), (0, 0), rlc.HexColor("#e0f2fe")),
+        ]))
+        return outer
+
+    all_rows        = []
+    all_row_heights = []
+
+    for (d_obj, day_tasks) in days_data:
+        n_prelevements = len(day_tasks)
+        sep_label      = (
+            f"{d_obj.strftime('%A %d/%m/%Y').capitalize()} "
+            f"— {n_prelevements} prélèvement{'s' if n_prelevements > 1 else ''}"
+        )
+        cells_day = [_build_sep_cell(sep_label)] + [_build_cell(t, d_obj) for t in day_tasks]
+        for i in range(0, len(cells_day), N_COLS):
+            chunk = cells_day[i:i + N_COLS]
+            while len(chunk) < N_COLS:
+                chunk.append("")
+            all_rows.append(chunk)
+            all_row_heights.append(H_ETQ)
+
+    story = []
+    if all_rows:
+        full_tbl = Table(
+            all_rows,
+            colWidths=[W_ETQ] * N_COLS,
+            rowHeights=all_row_heights,
+        )
+        full_tbl.setStyle(TableStyle([
+            ("LEFTPADDING",   (0, 0), (-1, -1), 0),
+            ("RIGHTPADDING",  (0, 0), (-1, -1), 0),
+            ("TOPPADDING",    (0, 0), (-1, -1), 0),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
+            ("LINEBELOW",     (0, -1), (-1, -1), 1.2, rlc.HexColor("#94a3b8")),
+        ]))
+        story.append(full_tbl)
+
+    doc.build(story)
+    buf.seek(0)
+    return buf.getvalue()
+
+# ── EXCEL DU PLANNING ─────────────────────────────────────────────────────────
+def _generate_excel_planning(exp_dates, xl_plan, plan_raw, exp_today,
+                             only_working=True, include_nonfaits=True):
+    """Classeur du planning (vue matricielle + non-faits), en octets .xlsx."""
+    import io as _io
+    import openpyxl
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    from openpyxl.utils  import get_column_letter
+
+    wb = openpyxl.Workbook()
+
+    C_BLUE     = "1E40AF"; C_BLUE2  = "2563EB"; C_BLUE_L = "DBEAFE"
+    C_WHITE    = "FFFFFF"; C_TEXT   = "0F172A"
+    C_GREY_HDR = "334155"; C_GREEN  = "16A34A"; C_RED    = "DC2626"
+
+    thin   = Side(style="thin",   color="CBD5E1")
+    medium = Side(style="medium", color="94A3B8")
+
+    def fill(h):
+        return PatternFill("solid", fgColor=h)
+
+    def font(size=9, bold=False, color=C_TEXT):
+        return Font(name="Arial", size=size, bold=bold, color=color)
+
+    def al_c(wrap=False):
+        return Alignment(horizontal="center", vertical="center", wrap_text=wrap)
+
+    def al_l(wrap=False):
+        return Alignment(horizontal="left", vertical="center", wrap_text=wrap)
+
+    def border_all():
+        return Border(left=thin, right=thin, top=thin, bottom=thin)
+
+    def border_medium():
+        return Border(left=medium, right=medium, top=medium, bottom=medium)
+
+    # ── Feuille 1 — Vue matricielle ───────────────────────────────
+    ws_matrix = wb.active
+    ws_matrix.title = "Planning Semaine"
+    ws_matrix.sheet_view.showGridLines = False
+
+    from collections import OrderedDict
+    weeks_map = OrderedDict()
+    for d in exp_dates:
+        ws_key = d - timedelta(days=d.weekday())
+        if ws_key not in weeks_map:
+            weeks_map[ws_key] = []
+        weeks_map[ws_key].append(d)
+
+    JOURS_XL      = ["Lundi","Mardi","Mercredi","Jeudi","Vendredi","Samedi","Dimanche"]
+    pts_all       = st.session_state.points
+    n_weeks       = len(weeks_map)
+    FIXED_COLS    = 3
+    DAYS_PER_WEEK = 5
+    total_cols    = FIXED_COLS + DAYS_PER_WEEK * n_weeks
+
+    ws_matrix.merge_cells(start_row=1, start_column=1,
+                           end_row=1,   end_column=total_cols)
+    ws_matrix.cell(1, 1).value     = "PLANNING MICROBIOLOGIQUE — MicroSurveillance URC"
+    ws_matrix.cell(1, 1).font      = Font(name="Arial", size=13, bold=True, color=C_WHITE)
+    ws_matrix.cell(1, 1).fill      = fill(C_BLUE)
+    ws_matrix.cell(1, 1).alignment = al_c()
+    ws_matrix.row_dimensions[1].height = 28
+
+    ws_matrix.merge_cells(start_row=2, start_column=1,
+                           end_row=2,   end_column=total_cols)
+    ws_matrix.cell(2, 1).value = (
+        f"Généré le {exp_today.strftime('%d/%m/%Y')} — "
+        f"{'Jours ouvrés uniquement' if only_working else 'Tous les jours'} — "
+        f"X = prélèvement prévu · ⏭ = reporté (non-fait) · ✓ = réalisé"
+    )
+    ws_matrix.cell(2, 1).font      = Font(name="Arial", size=8, color="475569")
+    ws_matrix.cell(2, 1).fill      = fill(C_BLUE_L)
+    ws_matrix.cell(2, 1).alignment = al_c()
+    ws_matrix.row_dimensions[2].height = 16
+
+    ws_matrix.row_dimensions[3].height = 20
+    for wi, (ws_key, ws_days) in enumerate(weeks_map.items()):
+        col_start = FIXED_COLS + 1 + wi * DAYS_PER_WEEK
+        col_end   = col_start + DAYS_PER_WEEK - 1
+        ws_matrix.merge_cells(start_row=3, start_column=col_start,
+                               end_row=3,   end_column=col_end)
+        we_key        = ws_key + timedelta(days=4)
+        _is_past_week = we_key < exp_today
+        _is_cur_week  = ws_key <= exp_today <= we_key
+        _wk_bg        = "475569" if _is_past_week else "1E40AF" if _is_cur_week else C_GREY_HDR
+        c = ws_matrix.cell(3, col_start)
+        c.value     = (
+            f"{'✅ ' if _is_past_week else '▶ ' if _is_cur_week else ''}"
+            f"Sem. {ws_key.isocalendar()[1]}  "
+            f"{ws_key.strftime('%d/%m')} → {we_key.strftime('%d/%m/%Y')}"
+        )
+        c.font      = Font(name="Arial", size=9, bold=True, color=C_WHITE)
+        c.fill      = fill(_wk_bg)
+        c.alignment = al_c()
+        c.border    = border_medium()
+
+    ws_matrix.row_dimensions[4].height = 34
+    fixed_headers = ["Point de prélèvement", "Lieu", "Type"]
+    fixed_widths  = [32, 9, 10]
+    for ci, (h, w) in enumerate(zip(fixed_headers, fixed_widths), start=1):
+        c = ws_matrix.cell(4, ci)
+        c.value     = h
+        c.font      = Font(name="Arial", size=9, bold=True, color=C_WHITE)
+        c.fill      = fill(C_BLUE2)
+        c.alignment = al_c(wrap=True)
+        c.border    = border_all()
+        ws_matrix.column_dimensions[get_column_letter(ci)].width = w
+
+    for wi, (ws_key, ws_days) in enumerate(weeks_map.items()):
+        day_date_map = {d.weekday(): d for d in ws_days}
+        for di in range(DAYS_PER_WEEK):
+            col       = FIXED_COLS + 1 + wi * DAYS_PER_WEEK + di
+            d_for_col = day_date_map.get(di)
+            if d_for_col:
+                is_today_col = (d_for_col == exp_today)
+                label  = f"{JOURS_XL[di][:3]}\n{d_for_col.strftime('%d/%m')}"
+                bg_col = "DBEAFE" if is_today_col else "EFF6FF"
+                fc_col = "1E40AF"
+            else:
+                label  = f"{JOURS_XL[di][:3]}\n—"
+                bg_col = "F1F5F9"
+                fc_col = "94A3B8"
+            c = ws_matrix.cell(4, col)
+            c.value     = label
+            c.font      = Font(name="Arial", size=8, bold=True, color=fc_col)
+            c.fill      = fill(bg_col)
+            c.alignment = al_c(wrap=True)
+            c.border    = border_all()
+            ws_matrix.column_dimensions[get_column_letter(col)].width = 8
+
+    ws_matrix.freeze_panes = "D5"
+
+    RISK_BG = {
+        "1": "DCFCE7", "2": "D9F99D",
+        "3": "FEF9C3", "4": "FFEDD5", "5": "FEE2E2",
+    }
+    RISK_FC = {
+        "1": "166534", "2": "365314",
+        "3": "713F12", "4": "7C2D12", "5": "7F1D1D",
+    }
+
+    data_row = 5
+    for pt_idx, pt in enumerate(pts_all):
+        rc         = (pt.get('room_class') or '').strip()
+        rv         = str(pt.get('risk_level', ''))
+        type_lbl   = pt.get('type', '—')
+        poste_type = pt.get('poste_type', 'non_applicable')
+        is_class_a = rc.strip().upper() == "A"
+        row_bg     = "FFFFFF" if pt_idx % 2 == 0 else "F8FAFC"
+
+        ws_matrix.row_dimensions[data_row].height = 18
+
+        c = ws_matrix.cell(data_row, 1)
+        c.value     = ("💨 " if type_lbl == "Air" else "🧴 ") + pt['label']
+        c.font      = Font(name="Arial", size=9, bold=True, color=C_TEXT)
+        c.fill      = fill(RISK_BG.get(rv, row_bg))
+        c.alignment = al_l()
+        c.border    = border_all()
+
+        rc_upper = rc.strip().upper()
+        if rc_upper == "A":
+            lieu_lbl = "Isolateur"
+        elif rc_upper in ("B", "C", "D"):
+            lieu_lbl = "Salle"
+        else:
+            lieu_lbl = rc or "—"
+
+        c = ws_matrix.cell(data_row, 2)
+        c.value     = lieu_lbl
+        c.font      = Font(name="Arial", size=9, bold=True,
+                           color=RISK_FC.get(rv, C_TEXT))
+        c.fill      = fill(RISK_BG.get(rv, row_bg))
+        c.alignment = al_c()
+        c.border    = border_all()
+
+        c = ws_matrix.cell(data_row, 3)
+        c.value     = type_lbl
+        c.font      = font(9, color=C_TEXT)
+        c.fill      = fill(row_bg)
+        c.alignment = al_c()
+        c.border    = border_all()
+
+        _freq_raw_xl  = pt.get('frequency')
+        _freq_unit_xl = pt.get('frequency_unit', '/ semaine')
+        try:
+            _freq_val_xl = float(_freq_raw_xl) if _freq_raw_xl else 0.0
+        except (TypeError, ValueError):
+            _freq_val_xl = 0.0
+        _is_multi_day = ('/ jour' in _freq_unit_xl and _freq_val_xl > 1)
+
+        poste_counter = 0
+
+        for wi, (ws_key, ws_days) in enumerate(weeks_map.items()):
+            day_date_map  = {d.weekday(): d for d in ws_days}
+            _fri_this_wk  = ws_key + timedelta(days=4)
+            _wk_is_past   = _fri_this_wk < exp_today
+
+            for di in range(DAYS_PER_WEEK):
+                col       = FIXED_COLS + 1 + wi * DAYS_PER_WEEK + di
+                d_for_col = day_date_map.get(di)
+                c         = ws_matrix.cell(data_row, col)
+
+                if not d_for_col:
+                    c.value     = ""
+                    c.fill      = fill("F1F5F9")
+                    c.alignment = al_c()
+                    c.border    = border_all()
+                    continue
+
+                tasks_day  = xl_plan.get(d_for_col, [])
+                is_planned = any(t.get("label") == pt["label"] for t in tasks_day)
+                is_done    = any(
+                    p.get("label") == pt["label"]
+                    and not p.get("archived", False)
+                    and p.get("date")
+                    and datetime.fromisoformat(p["date"]).date() == d_for_col
+                    for p in st.session_state.prelevements
+                )
+                _raw_day_tasks   = plan_raw.get(d_for_col, [])
+                _was_planned_raw = any(t.get("label") == pt["label"] for t in _raw_day_tasks)
+                _is_skipped      = pt["label"] in set(
+                    st.session_state["planning_skips"].get(d_for_col.isoformat(), [])
+                )
+                is_nonfait = (
+                    _wk_is_past
+                    and _was_planned_raw
+                    and not is_done
+                    and _is_skipped
+                    and include_nonfaits
+                )
+
+                if is_done:
+                    c.value = "✓"
+                    c.font  = Font(name="Arial", size=11, bold=True, color=C_GREEN)
+                    c.fill  = fill("DCFCE7")
+
+                elif is_nonfait:
+                    c.value = "⏭"
+                    c.font  = Font(name="Arial", size=10, bold=True, color=C_RED)
+                    c.fill  = fill("FEE2E2")
+
+                elif is_planned:
+                    if _is_multi_day:
+                        n_passages = max(
+                            sum(1 for t in tasks_day if t.get('label') == pt['label']),
+                            int(_freq_val_xl),
+                        )
+                        c.value = "  ".join(f"X {i+1}" for i in range(n_passages))
+                        c.font  = Font(name="Arial", size=10, bold=True, color=C_BLUE2)
+                        c.fill  = fill("DBEAFE")
+
+                    elif is_class_a and poste_type == "specifique":
+                        poste_num     = (poste_counter % 2) + 1
+                        poste_counter += 1
+                        c.value = f"X {poste_num}"
+                        c.font  = Font(name="Arial", size=10, bold=True, color=C_BLUE2)
+                        c.fill  = fill("DBEAFE")
+
+                    else:
+                        c.value = "X"
+                        c.font  = Font(name="Arial", size=10, bold=True, color=C_BLUE2)
+                        c.fill  = fill("DBEAFE")
+
+                else:
+                    c.value = ""
+                    c.fill  = fill("FFFFFF" if pt_idx % 2 == 0 else "F8FAFC")
+
+                c.alignment = al_c()
+                c.border    = border_all()
+
+        data_row += 1
+
+    ws_matrix.row_dimensions[data_row].height = 20
+    ws_matrix.merge_cells(start_row=data_row, start_column=1,
+                           end_row=data_row,   end_column=FIXED_COLS)
+    c = ws_matrix.cell(data_row, 1)
+    c.value     = "TOTAL prélèvements planifiés"
+    c.font      = Font(name="Arial", size=9, bold=True, color=C_WHITE)
+    c.fill      = fill(C_GREY_HDR)
+    c.alignment = al_c()
+    c.border    = border_all()
+
+    for wi, (ws_key, ws_days) in enumerate(weeks_map.items()):
+        day_date_map = {d.weekday(): d for d in ws_days}
+        for di in range(DAYS_PER_WEEK):
+            col       = FIXED_COLS + 1 + wi * DAYS_PER_WEEK + di
+            d_for_col = day_date_map.get(di)
+            c         = ws_matrix.cell(data_row, col)
+            if d_for_col:
+                total_day = len(xl_plan.get(d_for_col, []))
+                c.value   = total_day if total_day > 0 else "—"
+                c.font    = Font(name="Arial", size=9, bold=True,
+                                color=C_WHITE if total_day > 0 else "94A3B8")
+                c.fill    = fill(C_BLUE2 if total_day > 0 else C_GREY_HDR)
+            else:
+                c.value = ""
+                c.fill  = fill("334155")
+            c.alignment = al_c()
+            c.border    = border_all()
+
+    # ── Feuille 2 — Non-faits récapitulatif ──────────────────────
+    ws_nf = wb.create_sheet("Non-faits")
+    ws_nf.sheet_view.showGridLines = False
+
+    ws_nf.merge_cells("A1:F1")
+    ws_nf.cell(1, 1).value     = "RÉCAPITULATIF DES PRÉLÈVEMENTS NON RÉALISÉS"
+    ws_nf.cell(1, 1).font      = Font(name="Arial", size=12, bold=True, color=C_WHITE)
+    ws_nf.cell(1, 1).fill      = fill("DC2626")
+    ws_nf.cell(1, 1).alignment = al_c()
+    ws_nf.row_dimensions[1].height = 24
+
+    nf_headers = ["Date prévue", "Semaine", "Point", "Classe", "Type", "Statut"]
+    nf_widths   = [14, 10, 38, 9, 9, 18]
+    for ci, (h, w) in enumerate(zip(nf_headers, nf_widths), start=1):
+        c = ws_nf.cell(2, ci)
+        c.value     = h
+        c.font      = Font(name="Arial", size=9, bold=True, color=C_WHITE)
+        c.fill      = fill("7F1D1D")
+        c.alignment = al_c(wrap=True)
+        c.border    = border_all()
+        ws_nf.column_dimensions[get_column_letter(ci)].width = w
+    ws_nf.row_dimensions[2].height = 20
+
+    nf_row = 3
+    for d in sorted(st.session_state["planning_skips"].keys()):
+        try:
+            d_obj = date_type.fromisoformat(d)
+        except Exception:
+            continue
+        if d_obj not in exp_dates:
+            continue
+        skipped_lbls = st.session_state["planning_skips"][d]
+        if not skipped_lbls:
+            continue
+        for lbl in skipped_lbls:
+            done = any(
+                p.get("label") == lbl and p.get("date")
+                and datetime.fromisoformat(p["date"]).date() == d_obj
+                for p in st.session_state.prelevements
+            )
+            if done:
+                continue
+            _pt_info = next((p for p in pts_all if p.get("label") == lbl), {})
+            statut   = (
+                "⏭ Non-fait (sem. passée)"
+                if (d_obj + timedelta(days=(4 - d_obj.weekday()))) < exp_today
+                else "⬜ Manuel"
+            )
+            ws_nf.row_dimensions[nf_row].height = 16
+            row_bg_nf = "FFF1F2" if nf_row % 2 == 0 else "FFFFFF"
+            vals = [
+                d_obj.strftime("%d/%m/%Y"),
+                f"Sem. {d_obj.isocalendar()[1]}",
+                lbl,
+                _pt_info.get("room_class", "—"),
+                _pt_info.get("type", "—"),
+                statut,
+            ]
+            for ci, val in enumerate(vals, start=1):
+                c = ws_nf.cell(nf_row, ci)
+                c.value     = val
+                c.font      = Font(name="Arial", size=9,
+                                  color="DC2626" if "passée" in statut else C_TEXT)
+                c.fill      = fill(row_bg_nf)
+                c.alignment = al_l() if ci == 3 else al_c()
+                c.border    = border_all()
+            nf_row += 1
+
+    if nf_row == 3:
+        ws_nf.merge_cells("A3:F3")
+        ws_nf.cell(3, 1).value     = "✅ Aucun prélèvement non-réalisé sur cette période"
+        ws_nf.cell(3, 1).font      = Font(name="Arial", size=9, color="16A34A")
+        ws_nf.cell(3, 1).fill      = fill("F0FDF4")
+        ws_nf.cell(3, 1).alignment = al_c()
+
+    buf = _io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+# ── PDF DES MESURES CORRECTIVES ───────────────────────────────────────────────
+def _generate_mc_pdf(r, origin_measures, germs_list):
+    """Génère un PDF des mesures correctives applicables à l'entrée r."""
+    import io
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.lib.units import mm
+    from reportlab.platypus import (
+        SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
+    )
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.enums import TA_CENTER
+
+    # ── Infos de l'entrée ──────────────────────────────────────────
+    status_e   = r.get("status", "ok")
+    germ_name  = r.get("germ_saisi","") or r.get("germ_match","") or "—"
+    _gd        = r.get("germs_detail", [])
+    date_e     = r.get("date_prelevement", r.get("date","—"))
+    point_e    = r.get("prelevement","—")
+    operateur_e= r.get("operateur", r.get("preleveur","—"))
+    ufc_e      = r.get("ufc", 0)
+    score_e    = int(r.get("total_score", 0) or 0)
+    room_e     = r.get("room_class","—")
+
+    # ── Criticité du germe (1-5) ───────────────────────────────────
+
+    def _get_crit(gname):
+        for g in germs_list:
+            if g.get("name","") == gname:
+                # Calcul depuis les 3 champs si présents, sinon champ risk stocké
+                if all(k in g for k in ("pathogenicity","resistance","dissemination")):
+                    return int(g["pathogenicity"]) * int(g["resistance"]) * int(g["dissemination"])
+                return int(g.get("risk", 0) or 0)
+        return 0
+
+    # Collecter tous les germes présents dans l'entrée
+    germes_entry = []
+    if _gd:
+        germes_entry = [g.get("name","") for g in _gd if g.get("ufc",0) and g.get("name","") not in ("Négatif","—","")]
+    elif germ_name not in ("Négatif","—",""):
+        germes_entry = [germ_name]
+
+    # ── Type germe (bacteria/fungi) ────────────────────────────────
+    def _get_germ_type(gname):
+        for g in germs_list:
+            if g.get("name","") == gname:
+                path = g.get("path", [])
+                if len(path) > 1:
+                    return "fungi" if path[1] == "Champignons" else "bacteria"
+        return "bacteria"
+
+    germ_types_entry = set(_get_germ_type(gn) for gn in germes_entry) if germes_entry else set()
+    max_crit = max((_get_crit(gn) for gn in germes_entry), default=0)
+
+    # ── Filtrage des mesures correctives ───────────────────────────
+    def _mc_matches(m):
+        # Type alerte/action
+        mt = m.get("type","alert")
+        if mt != "both" and mt != status_e:
+            return False
+        # Criticité
+        mr = m.get("risk","all")
+        if mr != "all" and max_crit > 0:
+            if isinstance(mr, list):
+                if max_crit not in mr:
+                    return False
+            else:
+                if int(mr) != max_crit:
+                    return False
+        # Type de germe
+        mgt = m.get("germ_type","all")
+        if mgt != "all" and mgt != "both":
+            if not germ_types_entry or mgt not in germ_types_entry:
+                return False
+        return True
+
+    mc_applicables = [m for m in origin_measures if _mc_matches(m)]
+
+    # ── Construction PDF ───────────────────────────────────────────
+    buf    = io.BytesIO()
+    doc    = SimpleDocTemplate(
+        buf, pagesize=A4,
+        leftMargin=18*mm, rightMargin=18*mm,
+        topMargin=18*mm, bottomMargin=18*mm,
+    )
+    styles = getSampleStyleSheet()
+    story  = []
+
+    # Couleurs
+    if status_e == "action":
+        status_color = colors.HexColor("#dc2626")
+        status_label = "🚨 ACTION REQUISE"
+    else:
+        status_color = colors.HexColor("#d97706")
+        status_label = "⚠️ ALERTE"
+
+    # ── Titre ──────────────────────────────────────────────────────
+    title_style = ParagraphStyle(
+        "title", parent=styles["Normal"],
+        fontSize=16, textColor=colors.HexColor("#1e3a5f"),
+        spaceAfter=4, fontName="Helvetica-Bold", alignment=TA_CENTER,
+    )
+    story.append(Paragraph("FICHE MESURES CORRECTIVES", title_style))
+    story.append(Paragraph("Surveillance microbiologique — Environnement pharmaceutique", 
+        ParagraphStyle("sub", parent=styles["Normal"], fontSize=9,
+            textColor=colors.HexColor("#64748b"), alignment=TA_CENTER, spaceAfter=10)))
+    story.append(HRFlowable(width="100%", thickness=2, color=colors.HexColor("#1e3a5f")))
+    story.append(Spacer(1, 8))
+
+    # ── Bandeau statut ─────────────────────────────────────────────
+    status_data = [[
+        Paragraph(status_label, ParagraphStyle("sl", parent=styles["Normal"],
+            fontSize=13, textColor=colors.white, fontName="Helvetica-Bold", alignment=TA_CENTER))
+    ]]
+    status_table = Table(status_data, colWidths=["100%"])
+    status_table.setStyle(TableStyle([
+        ("BACKGROUND", (0,0), (-1,-1), status_color),
+        ("ROUNDEDCORNERS", [6]),
+        ("TOPPADDING",    (0,0), (-1,-1), 8),
+        ("BOTTOMPADDING", (0,0), (-1,-1), 8),
+    ]))
+    story.append(status_table)
+    story.append(Spacer(1, 10))
+
+    # ── Infos du prélèvement ───────────────────────────────────────
+    info_style  = ParagraphStyle("info", parent=styles["Normal"], fontSize=9,
+                                textColor=colors.HexColor("#0f172a"))
+    label_style = ParagraphStyle("lbl", parent=styles["Normal"], fontSize=9,
+                                textColor=colors.HexColor("#64748b"), fontName="Helvetica-Bold")
+
+    info_rows = [
+        [Paragraph("Point de prélèvement", label_style), Paragraph(point_e, info_style),
+        Paragraph("Date", label_style),                  Paragraph(str(date_e), info_style)],
+        [Paragraph("Germe(s) identifié(s)", label_style), Paragraph(", ".join(germes_entry) or "—", info_style),
+        Paragraph("UFC/m³", label_style),                Paragraph(str(ufc_e), info_style)],
+        [Paragraph("Classe de salle", label_style),       Paragraph(room_e, info_style),
+        Paragraph("Score total", label_style),           Paragraph(str(score_e), info_style)],
+        [Paragraph("Opérateur", label_style),             Paragraph(operateur_e, info_style),
+        Paragraph("Criticité germe", label_style),       Paragraph(str(max_crit) if max_crit else "—", info_style)],
+    ]
+    info_table = Table(info_rows, colWidths=[45*mm, 55*mm, 35*mm, 45*mm])
+    info_table.setStyle(TableStyle([
+        ("BACKGROUND",    (0,0), (-1,-1), colors.HexColor("#f8fafc")),
+        ("BOX",           (0,0), (-1,-1), 1, colors.HexColor("#e2e8f0")),
+        ("INNERGRID",     (0,0), (-1,-1), 0.5, colors.HexColor("#e2e8f0")),
+        ("TOPPADDING",    (0,0), (-1,-1), 6),
+        ("BOTTOMPADDING", (0,0), (-1,-1), 6),
+        ("LEFTPADDING",   (0,0), (-1,-1), 8),
+        ("RIGHTPADDING",  (0,0), (-1,-1), 8),
+        ("VALIGN",        (0,0), (-1,-1), "MIDDLE"),
+    ]))
+    story.append(info_table)
+    story.append(Spacer(1, 12))
+
+    # ── Mesures correctives ────────────────────────────────────────
+    story.append(Paragraph(
+        f"MESURES CORRECTIVES APPLICABLES ({len(mc_applicables)})",
+        ParagraphStyle("mct", parent=styles["Normal"], fontSize=11,
+            textColor=colors.HexColor("#1e3a5f"), fontName="Helvetica-Bold", spaceAfter=6)
+    ))
+    story.append(HRFlowable(width="100%", thickness=1, color=colors.HexColor("#cbd5e1")))
+    story.append(Spacer(1, 6))
+
+    if not mc_applicables:
+        story.append(Paragraph(
+            "Aucune mesure corrective définie pour ce profil.",
+            ParagraphStyle("none", parent=styles["Normal"], fontSize=9,
+                textColor=colors.HexColor("#94a3b8"), spaceAfter=6)
+        ))
+    else:
+        scope_fr = {
+            "Air": "💨 Air", "Humidité": "💧 Humidité",
+            "Flore fécale": "🦠 Flore fécale",
+            "Oropharynx / Gouttelettes": "😷 Oropharynx",
+            "Peau / Muqueuse": "🖐️ Peau / Muqueuse",
+            "Sol / Carton / Surface sèche": "📦 Sol / Surface",
+            "all": "🌐 Toutes origines",
+        }
+        mc_row_style = ParagraphStyle("mcr", parent=styles["Normal"],
+            fontSize=9, textColor=colors.HexColor("#0f172a"), leading=13)
+        mc_tag_style = ParagraphStyle("mctag", parent=styles["Normal"],
+            fontSize=8, textColor=colors.HexColor("#475569"), alignment=TA_CENTER)
+
+        for i, mc in enumerate(mc_applicables):
+            row_bg = colors.HexColor("#ffffff") if i % 2 == 0 else colors.HexColor("#f8fafc")
+            scope_lbl = scope_fr.get(mc.get("scope","all"), mc.get("scope","—"))
+            type_lbl  = "⚠️ Alerte" if mc.get("type","alert") == "alert" \
+                        else "🚨 Action" if mc.get("type") == "action" else "⚠️🚨 Les deux"
+            risk_val  = mc.get("risk","all")
+            risk_lbl  = ("🌐" if risk_val == "all"
+                        else "-".join(str(x) for x in risk_val) if isinstance(risk_val, list)
+                        else str(risk_val))
+
+            mc_row = [[
+                Paragraph(f"<b>{i+1}.</b>  {mc.get('text','')}", mc_row_style),
+                Paragraph(scope_lbl,  mc_tag_style),
+                Paragraph(type_lbl,   mc_tag_style),
+                Paragraph(f"Crit. {risk_lbl}", mc_tag_style),
+            ]]
+            mc_table = Table(mc_row, colWidths=[95*mm, 30*mm, 28*mm, 27*mm])
+            mc_table.setStyle(TableStyle([
+                ("BACKGROUND",    (0,0), (-1,-1), row_bg),
+                ("BOX",           (0,0), (-1,-1), 0.5, colors.HexColor("#e2e8f0")),
+                ("TOPPADDING",    (0,0), (-1,-1), 7),
+                ("BOTTOMPADDING", (0,0), (-1,-1), 7),
+                ("LEFTPADDING",   (0,0), (-1,-1), 8),
+                ("RIGHTPADDING",  (0,0), (-1,-1), 6),
+                ("VALIGN",        (0,0), (-1,-1), "MIDDLE"),
+            ]))
+            story.append(mc_table)
+
+    story.append(Spacer(1, 14))
+
+    # ── Zone signature ─────────────────────────────────────────────
+    story.append(HRFlowable(width="100%", thickness=1, color=colors.HexColor("#cbd5e1")))
+    story.append(Spacer(1, 8))
+    sig_rows = [[
+        Paragraph("Réalisé par :", ParagraphStyle("sg", parent=styles["Normal"],
+            fontSize=8, textColor=colors.HexColor("#64748b"))),
+        Paragraph("Validé par :", ParagraphStyle("sg2", parent=styles["Normal"],
+            fontSize=8, textColor=colors.HexColor("#64748b"))),
+        Paragraph("Date de clôture :", ParagraphStyle("sg3", parent=styles["Normal"],
+            fontSize=8, textColor=colors.HexColor("#64748b"))),
+    ],[
+        Paragraph("&nbsp;" * 40, styles["Normal"]),
+        Paragraph("&nbsp;" * 40, styles["Normal"]),
+        Paragraph("&nbsp;" * 30, styles["Normal"]),
+    ]]
+    sig_table = Table(sig_rows, colWidths=[60*mm, 60*mm, 60*mm])
+    sig_table.setStyle(TableStyle([
+        ("BOX",           (0,1), (-1,1), 0.5, colors.HexColor("#cbd5e1")),
+        ("TOPPADDING",    (0,0), (-1,-1), 4),
+        ("BOTTOMPADDING", (0,0), (-1,-1), 18),
+        ("LEFTPADDING",   (0,0), (-1,-1), 6),
+    ]))
+    story.append(sig_table)
+
+    # ── Pied de page ───────────────────────────────────────────────
+    from datetime import datetime as _dt
+    story.append(HRFlowable(width="100%", thickness=0.5, color=colors.HexColor("#e2e8f0")))
+    story.append(Paragraph(
+        f"Document généré le {_dt.now().strftime('%d/%m/%Y à %H:%M')} — Surveillance microbiologique",
+        ParagraphStyle("footer", parent=styles["Normal"], fontSize=7,
+            textColor=colors.HexColor("#94a3b8"), alignment=TA_CENTER, spaceBefore=4)
+    ))
+
+    doc.build(story)
+    buf.seek(0)
+    return buf.read()
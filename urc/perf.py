@@ -0,0 +1,235 @@
+"""Mesures de performance : profil de chaque rerun (sections chronométrées, appels
+Supabase et E/S fichiers de la session) et budget d'import de l'application."""
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import streamlit as st
+
+# ── MESURES DE PERFORMANCE ─────────────────────────────────────────────────────
+# Durée de chaque section de la page, appels Supabase (nombre, octets, latence) et
+# E/S fichiers faits par la session pendant le rerun. Les durées et les appels sont
+# toujours comptés ; les octets et le journal JSONL tournant seulement quand le
+# profilage est actif (URC_PROFILE=1 ou Paramètres → Supabase).
+PROFILE_LOG_FILE      = "perf_log.jsonl"
+PROFILE_LOG_MAX_BYTES = 1_000_000
+PROFILE_LOG_BACKUPS   = 3
+_SUPA_VERBS = ("select", "insert", "upsert", "update", "delete")
+
+# Bibliothèques lourdes (PDF, Excel, QR, images) : importées au premier usage, jamais
+# au démarrage ; budget des imports du script (vérifié par tests/test_import_budget.py)
+HEAVY_MODULES = ("reportlab", "openpyxl", "qrcode", "PIL")
+IMPORT_BUDGET_MS = 1500
+
+# Profil du rerun en cours, posé par _prof_begin dans le thread du script de la
+# session. Un thread démarre avec un contexte vide : les appels des threads
+# d'arrière-plan (écriture, boîte d'envoi, flux de changements) ne sont comptés
+# dans le profil d'aucune session (voir aussi _run_bound).
+_RUN_COUNTERS = contextvars.ContextVar("urc_run_counters", default=None)
+
+class _Metrics:
+    """Comptage des appels dans le profil du rerun du thread appelant, réglages du
+    profilage (communs au process)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.enabled = os.environ.get("URC_PROFILE", "").strip() == "1"
+
+    def supa_call(self, op, nbytes, ms):
+        run = _RUN_COUNTERS.get()
+        if run is None:
+            return
+        with self._lock:
+            c = run["supa"].setdefault(op, [0, 0, 0.0])   # "table.verbe" -> [appels, octets, ms]
+            c[0] += 1
+            c[1] += nbytes
+            c[2] += ms
+
+    def file_io(self, op, target, nbytes):
+        run = _RUN_COUNTERS.get()
+        if run is None:
+            return
+        with self._lock:
+            c = run["files"].setdefault(f"{op} {target}", [0, 0])   # -> [opérations, octets]
+            c[0] += 1
+            c[1] += nbytes
+
+    def counts(self, run):
+        """Copie des compteurs d'un rerun (un thread lié au rerun peut encore y ajouter)."""
+        with self._lock:
+            return ({k: list(v) for k, v in run["supa"].items()},
+                    {k: list(v) for k, v in run["files"].items()})
+
+    def log(self, record):
+        """Ajoute un profil au journal JSONL, avec rotation au-delà de PROFILE_LOG_MAX_BYTES."""
+        with self._lock:
+            try:
+                if (os.path.exists(PROFILE_LOG_FILE)
+                        and os.path.getsize(PROFILE_LOG_FILE) >= PROFILE_LOG_MAX_BYTES):
+                    for i in range(PROFILE_LOG_BACKUPS - 1, 0, -1):
+                        if os.path.exists(f"{PROFILE_LOG_FILE}.{i}"):
+                            os.replace(f"{PROFILE_LOG_FILE}.{i}", f"{PROFILE_LOG_FILE}.{i + 1}")
+                    os.replace(PROFILE_LOG_FILE, f"{PROFILE_LOG_FILE}.1")
+                with open(PROFILE_LOG_FILE, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            except OSError as e:
+                print(f"[LOCAL ERROR] {PROFILE_LOG_FILE} : {e}")
+
+@st.cache_resource
+def _metrics():
+    return _Metrics()
+
+def _count_io(op, target, nbytes):
+    _metrics().file_io(op, target, nbytes)
+
+def _payload_size(obj):
+    # Sérialiser coûte : la taille n'est mesurée que profilage actif
+    if obj is None or not _metrics().enabled:
+        return 0
+    try:
+        return len(json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8"))
+    except Exception:
+        return 0
+
+class _AccountedQuery:
+    """Requête PostgREST dont chaque execute() est compté sous « table.verbe »."""
+
+    def __init__(self, inner, table, verb=None, sent=0):
+        self._inner, self._table, self._verb, self._sent = inner, table, verb, sent
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            verb, sent = self._verb, self._sent
+            if name in _SUPA_VERBS:
+                verb = name
+                if name != "select" and args:
+                    sent = _payload_size(args[0])
+            out = attr(*args, **kwargs)
+            return _AccountedQuery(out, self._table, verb, sent) if hasattr(out, "execute") else out
+        return call
+
+    def execute(self):
+        t0, res = time.perf_counter(), None
+        try:
+            res = self._inner.execute()
+            return res
+        finally:
+            _metrics().supa_call(f"{self._table}.{self._verb or 'select'}",
+                                 self._sent + _payload_size(getattr(res, "data", None)),
+                                 (time.perf_counter() - t0) * 1000)
+
+class _AccountedBucket:
+    """Bucket Supabase Storage : chaque appel (upload, download…) est compté."""
+
+    def __init__(self, inner, bucket):
+        self._inner, self._bucket = inner, bucket
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            t0, out = time.perf_counter(), None
+            try:
+                out = attr(*args, **kwargs)
+                return out
+            finally:
+                size = sum(len(x) for x in (out, *args) if isinstance(x, (bytes, bytearray)))
+                _metrics().supa_call(f"storage:{self._bucket}.{name}", size,
+                                     (time.perf_counter() - t0) * 1000)
+        return call
+
+class _AccountedStorage:
+    def __init__(self, inner):
+        self._inner = inner
+
+    def from_(self, bucket):
+        return _AccountedBucket(self._inner.from_(bucket), bucket)
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+class _AccountedClient:
+    """Client Supabase instrumenté : table() et storage passent par les compteurs."""
+
+    def __init__(self, inner):
+        self._inner = inner
+
+    def table(self, name):
+        return _AccountedQuery(self._inner.table(name), name)
+
+    @property
+    def storage(self):
+        return _AccountedStorage(self._inner.storage)
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+# ── profil d'un rerun : sections chronométrées + appels faits par la session
+def _prof_begin():
+    """Début de rerun : clôt le profil du rerun précédent (affiché, consigné) et en ouvre un."""
+    prev = st.session_state.get("_prof_run")
+    if prev is not None:
+        record = _prof_record(prev)
+        st.session_state["_prof_last"] = record
+        if _metrics().enabled:
+            _metrics().log(record)
+    run = {
+        "ts": datetime.now().isoformat(timespec="seconds"), "t0": time.perf_counter(),
+        "open": None, "end": None, "sections": {}, "supa": {}, "files": {},
+    }
+    st.session_state["_prof_run"] = run
+    _RUN_COUNTERS.set(run)
+
+def _run_bound(fn):
+    """fn exécutée dans le contexte du rerun courant : le travail qu'une session
+    confie à un thread (préchargement) lui est compté."""
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
+
+def _prof_section(name):
+    """Passe à la section suivante de la page ; None marque la fin du script."""
+    run = st.session_state.get("_prof_run")
+    if run is None:
+        return
+    now = time.perf_counter()
+    if run["open"] is not None:
+        label, t0 = run["open"]
+        run["sections"][label] = run["sections"].get(label, 0) + (now - t0) * 1000
+    run["open"] = (name, now) if name is not None else None
+    if name is None:
+        run["end"] = now
+
+@contextmanager
+def _profiled(name):
+    """Sous-section chronométrée (liste J2, calcul du planning…), cumulée sur le rerun."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        run = st.session_state.get("_prof_run")
+        if run is not None:
+            run["sections"][name] = run["sections"].get(name, 0) + (time.perf_counter() - t0) * 1000
+
+def _prof_record(run):
+    supa, files = _metrics().counts(run)
+    d_supa = {op: {"appels": n, "octets": b, "ms": round(ms, 1)}
+              for op, (n, b, ms) in supa.items()}
+    d_files = {op: {"opérations": n, "octets": b} for op, (n, b) in files.items()}
+    return {
+        "ts": run["ts"],
+        # un rerun interrompu (st.rerun, st.stop) n'a pas de durée totale
+        "total_ms": round((run["end"] - run["t0"]) * 1000, 1) if run["end"] else None,
+        "sections": {k: round(v, 1) for k, v in run["sections"].items()},
+        "supabase": d_supa,
+        "fichiers": d_files,
+    }
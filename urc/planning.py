@@ -0,0 +1,934 @@
+"""Planification mensuelle des prélèvements : placement sous contraintes,
+redistribution des skips, équilibrage, re-planification incrémentale et horizon
+glissant."""
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from datetime import date as date_type, datetime, timedelta
+
+import streamlit as st
+
+from urc.workdays import get_holidays_cached
+from urc.storage import _content_hash
+
+# ── PLANIFICATION MENSUELLE ───────────────────────────────────────────────────
+# Moteur du planning (calcul, redistribution des skips, équilibrage) : fonctions
+# de niveau module, l'état de session n'est lu que par défaut — ce qui permet de
+# les appeler hors de l'onglet (export Excel, benchmarks/).
+# Le moteur est déterministe (graine stable, indépendante du process) et
+# _period_plan() mémorise son résultat sur une empreinte de ses entrées : les
+# mêmes données donnent le même planning, calculé une seule fois pour tous.
+# Quand les données changent, le planning précédent du mois est mis à jour
+# plutôt que recalculé (voir Re-planification incrémentale).
+PLANNING_MEMO_SIZE = 48   # plans (ancrages et plannings servis) gardés par process
+PLANNING_HORIZONS  = (3, 6, 12)   # horizons proposés (mois, à partir du mois en cours)
+PLANNING_CARRY_DAYS = 5   # jours ouvrés de M+1 ouverts aux skips de fin de mois
+
+def _stable_seed(*parts):
+    """Graine identique d'un process à l'autre (hash() des chaînes ne l'est pas)."""
+    digest = hashlib.blake2b("\x1f".join(map(str, parts)).encode("utf-8"), digest_size=8)
+    return int.from_bytes(digest.digest(), "big")
+
+# Occurrences mensuelles strictes selon la fréquence paramétrée
+def _total_occurrences_for_month(pt, mondays, all_wd):
+    freq_unit = (pt.get('frequency_unit') or '/ semaine').strip()
+    try:
+        freq_val = float(pt.get('frequency') or 0)
+    except (TypeError, ValueError):
+        freq_val = 0.0
+
+    nb_semaines = len(mondays)
+
+    if '/ jour' in freq_unit:
+        fv    = max(1, int(freq_val)) if freq_val > 0 else 1
+        total = fv * len(all_wd)
+        return total, fv, True
+    elif '/ semaine' in freq_unit:
+        fv    = max(1, int(freq_val)) if freq_val > 0 else 1
+        total = fv * nb_semaines
+        return total, 1, False
+    elif 'mois' in freq_unit.lower():
+        fv = max(1, int(freq_val)) if freq_val > 0 else 1
+        return fv, 1, False
+    else:
+        fv = max(1, int(freq_val)) if freq_val > 0 else 1
+        return fv * nb_semaines, 1, False
+
+# ── contraintes de placement ──────────────────────────────────────────────────
+# Capacité journalière par classe de salle (class_max_A, class_max_B… chargés
+# depuis la clé class_constraints), max_per_day de chaque point, jours déjà
+# réalisés et espacement des passages d'un même point.
+# Recherche locale après le placement initial, mois par mois, bornée par un délai
+# commun à tous les mois du calcul. Elle converge bien avant le délai sur un mois
+# (le planning reste alors déterministe) ; sur un long horizon chargé, le délai
+# l'arrête et les derniers mois gardent leur placement initial.
+PLANNING_SEARCH_MS = 300
+
+def _class_key(task):
+    return (task.get('room_class') or '').strip().upper()
+
+def _class_capacities(state=None):
+    """Capacités journalières par classe ({"A": 6, …}) ; classe absente = illimitée."""
+    state = st.session_state if state is None else state
+    caps = {}
+    for k in list(state.keys()):
+        if isinstance(k, str) and k.startswith("class_max_"):
+            try:
+                n = int(state[k])
+            except (TypeError, ValueError):
+                continue
+            if n > 0:
+                caps[k[len("class_max_"):].strip().upper()] = n
+    return caps
+
+class _DayLoad:
+    """Charge des jours ouvrés (totale, par classe, par point) et contrôle des
+    contraintes de placement."""
+
+    def __init__(self, days, capacities=None):
+        self.total    = dict.fromkeys(days, 0)
+        self.by_class = {d: {} for d in days}
+        self.by_label = {d: {} for d in days}
+        self.caps     = {str(k).strip().upper(): int(v) for k, v in (capacities or {}).items()}
+
+    def add(self, d, task, n=1):
+        cls, lbl = _class_key(task), task['label']
+        self.total[d] += n
+        self.by_class[d][cls] = self.by_class[d].get(cls, 0) + n
+        self.by_label[d][lbl] = self.by_label[d].get(lbl, 0) + n
+
+    def remove(self, d, task):
+        self.add(d, task, -1)
+
+    def class_full(self, d, task):
+        cls = _class_key(task)
+        cap = self.caps.get(cls)
+        return cap is not None and self.by_class[d].get(cls, 0) >= cap
+
+    def fits(self, d, task):
+        return (not self.class_full(d, task)
+                and self.by_label[d].get(task['label'], 0) < task.get('max_per_day', 1))
+
+def _capacity_overflows(plan, capacities):
+    """[(jour, classe, prélèvements, capacité)] des jours au-delà de la capacité."""
+    caps = {str(k).strip().upper(): v for k, v in (capacities or {}).items()}
+    out = []
+    for d in sorted(plan):
+        counts = {}
+        for t in plan[d]:
+            counts[_class_key(t)] = counts.get(_class_key(t), 0) + 1
+        out += [(d, c, n, caps[c]) for c, n in sorted(counts.items())
+                if c in caps and n > caps[c]]
+    return out
+
+def _place_occurrences(all_wd, requests, load):
+    """Place les occurrences des points non quotidiens sur les jours ouvrés.
+
+    requests : [(tâche, nombre, jours admissibles, écart idéal, graine)] par
+    priorité décroissante, une entrée par point et par mois. Chaque occurrence
+    vise une position régulièrement espacée parmi ses jours admissibles
+    (décalage stable propre au point) et prend le jour le moins chargé autour
+    de cette cible ; l'espacement tient compte des passages du même point déjà
+    placés, y compris le mois précédent. Une recherche locale bornée réduit
+    ensuite l'écart entre jours chargés et jours creux sans violer capacités,
+    max_per_day ni espacement. load doit déjà contenir les tâches fixes.
+    """
+    import bisect
+    import random as _rnd
+
+    n      = len(all_wd)
+    index  = {d: i for i, d in enumerate(all_wd)}
+    placed = {d: [] for d in all_wd}
+    spots  = {}   # label → indices (triés) des jours occupés
+    rules  = {}   # id(tâche placée) → (indices autorisés, écart idéal)
+
+    def _closest(lbl, i, skip=None):
+        js = spots.get(lbl, ())
+        k  = bisect.bisect_left(js, i)
+        return min((abs(i - j) for j in js[max(0, k - 2):k + 2] if j != skip), default=n)
+
+    for task, count, days, gap, seed in requests:
+        lbl     = task['label']
+        allowed = sorted(index[d] for d in days if d in index)
+        if not allowed or count <= 0:
+            continue
+        rule   = (set(allowed), gap)
+        offset = _rnd.Random(seed).random()
+        reach  = max(2, len(allowed) // count)
+        for j in range(count):
+            target = allowed[min(len(allowed) - 1, int((j + offset) * len(allowed) / count))]
+            # Jours voisins de la cible d'abord, toute la période s'ils sont tous pleins
+            free   = [i for i in allowed
+                      if abs(i - target) <= reach and load.fits(all_wd[i], task)]
+            if not free:
+                free = [i for i in allowed if load.fits(all_wd[i], task)]
+            if not free:
+                # Capacité de la classe épuisée : on garde la fréquence, au moindre dépassement
+                free = [i for i in allowed
+                        if load.by_label[all_wd[i]].get(lbl, 0) < task.get('max_per_day', 1)]
+            if not free:
+                break
+            best = min(free, key=lambda i: (max(0, gap - _closest(lbl, i)) * 100
+                                            + load.total[all_wd[i]] * 10
+                                            + abs(i - target)))
+            occ = dict(task)
+            placed[all_wd[best]].append(occ)
+            rules[id(occ)] = rule
+            load.add(all_wd[best], task)
+            bisect.insort(spots.setdefault(lbl, []), best)
+
+    # ── Recherche locale : du jour le plus chargé vers les jours plus creux, dans
+    # chaque mois (les jours admissibles d'une occurrence sont ceux de son mois) ──
+    deadline = time.perf_counter() + PLANNING_SEARCH_MS / 1000
+    blocks = {}
+    for i, d in enumerate(all_wd):
+        blocks.setdefault((d.year, d.month), []).append(i)
+    for block in blocks.values():
+        stuck = set()
+        while time.perf_counter() < deadline:
+            open_days = [i for i in block if i not in stuck]
+            if not open_days:
+                break
+            hi = max(open_days, key=lambda i: (load.total[all_wd[i]], -i))
+            lighter = sorted((i for i in block
+                              if load.total[all_wd[i]] < load.total[all_wd[hi]] - 1),
+                             key=lambda i: (load.total[all_wd[i]], i))
+            moved = False
+            for task in list(placed[all_wd[hi]]):
+                lbl = task['label']
+                allowed, gap = rules[id(task)]
+                before = _closest(lbl, hi, skip=hi)
+                for i in lighter:
+                    if i not in allowed or not load.fits(all_wd[i], task):
+                        continue
+                    if _closest(lbl, i, skip=hi) < min(before, gap):
+                        continue
+                    placed[all_wd[hi]].remove(task)
+                    load.remove(all_wd[hi], task)
+                    placed[all_wd[i]].append(task)
+                    load.add(all_wd[i], task)
+                    spots[lbl].remove(hi)
+                    bisect.insort(spots[lbl], i)
+                    moved = True
+                    break
+                if moved:
+                    break
+            if moved:
+                stuck.clear()
+            else:
+                stuck.add(hi)
+    return placed
+
+def _planning_task(pt, max_per_day):
+    """Tâche du planning pour un point (copiée à chaque occurrence placée)."""
+    return {
+        'label':       pt['label'],
+        'type':        pt.get('type', '—'),
+        'risk':        int(pt.get('risk_level', 1) or 1),
+        'room_class':  (pt.get('room_class') or '').strip(),
+        'max_per_day': max(1, max_per_day),
+        '_freq_unit':  (pt.get('frequency_unit') or '/ semaine'),
+    }
+
+def _month_mondays(year, month):
+    """Lundis des semaines qui touchent le mois."""
+    import calendar as _cm
+
+    first = date_type(year, month, 1)
+    last  = date_type(year, month, _cm.monthrange(year, month)[1])
+    cur, mondays = first - timedelta(days=first.weekday()), []
+    while cur <= last:
+        mondays.append(cur)
+        cur += timedelta(weeks=1)
+    return mondays
+
+def _month_working_days(year, month, holidays_set):
+    """Jours ouvrés du mois (hors week-ends et jours fériés)."""
+    import calendar as _cm
+
+    first = date_type(year, month, 1)
+    days  = (first + timedelta(days=i) for i in range(_cm.monthrange(year, month)[1]))
+    return [d for d in days if d.weekday() < 5 and d not in holidays_set]
+
+# Calcul du planning sur un ou plusieurs mois consécutifs
+def _compute_planning(months, holidays_set, prelevements=None, points=None, capacities=None):
+    """Planning brut de months ([(année, mois)…]) en une seule passe : les
+    fréquences restent comptées mois par mois, l'espacement des passages d'un
+    point et la charge des jours sont suivis d'un mois à l'autre."""
+    month_days = {ym: _month_working_days(ym[0], ym[1], holidays_set) for ym in months}
+    all_wd     = [d for ym in months for d in month_days[ym]]
+
+    planning = {d: [] for d in all_wd}
+
+    if prelevements is None:
+        prelevements = []
+    if capacities is None:
+        capacities = _class_capacities()
+
+    _done = {}   # (année, mois) → label → {jour: nombre}
+    for _p in prelevements:
+        if _p.get("archived", False) or not _p.get("date"):
+            continue
+        try:
+            _d = datetime.fromisoformat(_p["date"]).date()
+        except Exception:
+            continue
+        if (_d.year, _d.month) not in month_days:
+            continue
+        _by_day = _done.setdefault((_d.year, _d.month), {}).setdefault(_p.get("label", ""), {})
+        _by_day[_d] = _by_day.get(_d, 0) + 1
+
+    # ── Trier les points par risque décroissant : les plus critiques sont servis
+    # en premier quand la capacité d'une classe ne suffit pas ────────────────────
+    sorted_points = sorted(
+        st.session_state.points if points is None else points,
+        key=lambda p: -int(p.get('risk_level', 1) or 1)
+    )
+
+    load     = _DayLoad(all_wd, capacities)
+    requests = []
+    for pt in sorted_points:
+        lbl = pt['label']
+        for year, month in months:
+            wd_month = month_days[(year, month)]
+            _done_this_month = _done.get((year, month), {})
+
+            total_occ, max_per_day, is_daily = _total_occurrences_for_month(
+                pt, _month_mondays(year, month), wd_month
+            )
+
+            _already_done = sum(_done_this_month.get(lbl, {}).values())
+            total_occ     = max(0, total_occ - _already_done)
+
+            if total_occ <= 0:
+                continue
+
+            task_base = _planning_task(pt, max_per_day)
+
+            _done_dates_for_pt = set(_done_this_month.get(lbl, {}).keys())
+
+            if is_daily:
+                # Points quotidiens : jours imposés, ils consomment la capacité en premier
+                for d in wd_month:
+                    if d in _done_dates_for_pt:
+                        continue
+                    for _ in range(max_per_day):
+                        planning[d].append(dict(task_base))
+                        load.add(d, task_base)
+            else:
+                # ── Espacement souhaité entre deux occurrences du même point (en
+                # jours ouvrés) — pour 1/semaine : idéalement ~5 jours ouvrés
+                days = [d for d in wd_month if d not in _done_dates_for_pt]
+                if '/ semaine' in task_base['_freq_unit'] and days:
+                    ideal_gap = max(1, len(days) // total_occ)
+                else:
+                    ideal_gap = 1
+                requests.append((task_base, total_occ, days, ideal_gap,
+                                 _stable_seed(year, month, lbl)))
+
+    for d, tasks in _place_occurrences(all_wd, requests, load).items():
+        planning[d].extend(tasks)
+
+    for d in planning:
+        planning[d].sort(key=lambda x: (-x['risk'], x['label']))
+
+    return planning
+
+# Calcul du planning mensuel
+def _compute_monthly_planning(year, month, holidays_set, prelevements=None, points=None,
+                              capacities=None):
+    return _compute_planning([(year, month)], holidays_set, prelevements, points, capacities)
+
+# Redistribution des skips — dans le mois du jour skippé, puis report sur M+1
+def _skip_targets(day, future_days, plan, label):
+    """Jours candidats pour reporter une tâche skippée le jour day : jours futurs
+    du même mois sans ce point ; à défaut, les PLANNING_CARRY_DAYS premiers jours
+    futurs suivants du planning (mois suivant, quand il est planifié)."""
+    in_month = [d for d in future_days if (d.year, d.month) == (day.year, day.month)]
+    carry    = [d for d in future_days if (d.year, d.month) > (day.year, day.month)]
+    carry    = carry[:PLANNING_CARRY_DAYS]
+
+    def _free(days):
+        return [d for d in days if not any(t["label"] == label for t in plan.get(d, []))]
+
+    return _free(in_month) or _free(carry) or in_month or carry
+
+def _redistribute_skips(monthly_plan, planning_skips, holidays_set, frozen=None, today=None,
+                        capacities=None):
+    """
+    Redistribue les tâches skippées vers des jours futurs du même mois (voir
+    _skip_targets pour le report sur le mois suivant), en respectant si
+    possible la capacité journalière de leur classe.
+    planning_skips DOIT avoir des clés en chaînes ISO (YYYY-MM-DD).
+    """
+    # Les tâches ne sont jamais modifiées : copier les listes suffit
+    plan            = {d: list(ts) for d, ts in monthly_plan.items()}
+    today           = today or datetime.today().date()
+    all_days_sorted = sorted(plan.keys())
+    if frozen is None:
+        frozen = st.session_state.get("planning_frozen_weeks", {})
+    if capacities is None:
+        capacities = _class_capacities()
+
+    def _is_frozen_day(d):
+        wk = (d - timedelta(days=d.weekday())).isoformat()
+        return wk in frozen
+
+    future_days = [
+        d for d in all_days_sorted
+        if d > today
+        and not _is_frozen_day(d)
+    ]
+    load = _DayLoad(future_days, capacities)
+    for d in future_days:
+        for t in plan.get(d, []):
+            load.add(d, t)
+
+    for day in all_days_sorted:
+        # ── FIX : clé toujours en string ISO ──────────────────────────
+        day_key = day.isoformat() if hasattr(day, 'isoformat') else str(day)
+        skipped_labels = planning_skips.get(day_key, [])
+        if not skipped_labels:
+            continue
+
+        tasks_to_move = [
+            t for t in plan.get(day, [])
+            if t["label"] in skipped_labels
+            and "/ jour" not in t.get("_freq_unit", "")
+        ]
+        plan[day] = [
+            t for t in plan.get(day, [])
+            if t["label"] not in skipped_labels
+        ]
+
+        for task in tasks_to_move:
+            candidates = _skip_targets(day, future_days, plan, task["label"])
+            if not candidates:
+                continue
+            candidates = [d for d in candidates if not load.class_full(d, task)] or candidates
+            best = min(candidates, key=lambda d: len(plan.get(d, [])))
+            plan.setdefault(best, []).append(task)
+            load.add(best, task)
+
+    return plan
+
+def _enforce_capacities(plan, days, capacities):
+    """Dernière passe : les tâches d'un jour au-delà de la capacité de leur classe
+    partent vers un jour du même mois (parmi days) qui a de la place pour leur classe
+    et pour le point — la même semaine d'abord, le jour le moins chargé ensuite.
+    Les points quotidiens ne bougent pas. Modifie plan ; les autres jours non plus."""
+    load = _DayLoad(days, capacities)
+    if not load.caps:
+        return
+    for d in days:
+        for t in plan[d]:
+            load.add(d, t)
+    for d in days:
+        for task in reversed(plan[d][:]):   # risque le plus faible d'abord
+            cls = _class_key(task)
+            if (load.caps.get(cls) is None or load.by_class[d].get(cls, 0) <= load.caps[cls]
+                    or '/ jour' in task.get('_freq_unit', '')):
+                continue
+            week = d - timedelta(days=d.weekday())
+            dest = [e for e in days if (e.year, e.month) == (d.year, d.month)
+                    and e != d and load.fits(e, task)]
+            if not dest:
+                continue
+            e = min(dest, key=lambda e: (e - timedelta(days=e.weekday()) != week,
+                                         load.total[e], abs((e - d).days), e))
+            plan[d].remove(task)
+            load.remove(d, task)
+            plan[e].append(task)
+            load.add(e, task)
+            plan[e].sort(key=lambda x: (-x.get('risk', 1), x.get('label', '')))
+
+# Équilibrage des semaines
+def _balance_weeks(plan, holidays_set, frozen=None, today=None, capacities=None):
+    plan   = {d: list(ts) for d, ts in plan.items()}
+    today  = today or datetime.today().date()
+    if frozen is None:
+        frozen = st.session_state.get("planning_frozen_weeks", {})
+    if capacities is None:
+        capacities = _class_capacities()
+
+    weeks = sorted(set(d - timedelta(days=d.weekday()) for d in plan.keys()))
+
+    label_last_day = {}  # mémoire inter-semaines
+    open_days      = []  # jours rééquilibrés, ouverts à la passe des capacités
+
+    for wk_monday in weeks:
+        wk_key    = wk_monday.isoformat()
+        wk_friday = wk_monday + timedelta(days=4)
+
+        if wk_key in frozen:
+            for day_iso, tasks in frozen[wk_key].items():
+                try:
+                    d = date_type.fromisoformat(day_iso)
+                    if d in plan:
+                        plan[d] = list(tasks)
+                    for t in tasks:
+                        label_last_day[t['label']] = d
+                except Exception:
+                    pass
+            continue
+
+        if wk_friday < today:
+            for d in sorted(d for d in plan.keys() if wk_monday <= d <= wk_friday):
+                for t in plan.get(d, []):
+                    label_last_day[t['label']] = d
+            continue
+
+        all_week_days = sorted([
+            d for d in plan.keys()
+            if wk_monday <= d <= wk_friday
+            and d not in holidays_set
+        ])
+        if not all_week_days:
+            continue
+
+        is_current_week = (wk_monday <= today <= wk_friday)
+        if is_current_week:
+            free_days   = [d for d in all_week_days if d >= today]
+            locked_days = [d for d in all_week_days if d < today]
+        else:
+            free_days   = all_week_days
+            locked_days = []
+
+        if not free_days:
+            for d in locked_days:
+                for t in plan.get(d, []):
+                    label_last_day[t['label']] = d
+            continue
+        open_days.extend(free_days)
+
+        # Une tâche reste dans son mois : la fréquence est comptée par mois
+        all_tasks, task_month = [], []
+        for d in free_days:
+            all_tasks.extend(plan.get(d, []))
+            task_month.extend([(d.year, d.month)] * len(plan.get(d, [])))
+            plan[d] = []
+
+        if not all_tasks:
+            for d in locked_days:
+                for t in plan.get(d, []):
+                    label_last_day[t['label']] = d
+            continue
+
+        day_counts = {d: len(plan.get(d, [])) for d in free_days}
+        week_load  = _DayLoad(free_days, capacities)
+
+        # ── Pré-calculer le nb d'occurrences de chaque label dans la semaine ──
+        label_occ_in_week = {}
+        for t in all_tasks:
+            label_occ_in_week[t['label']] = label_occ_in_week.get(t['label'], 0) + 1
+
+        if week_load.caps:
+            # Capacités limitées : les points qui reviennent le plus souvent dans la
+            # semaine (quotidiens d'abord) ont le moins de jours possibles, on les
+            # place avant les autres
+            _order = lambda x: (-label_occ_in_week[x['label']],
+                                -x.get('risk', 1), x.get('label', ''))
+        else:
+            _order = lambda x: (-x.get('risk', 1), x.get('label', ''))
+        ordered = sorted(zip(all_tasks, task_month), key=lambda tm: _order(tm[0]))
+
+        # ── Mémoire intra-semaine : dernier jour assigné dans CETTE semaine ───
+        label_last_day_week = {}
+
+        for task, ym in ordered:
+            lbl     = task['label']
+            n_occ   = label_occ_in_week.get(lbl, 1)
+            n_free  = len(free_days)
+            month_days = [d for d in free_days if (d.year, d.month) == ym]
+
+            # Espacement idéal dans la semaine selon la fréquence
+            # Ex: 3 occ sur 5 jours → gap = 5//3 = 1 (Lun/Mer/Ven)
+            # Ex: 1 occ sur 5 jours → gap = 5 (une seule fois, n'importe quel jour)
+            # Ex: 2 occ sur 5 jours → gap = 2 (Lun/Mer ou Mar/Jeu...)
+            ideal_gap_week = max(1, n_free // n_occ) if n_occ > 0 else 1
+
+            # Dernier jour connu : intra-semaine prioritaire, sinon inter-semaines
+            last_d_week  = label_last_day_week.get(lbl)
+            last_d_inter = label_last_day.get(lbl)
+
+            # (les jours libres ont été vidés : week_load connaît leurs points)
+            candidates = [d for d in month_days if not week_load.by_label[d].get(lbl)]
+            if not candidates:
+                candidates = month_days
+            # Capacité de la classe : jours encore ouverts d'abord
+            candidates = [d for d in candidates if not week_load.class_full(d, task)] or candidates
+
+            def _week_score(d, _lw=last_d_week, _li=last_d_inter, _gap=ideal_gap_week):
+                load = day_counts[d] * 10
+
+                # ── Espacement intra-semaine (priorité haute) ─────────────────
+                if _lw is not None:
+                    diff_w = abs((d - _lw).days)
+                    if diff_w == 0:
+                        intra_penalty = 9999
+                    elif diff_w < _gap:
+                        # Trop proche du précédent passage dans la semaine
+                        intra_penalty = 300 * (_gap - diff_w)
+                    else:
+                        intra_penalty = 0
+                else:
+                    intra_penalty = 0
+
+                # ── Espacement inter-semaines (éviter consécutif Ven→Lun) ─────
+                if _li is not None and _lw is None:
+                    diff_i = abs((d - _li).days)
+                    if diff_i <= 1:
+                        inter_penalty = 200
+                    elif diff_i <= 3:
+                        inter_penalty = 50
+                    else:
+                        inter_penalty = 0
+                else:
+                    inter_penalty = 0
+
+                return load + intra_penalty + inter_penalty
+
+            best = min(candidates, key=_week_score)
+            plan.setdefault(best, []).append(task)
+            day_counts[best] += 1
+            week_load.add(best, task)
+            label_last_day_week[lbl] = best
+            label_last_day[lbl]      = best
+
+        for d in free_days:
+            plan[d].sort(key=lambda x: (-x.get('risk', 1), x.get('label', '')))
+
+        for d in locked_days:
+            for t in plan.get(d, []):
+                label_last_day[t['label']] = d
+
+    # Une semaine peut recevoir plus que sa capacité (skips, fin de mois) : le
+    # reste du mois absorbe le surplus dès qu'un jour a de la place
+    _enforce_capacities(plan, open_days, capacities)
+    return plan
+
+# ── Re-planification incrémentale ─────────────────────────────────────────────
+# Le planning servi est toujours construit en deux temps, quel que soit le chemin :
+#  1. un planning d'ancrage, calcul complet (calcul, redistribution des skips puis
+#     équilibrage des semaines) sur les entrées privées des prélèvements et des
+#     skips datés d'aujourd'hui ou après ; mémorisé sur sa propre empreinte ;
+#  2. ces prélèvements et skips du jour et à venir, appliqués par _replan sur les
+#     jours ouverts (futurs, hors semaines gelées).
+# L'ancrage ne dépend que des entrées : deux process, ou un process redémarré,
+# servent le même planning pour les mêmes entrées. Un prélèvement ou un non-fait
+# saisi dans la journée ne coûte que l'étape 2 ; une semaine gelée, un jour passé
+# modifiés ou un changement de date refont l'ancrage.
+# Un point ajouté, modifié (fréquence, classe…) ou retiré ne refait pas l'ancrage
+# quand celui des mêmes autres entrées est en mémoire : _replan n'y replace que
+# ce point, sur les jours ouverts. Le nouvel ancrage dépend alors du précédent
+# (un autre process, sans cet ancrage en mémoire, fait le calcul complet) ; au-delà
+# de PLANNING_REPLAN_MAX_SHARE des points modifiés, calcul complet.
+PLANNING_REPLAN_MAX_SHARE = 0.25   # part des points modifiés au-delà de laquelle on recalcule
+
+def _months_scope(months):
+    """(préfixes AAAA-MM, bornes des lundis des semaines qui touchent les mois)."""
+    prefixes = {f"{y:04d}-{m:02d}" for y, m in months}
+    first    = date_type(*months[0], 1)
+    y, m     = months[-1]
+    return prefixes, (first - timedelta(days=6)).isoformat(), f"{y:04d}-{m:02d}-31"
+
+def _planning_inputs(months, points, prelevements, skips, frozen):
+    """Entrées du planning de months sous une forme comparable d'un calcul à l'autre."""
+    prefixes, lo, hi = _months_scope(months)
+    done = Counter(
+        (p.get('label', ''), str(p['date'])[:10]) for p in prelevements
+        if not p.get('archived', False) and str(p.get('date') or '')[:7] in prefixes
+    )
+    return {
+        "points": {p.get('label'): (p.get('type'), p.get('risk_level'), p.get('room_class'),
+                                    p.get('frequency'), p.get('frequency_unit'))
+                   for p in points},
+        "done":   done,
+        "skips":  {k: frozenset(v) for k, v in skips.items() if str(k)[:7] in prefixes},
+        "frozen": {k: json.dumps(v, sort_keys=True, default=str)
+                   for k, v in frozen.items() if lo <= k <= hi},
+    }
+
+def _plan_moves(before, after):
+    """Différence entre deux plannings : [(point, ancien jour, nouveau jour)] ;
+    None d'un côté pour une occurrence ajoutée ou retirée."""
+    removed, added = {}, {}
+    for d in sorted(set(before) | set(after)):
+        old = Counter(t['label'] for t in before.get(d, []))
+        new = Counter(t['label'] for t in after.get(d, []))
+        for lbl, n in (old - new).items():
+            removed.setdefault(lbl, []).extend([d] * n)
+        for lbl, n in (new - old).items():
+            added.setdefault(lbl, []).extend([d] * n)
+    moves = []
+    for lbl in set(removed) | set(added):
+        src, dst = removed.get(lbl, []), added.get(lbl, [])
+        for i in range(max(len(src), len(dst))):
+            moves.append((lbl, src[i] if i < len(src) else None,
+                          dst[i] if i < len(dst) else None))
+    return sorted(moves, key=lambda m: (m[1] or m[2], m[0]))
+
+def _changed_points(old, new):
+    """Libellés des points ajoutés, modifiés ou retirés entre deux entrées."""
+    return {lbl for lbl in set(old["points"]) | set(new["points"])
+            if old["points"].get(lbl) != new["points"].get(lbl)}
+
+def _replan(base, inputs, points, today, capacities):
+    """Applique au planning d'ancrage (base : brut, final et entrées), sur les jours
+    ouverts, les points ajoutés, modifiés ou retirés, les prélèvements réalisés et
+    les skips ajoutés depuis ses entrées. Les semaines gelées sont celles de
+    l'ancrage ; le brut (lu pour les semaines passées) reste celui de l'ancrage.
+
+    Renvoie (brut, final) ; base n'est pas modifié.
+    """
+    old = base["inputs"]
+    changed = _changed_points(old, inputs)
+    if not changed and inputs["done"] == old["done"] and inputs["skips"] == old["skips"]:
+        return base["raw"], base["plan"]
+
+    plan = {d: list(ts) for d, ts in base["plan"].items()}
+    open_days = [d for d in sorted(plan) if d > today
+                 and (d - timedelta(days=d.weekday())).isoformat() not in inputs["frozen"]]
+    load = _DayLoad(open_days, capacities)
+    for d in open_days:
+        for t in plan[d]:
+            load.add(d, t)
+    by_label = {p.get('label'): p for p in points}
+
+    def _on_day(d, lbl):
+        return sum(1 for t in plan.get(d, []) if t['label'] == lbl)
+
+    # ── Points ajoutés, modifiés ou retirés : leurs occurrences des jours ouverts
+    # sont retirées puis replacées comme dans _compute_planning (les prélèvements
+    # réalisés et les occurrences des jours passés ou gelés restent comptés) ──────
+    if changed:
+        for d in open_days:
+            for t in [t for t in plan[d] if t['label'] in changed]:
+                plan[d].remove(t)
+                load.remove(d, t)
+        done_days = {}
+        for (lbl, day), n in inputs["done"].items():
+            if lbl in changed:
+                done_days.setdefault(lbl, {})[date_type.fromisoformat(day)] = n
+        months = sorted({(d.year, d.month) for d in plan})
+        requests = []
+        for pt in sorted((by_label[lbl] for lbl in changed if lbl in by_label),
+                         key=lambda p: (-int(p.get('risk_level', 1) or 1), p['label'])):
+            lbl = pt['label']
+            for year, month in months:
+                wd_month = [d for d in sorted(plan) if (d.year, d.month) == (year, month)]
+                total_occ, max_per_day, is_daily = _total_occurrences_for_month(
+                    pt, _month_mondays(year, month), wd_month)
+                task  = _planning_task(pt, max_per_day)
+                done  = {d: n for d, n in done_days.get(lbl, {}).items()
+                         if (d.year, d.month) == (year, month)}
+                days  = [d for d in wd_month if d in load.total and d not in done]
+                if is_daily:
+                    for d in days:
+                        for _ in range(max_per_day):
+                            plan[d].append(dict(task))
+                            load.add(d, task)
+                    continue
+                # Occurrences des jours fermés non réalisées ce jour-là : déjà comptées
+                kept  = sum(max(0, _on_day(d, lbl) - done.get(d, 0))
+                            for d in wd_month if d not in load.total)
+                count = total_occ - sum(done.values()) - kept
+                if count <= 0 or not days:
+                    continue
+                gap = max(1, len(days) // count) if '/ semaine' in task['_freq_unit'] else 1
+                requests.append((task, count, days, gap, _stable_seed(year, month, lbl)))
+        for d, ts in _place_occurrences(open_days, requests, load).items():
+            plan[d].extend(ts)
+
+    # ── Prélèvements réalisés : une occurrence future du mois en moins quand le
+    # jour de réalisation n'était pas planifié ─────────────────────────────────────
+    for (lbl, day), n in sorted((inputs["done"] - old["done"]).items()):
+        pt = by_label.get(lbl)
+        if lbl in changed or pt is None or '/ jour' in (pt.get('frequency_unit') or ''):
+            continue
+        d = date_type.fromisoformat(day)
+        for _ in range(max(0, min(n, inputs["done"][(lbl, day)] - _on_day(d, lbl)))):
+            future = [x for x in open_days
+                      if (x.year, x.month) == (d.year, d.month) and _on_day(x, lbl)]
+            if not future:
+                break
+            x = min(future, key=lambda x: (abs((x - d).days), x))
+            t = next(t for t in plan[x] if t['label'] == lbl)
+            plan[x].remove(t)
+            load.remove(x, t)
+
+    # ── Nouveaux skips : même report que _redistribute_skips ───────────────────
+    for k in sorted(inputs["skips"]):
+        labels = inputs["skips"][k] - old["skips"].get(k, frozenset())
+        try:
+            day = date_type.fromisoformat(k)
+        except Exception:
+            continue
+        if not labels or day not in plan:
+            continue
+        to_move = [t for t in plan[day]
+                   if t['label'] in labels and "/ jour" not in t.get('_freq_unit', '')]
+        if day in load.total:
+            for t in plan[day]:
+                if t['label'] in labels:
+                    load.remove(day, t)
+        plan[day] = [t for t in plan[day] if t['label'] not in labels]
+        targets = [d for d in open_days if d != day]
+        for task in to_move:
+            candidates = _skip_targets(day, targets, plan, task['label'])
+            if not candidates:
+                continue
+            candidates = [d for d in candidates if not load.class_full(d, task)] or candidates
+            best = min(candidates, key=lambda d: len(plan[d]))
+            plan[best].append(task)
+            load.add(best, task)
+
+    _enforce_capacities(plan, open_days, capacities)
+    for ts in plan.values():
+        ts.sort(key=lambda x: (-x.get('risk', 1), x.get('label', '')))
+    return base["raw"], plan
+
+@st.cache_resource
+def _planning_memo():
+    """Plans déjà calculés, partagés par toutes les sessions : empreinte → entrée
+    (ancrages : brut, final, entrées ; plannings servis : brut, final ; dernier
+    ancrage des mêmes entrées hors points : sa clé)."""
+    return {"lock": threading.Lock(), "plans": {}}
+
+def _memo_get(key):
+    memo = _planning_memo()
+    with memo["lock"]:
+        hit = memo["plans"].pop(key, None)
+        if hit is not None:
+            memo["plans"][key] = hit   # le plus récent en dernier
+        return hit
+
+def _memo_put(key, entry):
+    memo = _planning_memo()
+    with memo["lock"]:
+        plans = memo["plans"]
+        plans[key] = entry
+        while len(plans) > PLANNING_MEMO_SIZE:
+            del plans[next(iter(plans))]
+
+def _planning_fingerprint(months, holidays_set, points, prelevements, skips, frozen, today,
+                          capacities):
+    """Empreinte de tout ce dont dépend le planning de months."""
+    prefixes, lo, hi = _months_scope(months)
+    parts = [
+        months, today.isoformat(),
+        sorted(d.isoformat() for d in holidays_set if (d.year, d.month) in set(months)),
+        [(p.get('label'), p.get('type'), p.get('risk_level'), p.get('room_class'),
+          p.get('frequency'), p.get('frequency_unit')) for p in points],
+        sorted((p.get('label', ''), p['date']) for p in prelevements
+               if not p.get('archived', False) and str(p.get('date') or '')[:7] in prefixes),
+        sorted((k, sorted(v)) for k, v in skips.items() if str(k)[:7] in prefixes),
+        # semaines gelées qui touchent la période (lundi au plus 6 jours avant le 1er)
+        sorted((k, v) for k, v in frozen.items() if lo <= k <= hi),
+        sorted(capacities.items()),
+    ]
+    return _content_hash(json.dumps(parts, sort_keys=True, default=str))
+
+def _planning_anchor(months, holidays_set, points, prelevements, skips, frozen, today,
+                     capacities):
+    """Planning d'ancrage (brut, final, entrées) : calcul complet sur les prélèvements
+    et les skips datés d'avant today, mémorisé sur l'empreinte de ces entrées. Quand
+    seuls des points diffèrent d'un ancrage en mémoire, il est repris par _replan."""
+    cut          = today.isoformat()
+    prelevements = [p for p in prelevements if str(p.get('date') or '')[:10] < cut]
+    skips        = {k: v for k, v in skips.items() if str(k)[:10] < cut}
+    key = "ancrage:" + _planning_fingerprint(months, holidays_set, points, prelevements,
+                                             skips, frozen, today, capacities)
+    entry = _memo_get(key)
+    if entry is not None:
+        return entry
+    # Dernier ancrage des mêmes entrées hors points (empreinte sans les points)
+    family = "ancrages:" + _planning_fingerprint(months, holidays_set, [], prelevements,
+                                                 skips, frozen, today, capacities)
+    inputs  = _planning_inputs(months, points, prelevements, skips, frozen)
+    sibling = _memo_get(family)
+    sibling = sibling and _memo_get(sibling["key"])
+    if (sibling is not None and len(_changed_points(sibling["inputs"], inputs))
+            <= max(1, PLANNING_REPLAN_MAX_SHARE * len(inputs["points"]))):
+        raw, plan = _replan(sibling, inputs, points, today, capacities)
+    else:
+        raw  = _compute_planning(months, holidays_set, prelevements, points, capacities)
+        plan = _redistribute_skips(raw, skips, holidays_set, frozen, today, capacities)
+        plan = _balance_weeks(plan, holidays_set, frozen, today, capacities)
+    entry = {"raw": raw, "plan": plan, "inputs": inputs}
+    _memo_put(key, entry)
+    _memo_put(family, {"key": key})
+    return entry
+
+def _period_plan(months, holidays_set, points=None, prelevements=None,
+                 skips=None, frozen=None, today=None, capacities=None):
+    """Planning (brut, final) de mois consécutifs ([(année, mois)…]), mémorisé sur
+    l'empreinte des entrées : planning d'ancrage, puis prélèvements et skips du
+    jour et à venir (voir Re-planification incrémentale). Le résultat ne dépend que
+    des entrées. Les plans renvoyés sont partagés : ne pas modifier leurs listes."""
+    ss     = st.session_state
+    months = [tuple(ym) for ym in months]
+    points = ss.points if points is None else points
+    prelevements = ss.get("prelevements", []) if prelevements is None else prelevements
+    skips  = ss.get("planning_skips", {}) if skips is None else skips
+    frozen = ss.get("planning_frozen_weeks", {}) if frozen is None else frozen
+    today  = today or datetime.today().date()
+    capacities = _class_capacities() if capacities is None else capacities
+    # Seuls les prélèvements de la période comptent : un seul parcours de la liste
+    prefixes = _months_scope(months)[0]
+    prelevements = [p for p in prelevements if str(p.get('date') or '')[:7] in prefixes]
+
+    key = _planning_fingerprint(months, holidays_set, points, prelevements,
+                                skips, frozen, today, capacities)
+    hit = _memo_get(key)
+    if hit is not None:
+        return hit["raw"], hit["plan"]
+    base = _planning_anchor(months, holidays_set, points, prelevements, skips, frozen,
+                            today, capacities)
+    inputs = _planning_inputs(months, points, prelevements, skips, frozen)
+    raw, plan = _replan(base, inputs, points, today, capacities)
+    _memo_put(key, {"raw": raw, "plan": plan})
+    return raw, plan
+
+def _monthly_plan(year, month, holidays_set, points=None, prelevements=None,
+                  skips=None, frozen=None, today=None, capacities=None):
+    """Planning d'un mois seul (brut, final) — voir _period_plan."""
+    return _period_plan([(year, month)], holidays_set, points, prelevements,
+                        skips, frozen, today, capacities)
+
+# ── Horizon glissant ──────────────────────────────────────────────────────────
+# Le mois en cours et les suivants (3, 6 ou 12 mois) forment un seul planning :
+# les skips de fin de mois sont reportés sur M+1 et l'espacement des passages
+# suit le point d'un mois à l'autre. Calendrier et export Excel lisent leurs
+# jours dans ce planning ; les mois hors horizon restent calculés un par un.
+def _horizon_months(today=None, horizon=None):
+    """Mois de l'horizon glissant qui commence au mois de today."""
+    today   = today or datetime.today().date()
+    horizon = horizon or st.session_state.get("planning_horizon", PLANNING_HORIZONS[0])
+    return [((today.month - 1 + i) // 12 + today.year, (today.month - 1 + i) % 12 + 1)
+            for i in range(int(horizon))]
+
+def _planning_range(start, end, points=None, prelevements=None, skips=None, frozen=None,
+                    today=None, capacities=None, horizon=None):
+    """Planning (brut, final) des jours ouvrés de start à end, servi par l'horizon
+    glissant pour les mois qu'il couvre, mois par mois pour les autres."""
+    today = today or datetime.today().date()
+    hz    = _horizon_months(today, horizon)
+    wanted = sorted({(start + timedelta(days=i)).timetuple()[:2]
+                     for i in range((end - start).days + 1)})
+    args  = dict(points=points, prelevements=prelevements, skips=skips, frozen=frozen,
+                 today=today, capacities=capacities)
+    raw, plan = {}, {}
+    parts = []
+    if any(ym in hz for ym in wanted):
+        hol = set().union(*(get_holidays_cached(y) for y in {y for y, _ in hz}))
+        parts.append(_period_plan(hz, hol, **args))
+    for y, m in wanted:
+        if (y, m) not in hz:
+            parts.append(_monthly_plan(y, m, get_holidays_cached(y), **args))
+    for r, p in parts:
+        raw.update((d, ts) for d, ts in r.items() if start <= d <= end)
+        plan.update((d, ts) for d, ts in p.items() if start <= d <= end)
+    return raw, plan
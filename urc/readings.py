@@ -0,0 +1,158 @@
+"""Échéances des lectures J2/J7, migrations de données et compteurs des onglets
+de lecture."""
+import json
+from datetime import date
+
+import streamlit as st
+
+from urc.constants import MIGRATIONS_FILE
+from urc.workdays import next_working_day_offset
+from urc.storage import (
+    _enqueue_write, _flush_blob, _local_read_json, _repo, save_schedules,
+    _shared_versions, _supa_get,
+)
+
+# ── MIGRATIONS DE DONNÉES ─────────────────────────────────────────────────────
+# Corrections ponctuelles des données déjà enregistrées : chaque migration porte un
+# numéro de version, celui atteint est conservé (clé app_state 'migrations' + fichier
+# local) et la migration ne repasse plus, quelle que soit la session.
+READING_OFFSETS = {"J2": 2, "J7": 7}
+
+def _reading_due_date(sample_date, when):
+    """Échéance ISO d'une lecture J2/J7 (jours ouvrés), ou None si incalculable."""
+    offset = READING_OFFSETS.get(when)
+    if offset is None or not sample_date:
+        return None
+    try:
+        return next_working_day_offset(date.fromisoformat(str(sample_date)[:10]), offset).isoformat()
+    except ValueError:
+        return None
+
+def _schedule_due(s):
+    """Échéance (date) d'une lecture J2/J7. Une lecture sans due_date (ancienne
+    donnée, import) la reçoit, recalculée depuis la date du prélèvement ; None si
+    incalculable."""
+    due = s.get("due_date")
+    if not due:
+        smp = _repo().prelevement(s.get("sample_id"))
+        due = _reading_due_date(smp.get("date") if smp else None, s.get("when"))
+        if not due:
+            return None
+        s["due_date"] = due
+    try:
+        return date.fromisoformat(str(due)[:10])
+    except ValueError:
+        return None
+
+def _reschedule_sample(sample, label=None):
+    """Recalcule les échéances J2/J7 (et le libellé) des lectures d'un prélèvement
+    dont la date a changé ; True si une lecture a été modifiée."""
+    changed = False
+    for sch in _repo().schedules_for(sample.get("id")):
+        due = _reading_due_date(sample.get("date"), sch.get("when"))
+        if due and sch.get("due_date") != due:
+            sch["due_date"] = due
+            changed = True
+        if label is not None and sch.get("label") != label:
+            sch["label"] = label
+            changed = True
+    return changed
+
+def _realign_due_dates(pending_only=False):
+    """Réaligne les échéances J2/J7 sur la date du prélèvement (jours ouvrés du
+    calendrier du site) ; renvoie le nombre d'échéances modifiées."""
+    changed = 0
+    for s in st.session_state.schedules:
+        if pending_only and s.get("status") != "pending":
+            continue
+        smp = _repo().prelevement(s.get("sample_id"))
+        new_due = _reading_due_date(smp.get("date") if smp else None, s.get("when"))
+        if new_due and s.get("due_date") != new_due:
+            s["due_date"] = new_due
+            changed += 1
+    if changed:
+        save_schedules(st.session_state.schedules)
+    return changed
+
+def _migrate_schedule_due_dates():
+    """Réaligne les échéances J2/J7 sur la date du prélèvement (jours ouvrés)."""
+    _realign_due_dates()
+
+DATA_MIGRATIONS = [
+    ("schedule_due_dates", 1, _migrate_schedule_due_dates),
+]
+
+def load_migrations():
+    raw_json = _supa_get('migrations')
+    if raw_json:
+        try:
+            raw = json.loads(raw_json)
+            if isinstance(raw, dict):
+                return raw
+        except Exception:
+            pass
+    raw = _local_read_json(MIGRATIONS_FILE)
+    return raw if isinstance(raw, dict) else {}
+
+def save_migrations(done):
+    _enqueue_write('migrations', _flush_blob, 'migrations',
+                   json.dumps(done, ensure_ascii=False), MIGRATIONS_FILE)
+
+def _run_data_migrations():
+    """Exécute (une fois) les migrations dont la version n'est pas encore atteinte."""
+    done = load_migrations()
+    todo = [(name, version, fn) for name, version, fn in DATA_MIGRATIONS
+            if int(done.get(name, 0) or 0) < version]
+    if not todo:
+        return
+    for name, version, fn in todo:
+        try:
+            fn()
+        except Exception as e:
+            print(f"[LOCAL ERROR] migration {name} : {e}")
+            continue
+        done[name] = version
+    save_migrations(done)
+
+# ── COMPTEURS DES ONGLETS DE LECTURE ──────────────────────────────────────────
+def _reading_badges(today):
+    """(J2 en retard, J2 à venir, J7 en retard, J7 à venir, identifications en attente),
+    calculés en une passe et mémorisés tant que ni les données ni le jour ne changent."""
+    names = ("schedules", "prelevements", "pending_identifications")
+    key = (today,) + tuple((id(st.session_state.get(n)), len(st.session_state.get(n) or []),
+                            _shared_versions().get(n)) for n in names)
+    cached = st.session_state.get("_reading_badges")
+    if cached and cached[0] == key:
+        return cached[1]
+    j2_red = j2_orange = j7_red = j7_orange = 0
+    filled = False
+    for s in st.session_state.schedules:
+        if s.get("status") != "pending" or s.get("when") not in READING_OFFSETS:
+            continue
+        smp = _repo().prelevement(s.get("sample_id"))
+        if not smp or smp.get("archived"):
+            continue
+        missing = not s.get("due_date")
+        due = _schedule_due(s)
+        if due is None:
+            continue   # prélèvement sans date exploitable : pas d'échéance à compter
+        filled |= missing
+        late = due <= today
+        if s["when"] == "J2":
+            j2_red += late
+            j2_orange += not late
+        else:
+            # J7 : en retard seulement si le prélèvement a au moins 7 jours
+            try:
+                aged = (today - date.fromisoformat(smp["date"])).days >= 7
+            except (KeyError, TypeError, ValueError):
+                aged = True
+            j7_red += late and aged
+            j7_orange += not (late and aged)
+    id_red = sum(1 for p in st.session_state.pending_identifications
+                 if p.get("status") == "pending")
+    counts = (j2_red, j2_orange, j7_red, j7_orange, id_red)
+    if filled:
+        save_schedules(st.session_state.schedules)   # échéances recalculées, conservées
+    st.session_state["_reading_badges"] = (key, counts)
+    return counts
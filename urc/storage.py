@@ -0,0 +1,2811 @@
+"""Couche de stockage : Supabase (app_state, tables rec_*, Storage), fichiers
+locaux ou SQLite, écritures différées et boîte d'envoi, modèle de lecture
+partagé entre sessions, historique par mois, images des plans et export.
+
+Aucun rendu ici ; les threads d'écriture ne touchent jamais à l'état de session."""
+import atexit
+import base64
+import csv
+import difflib
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import date, datetime
+
+import streamlit as st
+
+from urc.perf import _AccountedClient, _count_io, _run_bound
+from urc.constants import (
+    ARCHIVED_FILE, CSV_FILE, DEFAULT_FAQ, DEFAULT_GERM_NAMES, DEFAULT_GERMS,
+    DEFAULT_MEASURES, DEFAULT_ORIGIN_MEASURES, DEFAULT_THRESHOLDS, GERMS_FILE,
+    OPERATORS_FILE, PENDING_FILE, PLANS_FILE, POINTS_FILE, PRELEVEMENTS_FILE,
+    SCHEDULES_FILE, SQLITE_FILE, STORAGE_BACKEND, SURV_JOURNAL_FILE,
+    SURV_SNAPSHOT_FILE, THRESHOLDS_FILE,
+)
+
+# ── SUPABASE ───────────────────────────────────────────────────────────────────
+SUPABASE_URL = os.environ.get("SUPABASE_URL")
+SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
+_supabase_client = None
+
+@st.cache_resource
+def _shared_supabase_client(url, key):
+    # Un seul client (et sa connexion HTTP) pour tout le process, au lieu d'un par rerun.
+    # Le paquet supabase n'est importé que si Supabase est configuré.
+    try:
+        from supabase import create_client
+        return _AccountedClient(create_client(url, key))
+    except Exception:
+        return None
+
+def get_supabase_client():
+    global _supabase_client
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        return None
+    if _supabase_client is None:
+        _supabase_client = _shared_supabase_client(SUPABASE_URL, SUPABASE_KEY)
+    return _supabase_client
+
+# ── PERSISTENCE ────────────────────────────────────────────────────────────────
+# ── EMPREINTES DE CONTENU ─────────────────────────────────────────────────────
+# Dernier contenu connu de chaque cible d'écriture (clé app_state, fichier local) :
+# une écriture identique à ce qui est déjà stocké n'est pas refaite.
+@st.cache_resource
+def _content_hashes():
+    return {}
+
+def _content_hash(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+def _supa_upsert(key, value_json):
+    """Écriture d'une clé app_state : consignée dans la boîte d'envoi et envoyée
+    en arrière-plan (voir _Outbox) — l'appelant n'attend jamais Supabase.
+    Une valeur identique à celle déjà stockée n'est pas renvoyée."""
+    if get_supabase_client() is None:
+        return False
+    ob = _outbox()
+    if (_content_hashes().get(("app_state", key)) == _content_hash(value_json)
+            and ob.pending_blob(key) is None):
+        return True
+    ob.add_blob(key, value_json)
+    return True
+
+def _supa_upsert_now(key, value_json):
+    supa = get_supabase_client()
+    if supa is None:
+        return False
+    try:
+        supa.table('app_state').upsert(
+            {'key': key, 'value': value_json, 'updated_at': datetime.now().isoformat()},
+            on_conflict='key'
+        ).execute()
+        _content_hashes()[("app_state", key)] = _content_hash(value_json)
+        return True
+    except Exception as e:
+        print(f"[SUPA ERROR] key={key} : {e}")
+        return False
+
+def _run_scratch(name):
+    """Dictionnaire propre au rerun en cours de la session (valeurs préchargées,
+    durées d'amorçage) : repart vide à chaque rerun, n'est jamais partagé entre
+    sessions. Thread du script uniquement."""
+    run_id = st.session_state.get("_run_id")
+    scratch = st.session_state.get("_run_scratch")
+    if scratch is None or scratch[0] != run_id:
+        scratch = (run_id, {})
+        st.session_state["_run_scratch"] = scratch
+    return scratch[1].setdefault(name, {})
+
+def _supa_get(key):
+    # Valeurs préchargées au démarrage d'une session (une requête pour toutes les clés)
+    prefetched = _run_scratch("app_state")
+    supa = get_supabase_client()
+    if supa is not None:
+        # Une écriture encore en attente d'envoi est plus récente que Supabase
+        pending = _outbox().pending_blob(key)
+        if pending is not None:
+            prefetched.pop(key, None)
+            return pending
+    if key in prefetched:
+        value = prefetched.pop(key)
+    elif supa is None:
+        return None
+    else:
+        value = None
+        try:
+            res = supa.table('app_state').select('value').eq('key', key).execute()
+            if res and getattr(res, 'data', None):
+                row = res.data[0]
+                value = row.get('value') if isinstance(row, dict) else row['value']
+        except Exception:
+            pass
+    if isinstance(value, str):
+        _content_hashes()[("app_state", key)] = _content_hash(value)
+    return value
+
+def _flush_blob(key, js, local_file=None):
+    _supa_upsert(key, js)
+    if local_file:
+        _local_write_text(local_file, js)
+
+def save_germs(germs):
+    known_default_names = sorted(DEFAULT_GERM_NAMES)
+    payload = {"germs": germs, "known_defaults": known_default_names}
+    js = json.dumps(payload, ensure_ascii=False)
+    _repo().invalidate("germs")   # pas de version partagée pour les germes
+    _enqueue_write('germs', _flush_blob, 'germs', js, GERMS_FILE)
+
+def load_germs():
+    defaults_by_name = {d["name"]: d for d in DEFAULT_GERMS}
+    saved_germs = []
+    known_defaults = set()
+    raw_json = _supa_get('germs')
+    if raw_json:
+        try:
+            raw = json.loads(raw_json)
+            if isinstance(raw, dict):
+                saved_germs  = raw.get("germs", [])
+                known_defaults = set(raw.get("known_defaults", []))
+            elif isinstance(raw, list):
+                saved_germs = raw
+        except Exception:
+            saved_germs = []
+    if not saved_germs:
+        raw = _local_read_json(GERMS_FILE)
+        if isinstance(raw, dict):
+            saved_germs    = raw.get("germs", [])
+            known_defaults = set(raw.get("known_defaults", []))
+        elif isinstance(raw, list):
+            saved_germs = raw
+    if not saved_germs:
+        return [dict(d) for d in DEFAULT_GERMS], len(DEFAULT_GERMS)
+    saved_by_name = {g.get("name", ""): g for g in saved_germs}
+    merged = []
+    new_defaults_added = 0
+    for dflt in DEFAULT_GERMS:
+        name = dflt["name"]
+        if name in saved_by_name:
+            merged.append(dict(saved_by_name[name]))
+        elif name not in known_defaults:
+            merged.append(dict(dflt))
+            new_defaults_added += 1
+    for g in saved_germs:
+        name = g.get("name", "")
+        if name and name not in defaults_by_name:
+            merged.append(dict(g))
+    return merged, new_defaults_added
+
+def load_thresholds():
+    saved = {}
+    raw_json = _supa_get('thresholds')
+    if raw_json:
+        try:
+            raw = json.loads(raw_json)
+            saved = {int(k): v for k, v in raw.items() if k != 'measures'}
+        except Exception:
+            saved = {}
+    if not saved:
+        try:
+            raw = _local_read_json(THRESHOLDS_FILE) or {}
+            saved = {int(k): v for k, v in raw.items() if k != 'measures'}
+        except Exception:
+            saved = {}
+    merged = {k: dict(v) for k, v in DEFAULT_THRESHOLDS.items()}
+    merged.update(saved)
+    return merged
+
+def load_measures():
+    raw = _local_read_json(THRESHOLDS_FILE)
+    if isinstance(raw, dict) and "measures" in raw:
+        try:
+            return {int(k): v for k, v in raw["measures"].items()}
+        except Exception:
+            pass
+    return {k: dict(v) for k, v in DEFAULT_MEASURES.items()}
+
+def save_thresholds_and_measures(thresholds, measures):
+    data = {str(k): v for k, v in thresholds.items()}
+    data["measures"] = {str(k): v for k, v in measures.items()}
+    js = json.dumps(data, ensure_ascii=False)
+    _enqueue_write('thresholds', _flush_blob, 'thresholds', js, THRESHOLDS_FILE)
+
+def get_thresholds_for_risk(risk, thresholds):
+    return thresholds.get(risk, {"alert": 25, "action": 40})
+
+def load_origin_measures():
+    raw_json = _supa_get('measures')
+    if raw_json:
+        try:
+            raw = json.loads(raw_json)
+            if isinstance(raw, list) and raw:
+                return raw
+        except Exception:
+            pass
+    raw = _local_read_json(THRESHOLDS_FILE)
+    if isinstance(raw, dict) and isinstance(raw.get("measures"), list) and raw["measures"]:
+        return raw["measures"]
+    return [dict(m) for m in DEFAULT_ORIGIN_MEASURES]
+
+def _flush_origin_measures(measures, supa):
+    if supa:
+        _supa_upsert('measures', json.dumps(measures, ensure_ascii=False))
+    raw = _local_read_json(THRESHOLDS_FILE)
+    if not isinstance(raw, dict):
+        raw = {}
+    raw["measures"] = measures
+    _local_write_text(THRESHOLDS_FILE, json.dumps(raw, ensure_ascii=False, indent=2))
+
+def save_origin_measures(measures, supa=True):
+    if supa and get_supabase_client() is None:
+        st.warning("⚠️ Supabase non connecté — sauvegarde locale uniquement.")
+    _enqueue_write(('origin_measures', supa), _flush_origin_measures, _snapshot(measures), supa)
+
+# ── STOCKAGE LOCAL ─────────────────────────────────────────────────────────────
+# Deux moteurs derrière les mêmes fonctions, choisis par URC_STORAGE :
+#   fichiers : un fichier JSON par collection + surveillance_data.csv
+#   sqlite   : urc_data.sqlite3 en mode WAL — table records (une ligne par
+#              enregistrement, colonnes indexées sample_id / date / label / status)
+#              et table docs pour les petits documents (germes, seuils, mesures).
+# Au premier démarrage en sqlite, les fichiers existants sont importés.
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    collection TEXT NOT NULL,
+    id         TEXT NOT NULL,
+    seq        INTEGER NOT NULL,
+    sample_id  TEXT,
+    date       TEXT,
+    label      TEXT,
+    status     TEXT,
+    month      TEXT,
+    digest     TEXT,
+    data       TEXT NOT NULL,
+    updated_at TEXT,
+    PRIMARY KEY (collection, id)
+);
+CREATE INDEX IF NOT EXISTS idx_records_seq       ON records(collection, seq);
+CREATE INDEX IF NOT EXISTS idx_records_sample_id ON records(collection, sample_id);
+CREATE INDEX IF NOT EXISTS idx_records_date      ON records(collection, date);
+CREATE INDEX IF NOT EXISTS idx_records_label     ON records(collection, label);
+CREATE INDEX IF NOT EXISTS idx_records_status    ON records(collection, status);
+CREATE TABLE IF NOT EXISTS docs (
+    name       TEXT PRIMARY KEY,
+    value      TEXT NOT NULL,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+_LOCAL_COLLECTION_FILES = {
+    "prelevements":            PRELEVEMENTS_FILE,
+    "schedules":               SCHEDULES_FILE,
+    "surveillance":            CSV_FILE,
+    "pending_identifications": PENDING_FILE,
+    "archived_samples":        ARCHIVED_FILE,
+    "points":                  POINTS_FILE,
+    "operators":               OPERATORS_FILE,
+    "plans":                   PLANS_FILE,
+}
+
+class _SqliteStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SQLITE_SCHEMA)
+        cols = {r[1] for r in self.conn.execute("PRAGMA table_info(records)")}
+        if "month" not in cols:
+            self.conn.execute("ALTER TABLE records ADD COLUMN month TEXT")
+            for rid, data in self.conn.execute(
+                    "SELECT id, data FROM records WHERE collection = 'surveillance'").fetchall():
+                self.conn.execute(
+                    "UPDATE records SET month = ? WHERE collection = 'surveillance' AND id = ?",
+                    (_surv_month(json.loads(data)), rid))
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_records_month ON records(collection, month)")
+        for coll in _LOCAL_COLLECTION_FILES:
+            self.conn.execute(
+                f"CREATE VIEW IF NOT EXISTS {coll} AS SELECT id, sample_id, date, label, status, "
+                f"month, data FROM records WHERE collection = '{coll}'")
+
+    @contextmanager
+    def transaction(self):
+        """Transaction unique pour tout ce qui est écrit dans le bloc (réentrant)."""
+        with self._lock:
+            outer = self._depth == 0
+            if outer:
+                self.conn.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield self.conn
+            except Exception:
+                self._depth -= 1
+                if outer:
+                    self.conn.execute("ROLLBACK")
+                raise
+            else:
+                self._depth -= 1
+                if outer:
+                    self.conn.execute("COMMIT")
+
+    def query(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def read_doc(self, name):
+        rows = self.query("SELECT value FROM docs WHERE name = ?", (name,))
+        return rows[0][0] if rows else None
+
+    def write_doc(self, name, text):
+        with self.transaction() as c:
+            c.execute("INSERT INTO docs(name, value, updated_at) VALUES (?, ?, ?) "
+                      "ON CONFLICT(name) DO UPDATE SET value = excluded.value, "
+                      "updated_at = excluded.updated_at",
+                      (name, text, datetime.now().isoformat()))
+
+    def delete_doc(self, name):
+        with self.transaction() as c:
+            c.execute("DELETE FROM docs WHERE name = ?", (name,))
+
+    def load_collection(self, collection, months=None):
+        if months is None:
+            rows = self.query("SELECT data FROM records WHERE collection = ? ORDER BY month, seq",
+                              (collection,))
+        else:
+            months = sorted(months)
+            marks = ",".join("?" * len(months))
+            rows = self.query(
+                f"SELECT data FROM records WHERE collection = ? AND coalesce(month, '') IN ({marks}) "
+                f"ORDER BY month, seq", (collection, *months))
+        return [json.loads(r[0]) for r in rows]
+
+    def month_index(self, collection):
+        return {(m or ""): n for m, n in self.query(
+            "SELECT month, COUNT(*) FROM records WHERE collection = ? GROUP BY month",
+            (collection,))}
+
+    def save_collection(self, collection, records, months=None):
+        """Remplace le contenu d'une collection (ou de ses mois `months`) ;
+        seules les lignes modifiées sont écrites."""
+        now = datetime.now().isoformat()
+        with self.transaction() as c:
+            if months is None:
+                known = dict(c.execute("SELECT id, digest FROM records WHERE collection = ?",
+                                       (collection,)).fetchall())
+            else:
+                months = sorted(months)
+                marks = ",".join("?" * len(months))
+                known = dict(c.execute(
+                    f"SELECT id, digest FROM records WHERE collection = ? "
+                    f"AND coalesce(month, '') IN ({marks})", (collection, *months)).fetchall())
+            keep = set()
+            changed = []
+            for seq, (rid, r) in enumerate(_keyed_rows(collection, records)):
+                keep.add(rid)
+                data = json.dumps(r, ensure_ascii=False)
+                dg = hashlib.blake2b(f"{seq}:{data}".encode("utf-8"), digest_size=16).hexdigest()
+                if known.get(rid) == dg:
+                    continue
+                changed.append((
+                    collection, rid, seq, _str_or_none(r.get("sample_id")),
+                    _str_or_none(r.get("date") or r.get("due_date") or r.get("date_prelevement")),
+                    _str_or_none(r.get("label") or r.get("prelevement")),
+                    _str_or_none(r.get("status")), _row_part(collection, r), dg, data, now,
+                ))
+            if changed:
+                c.executemany(
+                    "INSERT INTO records(collection, id, seq, sample_id, date, label, status, "
+                    "month, digest, data, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(collection, id) DO UPDATE SET seq = excluded.seq, "
+                    "sample_id = excluded.sample_id, date = excluded.date, "
+                    "label = excluded.label, status = excluded.status, month = excluded.month, "
+                    "digest = excluded.digest, data = excluded.data, "
+                    "updated_at = excluded.updated_at", changed)
+            gone = [rid for rid in known if rid not in keep]
+            if gone:
+                c.executemany("DELETE FROM records WHERE collection = ? AND id = ?",
+                              [(collection, rid) for rid in gone])
+
+    def migrate_from_files(self):
+        """Import unique des fichiers JSON/CSV existants."""
+        if self.query("SELECT 1 FROM meta WHERE key = 'migrated_from_files'"):
+            return
+        with self.transaction() as c:
+            for coll, path in _LOCAL_COLLECTION_FILES.items():
+                if coll == "surveillance":
+                    records = _SurvJournal(SURV_SNAPSHOT_FILE, SURV_JOURNAL_FILE).load()
+                else:
+                    records = _read_json_file(path)
+                    records = [dict(x) for x in records] if isinstance(records, list) else []
+                if records:
+                    self.save_collection(coll, records)
+            for path in (GERMS_FILE, THRESHOLDS_FILE):
+                if os.path.exists(path):
+                    try:
+                        with open(path, encoding='utf-8') as f:
+                            self.write_doc(path, f.read())
+                    except Exception:
+                        pass
+            c.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('migrated_from_files', ?)",
+                      (datetime.now().isoformat(),))
+
+def _str_or_none(v):
+    return None if v in (None, "") else str(v)
+
+def _read_json_file(path):
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                _count_io("lecture", path, os.fstat(f.fileno()).st_size)
+                return json.load(f)
+        except Exception:
+            pass
+    return None
+
+@st.cache_resource
+def _sqlite_store():
+    store = _SqliteStore(SQLITE_FILE)
+    store.migrate_from_files()
+    return store
+
+def _use_sqlite():
+    return STORAGE_BACKEND == "sqlite"
+
+def _local_batch():
+    """Regroupe les écritures locales d'un vidage de file dans une seule transaction."""
+    return _sqlite_store().transaction() if _use_sqlite() else nullcontext()
+
+def _local_read_json(path):
+    if _use_sqlite():
+        txt = _sqlite_store().read_doc(path)
+        _count_io("lecture", path, len(txt or ""))
+        try:
+            return json.loads(txt) if txt else None
+        except Exception:
+            return None
+    return _read_json_file(path)
+
+def _local_write_text(path, text):
+    target = ("sqlite" if _use_sqlite() else "file", path)
+    digest = _content_hash(text)
+    if _content_hashes().get(target) == digest and (_use_sqlite() or os.path.exists(path)):
+        return   # contenu déjà écrit
+    try:
+        if _use_sqlite():
+            _sqlite_store().write_doc(path, text)
+        else:
+            with open(path, "w", encoding='utf-8') as f:
+                f.write(text)
+        _count_io("écriture", path, len(text))
+        _content_hashes()[target] = digest
+    except Exception as e:
+        print(f"[LOCAL ERROR] {path} : {e}")
+
+def _local_load_collection(collection, local_file, months=None):
+    if _use_sqlite():
+        try:
+            return _sqlite_store().load_collection(collection, months)
+        except Exception as e:
+            print(f"[LOCAL ERROR] {collection} : {e}")
+            return []
+    if collection == "surveillance":
+        return _surv_journal().load(months)
+    raw = _read_json_file(local_file)
+    return [dict(x) for x in raw] if isinstance(raw, list) else []
+
+def _local_save_collection(collection, records, local_file, months=None):
+    if _use_sqlite():
+        try:
+            _sqlite_store().save_collection(collection, records, months)
+        except Exception as e:
+            print(f"[LOCAL ERROR] {collection} : {e}")
+        return
+    if collection == "surveillance":
+        try:
+            _surv_journal().save(records, months)
+        except Exception as e:
+            print(f"[LOCAL ERROR] journal surveillance : {e}")
+    else:
+        _local_write_text(local_file, json.dumps(records, ensure_ascii=False))
+
+def _local_surv_month_index():
+    try:
+        if _use_sqlite():
+            return _sqlite_store().month_index("surveillance")
+        return _surv_journal().month_index()
+    except Exception as e:
+        print(f"[LOCAL ERROR] index surveillance : {e}")
+        return None
+
+def local_sql_query(sql, limit=500):
+    """Requête ad hoc en lecture seule sur la base SQLite (onglet Analyse)."""
+    if not re.match(r"^\s*(select|with)\b", sql, re.IGNORECASE):
+        raise ValueError("Seules les requêtes SELECT sont autorisées.")
+    _flush_pending_writes()
+    conn = sqlite3.connect(f"file:{SQLITE_FILE}?mode=ro", uri=True)
+    try:
+        conn.execute("PRAGMA query_only = ON")
+        cur = conn.execute(sql)
+        cols = [d[0] for d in cur.description or []]
+        return cols, cur.fetchmany(limit)
+    finally:
+        conn.close()
+
+# ── JOURNAL DE L'HISTORIQUE (moteur fichiers) ─────────────────────────────────
+# L'historique n'est plus réécrit en entier à chaque identification :
+#   surveillance_snapshot.json  : instantané compacté (liste d'enregistrements)
+#   surveillance_journal.jsonl  : opérations ajoutées depuis, une par ligne
+#     {"op": "put",   "id": ..., "rec": {...}}
+#     {"op": "patch", "id": ..., "set": {...}, "unset": [...]}
+#     {"op": "del",   "id": ...}
+# Chaque ajout est fsync'é. Au-delà de JOURNAL_COMPACT_OPS opérations, le thread
+# d'écriture réécrit l'instantané (fichier temporaire + os.replace) et vide le
+# journal. Lecture = instantané + rejeu du journal (une dernière ligne tronquée
+# par un arrêt brutal est ignorée). L'ancien CSV sert de point de départ.
+JOURNAL_COMPACT_OPS = 500
+
+class _SurvJournal:
+    def __init__(self, snapshot_path, journal_path):
+        self.snapshot_path = snapshot_path
+        self.journal_path  = journal_path
+        self._lock  = threading.Lock()
+        self.state  = None
+        self.ops    = 0
+
+    def _read(self):
+        snap = _read_json_file(self.snapshot_path)
+        if isinstance(snap, list):
+            state = {rid: r for rid, r in _keyed_rows("surveillance", snap)}
+        else:
+            # Première ouverture : l'ancien CSV devient l'instantané (avec ses ids)
+            state = {rid: r for rid, r in _keyed_rows("surveillance", _read_surveillance_csv())}
+            self.state = state
+            if state:
+                self._write_snapshot()
+        ops = 0
+        if os.path.exists(self.journal_path):
+            _count_io("lecture", self.journal_path, os.path.getsize(self.journal_path))
+            with open(self.journal_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        break
+                    ops += 1
+                    rid = op.get("id")
+                    if op.get("op") == "put":
+                        state[rid] = op.get("rec", {})
+                    elif op.get("op") == "patch" and rid in state:
+                        rec = dict(state[rid])
+                        rec.update(op.get("set", {}))
+                        for k in op.get("unset", []):
+                            rec.pop(k, None)
+                        state[rid] = rec
+                    elif op.get("op") == "del":
+                        state.pop(rid, None)
+        self.state, self.ops = state, ops
+
+    def load(self, months=None):
+        with self._lock:
+            if self.state is None:
+                self._read()
+            return [dict(r) for r in self.state.values()
+                    if months is None or _surv_month(r) in months]
+
+    def month_index(self):
+        with self._lock:
+            if self.state is None:
+                self._read()
+            index = {}
+            for r in self.state.values():
+                m = _surv_month(r)
+                index[m] = index.get(m, 0) + 1
+            return index
+
+    def save(self, records, months=None):
+        """Journalise les différences. Avec `months`, les entrées des autres mois
+        (non chargées par la session) ne sont ni modifiées ni supprimées."""
+        with self._lock:
+            if self.state is None:
+                self._read()
+            new = {rid: r for rid, r in _keyed_rows("surveillance", records)}
+            if months is not None:
+                kept = {rid: r for rid, r in self.state.items()
+                        if rid not in new and _surv_month(r) not in months}
+                kept.update(new)
+                new = kept
+            lines = []
+            for rid, r in new.items():
+                old = self.state.get(rid)
+                if old is None:
+                    lines.append({"op": "put", "id": rid, "rec": r})
+                elif old != r:
+                    lines.append({
+                        "op": "patch", "id": rid,
+                        "set": {k: v for k, v in r.items() if old.get(k, _MISSING) != v},
+                        "unset": [k for k in old if k not in r],
+                    })
+            lines.extend({"op": "del", "id": rid} for rid in self.state if rid not in new)
+            if lines:
+                payload = "".join(json.dumps(op, ensure_ascii=False) + "\n" for op in lines)
+                with open(self.journal_path, "a", encoding='utf-8') as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                _count_io("écriture", self.journal_path, len(payload))
+                self.ops += len(lines)
+            self.state = new
+            if self.ops >= JOURNAL_COMPACT_OPS:
+                self._compact()
+
+    def _write_snapshot(self):
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w", encoding='utf-8') as f:
+            json.dump(list(self.state.values()), f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+            _count_io("écriture", self.snapshot_path, f.tell())
+        os.replace(tmp, self.snapshot_path)
+
+    def _compact(self):
+        self._write_snapshot()
+        # Si l'arrêt survient ici, le rejeu du journal sur le nouvel instantané est idempotent
+        with open(self.journal_path, "w", encoding='utf-8') as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self.ops = 0
+
+_MISSING = object()   # champ absent (journal de l'historique, fusion à trois voies)
+
+@st.cache_resource
+def _surv_journal():
+    return _SurvJournal(SURV_SNAPSHOT_FILE, SURV_JOURNAL_FILE)
+
+# ── STOCKAGE PAR ENREGISTREMENT (Supabase) ─────────────────────────────────────
+# Chaque collection volumineuse a sa propre table, une ligne par enregistrement :
+#   rec_<collection>(id TEXT PRIMARY KEY, data JSONB, seq BIGSERIAL, version, updated_at)
+# Une sauvegarde n'envoie que les lignes ajoutées / modifiées / supprimées depuis
+# le dernier état connu de la session (comparaison d'empreintes par enregistrement).
+# Si la table n'existe pas encore, on retombe sur l'ancien blob de app_state.
+ROW_COLLECTIONS = {
+    "prelevements":            "id",
+    "schedules":               "id",
+    "surveillance":            "id",
+    "pending_identifications": "id",
+    "archived_samples":        "id",
+    "points":                  "id",
+    "operators":               "nom",
+    "plans":                   "id",
+}
+_ROW_PAGE = 1000
+_ROW_CHUNK = 500
+CAS_RETRIES = 3   # tentatives d'écriture d'une ligne modifiée ailleurs entre-temps
+
+def _row_table(collection):
+    return f"rec_{collection}"
+
+@st.cache_resource
+def _row_tables_state():
+    # {collection: True/False} — disponibilité des tables rec_* (schéma commun à tout le process)
+    return {}
+
+def _record_id(collection, rec):
+    """Identifiant stable d'un enregistrement ; en attribue un s'il manque."""
+    key = ROW_COLLECTIONS[collection]
+    rid = rec.get(key)
+    if rid in (None, ""):
+        rid = f"{collection[:4]}_{uuid.uuid4().hex[:12]}"
+        if key == "id":
+            rec["id"] = rid
+    return str(rid)
+
+def _record_digest(rec):
+    js = json.dumps(rec, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.blake2b(js.encode("utf-8"), digest_size=16).hexdigest()
+
+def _keyed_rows(collection, records):
+    """(id de ligne, enregistrement) — les doublons d'id reçoivent un suffixe #n."""
+    seen = {}
+    for r in records:
+        rid = _record_id(collection, r)
+        if rid in seen:
+            seen[rid] += 1
+            rid = f"{rid}#{seen[rid]}"
+        else:
+            seen[rid] = 0
+        yield rid, r
+
+def _rows_baseline():
+    # Modifié aussi par le thread d'écriture et la boîte d'envoi : toute lecture
+    # ou écriture d'un état connu se fait sous _rows_lock()
+    if "_rows_baseline" not in st.session_state:
+        st.session_state["_rows_baseline"] = {}
+    return st.session_state["_rows_baseline"]
+
+def _rows_lock():
+    """Verrou des états connus (_rows_baseline des sessions, empreintes du modèle
+    partagé), pris par le script, le thread d'écriture, la boîte d'envoi et le flux
+    de changements. Jamais tenu pendant un appel réseau ni une attente de la file."""
+    return _write_queue().rows_lock
+
+def _rows_share_baseline(collection, merge=False):
+    """Reporte l'état connu de la session dans les empreintes du modèle partagé."""
+    with _rows_lock():
+        known = _rows_baseline().get(collection)
+        if known is None:
+            return
+        digests = _shared_store().digests
+        if merge:
+            digests.setdefault(collection, {}).update(known)
+        else:
+            digests[collection] = dict(known)
+
+def _row_part(collection, rec):
+    # Partition d'un enregistrement : le mois pour l'historique, "" ailleurs
+    return _surv_month(rec) if collection == "surveillance" else ""
+
+def _rows_set_baseline(collection, records, merge=False, versions=None):
+    # État connu d'une ligne : (partition, empreinte, version distante, ancêtre).
+    # L'ancêtre (copie figée de la ligne telle que lue / écrite) sert à la fusion
+    # à trois voies ; il est rattaché par _rows_attach_ancestors.
+    versions = versions or {}
+    known = {rid: (_row_part(collection, r), _record_digest(r), versions.get(rid), None)
+             for rid, r in _keyed_rows(collection, records)}
+    base = _rows_baseline()
+    with _rows_lock():
+        if merge and collection in base:
+            base[collection].update(known)
+        else:
+            base[collection] = known
+
+def _rows_forget_baseline(collection=None):
+    """Oublie l'état connu : la prochaine sauvegarde renverra toutes les lignes."""
+    base = _rows_baseline()
+    with _rows_lock():
+        if collection is None:
+            base.clear()
+        else:
+            base.pop(collection, None)
+
+def _rows_diff(collection, records, base, scope=None, shared=None):
+    """(lignes à upserter, ids à supprimer, nouvel état connu) par rapport à l'état connu.
+    Avec scope (ensemble de partitions), seules les lignes connues de ces partitions
+    peuvent être supprimées ; les autres sont conservées telles quelles.
+    shared : état connu commun au process, consulté pour les lignes que la session
+    ne connaît pas encore (écrites entre-temps par une autre session)."""
+    known = base.get(collection, {})
+    shared = shared or {}
+    current = {}
+    upserts = []
+    for rid, r in _keyed_rows(collection, records):
+        state = (_row_part(collection, r), _record_digest(r))
+        prev = known.get(rid) or shared.get(rid)
+        if prev is not None and prev[:2] == state:
+            current[rid] = prev
+        else:
+            current[rid] = state + ((prev[2], prev[3]) if prev is not None else (None, None))
+            upserts.append({"id": rid, "data": r})
+    deletes = [rid for rid, (part, *_) in known.items()
+               if rid not in current and (scope is None or part in scope)]
+    if scope is not None:
+        kept = {rid: v for rid, v in known.items() if rid not in current and v[0] not in scope}
+        kept.update(current)
+        current = kept
+    return upserts, deletes, current
+
+def _row_cols(collection, tables):
+    # La colonne version (concurrence optimiste) peut manquer sur un ancien schéma
+    return "id,data" if tables.get(f"{collection}:version") is False else "id,data,version"
+
+def _supa_rows_get(collection, tables=None, months=None):
+    """(enregistrements, {id de ligne: version}) de rec_<collection> (limité à
+    certains mois pour l'historique), ou None si indisponible."""
+    supa = get_supabase_client()
+    if supa is None:
+        return None
+    tables = _row_tables_state() if tables is None else tables
+    if tables.get(collection) is False:
+        return None
+    out, versions = [], {}
+    start = 0
+    cols = _row_cols(collection, tables)
+    try:
+        while True:
+            q = supa.table(_row_table(collection)).select(cols)
+            if months is not None:
+                q = q.in_("month", sorted(months))
+            try:
+                res = q.order("seq").range(start, start + _ROW_PAGE - 1).execute()
+            except Exception as e:
+                if "version" not in cols or "version" not in str(e):
+                    raise
+                # Schéma sans colonne version : lecture (et écritures) sans contrôle
+                tables[f"{collection}:version"] = False
+                cols = _row_cols(collection, tables)
+                continue
+            page = getattr(res, "data", None) or []
+            for row in page:
+                data = row.get("data")
+                if isinstance(data, str):
+                    data = json.loads(data)
+                if isinstance(data, dict):
+                    out.append(dict(data))
+                    versions[row.get("id")] = row.get("version")
+            if len(page) < _ROW_PAGE:
+                break
+            start += _ROW_PAGE
+    except Exception as e:
+        print(f"[SUPA ERROR] table={_row_table(collection)} : {e}")
+        if months is None and _missing_relation(e):
+            tables[collection] = False
+        return None
+    tables[collection] = True
+    return _outbox().overlay_rows(collection, out, months), versions
+
+def _supa_rows_probe(collection, tables):
+    """Vérifie (une fois par process) que la table rec_<collection> existe."""
+    supa = get_supabase_client()
+    if supa is None:
+        return
+    try:
+        supa.table(_row_table(collection)).select("id").limit(1).execute()
+        tables[collection] = True
+    except Exception as e:
+        print(f"[SUPA ERROR] table={_row_table(collection)} : {e}")
+        if _missing_relation(e):
+            tables[collection] = False
+
+def _missing_relation(e):
+    # Table / vue absente du schéma, par opposition à une erreur réseau passagère
+    msg = str(e)
+    return any(t in msg for t in ("42P01", "PGRST205", "does not exist", "Could not find the table"))
+
+def _supa_rows_versions(collection, months=None):
+    """{id de ligne: version} de rec_<collection> (quelques octets par ligne), ou None."""
+    supa = get_supabase_client()
+    tables = _row_tables_state()
+    if supa is None or not tables.get(collection) or tables.get(f"{collection}:version") is False:
+        return None
+    out = {}
+    start = 0
+    try:
+        while True:
+            q = supa.table(_row_table(collection)).select("id,version")
+            if months is not None:
+                q = q.in_("month", sorted(months))
+            res = q.order("seq").range(start, start + _ROW_PAGE - 1).execute()
+            page = getattr(res, "data", None) or []
+            out.update((row.get("id"), row.get("version")) for row in page)
+            if len(page) < _ROW_PAGE:
+                break
+            start += _ROW_PAGE
+    except Exception as e:
+        print(f"[SUPA ERROR] table={_row_table(collection)} : {e}")
+        return None
+    return out
+
+def _refresh_rows(collection):
+    """Relecture conditionnelle d'une collection déjà dans le modèle partagé : les
+    ids et versions d'abord, puis seulement les lignes nouvelles ou modifiées.
+    Retourne le nombre de lignes relues / retirées, ou None s'il faut tout relire."""
+    store = _shared_store()
+    with _rows_lock():
+        known = store.digests.get(collection)
+        known = None if known is None else dict(known)
+    if collection == "surveillance":
+        months = set(store.names("surveillance:"))
+        if not months or known is None or st.session_state.get("_surv_months") is None:
+            return None
+    else:
+        months = None
+        if known is None or not store.version(collection):
+            return None
+    remote = _supa_rows_versions(collection, months)
+    if remote is None:
+        return None
+    if months is not None:
+        known = {rid: e for rid, e in known.items() if e[0] in months}
+    changed = [rid for rid, v in remote.items() if (known.get(rid) or (None,) * 4)[2] != v]
+    deleted = set(known) - set(remote)
+    fresh = {}
+    supa = get_supabase_client()
+    try:
+        for i in range(0, len(changed), _ROW_CHUNK):
+            res = (supa.table(_row_table(collection)).select("id,data,version")
+                   .in_("id", changed[i:i + _ROW_CHUNK]).execute())
+            for row in (getattr(res, "data", None) or []):
+                data = row.get("data")
+                if isinstance(data, str):
+                    data = json.loads(data)
+                if isinstance(data, dict):
+                    fresh[row.get("id")] = (row.get("version"), dict(data))
+    except Exception as e:
+        print(f"[SUPA ERROR] table={_row_table(collection)} : {e}")
+        return None
+    if fresh or deleted:
+        _publish_remote(collection, fresh, deleted)
+    return len(fresh) + len(deleted)
+
+def _supa_month_index():
+    """{mois: nb} depuis la vue rec_surveillance_months, ou None si absente."""
+    supa = get_supabase_client()
+    if supa is None or _row_tables_state().get("surveillance") is False:
+        return None
+    try:
+        res = supa.table("rec_surveillance_months").select("month,n").execute()
+        return {(row.get("month") or ""): int(row.get("n") or 0)
+                for row in (getattr(res, "data", None) or [])}
+    except Exception as e:
+        print(f"[SUPA ERROR] rec_surveillance_months : {e}")
+        return None
+
+def _rows_sync_ids(collection):
+    """Recale l'état connu sur les ids distants (empreintes vides) : la prochaine
+    sauvegarde renvoie tout et supprime les lignes distantes absentes localement."""
+    supa = get_supabase_client()
+    if supa is None or _row_tables_state().get(collection) is False:
+        return
+    _flush_pending_writes()
+    ids = []
+    start = 0
+    try:
+        while True:
+            res = (supa.table(_row_table(collection)).select("id")
+                   .range(start, start + _ROW_PAGE - 1).execute())
+            page = getattr(res, "data", None) or []
+            ids.extend(row.get("id") for row in page)
+            if len(page) < _ROW_PAGE:
+                break
+            start += _ROW_PAGE
+    except Exception as e:
+        print(f"[SUPA ERROR] table={_row_table(collection)} : {e}")
+        return
+    with _rows_lock():
+        _rows_baseline()[collection] = {rid: (None, None, None, None) for rid in ids}
+    st.session_state.setdefault("_rows_forced", set()).add(collection)
+
+def _rows_take_forced(collection):
+    """True (une fois) si la prochaine sauvegarde doit être écrite même sans changement."""
+    forced = st.session_state.get("_rows_forced") or set()
+    if collection in forced:
+        forced.discard(collection)
+        return True
+    return False
+
+def _supa_row_current(supa, table, rid):
+    """(version, données) actuelles d'une ligne distante, ou None si elle n'existe plus."""
+    res = supa.table(table).select("data,version").eq("id", rid).limit(1).execute()
+    rows = getattr(res, "data", None) or []
+    if not rows:
+        return None
+    data = rows[0].get("data")
+    if isinstance(data, str):
+        data = json.loads(data)
+    return rows[0].get("version") or 1, dict(data or {})
+
+def _supa_rows_apply(collection, upserts, deletes, tables, known=None):
+    """Écrit les lignes modifiées avec contrôle de version (concurrence optimiste).
+    Une ligne modifiée n'est écrite que si sa version distante est celle que la
+    session a lue ; sinon la version distante est relue, fusionnée à trois voies
+    avec la modification locale (_merge_record) puis réécrite.
+    Retourne ({id: nouvelle version}, {id: enregistrement fusionné}) ou None en cas d'échec."""
+    supa = get_supabase_client()
+    if supa is None or tables.get(collection) is False:
+        return None
+    table = _row_table(collection)
+    now = datetime.now().isoformat()
+    known = known or {}
+    versions, merged = {}, {}
+    try:
+        if tables.get(f"{collection}:version") is False:
+            for i in range(0, len(upserts), _ROW_CHUNK):
+                chunk = [dict(row, updated_at=now) for row in upserts[i:i + _ROW_CHUNK]]
+                supa.table(table).upsert(chunk, on_conflict="id").execute()
+            for i in range(0, len(deletes), _ROW_CHUNK):
+                supa.table(table).delete().in_("id", deletes[i:i + _ROW_CHUNK]).execute()
+            tables[collection] = True
+            return versions, merged
+        # Lignes jamais vues : insertion groupée ; un id déjà présent à distance
+        # (créé entre-temps par une autre session) est traité comme un conflit.
+        # Lignes recalées sur les ids distants (version inconnue) : écrasement.
+        fresh  = [u for u in upserts if u["id"] not in known]
+        forced = [u for u in upserts if u["id"] in known and known[u["id"]][2] is None]
+        edits  = [u for u in upserts if u["id"] in known and known[u["id"]][2] is not None]
+        for i in range(0, len(forced), _ROW_CHUNK):
+            chunk = [dict(row, updated_at=now) for row in forced[i:i + _ROW_CHUNK]]
+            res = supa.table(table).upsert(chunk, on_conflict="id").execute()
+            for r in (getattr(res, "data", None) or []):
+                versions[r.get("id")] = r.get("version") or 1
+        for i in range(0, len(fresh), _ROW_CHUNK):
+            chunk = fresh[i:i + _ROW_CHUNK]
+            res = supa.table(table).upsert(
+                [dict(row, version=1, updated_at=now) for row in chunk],
+                on_conflict="id", ignore_duplicates=True).execute()
+            inserted = {row.get("id") for row in (getattr(res, "data", None) or [])}
+            for row in chunk:
+                if row["id"] in inserted:
+                    versions[row["id"]] = 1
+                else:
+                    edits.append(row)
+        for row in edits:
+            rid = row["id"]
+            entry = known.get(rid)
+            ancestor = entry[3] if entry else None
+            version = entry[2] if entry else None
+            rec = row["data"]
+            for _ in range(CAS_RETRIES):
+                if version is None:
+                    cur = _supa_row_current(supa, table, rid)
+                    if cur is None:
+                        res = supa.table(table).upsert(
+                            [{"id": rid, "data": rec, "version": 1, "updated_at": now}],
+                            on_conflict="id", ignore_duplicates=True).execute()
+                        if getattr(res, "data", None):
+                            versions[rid] = 1
+                            break
+                        continue
+                    version, remote = cur
+                    if remote != rec:
+                        rec = _merge_record(ancestor, rec, remote)
+                        ancestor = remote
+                res = (supa.table(table)
+                       .update({"data": rec, "version": version + 1, "updated_at": now})
+                       .eq("id", rid).eq("version", version).execute())
+                if getattr(res, "data", None):
+                    versions[rid] = version + 1
+                    if rec is not row["data"]:
+                        merged[rid] = rec
+                    break
+                version = None   # modifiée ailleurs depuis la lecture : relecture + fusion
+            else:
+                raise RuntimeError(f"conflit persistant sur {rid}")
+        unconditional = [rid for rid in deletes if (known.get(rid) or (None,) * 4)[2] is None]
+        for i in range(0, len(unconditional), _ROW_CHUNK):
+            supa.table(table).delete().in_("id", unconditional[i:i + _ROW_CHUNK]).execute()
+        for rid in deletes:
+            version = (known.get(rid) or (None,) * 4)[2]
+            if version is None:
+                continue
+            res = supa.table(table).delete().eq("id", rid).eq("version", version).execute()
+            if not getattr(res, "data", None):
+                # Modifiée ailleurs depuis la lecture : la modification l'emporte sur
+                # la suppression, la ligne revient dans la session.
+                cur = _supa_row_current(supa, table, rid)
+                if cur is not None:
+                    versions[rid], merged[rid] = cur
+        tables[collection] = True
+        return versions, merged
+    except Exception as e:
+        print(f"[SUPA ERROR] table={table} : {e}")
+        return None
+
+def _legacy_blob_list(collection):
+    raw_json = _supa_get(collection)
+    if raw_json:
+        try:
+            raw = json.loads(raw_json)
+            if isinstance(raw, list):
+                return [dict(x) for x in raw]
+        except Exception:
+            pass
+    return None
+
+def _load_rows(collection):
+    """Lecture Supabase d'une collection : tables rec_* puis ancien blob (migré au passage)."""
+    tables = _row_tables_state()
+    prefetched = _run_scratch("rows")
+    if collection in prefetched:
+        fetched = prefetched.pop(collection)
+    else:
+        fetched = _supa_rows_get(collection, tables)
+    rows, versions = fetched if fetched is not None else (None, None)
+    if rows:
+        _rows_set_baseline(collection, rows, versions=versions)
+        return rows
+    legacy = _legacy_blob_list(collection)
+    if rows is not None and not legacy:
+        # Table présente et vide, blob déjà migré ou vide : la collection est vide
+        # (surtout pas de repli sur les fichiers locaux, qui en ont une ancienne copie)
+        _rows_set_baseline(collection, [])
+        return []
+    if legacy is None:
+        return None
+    if rows is not None:
+        # Table rec_* présente mais vide : migration unique du blob vers les lignes,
+        # puis le blob est remplacé par un renvoi vers la table.
+        base = _rows_baseline()
+        with _rows_lock():
+            base.pop(collection, None)
+            ups, _, current = _rows_diff(collection, legacy, base)
+        applied = _supa_rows_apply(collection, ups, [], tables)
+        if applied is not None:
+            written = {u["id"]: dict(u["data"]) for u in ups}
+            with _rows_lock():
+                base[collection] = _rows_committed(collection, current, *applied, written)
+            _supa_upsert(collection, json.dumps({"migrated_to": _row_table(collection)}))
+    return legacy
+
+# ── PRÉCHARGEMENT D'UNE NOUVELLE SESSION ──────────────────────────────────────
+BOOTSTRAP_KEYS = [
+    'germs', 'thresholds', 'measures', 'faq', 'planning_skips', 'seuils',
+    'planning_overrides', 'class_constraints', 'planning_frozen_weeks', 'migrations',
+    'working_calendar',
+] + list(ROW_COLLECTIONS)
+
+def _supa_prefetch(keys, into=None):
+    """Charge plusieurs clés de app_state en une seule requête ; into est le
+    dictionnaire à remplir quand l'appel se fait hors du thread du script."""
+    if into is None:
+        into = _run_scratch("app_state")
+    supa = get_supabase_client()
+    if supa is None:
+        return
+    try:
+        res = supa.table('app_state').select('key,value').in_('key', list(keys)).execute()
+        found = {row['key']: row.get('value') for row in (getattr(res, 'data', None) or [])}
+    except Exception as e:
+        print(f"[SUPA ERROR] prefetch : {e}")
+        return
+    for k in keys:
+        into[k] = found.get(k)
+
+def _bootstrap_prefetch():
+    """Requête app_state groupée + lecture des tables rec_* en parallèle."""
+    if get_supabase_client() is None:
+        return
+    tables = _row_tables_state()
+    # Les collections déjà présentes dans le modèle partagé ne sont pas relues
+    # L'historique est chargé par mois (voir _surv_bootstrap)
+    missing = [c for c in ROW_COLLECTIONS
+               if c != "surveillance" and not _shared_store().version(c)]
+    keys = [k for k in BOOTSTRAP_KEYS if k not in ROW_COLLECTIONS or k in missing]
+    rows = _run_scratch("rows")
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(missing) + 1) as pool:
+        f_keys = pool.submit(_run_bound(_supa_prefetch), keys, _run_scratch("app_state"))
+        f_rows = {c: pool.submit(_run_bound(_supa_rows_get), c, tables) for c in missing}
+        f_keys.result()
+        for c, fut in f_rows.items():
+            rows[c] = fut.result()
+    _run_scratch("boot")["préchargement Supabase"] = (time.perf_counter() - t0) * 1000
+
+def _timed(label, fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    timings = _run_scratch("boot")
+    timings[label] = timings.get(label, 0) + (time.perf_counter() - t0) * 1000
+    return out
+
+def _save_rows(collection, records, base, tables, digests, scope=None):
+    """Écriture Supabase d'une collection : diff ligne à ligne, sinon ancien blob.
+    Les lignes à écrire partent dans la boîte d'envoi ; l'état connu est avancé
+    tout de suite (les versions distantes suivent à l'envoi).
+    Exécutée par le thread d'écriture : ne touche pas à st.session_state."""
+    if get_supabase_client() is None:
+        return
+    if tables.get(collection) is None:
+        _supa_rows_probe(collection, tables)
+    if tables.get(collection) is not False:
+        # Table présente, ou injoignable pour l'instant (le schéma courant a les tables rec_*)
+        with _rows_lock():
+            shared = digests.get(collection) or {}
+            ups, dels, current = _rows_diff(collection, records, base, scope, shared)
+            known = dict(shared)
+            known.update(base.get(collection, {}))
+            base[collection] = current
+            if not ups and not dels:
+                return
+            digests[collection] = current
+        _outbox().add_rows(collection, ups, dels, known, base)
+        return
+    if scope is not None:
+        return  # l'ancien blob ne peut pas être écrit partiellement
+    _supa_upsert(collection, json.dumps(records, ensure_ascii=False))
+
+def _rows_committed(collection, current, versions, merged, written):
+    """Nouvel état connu après écriture : versions distantes et ancêtres à jour.
+    Les enregistrements écrits (dict figés de l'instantané) deviennent les ancêtres
+    de la prochaine fusion."""
+    out = dict(current)
+    for rid, version in versions.items():
+        rec = merged.get(rid, written.get(rid))
+        if rec is not None:
+            out[rid] = (_row_part(collection, rec), _record_digest(rec), version, rec)
+    return out
+
+# ── ÉCRITURES DIFFÉRÉES ────────────────────────────────────────────────────────
+# Les save_* ne font plus d'aller-retour bloquant : ils déposent un instantané
+# dans une file commune au process. Un thread vide la file après une courte
+# fenêtre ; plusieurs sauvegardes d'une même collection dans cette fenêtre
+# n'en font qu'une (la dernière gagne). La file est vidée à l'arrêt du process.
+WRITE_BEHIND_WINDOW = 0.4  # secondes
+
+class _WriteBehindQueue:
+    def __init__(self, window, batch_context=None):
+        self.window    = window
+        self.batch_context = batch_context
+        self.errors    = 0
+        self.written   = 0
+        self.coalesced = 0
+        self._pending  = {}
+        self._inflight = 0
+        self._cond     = threading.Condition()
+        self._drain_lock = threading.Lock()
+        self.rows_lock = threading.RLock()   # voir _rows_lock
+        self._thread = threading.Thread(target=self._run, name="urc-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def submit(self, key, fn, *args):
+        with self._cond:
+            if self._pending.pop(key, None) is not None:
+                self.coalesced += 1
+            self._pending[key] = (fn, args)
+            self._cond.notify()
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._pending) + self._inflight
+
+    def flush(self):
+        self._drain()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            time.sleep(self.window)
+            self._drain()
+
+    def _drain(self):
+        with self._drain_lock:
+            with self._cond:
+                items = list(self._pending.items())
+                self._pending.clear()
+                self._inflight = len(items)
+            try:
+                batch = self.batch_context() if self.batch_context else nullcontext()
+            except Exception as e:
+                print(f"[WRITE ERROR] batch : {e}")
+                batch = nullcontext()
+            with batch:
+                for key, (fn, args) in items:
+                    try:
+                        fn(*args)
+                        self.written += 1
+                    except Exception as e:
+                        self.errors += 1
+                        print(f"[WRITE ERROR] key={key} : {e}")
+                    finally:
+                        with self._cond:
+                            self._inflight -= 1
+
+@st.cache_resource
+def _write_queue():
+    return _WriteBehindQueue(WRITE_BEHIND_WINDOW, batch_context=_local_batch)
+
+def _enqueue_write(key, fn, *args):
+    _write_queue().submit(key, fn, *args)
+
+def _flush_pending_writes():
+    _write_queue().flush()
+
+def _snapshot(records):
+    return [dict(r) for r in records]
+
+# ── BOÎTE D'ENVOI SUPABASE ────────────────────────────────────────────────────
+# Toute écriture distante est d'abord consignée sur disque, puis envoyée par un
+# thread dans l'ordre d'arrivée ; elle n'est retirée qu'une fois acceptée par
+# Supabase. En cas d'échec (réseau, délai dépassé), la même opération est
+# retentée avec une attente qui double à chaque essai, les suivantes attendant
+# leur tour. Après OUTBOX_MAX_ATTEMPTS échecs (écriture refusée : RLS, requête
+# invalide, conflit persistant…), l'opération est mise à l'écart dans un second
+# journal pour ne pas bloquer les suivantes ; la barre latérale en affiche le
+# nombre et permet de les renvoyer. Au redémarrage, les opérations non envoyées
+# sont reprises ; les lectures voient déjà ces écritures (pending_blob, overlay_rows).
+OUTBOX_FILE = "supabase_outbox.jsonl"
+OUTBOX_DEAD_FILE = "supabase_outbox_dead.jsonl"
+OUTBOX_BACKOFF_BASE = 2.0     # secondes avant le premier nouvel essai
+OUTBOX_BACKOFF_MAX  = 300.0
+OUTBOX_MAX_ATTEMPTS = 8       # ≈ 8 min d'essais avant mise à l'écart
+OUTBOX_COMPACT_EVERY = 200    # opérations envoyées avant réécriture du journal
+
+class _Outbox:
+    def __init__(self, path, dead_path=None):
+        self.path       = path
+        self.dead_path  = dead_path or path + ".dead"
+        self.sent       = 0
+        self.failures   = 0
+        self.dead       = 0     # opérations mises à l'écart (voir retry_dead)
+        self.last_error = ""
+        self.retry_at   = 0.0
+        self._attempts  = 0
+        self._stale     = 0     # opérations terminées encore présentes dans le journal
+        self._seq       = 0
+        self._items     = []    # opérations en attente, dans l'ordre d'envoi
+        self._memo      = {}    # seq -> (état connu de la session, ancêtres) — mémoire seulement
+        self._versions  = {}    # (collection, id) -> dernière version écrite
+        self._inflight  = None
+        self._cond = threading.Condition()
+        self._load()
+        self.dead = len(self._read_dead())
+        self._thread = threading.Thread(target=self._run, name="urc-outbox", daemon=True)
+        self._thread.start()
+
+    # ── journal sur disque : une ligne par opération, {"done": seq} une fois envoyée
+    def _load(self):
+        items = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue   # dernière ligne tronquée par un arrêt brutal
+                    if "done" in entry:
+                        items.pop(entry["done"], None)
+                    else:
+                        items[entry["seq"]] = entry
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            print(f"[OUTBOX ERROR] {self.path} : {e}")
+        self._items = sorted(items.values(), key=lambda e: e["seq"])
+        self._seq = max((e["seq"] for e in self._items), default=0)
+        if self._items:
+            print(f"[OUTBOX] {len(self._items)} écriture(s) reprise(s) depuis {self.path}")
+            self._compact()
+
+    def _append(self, entry):
+        try:
+            line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            _count_io("écriture", self.path, len(line))
+        except OSError as e:
+            print(f"[OUTBOX ERROR] {self.path} : {e}")
+
+    def _done(self, seq):
+        if not self._items:
+            self._stale = 0
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            return
+        self._stale += 1
+        if self._stale < OUTBOX_COMPACT_EVERY or not self._compact():
+            self._append({"done": seq})
+
+    def _compact(self):
+        """Réécrit le journal avec les seules opérations en attente (sans les
+        opérations envoyées ni les lignes {"done"}) ; False en cas d'échec."""
+        tmp = self.path + ".tmp"
+        try:
+            data = "".join(json.dumps(e, ensure_ascii=False, default=str) + "\n" for e in self._items)
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            _count_io("écriture", self.path, len(data))
+        except OSError as e:
+            print(f"[OUTBOX ERROR] {self.path} : {e}")
+            return False
+        self._stale = 0
+        return True
+
+    # ── opérations mises à l'écart : une ligne par opération, avec l'erreur
+    def _read_dead(self):
+        entries = []
+        try:
+            with open(self.dead_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"[OUTBOX ERROR] {self.dead_path} : {e}")
+        return entries
+
+    def _bury(self, item, error):
+        """Retire l'opération de tête de la file et la consigne dans le journal des
+        opérations mises à l'écart (appelé sous self._cond)."""
+        self._items.remove(item)
+        self._memo.pop(item["seq"], None)
+        entry = dict(item, error=error, attempts=self._attempts,
+                     failed_at=datetime.now().isoformat(timespec="seconds"))
+        try:
+            line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+            with open(self.dead_path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            _count_io("écriture", self.dead_path, len(line))
+        except OSError as e:
+            print(f"[OUTBOX ERROR] {self.dead_path} : {e}")
+        self._done(item["seq"])
+        self.dead += 1
+        print(f"[OUTBOX ERROR] seq={item['seq']} ({self.last_error}) mise à l'écart après "
+              f"{self._attempts} essais : {error}")
+
+    def retry_dead(self):
+        """Remet en file, dans leur ordre d'origine, les opérations mises à l'écart ;
+        retourne leur nombre."""
+        with self._cond:
+            entries = self._read_dead()
+            for entry in entries:
+                for k in ("seq", "error", "attempts", "failed_at"):
+                    entry.pop(k, None)
+                self._push(entry)
+            try:
+                os.remove(self.dead_path)
+            except OSError:
+                pass
+            self.dead = 0
+        return len(entries)
+
+    # ── dépôt (appelé par le thread d'écriture ou l'interface, jamais bloquant sur le réseau)
+    def add_blob(self, key, value):
+        with self._cond:
+            # Une valeur plus récente de la même clé remplace celle qui n'est pas encore partie
+            for item in [i for i in self._items
+                         if i["kind"] == "blob" and i["key"] == key and i["seq"] != self._inflight]:
+                self._items.remove(item)
+                self._done(item["seq"])
+            self._push({"kind": "blob", "key": key, "value": value})
+
+    def add_rows(self, collection, upserts, deletes, known, base=None):
+        rids = [u["id"] for u in upserts] + list(deletes)
+        versions = {rid: known[rid][2] for rid in rids if rid in known}
+        ancestors = {rid: known[rid][3] for rid in rids if rid in known and known[rid][3] is not None}
+        with self._cond:
+            seq = self._push({"kind": "rows", "collection": collection,
+                              "upserts": upserts, "deletes": list(deletes), "versions": versions})
+            self._memo[seq] = (base, ancestors)
+
+    def add_upload(self, digest):
+        with self._cond:
+            if not any(i["kind"] == "upload" and i["digest"] == digest for i in self._items):
+                self._push({"kind": "upload", "digest": digest})
+
+    def _push(self, entry):
+        self._seq += 1
+        entry["seq"] = self._seq
+        self._append(entry)
+        self._items.append(entry)
+        self._cond.notify()
+        return self._seq
+
+    # ── état, pour l'interface et les lectures
+    def pending(self):
+        with self._cond:
+            return len(self._items)
+
+    def pending_blob(self, key):
+        with self._cond:
+            for item in reversed(self._items):
+                if item["kind"] == "blob" and item["key"] == key:
+                    return item["value"]
+        return None
+
+    def overlay_rows(self, collection, records, months=None):
+        """records (lus sur Supabase) avec les écritures de lignes encore en attente."""
+        with self._cond:
+            items = [i for i in self._items if i["kind"] == "rows" and i["collection"] == collection]
+        for item in items:
+            ups = {u["id"]: dict(u["data"]) for u in item["upserts"]
+                   if months is None or _surv_month(u["data"]) in months}
+            records = _patch_records(collection, records, ups, set(item["deletes"]))
+        return records
+
+    # ── envoi
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._items:
+                    self._cond.wait()
+                delay = self.retry_at - time.time()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                item = self._items[0]
+                self._inflight = item["seq"]
+            error = "refusée par Supabase"
+            try:
+                ok = self._send(item)
+            except Exception as e:
+                print(f"[OUTBOX ERROR] seq={item['seq']} : {e}")
+                ok, error = False, f"{type(e).__name__}: {e}"
+            with self._cond:
+                self._inflight = None
+                if ok:
+                    self._items.remove(item)
+                    self._memo.pop(item["seq"], None)
+                    self._done(item["seq"])
+                    self.sent += 1
+                    self._attempts = 0
+                    self.retry_at = 0.0
+                    self.last_error = ""
+                else:
+                    self._attempts += 1
+                    self.failures += 1
+                    self.last_error = item.get("key") or item.get("collection") or ""
+                    if self._attempts >= OUTBOX_MAX_ATTEMPTS:
+                        self._bury(item, error)
+                        self._attempts = 0
+                        self.retry_at = 0.0
+                    else:
+                        self.retry_at = time.time() + min(
+                            OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE * 2 ** (self._attempts - 1))
+
+    def flush(self, timeout=None):
+        """Attend que la boîte soit vide (hors attente de nouvel essai) ; True si vide."""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self._cond:
+                if not self._items:
+                    return True
+                if self.retry_at > time.time():
+                    return False
+            if deadline is not None and time.time() > deadline:
+                return False
+            time.sleep(0.02)
+
+    def _send(self, item):
+        if item["kind"] == "blob":
+            return _supa_upsert_now(item["key"], item["value"])
+        if item["kind"] == "upload":
+            store = _blob_store()
+            return store.upload_now(item["digest"]) if hasattr(store, "upload_now") else True
+        collection = item["collection"]
+        base, ancestors = self._memo.get(item["seq"], (None, {}))
+        known = {}
+        for rid, version in item["versions"].items():
+            # Une opération précédente de la boîte a pu faire avancer la version
+            # (version None : écrasement voulu, recalage sur les ids distants)
+            if version is not None:
+                version = self._versions.get((collection, rid), version)
+            known[rid] = (None, None, version, ancestors.get(rid))
+        for u in item["upserts"]:
+            if u["id"] not in known and (collection, u["id"]) in self._versions:
+                known[u["id"]] = (None, None, self._versions[(collection, u["id"])], None)
+        applied = _supa_rows_apply(collection, item["upserts"], item["deletes"],
+                                   _row_tables_state(), known)
+        if applied is None:
+            return False
+        versions, merged = applied
+        for rid, version in versions.items():
+            self._versions[(collection, rid)] = version
+        for rid in item["deletes"]:
+            if rid not in merged:
+                self._versions.pop((collection, rid), None)
+        written = {u["id"]: u["data"] for u in item["upserts"]}
+        with _rows_lock():
+            shared = _shared_store().digests.setdefault(collection, {})
+            for rid, version in versions.items():
+                rec = merged.get(rid, written.get(rid))
+                if rec is not None:
+                    shared[rid] = (_row_part(collection, rec), _record_digest(rec), version, rec)
+            # État connu de la session : seulement les lignes qu'elle n'a pas modifiées
+            # depuis. Une ligne fusionnée garde l'ancienne version : une modification
+            # locale faite avant la reprise du résultat sera fusionnée à son tour.
+            current = (base or {}).get(collection)
+            for rid, version in versions.items():
+                entry = (current or {}).get(rid)
+                if entry is None or rid in merged or rid not in written:
+                    continue
+                if entry[1] == _record_digest(written[rid]):
+                    current[rid] = entry[:2] + (version, written[rid])
+        _publish_merged(collection, merged)
+        return True
+
+@st.cache_resource
+def _outbox():
+    return _Outbox(OUTBOX_FILE, OUTBOX_DEAD_FILE)
+
+# ── MODÈLE DE LECTURE PARTAGÉ ─────────────────────────────────────────────────
+# Une seule copie de référence des collections pour tout le process. Chaque
+# session en prend une copie enregistrement par enregistrement (les valeurs —
+# chaînes, images base64 — sont partagées, seuls les dict sont dupliqués).
+# Chaque sauvegarde publie un nouvel instantané et incrémente la version ;
+# les autres sessions le reprennent au rerun suivant. Chaque publication note
+# les ids modifiés / supprimés : une session en retard ne recopie que ceux-là.
+CHANGE_LOG_LEN = 200   # publications retenues par collection
+
+class _SharedStore:
+    def __init__(self):
+        self._lock     = threading.Lock()
+        self._data     = {}
+        self._versions = {}
+        self._changes  = {}
+        self.digests   = {}
+        self.surv_complete = False   # tout l'historique est présent (mode non partitionné)
+        self.merges    = 0           # enregistrements fusionnés après une modification concurrente
+
+    def version(self, name):
+        return self._versions.get(name, 0)
+
+    def names(self, prefix):
+        with self._lock:
+            return [n[len(prefix):] for n in self._data if n.startswith(prefix)]
+
+    def get(self, name):
+        with self._lock:
+            if name not in self._data:
+                return 0, None
+            return self._versions[name], self._data[name]
+
+    def publish(self, name, records, changed=None, deleted=()):
+        """changed=None : remplacement complet, les sessions reprennent tout."""
+        with self._lock:
+            self._data[name] = records
+            version = self._versions.get(name, 0) + 1
+            self._versions[name] = version
+            log = self._changes.setdefault(name, deque(maxlen=CHANGE_LOG_LEN))
+            log.append((version, None if changed is None else frozenset(changed),
+                        frozenset(deleted)))
+            return version
+
+    def delta(self, name, since):
+        """(version, instantané, ids modifiés, ids supprimés) depuis la version `since`,
+        ou None si le journal ne suffit pas (remplacement complet, trop ancien)."""
+        with self._lock:
+            entries = [e for e in self._changes.get(name, ()) if e[0] > since]
+            if not entries or entries[0][0] != since + 1:
+                return None
+            changed, deleted = set(), set()
+            for _, c, d in entries:
+                if c is None:
+                    return None
+                changed = (changed - d) | c
+                deleted = (deleted - c) | d
+            return self._versions[name], self._data[name], changed, deleted
+
+@st.cache_resource
+def _shared_store():
+    return _SharedStore()
+
+def _shared_versions():
+    if "_shared_versions" not in st.session_state:
+        st.session_state["_shared_versions"] = {}
+    return st.session_state["_shared_versions"]
+
+def _shared_bases():
+    # {nom: instantané partagé sur lequel la session travaille} — ancêtre commun
+    # de la fusion quand une autre session a publié entre-temps
+    if "_shared_bases" not in st.session_state:
+        st.session_state["_shared_bases"] = {}
+    return st.session_state["_shared_bases"]
+
+def _publish_shared(name, snapshot, collection=None):
+    """Publie un instantané (déjà copié) et marque la session comme à jour.
+    Avec collection, la publication note les ids modifiés par rapport à la
+    version précédente (reprise partielle par les autres sessions).
+    Retourne False (sans rien publier) si le contenu est identique au dernier publié."""
+    store = _shared_store()
+    changed, deleted = None, ()
+    if collection is not None:
+        version, previous = store.get(name)
+        if previous is not None:
+            changed, deleted = _records_delta(collection, previous, snapshot)
+            if not changed and not deleted:
+                _shared_versions()[name] = version
+                _shared_bases()[name] = previous
+                return False
+    _shared_versions()[name] = store.publish(name, snapshot, changed, deleted)
+    _shared_bases()[name] = snapshot
+    return True
+
+def _records_delta(collection, old, new):
+    """(ids modifiés ou ajoutés, ids supprimés) entre deux listes."""
+    old_by = dict(_keyed_rows(collection, old))
+    changed = {rid for rid, r in _keyed_rows(collection, new) if old_by.pop(rid, None) != r}
+    return changed, set(old_by)
+
+def _adopt_shared(name):
+    """Copie de session de la version partagée, ou None si absente."""
+    store = _shared_store()
+    version, records = store.get(name)
+    if records is None:
+        return None
+    _shared_versions()[name] = version
+    _shared_bases()[name] = records
+    if name in ROW_COLLECTIONS:
+        with _rows_lock():
+            if name in store.digests:
+                _rows_baseline()[name] = dict(store.digests[name])
+    return [dict(r) for r in records]
+
+def _load_shared(name, loader):
+    records = _adopt_shared(name)
+    if records is None:
+        records = loader()
+        snap = _snapshot(records)
+        _publish_shared(name, snap)
+        if name in _rows_baseline():
+            _rows_attach_ancestors(name, snap)
+            _rows_share_baseline(name)
+    return records
+
+def _rows_attach_ancestors(collection, snapshot):
+    """Rattache à l'état connu les copies figées qui serviront d'ancêtres de fusion."""
+    with _rows_lock():
+        known = _rows_baseline().get(collection)
+        if not known:
+            return
+        for rid, rec in _keyed_rows(collection, snapshot):
+            entry = known.get(rid)
+            if entry is not None and entry[3] is None:
+                known[rid] = entry[:3] + (rec,)
+
+# ── CONCURRENCE OPTIMISTE ─────────────────────────────────────────────────────
+# Deux niveaux, sans verrou :
+#  • dans le process, une sauvegarde faite sur une version partagée dépassée est
+#    rejouée sur la dernière version (_rebase_shared) au lieu de l'écraser ;
+#  • sur Supabase, chaque ligne porte une version ; l'écriture n'aboutit que si
+#    la version lue n'a pas changé, sinon la ligne distante est relue et fusionnée
+#    (_supa_rows_apply). Le résultat fusionné est republié pour toutes les sessions.
+# La fusion est faite champ par champ par rapport à l'ancêtre commun : un champ
+# modifié d'un seul côté garde cette modification ; modifié des deux côtés,
+# la modification locale l'emporte. Une modification l'emporte sur une suppression.
+
+def _merge_record(base, local, remote):
+    """Fusion à trois voies d'un enregistrement (base = ancêtre commun, ou None)."""
+    if base is None:
+        out = dict(remote)
+        out.update(local)
+        return out
+    out = {}
+    for k in dict.fromkeys([*remote, *local, *base]):
+        b, l, r = base.get(k, _MISSING), local.get(k, _MISSING), remote.get(k, _MISSING)
+        v = r if l == b else l
+        if v is not _MISSING:
+            out[k] = v
+    return out
+
+def _rebase_records(collection, base, local, latest):
+    """Rejoue sur `latest` les changements de `local` par rapport à `base`.
+    Retourne (liste fusionnée, nb d'enregistrements fusionnés champ par champ)."""
+    base_by  = dict(_keyed_rows(collection, base))
+    local_by = dict(_keyed_rows(collection, local))
+    out, seen, merges = [], set(), 0
+    for rid, r in _keyed_rows(collection, latest):
+        seen.add(rid)
+        b, l = base_by.get(rid), local_by.get(rid)
+        if l is None:
+            if b is None or b != r:
+                out.append(r)          # nouveau ailleurs, ou modifié ailleurs et supprimé ici
+        elif l == b or l == r:
+            out.append(r)
+        elif b == r:
+            out.append(l)
+        else:
+            out.append(_merge_record(b, l, r))
+            merges += 1
+    for rid, l in local_by.items():
+        if rid in seen:
+            continue
+        b = base_by.get(rid)
+        if b is None or b != l:
+            out.append(l)              # ajouté ici, ou modifié ici et supprimé ailleurs
+    return out, merges
+
+def _rebase_shared(name, collection, records):
+    """Liste fusionnée si une autre session a publié `name` depuis que la session
+    l'a lu, sinon None (rien à faire)."""
+    store = _shared_store()
+    version, latest = store.get(name)
+    base = _shared_bases().get(name)
+    if latest is None or base is None or version == _shared_versions().get(name):
+        return None
+    out, merges = _rebase_records(collection, base, records, latest)
+    store.merges += merges
+    return out
+
+def _patch_records(collection, records, merged, deleted=()):
+    """records où les enregistrements fusionnés (par id de ligne) remplacent les
+    anciens, sans les ids supprimés ; les nouveaux arrivent en fin de liste."""
+    if not merged and not deleted:
+        return records
+    out, seen = [], set()
+    for rid, r in _keyed_rows(collection, records):
+        if rid in deleted:
+            continue
+        seen.add(rid)
+        out.append(merged.get(rid, r))
+    out.extend(rec for rid, rec in merged.items() if rid not in seen)
+    return out
+
+def _publish_merged(collection, merged):
+    """Republie dans le modèle partagé les enregistrements fusionnés par le thread
+    d'écriture : toutes les sessions les reprennent au rerun suivant."""
+    if not merged:
+        return
+    store = _shared_store()
+    store.merges += len(merged)
+    if collection != "surveillance":
+        names = {collection: merged}
+    else:
+        names = {}
+        for rid, rec in merged.items():
+            names.setdefault(_surv_part_name(_surv_month(rec)), {})[rid] = rec
+    for name, recs in names.items():
+        _, latest = store.get(name)
+        if latest is not None:
+            store.publish(name, _patch_records(collection, latest, recs), recs)
+
+# ── PROPAGATION DES CHANGEMENTS ───────────────────────────────────────────────
+# Dans le process, le modèle partagé sert de canal : chaque publication annonce
+# « collection X, version N, ids … » et une session en retard ne recopie que ces
+# enregistrements (_session_catch_up). Entre process (plusieurs instances sur
+# Supabase), un déclencheur SQL consigne chaque écriture dans rec_changes ; un
+# thread lit ce journal toutes les quelques secondes, relit les seules lignes
+# concernées et les publie dans le modèle partagé. Les sessions ouvertes se
+# rafraîchissent d'elles-mêmes quand une publication les concerne.
+CHANGE_FEED_INTERVAL = 3.0   # secondes entre deux lectures de rec_changes
+LIVE_REFRESH_SECONDS = 10    # vérification périodique des sessions ouvertes
+_FEED_BATCH = 500
+
+def _follow_shared(name, collection):
+    """(enregistrements modifiés par id, ids supprimés) publiés par d'autres depuis
+    la version de la session, ou None s'il faut tout reprendre."""
+    delta = _shared_store().delta(name, _shared_versions().get(name, 0))
+    if delta is None:
+        return None
+    version, latest, changed, deleted = delta
+    _shared_versions()[name] = version
+    _shared_bases()[name] = latest
+    fresh = {rid: dict(r) for rid, r in _keyed_rows(collection, latest) if rid in changed}
+    return fresh, deleted
+
+def _rows_catch_up(collection, fresh, deleted):
+    """Recale l'état connu de la session sur les lignes reprises du modèle partagé."""
+    with _rows_lock():
+        known = _rows_baseline().get(collection)
+        if known is None:
+            return
+        shared = _shared_store().digests.get(collection) or {}
+        for rid in deleted:
+            known.pop(rid, None)
+        for rid, rec in fresh.items():
+            entry = shared.get(rid)
+            if entry is not None and entry[1] == _record_digest(rec):
+                known[rid] = entry
+
+def _session_catch_up():
+    """Reprise des publications des autres sessions depuis le dernier rerun : seuls
+    les enregistrements annoncés sont recopiés (liste complète si le journal ne suffit pas)."""
+    store = _shared_store()
+    for coll in ROW_COLLECTIONS:
+        if coll == "surveillance" or _shared_versions().get(coll, 0) >= store.version(coll):
+            continue
+        follow = _follow_shared(coll, coll) if coll in st.session_state else None
+        if follow is None:
+            fresh = _adopt_shared(coll)
+            if fresh is not None:
+                st.session_state[coll] = fresh
+            continue
+        fresh, deleted = follow
+        st.session_state[coll] = _patch_records(coll, st.session_state[coll], fresh, deleted)
+        _rows_catch_up(coll, fresh, deleted)
+    months = _surv_loaded_months()
+    behind = [m for m in months
+              if _shared_versions().get(_surv_part_name(m), 0) < store.version(_surv_part_name(m))]
+    if not behind:
+        return
+    fresh, deleted = {}, set()
+    for m in behind:
+        follow = _follow_shared(_surv_part_name(m), "surveillance")
+        if follow is None or "surveillance" not in st.session_state:
+            st.session_state.surveillance = _surv_assemble(months)
+            return
+        fresh.update(follow[0])
+        deleted |= follow[1]
+    deleted -= set(fresh)   # changement de mois : supprimé d'une partition, ajouté à l'autre
+    st.session_state.surveillance = _patch_records(
+        "surveillance", st.session_state.surveillance, fresh, deleted)
+    _rows_catch_up("surveillance", fresh, deleted)
+
+def _session_behind():
+    store = _shared_store()
+    names = [c for c in ROW_COLLECTIONS if c != "surveillance"]
+    names += [_surv_part_name(m) for m in _surv_loaded_months()]
+    return any(_shared_versions().get(n, 0) < store.version(n) for n in names)
+
+def _publish_remote(collection, fresh, deleted):
+    """Publie dans le modèle partagé des lignes modifiées / supprimées par une autre
+    instance. fresh = {id: (version, enregistrement)}."""
+    store = _shared_store()
+    with _rows_lock():
+        digests = store.digests.setdefault(collection, {})
+        for rid, (version, rec) in fresh.items():
+            digests[rid] = (_row_part(collection, rec), _record_digest(rec), version, rec)
+        for rid in deleted:
+            digests.pop(rid, None)
+    recs = {rid: rec for rid, (_, rec) in fresh.items()}
+    if collection != "surveillance":
+        targets = {collection: (recs, deleted)}
+    else:
+        targets = {}
+        for m in store.names("surveillance:"):
+            mine = {rid: rec for rid, rec in recs.items() if _surv_month(rec) == m}
+            targets[_surv_part_name(m)] = (mine, set(deleted) | (set(recs) - set(mine)))
+    for name, (mine, gone) in targets.items():
+        _, latest = store.get(name)
+        if latest is None:
+            continue
+        current = dict(_keyed_rows(collection, latest))
+        mine = {rid: rec for rid, rec in mine.items() if current.get(rid) != rec}
+        gone = {rid for rid in gone if rid in current}
+        if mine or gone:
+            store.publish(name, _patch_records(collection, latest, mine, gone), mine, gone)
+
+class _ChangeFeed:
+    """Lecture périodique du journal rec_changes (toutes collections en une requête)."""
+    def __init__(self, interval):
+        self.interval  = interval
+        self.available = None   # False : table rec_changes absente, flux désactivé
+        self.watermark = None
+        self.applied   = 0
+        self._thread = threading.Thread(target=self._run, name="urc-change-feed", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while self.available is not False:
+            time.sleep(self.interval)
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"[SUPA ERROR] rec_changes : {e}")
+
+    def poll(self):
+        supa = get_supabase_client()
+        if supa is None:
+            return
+        if self.watermark is None:
+            try:
+                res = (supa.table("rec_changes").select("seq")
+                       .order("seq", desc=True).limit(1).execute())
+            except Exception as e:
+                print(f"[SUPA ERROR] rec_changes : {e}")
+                if _missing_relation(e):
+                    self.available = False   # schéma sans journal : flux désactivé
+                return                       # sinon nouvel essai au prochain passage
+            rows = getattr(res, "data", None) or []
+            self.watermark = rows[0]["seq"] if rows else 0
+            self.available = True
+            return
+        res = (supa.table("rec_changes").select("seq,collection,id,op,version")
+               .gt("seq", self.watermark).order("seq").limit(_FEED_BATCH).execute())
+        rows = getattr(res, "data", None) or []
+        if not rows:
+            return
+        self.watermark = rows[-1]["seq"]
+        by_coll = {}
+        for row in rows:
+            by_coll.setdefault(row.get("collection"), {})[row.get("id")] = (row.get("op"), row.get("version"))
+        store = _shared_store()
+        for coll, ops in by_coll.items():
+            if coll not in ROW_COLLECTIONS:
+                continue
+            # Nos propres écritures sont déjà connues à cette version : pas de relecture
+            with _rows_lock():
+                known = store.digests.get(coll) or {}
+                puts = [rid for rid, (op, v) in ops.items()
+                        if op != "del" and (known.get(rid) or (None,) * 4)[2] != v]
+            deleted = {rid for rid, (op, _) in ops.items() if op == "del"}
+            fresh = {}
+            for i in range(0, len(puts), _ROW_CHUNK):
+                res = (supa.table(_row_table(coll)).select("id,data,version")
+                       .in_("id", puts[i:i + _ROW_CHUNK]).execute())
+                for row in (getattr(res, "data", None) or []):
+                    data = row.get("data")
+                    if isinstance(data, str):
+                        data = json.loads(data)
+                    if isinstance(data, dict):
+                        fresh[row.get("id")] = (row.get("version"), dict(data))
+            if fresh or deleted:
+                _publish_remote(coll, fresh, deleted)
+                self.applied += len(fresh) + len(deleted)
+
+@st.cache_resource
+def _change_feed():
+    return _ChangeFeed(CHANGE_FEED_INTERVAL)
+
+def _ensure_ids(collection, records):
+    for r in records:
+        _record_id(collection, r)
+
+def _load_json_key(key, local_file):
+    remote = _load_rows(key)
+    if remote is not None:
+        return remote
+    return _local_load_collection(key, local_file)
+
+def _flush_json_key(key, data, local_file, supa, base, tables, digests):
+    if supa:
+        _save_rows(key, data, base, tables, digests)
+    _local_save_collection(key, data, local_file)
+
+def _save_json_key(key, data, local_file, supa=True):
+    base = _rows_baseline()
+    _ensure_ids(key, data)
+    rebased = _rebase_shared(key, key, data)
+    if rebased is not None:
+        data[:] = [dict(r) for r in rebased]
+    snap = _snapshot(data)
+    if not _publish_shared(key, snap, key) and not _rows_take_forced(key):
+        return   # contenu identique au dernier publié : ni Supabase ni fichier à réécrire
+    _enqueue_write((id(base), key, supa), _flush_json_key,
+                   key, snap, local_file, supa, base, _row_tables_state(),
+                   _shared_store().digests)
+
+def load_points():  return _load_json_key('points', POINTS_FILE)
+def save_points(d, supa=True):
+    _save_json_key('points', d, POINTS_FILE, supa)
+
+def load_prelevements():  return _load_json_key('prelevements', PRELEVEMENTS_FILE)
+def save_prelevements(d, supa=True):
+    _save_json_key('prelevements', d, PRELEVEMENTS_FILE, supa)
+
+def load_schedules():  return _load_json_key('schedules', SCHEDULES_FILE)
+def save_schedules(d, supa=True):
+    _save_json_key('schedules', d, SCHEDULES_FILE, supa)
+
+def load_pending_identifications():  return _load_json_key('pending_identifications', PENDING_FILE)
+def save_pending_identifications(d, supa=True):
+    _save_json_key('pending_identifications', d, PENDING_FILE, supa)
+
+def load_archived_samples():  return _load_json_key('archived_samples', ARCHIVED_FILE)
+def save_archived_samples(d, supa=True):
+    _save_json_key('archived_samples', d, ARCHIVED_FILE, supa)
+
+def load_operators():  return _load_json_key('operators', OPERATORS_FILE)
+def save_operators(d, supa=True):
+    _save_json_key('operators', d, OPERATORS_FILE, supa)
+
+def load_plans():  return _load_json_key('plans', PLANS_FILE)
+def save_plans(d, supa=True):
+    _externalize_plan_images(d)
+    _save_json_key('plans', d, PLANS_FILE, supa)
+
+# ── IMAGES DES PLANS ──────────────────────────────────────────────────────────
+# Les images ne sont plus stockées en base64 dans les enregistrements de plans :
+# chaque image est rangée une fois, sous son empreinte SHA-256, dans un stockage
+# de fichiers (dossier local, ou Supabase Storage avec le dossier local en cache),
+# et le plan ne garde qu'une référence "blob:<type mime>:<empreinte>". Les images
+# et leurs vignettes ne sont lues qu'à l'affichage (plan_image).
+BLOB_DIR     = "plan_blobs"
+BLOB_BUCKET  = "plans"
+BLOB_REF     = "blob:"
+THUMB_SIZES  = (160, 480, 1200)   # largeurs de vignettes proposées (px)
+_DATA_URL_RE = re.compile(r"^data:(image/[\w.+-]+);base64,")
+
+class _LocalBlobStore:
+    """Fichiers rangés par empreinte : <racine>/ab/abcdef…[suffixe]."""
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, digest, suffix=""):
+        return os.path.join(self.root, digest[:2], digest + suffix)
+
+    def has(self, digest, suffix=""):
+        return os.path.exists(self._path(digest, suffix))
+
+    def get(self, digest, suffix=""):
+        try:
+            with open(self._path(digest, suffix), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        _count_io("lecture", self.root, len(data))
+        return data
+
+    def put(self, digest, data, suffix=""):
+        path = self._path(digest, suffix)
+        if os.path.exists(path):
+            return   # contenu adressé par empreinte : déjà présent = identique
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        _count_io("écriture", self.root, len(data))
+
+class _SupabaseBlobStore:
+    """Supabase Storage (bucket BLOB_BUCKET), avec le dossier local en cache.
+    Les envois passent par la boîte d'envoi : une image ajoutée hors ligne part
+    dès que Supabase répond."""
+    def __init__(self, bucket, cache):
+        self.bucket = bucket
+        self.cache  = cache
+
+    def _remote(self):
+        supa = get_supabase_client()
+        return supa.storage.from_(self.bucket) if supa is not None else None
+
+    def get(self, digest, suffix=""):
+        data = self.cache.get(digest, suffix)
+        if data is not None or suffix:
+            return data   # les vignettes ne sont gardées qu'en local
+        try:
+            data = self._remote().download(f"{digest[:2]}/{digest}")
+        except Exception as e:
+            print(f"[SUPA ERROR] storage {digest[:12]} : {e}")
+            return None
+        self.cache.put(digest, data)
+        return data
+
+    def put(self, digest, data, suffix=""):
+        fresh = not self.cache.has(digest, suffix)
+        self.cache.put(digest, data, suffix)
+        if fresh and not suffix:
+            _outbox().add_upload(digest)
+
+    def upload_now(self, digest):
+        data = self.cache.get(digest)
+        if data is None:
+            return True   # rien à envoyer
+        try:
+            self._remote().upload(f"{digest[:2]}/{digest}", data,
+                                  {"content-type": "application/octet-stream", "upsert": "true"})
+            return True
+        except Exception as e:
+            if "Duplicate" in str(e) or "already exists" in str(e):
+                return True
+            print(f"[SUPA ERROR] storage {digest[:12]} : {e}")
+            return False
+
+@st.cache_resource
+def _blob_store():
+    local = _LocalBlobStore(BLOB_DIR)
+    if get_supabase_client() is not None:
+        return _SupabaseBlobStore(BLOB_BUCKET, local)
+    return local
+
+def _parse_blob_ref(value):
+    """(type mime, empreinte) d'une référence blob, ou None."""
+    if isinstance(value, str) and value.startswith(BLOB_REF):
+        parts = value.split(":", 2)
+        if len(parts) == 3:
+            return parts[1], parts[2]
+    return None
+
+def store_image(data: bytes, mime="image/png"):
+    """Range une image et retourne sa référence."""
+    digest = hashlib.sha256(data).hexdigest()
+    _blob_store().put(digest, data)
+    return f"{BLOB_REF}{mime}:{digest}"
+
+def _externalize_plan_images(plans):
+    """Remplace les images base64 des plans par des références ; True si modifié."""
+    changed = False
+    for plan in plans:
+        for k, v in list(plan.items()):
+            if isinstance(v, str) and v.startswith("data:image/"):
+                m = _DATA_URL_RE.match(v)
+                if m is None:
+                    continue
+                try:
+                    data = base64.b64decode(v[m.end():])
+                except Exception:
+                    continue
+                plan[k] = store_image(data, m.group(1))
+                changed = True
+    return changed
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _image_bytes(digest, width):
+    store = _blob_store()
+    if width is None:
+        return store.get(digest)
+    suffix = f"_{width}.png"
+    thumb = store.get(digest, suffix)
+    if thumb is not None:
+        return thumb
+    data = store.get(digest)
+    if data is None:
+        return None
+    try:
+        from PIL import Image
+        img = Image.open(io.BytesIO(data))
+        img.thumbnail((width, width * 4))
+        buf = io.BytesIO()
+        img.save(buf, format="PNG", optimize=True)
+    except Exception as e:
+        print(f"[LOCAL ERROR] vignette {digest[:12]} : {e}")
+        return data
+    thumb = buf.getvalue()
+    store.put(digest, thumb, suffix)
+    return thumb
+
+def plan_image(ref, width=None):
+    """Octets de l'image référencée (vignette à la plus petite taille de THUMB_SIZES
+    couvrant `width`, image d'origine si width est None), ou None."""
+    parsed = _parse_blob_ref(ref)
+    if parsed is None:
+        return None
+    if width is not None:
+        width = next((w for w in THUMB_SIZES if w >= width), None)
+    return _image_bytes(parsed[1], width)
+
+def plan_image_refs(plans):
+    """Empreintes des images référencées par les plans."""
+    return {parsed[1] for p in plans for v in p.values()
+            if (parsed := _parse_blob_ref(v)) is not None}
+
+def load_faq():
+    raw_json = _supa_get('faq')
+    if raw_json:
+        try:
+            raw = json.loads(raw_json)
+            if isinstance(raw, list) and raw:
+                return raw
+        except Exception:
+            pass
+    return [dict(f) for f in DEFAULT_FAQ]
+
+def save_faq(faq_items, supa=True):
+    if supa:
+        _enqueue_write('faq', _flush_blob, 'faq', json.dumps(faq_items, ensure_ascii=False))
+
+# ── HISTORIQUE PAR MOIS ───────────────────────────────────────────────────────
+# L'historique est partitionné par mois (date de prélèvement, sinon date de
+# lecture) dans le stockage comme en mémoire. Une session ne charge que le mois
+# courant et le précédent ; l'onglet Analyse charge les mois plus anciens quand
+# le filtre de dates les atteint. st.session_state["_surv_months"] contient les
+# mois chargés (None = tout l'historique, quand le stockage ne sait pas filtrer).
+# Le modèle partagé garde une entrée "surveillance:<mois>" par partition.
+SURV_EAGER_MONTHS = 2
+
+def _surv_month(rec):
+    return str(rec.get("date_prelevement") or rec.get("date") or "")[:7]
+
+def _surv_part_name(month):
+    return f"surveillance:{month}"
+
+def _surv_eager_months(today=None):
+    today = today or date.today()
+    months = {""}
+    y, m = today.year, today.month
+    for _ in range(SURV_EAGER_MONTHS):
+        months.add(f"{y:04d}-{m:02d}")
+        y, m = (y, m - 1) if m > 1 else (y - 1, 12)
+    return months
+
+def _months_between(d1, d2):
+    months = set()
+    y, m = d1.year, d1.month
+    while (y, m) <= (d2.year, d2.month):
+        months.add(f"{y:04d}-{m:02d}")
+        y, m = (y, m + 1) if m < 12 else (y + 1, 1)
+    return months
+
+def surveillance_month_index():
+    """{mois: nb d'entrées} de tout l'historique stocké, ou None si non partitionnable."""
+    if get_supabase_client() is not None:
+        return _supa_month_index()
+    return _local_surv_month_index()
+
+def load_surveillance(months=None):
+    if months is None:
+        remote = _load_rows('surveillance')
+        if remote is not None:
+            return remote
+        return _local_load_collection('surveillance', CSV_FILE)
+    if get_supabase_client() is not None:
+        fetched = _supa_rows_get('surveillance', months=months)
+        if fetched is not None:
+            rows, versions = fetched
+            _rows_set_baseline('surveillance', rows, merge=True, versions=versions)
+            return rows
+    return _local_load_collection('surveillance', CSV_FILE, months)
+
+def _surv_publish_parts(records, months):
+    """Publie les partitions `months` de records (copies déjà faites) si elles ont
+    changé. Retourne les mois publiés."""
+    store = _shared_store()
+    parts = {m: [] for m in months}
+    for r in records:
+        parts.setdefault(_surv_month(r), []).append(r)
+    published = set()
+    for m, part in parts.items():
+        version, latest = store.get(_surv_part_name(m))
+        if latest != part:
+            _publish_shared(_surv_part_name(m), part, "surveillance")
+            published.add(m)
+        else:
+            _shared_versions()[_surv_part_name(m)] = version
+            _shared_bases()[_surv_part_name(m)] = latest
+    return published
+
+def _surv_fetch_months(months, force=False):
+    """Charge dans le modèle partagé les mois absents (une seule requête)."""
+    store = _shared_store()
+    missing = {m for m in months if force or not store.version(_surv_part_name(m))}
+    if not missing:
+        return []
+    records = load_surveillance(missing)
+    snap = _snapshot(records)
+    _surv_publish_parts(snap, missing)
+    _rows_attach_ancestors("surveillance", snap)
+    _rows_share_baseline("surveillance", merge=True)
+    return records
+
+def _surv_loaded_months():
+    months = st.session_state.get("_surv_months")
+    if months is None:
+        return set(_shared_store().names("surveillance:"))
+    return months
+
+def _surv_assemble(months):
+    """Liste de session = copie des partitions chargées, dans l'ordre des mois."""
+    store = _shared_store()
+    out = []
+    for m in sorted(months):
+        part = _adopt_shared(_surv_part_name(m))
+        if part:
+            out.extend(part)
+    with _rows_lock():
+        if "surveillance" not in _rows_baseline() and "surveillance" in store.digests:
+            _rows_baseline()["surveillance"] = dict(store.digests["surveillance"])
+    return out
+
+def _surv_bootstrap(force=False):
+    store = _shared_store()
+    index = surveillance_month_index()
+    st.session_state["_surv_index"] = index
+    if index is None:
+        # Stockage non partitionnable (ancien blob, vue absente) : tout l'historique
+        st.session_state["_surv_months"] = None
+        if force or not store.surv_complete:
+            records = _snapshot(load_surveillance())
+            _surv_publish_parts(records, set(store.names("surveillance:")))
+            _rows_attach_ancestors("surveillance", records)
+            store.surv_complete = True
+            _rows_share_baseline("surveillance")
+        return _surv_assemble(_surv_loaded_months())
+    months = _surv_eager_months()
+    st.session_state["_surv_months"] = set(months)
+    _surv_fetch_months(months, force=force)
+    return _surv_assemble(months)
+
+def ensure_surveillance_months(months):
+    """Charge dans la session les mois demandés qui existent dans le stockage.
+    Retourne True si la liste de session a changé."""
+    loaded = st.session_state.get("_surv_months")
+    if loaded is None:
+        return False
+    index = st.session_state.get("_surv_index") or {}
+    wanted = {m for m in months if m in index} - loaded
+    if not wanted:
+        return False
+    _surv_fetch_months(wanted)
+    st.session_state["_surv_months"] = loaded | wanted
+    st.session_state.surveillance = _surv_assemble(st.session_state["_surv_months"])
+    return True
+
+def _surv_replace_all():
+    """La prochaine sauvegarde remplace tout l'historique (vidage, restauration)."""
+    _rows_sync_ids("surveillance")
+    st.session_state["_surv_months"] = None
+    _shared_store().surv_complete = True
+
+def surveillance_full():
+    """Tout l'historique (export) sans changer les mois chargés par la session."""
+    loaded = st.session_state.get("_surv_months")
+    if loaded is not None:
+        index = st.session_state.get("_surv_index") or {}
+        _surv_fetch_months(set(index) - loaded)
+        months = set(index) | loaded
+    else:
+        months = _surv_loaded_months()
+    store = _shared_store()
+    out = []
+    for m in sorted(months):
+        out.extend(store.get(_surv_part_name(m))[1] or [])
+    return out
+
+def _read_surveillance_csv():
+    if os.path.exists(CSV_FILE):
+        try:
+            rows = []
+            with open(CSV_FILE, newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                for row in reader:
+                    rows.append(row)
+            return rows
+        except Exception:
+            pass
+    return []
+
+def _flush_surveillance(records, base, tables, digests, months):
+    _save_rows('surveillance', records, base, tables, digests, months)
+    _local_save_collection('surveillance', records, CSV_FILE, months)
+
+def _surv_rebase(records, months):
+    """Rejoue la liste de session sur les partitions publiées entre-temps par
+    d'autres sessions (voir _rebase_shared). Modifie records sur place."""
+    parts = {}
+    for r in records:
+        parts.setdefault(_surv_month(r), []).append(r)
+    changed = False
+    for m in months | set(parts):
+        rebased = _rebase_shared(_surv_part_name(m), "surveillance", parts.get(m, []))
+        if rebased is not None:
+            parts[m] = [dict(r) for r in rebased]
+            changed = True
+    if changed:
+        records[:] = [r for m in sorted(parts) for r in parts[m]]
+
+def save_surveillance(records):
+    base = _rows_baseline()
+    _ensure_ids('surveillance', records)
+    months = st.session_state.get("_surv_months")
+    if months is not None:
+        extra = {_surv_month(r) for r in records} - months
+        if extra:
+            # Entrée datée d'un mois non chargé : on récupère ce mois avant d'écrire
+            ids = {r.get("id") for r in records}
+            records.extend(dict(r) for r in _surv_fetch_months(extra) if r.get("id") not in ids)
+            months = months | extra
+            st.session_state["_surv_months"] = months
+        months = set(months)
+    scope = months if months is not None else set(_shared_store().names("surveillance:"))
+    _surv_rebase(records, scope)
+    snap = _snapshot(records)
+    if not _surv_publish_parts(snap, scope) and not _rows_take_forced('surveillance'):
+        return   # rien n'a changé depuis la dernière publication
+    index = st.session_state.get("_surv_index")
+    if index is not None:
+        for m in (months if months is not None else index.keys() | {_surv_month(r) for r in snap}):
+            index[m] = sum(1 for r in snap if _surv_month(r) == m)
+    _enqueue_write((id(base), 'surveillance'), _flush_surveillance,
+                   snap, base, _row_tables_state(), _shared_store().digests, months)
+
+def export_all_data():
+    return {
+        "_meta": {
+            "version": "5.0",
+            "exported_at": datetime.now().isoformat(),
+            "app": "MicroSurveillance URC"
+        },
+        "germs":                   st.session_state.germs,
+        "thresholds":              {str(k): v for k, v in st.session_state.thresholds.items()},
+        "measures":                {str(k): v for k, v in st.session_state.measures.items()},
+        "origin_measures":         st.session_state.origin_measures,
+        "points":                  st.session_state.points,
+        "operators":               st.session_state.operators,
+        "plans":                   st.session_state.plans,
+        "prelevements":            st.session_state.prelevements,
+        "schedules":               st.session_state.schedules,
+        "pending_identifications": st.session_state.pending_identifications,
+        "archived_samples":        st.session_state.archived_samples,
+        "surveillance":            surveillance_full(),
+        "planning_overrides":      st.session_state.get("planning_overrides", {}),
+        # Images des plans, une seule fois chacune (les plans n'en gardent que la référence)
+        "blobs":                   {d: base64.b64encode(b).decode("ascii")
+                                    for d in sorted(plan_image_refs(st.session_state.plans))
+                                    if (b := _blob_store().get(d)) is not None},
+    }
+
+# ── EXPORT À LA DEMANDE ───────────────────────────────────────────────────────
+# L'export complet n'est construit que sur demande, sérialisé par morceaux
+# (JSON compact, gzip en option) puis gardé en cache tant que les données n'ont
+# pas changé : l'empreinte combine les versions du modèle partagé et les petits
+# réglages de session.
+EXPORT_CHUNK = 1 << 16   # caractères accumulés avant chaque écriture
+
+@st.cache_resource
+def _export_cache():
+    return {}
+
+def _export_fingerprint():
+    store = _shared_store()
+    names = [c for c in ROW_COLLECTIONS if c != "surveillance"]
+    names += sorted(_surv_part_name(m) for m in store.names("surveillance:"))
+    versions = [(n, store.version(n)) for n in names]
+    small = json.dumps([st.session_state.germs,
+                        {str(k): v for k, v in st.session_state.thresholds.items()},
+                        {str(k): v for k, v in st.session_state.measures.items()},
+                        st.session_state.origin_measures,
+                        st.session_state.get("planning_overrides", {}),
+                        st.session_state.get("_surv_index")],
+                       sort_keys=True, default=str)
+    return _content_hash(repr(versions) + small)
+
+def _encode_export(data, compress):
+    buf = io.BytesIO()
+    out = gzip.GzipFile(fileobj=buf, mode="wb", mtime=0) if compress else buf
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str)
+    pending, size = [], 0
+    for chunk in encoder.iterencode(data):
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= EXPORT_CHUNK:
+            out.write("".join(pending).encode("utf-8"))
+            pending, size = [], 0
+    out.write("".join(pending).encode("utf-8"))
+    if compress:
+        out.close()
+    return buf.getvalue()
+
+def cached_export(compress=False):
+    """Export déjà construit pour la version actuelle des données, ou None."""
+    return _export_cache().get((_export_fingerprint(), compress))
+
+def build_export(compress=False):
+    """Octets de l'export complet (JSON compact, gzip en option)."""
+    data = export_all_data()   # charge au besoin les mois d'historique manquants
+    key = (_export_fingerprint(), compress)
+    cache = _export_cache()
+    if key not in cache:
+        payload = _encode_export(data, compress)
+        # Une seule version des données est gardée (JSON et/ou gzip)
+        for old in [k for k in cache if k[0] != key[0]]:
+            del cache[old]
+        cache[key] = payload
+    return cache[key]
+
+def _export_widget(key, compress=False, label="⬇️ Exporter toutes les données", help=None):
+    """Bouton « préparer » puis téléchargement : rien n'est sérialisé tant que
+    l'utilisateur ne le demande pas."""
+    payload = cached_export(compress)
+    if payload is None:
+        if st.button("📦 Préparer l'export", key=f"{key}_prepare",
+                     use_container_width=True, help=help):
+            with st.spinner("Préparation de l'export…"):
+                payload = build_export(compress)
+    if payload is not None:
+        ext = "json.gz" if compress else "json"
+        st.download_button(
+            label=f"{label} ({len(payload)//1024 + 1} Ko)",
+            data=payload,
+            file_name=f"backup_URC_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{ext}",
+            mime="application/gzip" if compress else "application/json",
+            use_container_width=True,
+            key=key,
+            help=help,
+        )
+
+def read_backup_file(raw: bytes):
+    """Contenu d'un fichier de sauvegarde (.json ou .json.gz)."""
+    if raw[:2] == b"\x1f\x8b":
+        raw = gzip.decompress(raw)
+    return json.loads(raw.decode("utf-8"))
+
+def import_all_data(data: dict):
+    try:
+        required = ["germs", "points", "operators", "prelevements", "schedules", "surveillance"]
+        for key in required:
+            if key not in data:
+                return False, f"Clé manquante dans le fichier : '{key}'"
+        st.session_state.germs = [dict(g) for g in data["germs"]]
+        _germs_sync, _ = load_germs()
+        _default_names = {d["name"] for d in DEFAULT_GERMS}
+        _custom = [g for g in st.session_state.germs if g.get("name") not in _default_names]
+        st.session_state.germs = _germs_sync + [g for g in _custom if g.get("name") not in {x["name"] for x in _germs_sync}]
+        st.session_state.origin_measures         = [dict(m) for m in data.get("origin_measures", [])] or [dict(m) for m in DEFAULT_ORIGIN_MEASURES]
+        st.session_state.points                  = [dict(p) for p in data.get("points", [])]
+        st.session_state.operators               = [dict(o) for o in data.get("operators", [])]
+        for _b64 in (data.get("blobs") or {}).values():
+            _raw = base64.b64decode(_b64)
+            _blob_store().put(hashlib.sha256(_raw).hexdigest(), _raw)
+        st.session_state.plans                   = [dict(p) for p in data.get("plans", [])]
+        st.session_state.prelevements            = [dict(p) for p in data.get("prelevements", [])]
+        st.session_state.schedules               = [dict(s) for s in data.get("schedules", [])]
+        st.session_state.pending_identifications = [dict(x) for x in data.get("pending_identifications", [])]
+        st.session_state.archived_samples        = [dict(x) for x in data.get("archived_samples", [])]
+        st.session_state.surveillance            = list(data.get("surveillance", []))
+        if "thresholds" in data:
+            st.session_state.thresholds = {int(k): v for k, v in data["thresholds"].items()}
+        if "measures" in data:
+            st.session_state.measures   = {int(k): v for k, v in data["measures"].items()}
+        for _coll in ROW_COLLECTIONS:
+            _rows_sync_ids(_coll)
+        _surv_replace_all()
+        save_germs(st.session_state.germs)
+        save_origin_measures(st.session_state.origin_measures)
+        save_points(st.session_state.points)
+        save_operators(st.session_state.operators)
+        save_plans(st.session_state.plans)
+        save_prelevements(st.session_state.prelevements)
+        save_schedules(st.session_state.schedules)
+        save_pending_identifications(st.session_state.pending_identifications)
+        save_archived_samples(st.session_state.archived_samples)
+        save_surveillance(st.session_state.surveillance)
+        save_thresholds_and_measures(st.session_state.thresholds, st.session_state.measures)
+        n_p = len(st.session_state.prelevements)
+        n_s = len(st.session_state.schedules)
+        n_g = len(st.session_state.germs)
+        n_h = len(st.session_state.surveillance)
+        return True, (f"Restauration réussie — {n_g} germes, {n_p} prélèvements, "
+                      f"{n_s} lectures planifiées, {n_h} entrées historique.")
+    except Exception as e:
+        return False, f"Erreur lors de la restauration : {e}"
+
+def find_germ_match(query, germs):
+    query_low  = query.lower().strip()
+    query_genus = query_low.split()[0] if query_low else ""
+    best_score = 0
+    best_match = None
+    for g in germs:
+        name_low = g["name"].lower()
+        genus    = name_low.split()[0]
+        if query_genus and query_genus == genus:
+            score = 0.9
+        else:
+            score       = difflib.SequenceMatcher(None, query_low, name_low).ratio()
+            genus_score = difflib.SequenceMatcher(None, query_genus, genus).ratio()
+            score       = max(score, genus_score * 0.85)
+        if score > best_score:
+            best_score = score
+            best_match = g
+    return best_match, best_score
+
+def load_planning_skips():
+    raw_json = _supa_get('planning_skips')
+    if raw_json:
+        try:
+            raw = json.loads(raw_json)
+            if isinstance(raw, dict):
+                return raw
+        except Exception:
+            pass
+    return {}
+
+def save_planning_skips(skips):
+    _enqueue_write('planning_skips', _flush_blob, 'planning_skips', json.dumps(skips, ensure_ascii=False))
+
+# ── INDEX EN MÉMOIRE ──────────────────────────────────────────────────────────
+class _Index:
+    """Index clé → position (et clé étrangère → positions) sur une liste de la session.
+    Vérification en temps constant à chaque accès : les ajouts en fin de liste sont
+    indexés au fil de l'eau ; une nouvelle liste, une liste raccourcie ou une
+    nouvelle version de la collection (sauvegarde, reprise du modèle partagé)
+    reconstruisent l'index, de même qu'invalidate() pour une collection sans
+    version. Un enregistrement remplacé sur place est détecté à la lecture de sa
+    position (clé différente) ; les chemins de modification sauvegardent aussitôt."""
+
+    def __init__(self, key, group=None):
+        self.key, self.group = key, group
+        self._src, self._n, self._version = None, 0, None
+        self._pos, self._groups = {}, {}
+        self._miss_run = None
+
+    def _add(self, i, r):
+        self._pos.setdefault(r.get(self.key), i)
+        if self.group:
+            self._groups.setdefault(r.get(self.group), []).append(i)
+
+    def _rebuild(self, records, version=None):
+        self._pos, self._groups = {}, {}
+        for i, r in enumerate(records):
+            self._add(i, r)
+        self._src, self._n, self._version = records, len(records), version
+
+    def _sync(self, records, version=None):
+        if records is self._src and version == self._version:
+            n = len(records)
+            if n == self._n:
+                return
+            if n > self._n:
+                for i in range(self._n, n):
+                    self._add(i, records[i])
+                self._n = n
+                return
+        self._rebuild(records, version)
+
+    def invalidate(self):
+        self._src = None
+
+    def _stale(self, records, i, field, value):
+        return i >= len(records) or records[i].get(field) != value
+
+    def _retry(self, records):
+        """Clé absente : une reconstruction au plus par rerun (clé posée après coup)."""
+        run = st.session_state.get("_run_id")
+        if self._miss_run == run:
+            return False
+        self._miss_run = run
+        self._rebuild(records, self._version)
+        return True
+
+    def get(self, records, k, version=None):
+        self._sync(records, version)
+        i = self._pos.get(k)
+        if i is None or self._stale(records, i, self.key, k):
+            if i is not None:
+                self._rebuild(records, version)
+            elif not self._retry(records):
+                return None
+            i = self._pos.get(k)
+            if i is None or self._stale(records, i, self.key, k):
+                return None
+        return records[i]
+
+    def group_of(self, records, g, version=None):
+        self._sync(records, version)
+        pos = self._groups.get(g, ())
+        if any(self._stale(records, i, self.group, g) for i in pos):
+            self._rebuild(records, version)
+            pos = self._groups.get(g, ())
+        return [records[i] for i in pos]
+
+class _Repository:
+    """Accès direct aux collections de la session par identifiant et par clé étrangère."""
+
+    _INDEXES = {
+        "prelevements":            ("id", None),
+        "schedules":               ("id", "sample_id"),
+        "pending_identifications": ("id", "sample_id"),
+        "points":                  ("label", None),
+        "germs":                   ("name", None),
+    }
+
+    def __init__(self):
+        self._idx = {name: _Index(*spec) for name, spec in self._INDEXES.items()}
+
+    # La version partagée de la collection change à chaque sauvegarde de la session
+    # et à chaque reprise des publications d'une autre session
+    def invalidate(self, name):
+        """À appeler après une modification d'une collection sans version partagée."""
+        self._idx[name].invalidate()
+
+    def _get(self, name, k):
+        return self._idx[name].get(st.session_state.get(name) or [], k,
+                                   _shared_versions().get(name))
+
+    def _group(self, name, g):
+        return self._idx[name].group_of(st.session_state.get(name) or [], g,
+                                        _shared_versions().get(name))
+
+    def prelevement(self, sample_id):
+        return self._get("prelevements", sample_id)
+
+    def schedule(self, sch_id):
+        return self._get("schedules", sch_id)
+
+    def schedules_for(self, sample_id, when=None):
+        scheds = self._group("schedules", sample_id)
+        return scheds if when is None else [s for s in scheds if s.get("when") == when]
+
+    def schedule_for(self, sample_id, when):
+        scheds = self.schedules_for(sample_id, when)
+        return scheds[0] if scheds else None
+
+    def pending_for(self, sample_id):
+        return self._group("pending_identifications", sample_id)
+
+    def point(self, label):
+        return self._get("points", label)
+
+    def germ(self, name):
+        return self._get("germs", name)
+
+def _repo():
+    """Index de la session courante (créé au premier accès)."""
+    repo = st.session_state.get("_repo")
+    if repo is None:
+        repo = st.session_state["_repo"] = _Repository()
+    return repo
@@ -0,0 +1,23 @@
+"""Onglets de l'application, un module par onglet (fonction render()).
+
+Le script n'importe que ce paquet : le module d'un onglet, et les bibliothèques
+qu'il utilise, ne sont importés qu'à la première ouverture de l'onglet dans le
+process, puis restent en cache comme tout module."""
+import importlib
+
+# Clé d'onglet (st.session_state.active_tab) -> module de urc.tabs
+TAB_MODULES = {
+    "faq":             "faq",
+    "accueil":         "accueil",
+    "Base de données": "germes",
+    "surveillance":    "surveillance",
+    "planning":        "planning",
+    "analyse":         "analyse",
+    "parametres":      "parametres",
+}
+
+def render_tab(active):
+    """Affiche l'onglet `active` (rien pour une clé inconnue)."""
+    name = TAB_MODULES.get(active)
+    if name is not None:
+        importlib.import_module(f"{__name__}.{name}").render()
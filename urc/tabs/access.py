@@ -0,0 +1,71 @@
+"""Accès protégé des onglets modifiables : mode administrateur (mot de passe) ou
+lecture seule, retenu pour la session."""
+import streamlit as st
+
+MOT_DE_PASSE_ADMIN = "pharmaCHBA"
+
+def check_access_protege(onglet_nom: str) -> bool:
+    key_mode = f"access_mode_{onglet_nom}"
+    key_pwd  = f"pwd_input_{onglet_nom}"
+    key_err  = f"pwd_error_{onglet_nom}"
+    if st.session_state.get(key_mode) == "admin":
+        col_info, col_lock = st.columns([5, 1])
+        with col_info:
+            st.success("🔓 Mode administrateur — modifications autorisées")
+        with col_lock:
+            if st.button("🔒 Verrouiller", key=f"lock_{onglet_nom}", use_container_width=True):
+                st.session_state[key_mode] = None
+                st.rerun()
+        return True
+    if st.session_state.get(key_mode) == "lecture":
+        col_info, col_conn = st.columns([5, 1])
+        with col_info:
+            st.info("👁️ Mode lecture seule — aucune modification possible")
+        with col_conn:
+            if st.button("🔑 Se connecter", key=f"connect_{onglet_nom}", use_container_width=True):
+                st.session_state[key_mode] = None
+                st.rerun()
+        return False
+    st.markdown("<div style='height:20px'></div>", unsafe_allow_html=True)
+    st.markdown(
+        "<div style='background:#fff;border:1.5px solid #e2e8f0;border-radius:14px;"
+        "padding:28px 32px;max-width:460px;margin:0 auto;box-shadow:0 4px 20px rgba(0,0,0,.08)'>"
+        "<div style='text-align:center;font-size:2.2rem;margin-bottom:8px'>🔐</div>"
+        f"<div style='text-align:center;font-weight:800;font-size:1.15rem;color:#0f172a'>"
+        f"Accès protégé — {onglet_nom}</div>"
+        "<div style='text-align:center;font-size:.85rem;color:#64748b;margin:8px 0 20px'>"
+        "Cet onglet est restreint. Connectez-vous pour modifier,<br>ou continuez en lecture seule.</div>"
+        "</div>",
+        unsafe_allow_html=True,
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**🔑 Accès administrateur**")
+        pwd = st.text_input(
+            "Mot de passe", type="password", key=key_pwd,
+            placeholder="Entrez le mot de passe", label_visibility="collapsed"
+        )
+        if st.button("✅ Connexion", key=f"btn_admin_{onglet_nom}",
+                     use_container_width=True, type="primary"):
+            if pwd == MOT_DE_PASSE_ADMIN:
+                st.session_state[key_mode] = "admin"
+                st.session_state[key_err]  = False
+                st.rerun()
+            else:
+                st.session_state[key_err] = True
+                st.rerun()
+        if st.session_state.get(key_err):
+            st.error("❌ Mot de passe incorrect")
+    with col2:
+        st.markdown("**👁️ Lecture seule**")
+        st.markdown(
+            "<div style='font-size:.82rem;color:#64748b;margin-bottom:10px'>"
+            "Consultez le contenu sans pouvoir effectuer de modifications.</div>",
+            unsafe_allow_html=True,
+        )
+        if st.button("👁️ Continuer en lecture", key=f"btn_lecture_{onglet_nom}",
+                     use_container_width=True):
+            st.session_state[key_mode] = "lecture"
+            st.rerun()
+    st.stop()
+    return False
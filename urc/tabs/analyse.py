@@ -0,0 +1,1174 @@
+"""Onglet Analyse : historique des prélèvements, statistiques par point, germe et
+préleveur, requêtes SQL sur la base locale."""
+import csv
+import io
+import re
+from datetime import datetime
+
+import streamlit as st
+
+from urc.perf import _profiled
+from urc.storage import (
+    _months_between, _repo, _surv_replace_all, _use_sqlite, ensure_surveillance_months,
+    local_sql_query, save_surveillance,
+)
+from urc.analysis import (
+    _evaluate_score, _records_in_period, _stats_par_germe, _stats_par_point,
+    _stats_par_preleveur,
+)
+from urc.tabs.mesures import _render_mesures_correctives
+
+def render():
+    st.markdown("### 📋 Analyse des prélèvements")
+    surv  = st.session_state.surveillance
+    total = len(surv)
+
+    # ── Helpers ───────────────────────────────────────────────────────────────
+    def _get_criticite(germ_name):
+        g = _repo().germ(germ_name)
+        return int(g.get("criticite", 0) or 0) if g else 0
+
+    def _crit_label(c):
+        return {5:"Critique",4:"Majeur",3:"Important",2:"Modéré",1:"Limité"}.get(c,"—")
+
+    def _crit_color(c):
+        return {5:"#7c3aed",4:"#ef4444",3:"#f97316",2:"#f59e0b",1:"#22c55e"}.get(c,"#94a3b8")
+
+    def _parse_qr_to_point_id(raw: str):
+        import json
+        if not raw:
+            return None, None
+        raw = raw.strip()
+        if raw.startswith("{"):
+            try:
+                data = json.loads(raw)
+                pid = str(data.get("id", "")).strip()
+                if pid:
+                    return pid, None
+                return None, "QR JSON valide mais sans champ 'id'."
+            except json.JSONDecodeError:
+                return None, "QR JSON invalide."
+        return raw, None
+
+    def _parse_date(date_str):
+        try:
+            return datetime.strptime(date_str, "%Y-%m-%d").date()
+        except Exception:
+            return None
+
+    def _render_liste_entries(entries, surv_ref, key_prefix=""):
+        for _li, r in enumerate(entries):
+            _real_idx = next(
+                (i for i, s in enumerate(st.session_state.surveillance) if s is r),
+                None,
+            )
+            if _real_idx is None:
+                continue
+
+            _k = f"{key_prefix}{_real_idx}"
+
+            # APRÈS
+            _ufc_r = int(r.get("ufc", 0) or 0)
+            _gd_r  = r.get("germs_detail", [])
+            if _gd_r and any(int(g.get("ufc",0) or 0) > 0 for g in _gd_r):
+                _worst_r = next((g for g in _gd_r if g.get("is_worst")), None) or _gd_r[0]
+                germ_r   = (_worst_r.get("name","") or "").strip() or r.get("germ_saisi","") or ""
+            elif _ufc_r > 0:
+                germ_r = (r.get("germ_saisi","") or "").strip()
+                if not germ_r or germ_r in ("—", "Négatif", ""):
+                    germ_r = (r.get("germ_match","") or "").strip()
+            else:
+                germ_r = ""  # UFC = 0 → pas de germe affiché
+
+            if germ_r in ("—", "Négatif", ""):
+                germ_r = ""
+
+            status_r  = r.get("status", "ok")
+            mc_statut = r.get("mc_statut", "")
+            if _gd_r:
+                _worst_r = next((g for g in _gd_r if g.get("is_worst")), None) or _gd_r[0]
+                germ_r   = _worst_r.get("name","") or r.get("germ_saisi","") or ""
+            else:
+                germ = (r.get("germ_saisi","") or "").strip()
+                if not germ or germ in ("—", "Négatif"):
+                    germ = (r.get("germ_match","") or "").strip()
+
+            if status_r == "action":
+                _sc = "#dc2626"; _sb = "#fef2f2"; _sl = "🚨 ACTION"
+            elif status_r == "alert":
+                _sc = "#d97706"; _sb = "#fffbeb"; _sl = "⚠️ ALERTE"
+            else:
+                _sc = "#16a34a"; _sb = "#f0fdf4"; _sl = "✅ CONFORME"
+
+            _mc_badge = ""
+            if status_r in ("alert", "action"):
+                if mc_statut == "fait":
+                    _mc_badge = (
+                        "<span style='background:#22c55e;color:#fff;border-radius:5px;"
+                        "padding:1px 8px;font-size:.65rem;font-weight:700;margin-left:6px'>"
+                        "🔧 MC FAITES</span>"
+                    )
+                else:
+                    _mc_badge = (
+                        "<span style='background:#f59e0b;color:#fff;border-radius:5px;"
+                        "padding:1px 8px;font-size:.65rem;font-weight:700;margin-left:6px'>"
+                        "🔧 MC EN ATTENTE</span>"
+                    )
+
+            st.markdown(
+                f"<div style='background:{_sb};border:1px solid {_sc}44;"
+                f"border-left:4px solid {_sc};border-radius:8px;"
+                f"padding:10px 14px;margin-bottom:6px'>"
+                f"<div style='display:flex;justify-content:space-between;"
+                f"align-items:center;margin-bottom:4px'>"
+                f"<span style='font-size:.82rem;font-weight:700;color:#0f172a'>"
+                f"📍 {r.get('prelevement','—')} &nbsp;·&nbsp; "
+                f"🦠 {germ_r or '—'} &nbsp;·&nbsp; "
+                f"{r.get('ufc', 0)} UFC</span>"
+                f"<div>"
+                f"<span style='background:{_sc};color:#fff;border-radius:5px;"
+                f"padding:1px 8px;font-size:.7rem;font-weight:700'>{_sl}</span>"
+                f"{_mc_badge}</div>"
+                f"</div>"
+                f"<div style='font-size:.72rem;color:#475569'>"
+                f"📅 {r.get('date_prelevement', r.get('date','—'))} &nbsp;·&nbsp; "
+                f"👤 {r.get('operateur', r.get('preleveur','—'))} &nbsp;·&nbsp; "
+                f"🏥 {r.get('room_class','—')} &nbsp;·&nbsp; "
+                f"Score : {r.get('total_score','—')}"
+                f"</div>"
+                f"</div>",
+                unsafe_allow_html=True,
+            )
+
+            _remarque  = r.get("remarque", "")
+            _triggered = r.get("triggered_by", "")
+            if _remarque or _triggered:
+                st.markdown(
+                    "<div style='background:#f8fafc;border-left:3px solid #cbd5e1;"
+                    "border-radius:0 6px 6px 0;padding:6px 12px;margin-top:-4px;"
+                    "margin-bottom:6px;font-size:.72rem;color:#475569'>"
+                    + (f"💬 {_remarque}" if _remarque else "")
+                    + (" &nbsp;·&nbsp; " if _remarque and _triggered else "")
+                    + "</div>",
+                    unsafe_allow_html=True,
+                )
+
+            _germs_detail = r.get("germs_detail", [])
+            if len(_germs_detail) > 1:
+                _gd_html = " &nbsp;·&nbsp; ".join(
+                    f"<b>{'👑 ' if g.get('is_worst') else ''}{g['name']}</b> "
+                    f"({g.get('ufc',0)} UFC · score {g.get('germ_score','?')})"
+                    for g in _germs_detail
+                )
+                st.markdown(
+                    f"<div style='background:#eff6ff;border-left:3px solid #93c5fd;"
+                    f"border-radius:0 6px 6px 0;padding:6px 12px;margin-top:-4px;"
+                    f"margin-bottom:6px;font-size:.72rem;color:#1e40af'>"
+                    f"🦠 {_gd_html}</div>",
+                    unsafe_allow_html=True,
+                )
+
+            # APRÈS
+            _tab_mc, _tab_edit, _tab_del = st.tabs([
+                "🔧 Mesures correctives" if status_r in ("alert","action") else "ℹ️ Détails",
+                "✏️ Modifier",
+                "🗑️ Supprimer",
+            ])
+            # (pas de changement ici, st.tabs n'a pas de clé)
+
+            with _tab_mc:
+                if status_r in ("alert", "action"):
+                    _render_mesures_correctives(st.session_state.surveillance[_real_idx], _real_idx)
+                    
+                    # ── Bouton impression PDF ──────────────────────────────
+                    _pdf_cache = st.session_state.get(f"pdf_mc_cache_{_real_idx}")
+                    if _pdf_cache:
+                        st.download_button(
+                            label="🖨️ Imprimer / Télécharger la fiche MC (PDF)",
+                            data=_pdf_cache["data"],
+                            file_name=_pdf_cache["fname"],
+                            mime="application/pdf",
+                            use_container_width=True,
+                            key=f"pdf_mc_{_k}",
+                        )
+                
+                else:
+                    st.markdown(
+                        "<div style='font-size:.82rem;color:#16a34a;padding:8px 0'>"
+                        "✅ Résultat conforme — aucune mesure corrective requise.</div>",
+                        unsafe_allow_html=True,
+                    )
+
+            with _tab_edit:
+                st.markdown("**✏️ Modifier cette entrée**")
+                germ_names_edit  = sorted([g['name'] for g in st.session_state.germs])
+                _germ_opts_edit  = ["Négatif"] + germ_names_edit
+                _germs_det_edit  = r.get("germs_detail", [])
+
+                # ── Champs communs ─────────────────────────────────────────────
+                _ec1, _ec2 = st.columns(2)
+                with _ec1:
+                    # APRÈS
+                    _new_prelev = st.text_input(
+                        "📍 Point de prélèvement",
+                        value=r.get("prelevement", ""),
+                        key=f"edit_prelev_{_k}",
+                    )
+                    # APRÈS
+                    _new_date = st.text_input(
+                        "📅 Date (YYYY-MM-DD)",
+                        value=r.get("date_prelevement", r.get("date", "")),
+                        key=f"edit_date_{_k}",
+                    )
+                    
+                    _new_oper = st.text_input(
+                        "👤 Opérateur",
+                        value=r.get("operateur", r.get("preleveur", "")),
+                        key=f"edit_oper_{_k}",
+                    )
+                with _ec2:
+                    if len(_germs_det_edit) > 1:
+                        st.markdown(
+                            f"<div style='background:#eff6ff;border:1px solid #93c5fd;"
+                            f"border-radius:10px;padding:12px;margin-top:4px;"
+                            f"font-size:.8rem;color:#1e40af;font-weight:700'>"
+                            f"🦠 {len(_germs_det_edit)} germes saisis<br>"
+                            f"<span style='font-weight:400;font-size:.75rem;color:#475569'>"
+                            f"Éditez chaque germe dans ses onglets ci-dessous.</span></div>",
+                            unsafe_allow_html=True,
+                        )
+                    else:
+                        # Priorité : germs_detail[0] > germ_saisi > germ_match > Négatif
+                        _gd0_name   = _germs_det_edit[0].get("name","").strip() if _germs_det_edit else ""
+                        _cur_germ_e = (
+                            _gd0_name
+                            or (r.get("germ_saisi","") or "").strip()
+                            or (r.get("germ_match","") or "").strip()
+                            or "Négatif"
+                        )
+                        if _cur_germ_e in ("—", ""):
+                            _cur_germ_e = "Négatif"
+                        
+                        _cur_ufc_e = int(
+                            (_germs_det_edit[0].get("ufc", None) if _germs_det_edit else None)
+                            or r.get("ufc", 0)
+                            or 0
+                        )
+                        _germ_idx_e = (
+                            _germ_opts_edit.index(_cur_germ_e)
+                            if _cur_germ_e in _germ_opts_edit else 0
+                        )
+                        # APRÈS
+                        _new_germ = st.selectbox(
+                            "🦠 Germe identifié",
+                            _germ_opts_edit,
+                            index=_germ_idx_e,
+                            key=f"edit_germ_{_k}",
+                        )
+                        # APRÈS
+                        _new_ufc = st.number_input(
+                            "UFC",
+                            min_value=0,
+                            value=_cur_ufc_e,
+                            step=1,
+                            key=f"edit_ufc_{_k}",
+                        )
+
+                        # APRÈS
+                        _new_remarque = st.text_area(
+                            "💬 Remarque",
+                            value=r.get("remarque", ""),
+                            height=70,
+                            key=f"edit_rem_{_k}",
+                        )
+
+                # ══════════════════════════════════════════════════════════════
+                # CAS MULTI-GERMES : onglets par germe
+                # ══════════════════════════════════════════════════════════════
+                if len(_germs_det_edit) > 1:
+                    st.markdown(
+                        "<div style='font-size:.78rem;font-weight:700;color:#1e40af;"
+                        "margin:10px 0 4px 0'>🦠 Modifier chaque germe</div>",
+                        unsafe_allow_html=True,
+                    )
+                    _mg_tab_labels = [
+                        f"{'👑 ' if gde.get('is_worst') else ''}Germe {gi+1} · "
+                        f"{(gde.get('name') or '?')[:22]}"
+                        for gi, gde in enumerate(_germs_det_edit)
+                    ]
+                    _mg_tabs = st.tabs(_mg_tab_labels)
+
+                    for gi, (mgtab, gde) in enumerate(zip(_mg_tabs, _germs_det_edit)):
+                        with mgtab:
+                            _mg_c1, _mg_c2 = st.columns(2)
+                            _cur_mg_name = gde.get("name","") or "Négatif"
+                            _mg_idx = (
+                                _germ_opts_edit.index(_cur_mg_name)
+                                if _cur_mg_name in _germ_opts_edit else 0
+                            )
+                            with _mg_c1:
+                                _ng_name = st.selectbox(
+                                    "🦠 Germe",
+                                    _germ_opts_edit,
+                                    index=_mg_idx,
+                                    # APRÈS
+                                    key=f"edit_mg_name_{_real_idx}_{gi}"
+                                )
+                            with _mg_c2:
+                                st.number_input(
+                                    "UFC",
+                                    min_value=0,
+                                    value=int(gde.get("ufc",0) or 0),
+                                    step=1,
+                                    key=f"edit_mg_ufc_{_real_idx}_{gi}"
+                                )
+                            # Aperçu score pour ce germe
+                            if _ng_name != "Négatif":
+                                _gobj_mg = next(
+                                    (g for g in st.session_state.germs if g['name'] == _ng_name), None
+                                )
+                                if _gobj_mg:
+                                    _mg_gscore = (
+                                        int(_gobj_mg.get('pathogenicity',1))
+                                        * int(_gobj_mg.get('resistance',1))
+                                        * int(_gobj_mg.get('dissemination',1))
+                                    )
+                                    _loc_c_mg  = int(r.get("location_criticality",1) or 1)
+                                    _mg_total  = _loc_c_mg * _mg_gscore
+                                    _mg_st, _mg_lbl, _mg_col = _evaluate_score(_mg_total)
+                                    st.markdown(
+                                        f"<div style='background:{_mg_col}11;border:1px solid {_mg_col}44;"
+                                        f"border-radius:8px;padding:6px 10px;font-size:.75rem;"
+                                        f"font-weight:700;color:{_mg_col}'>"
+                                        f"Score : {_mg_total} (lieu {_loc_c_mg} × germe {_mg_gscore}) → {_mg_lbl}"
+                                        f"</div>",
+                                        unsafe_allow_html=True,
+                                    )
+
+                    # APRÈS
+                    if st.button(
+                        "💾 Sauvegarder les modifications",
+                        key=f"edit_save_{_k}",
+                        type="primary",
+                        use_container_width=True,
+                    ):
+                        # ── Reconstruire germs_detail depuis les widgets ───────
+                        _loc_c_sv = int(r.get("location_criticality",1) or 1)
+                        _new_gd   = []
+                        for gi, gde in enumerate(_germs_det_edit):
+                            # APRÈS
+                            _sv_name = st.session_state.get(f"edit_mg_name_{_k}_{gi}", gde.get("name","Négatif"))
+                            _sv_ufc  = st.session_state.get(f"edit_mg_ufc_{_k}_{gi}",  int(gde.get("ufc",0) or 0))
+                            _sv_gscore = 0
+                            if _sv_name != "Négatif":
+                                _go2 = _repo().germ(_sv_name)
+                                if _go2:
+                                    _sv_gscore = (
+                                        int(_go2.get('pathogenicity',1))
+                                        * int(_go2.get('resistance',1))
+                                        * int(_go2.get('dissemination',1))
+                                    )
+                            _new_gd.append({
+                                "name":       _sv_name,
+                                "ufc":        _sv_ufc,
+                                "germ_score": _sv_gscore,
+                                "is_worst":   False,
+                            })
+
+                        # ── Trouver le germe le plus critique (worst) ─────────
+                        _best_ts    = -1
+                        _worst_name = None
+                        _worst_gs   = 0
+                        _total_ufc_sv = 0
+                        for ngd in _new_gd:
+                            if ngd["name"] != "Négatif" and ngd["ufc"] > 0:
+                                _ts_ngd = _loc_c_sv * ngd["germ_score"]
+                                _total_ufc_sv += ngd["ufc"]
+                                if _ts_ngd > _best_ts:
+                                    _best_ts    = _ts_ngd
+                                    _worst_name = ngd["name"]
+                                    _worst_gs   = ngd["germ_score"]
+
+                        for ngd in _new_gd:
+                            ngd["is_worst"] = (ngd["name"] == _worst_name and _worst_name is not None)
+
+                        if _worst_name:
+                            _final_ts  = _loc_c_sv * _worst_gs
+                            _final_st, _, _ = _evaluate_score(_final_ts)
+                        else:
+                            _final_ts = 0; _final_st = "ok"; _worst_gs = 0
+
+                        st.session_state.surveillance[_real_idx].update({
+                            "prelevement":  _new_prelev.strip(),
+                            "date":         _new_date.strip(),
+                            "operateur":    _new_oper.strip(),
+                            "germ_saisi":   _worst_name or "Négatif",
+                            "ufc":          _total_ufc_sv,
+                            "ufc_total":    _total_ufc_sv,
+                            "germ_score":   _worst_gs,
+                            "total_score":  _final_ts,
+                            "status":       _final_st,
+                            "remarque":     _new_remarque.strip(),
+                            "germs_detail": _new_gd,
+                        })
+                        save_surveillance(st.session_state.surveillance)
+                        st.success("✅ Entrée mise à jour — germes et stats recalculés.")
+                        st.rerun()
+
+                # ══════════════════════════════════════════════════════════════
+                # CAS MONO-GERME : logique d'origine
+                # ══════════════════════════════════════════════════════════════
+                else:
+                    if _new_germ != "Négatif":
+                        _gobj_s = next(
+                            (g for g in st.session_state.germs if g['name'] == _new_germ), None
+                        )
+                        if _gobj_s:
+                            _new_germ_score = (
+                                int(_gobj_s.get('pathogenicity',1))
+                                * int(_gobj_s.get('resistance',1))
+                                * int(_gobj_s.get('dissemination',1))
+                            )
+                            _loc_c_edit = int(r.get("location_criticality",1) or 1)
+                            _new_total  = _loc_c_edit * _new_germ_score
+                            _new_status, _new_lbl, _new_col = _evaluate_score(_new_total)
+                            st.markdown(
+                                f"<div style='background:{_new_col}11;border:1px solid {_new_col}44;"
+                                f"border-radius:8px;padding:8px 12px;font-size:.78rem;"
+                                f"font-weight:700;color:{_new_col}'>"
+                                f"Score recalculé : {_new_total} "
+                                f"(lieu {_loc_c_edit} × germe {_new_germ_score}) → {_new_lbl}"
+                                f"</div>",
+                                unsafe_allow_html=True,
+                            )
+                        else:
+                            _new_germ_score = int(r.get("germ_score",0) or 0)
+                            _new_total      = int(r.get("total_score",0) or 0)
+                            _new_status     = r.get("status","ok")
+                    else:
+                        _new_germ_score = 0
+                        _new_total      = 0
+                        _new_status     = "ok"
+
+                    if st.button(
+                        "💾 Sauvegarder les modifications",
+                        key=f"edit_save_{_k}",        # ← _k = f"{key_prefix}{_real_idx}", unique global
+                        type="primary",
+                        use_container_width=True,
+                    ):
+                        # Met à jour germs_detail si existant, sinon champ plat
+                        _upd_gd = (
+                            [{"name": _new_germ, "ufc": _new_ufc,
+                            "germ_score": _new_germ_score, "is_worst": True}]
+                            if _new_germ != "Négatif" else []
+                        )
+                        st.session_state.surveillance[_real_idx].update({
+                            "prelevement":  _new_prelev.strip(),
+                            "date":         _new_date.strip(),
+                            "operateur":    _new_oper.strip(),
+                            "germ_saisi":   _new_germ,
+                            "ufc":          _new_ufc,
+                            "ufc_total":    _new_ufc,
+                            "germ_score":   _new_germ_score,
+                            "total_score":  _new_total,
+                            "status":       _new_status,
+                            "remarque":     _new_remarque.strip(),
+                            "germs_detail": _upd_gd,
+                        })
+                        save_surveillance(st.session_state.surveillance)
+                        st.success("✅ Entrée mise à jour — stats recalculées automatiquement.")
+                        st.rerun()
+
+            with _tab_del:
+                st.markdown(
+                    f"<div style='background:#fef2f2;border:1.5px solid #fca5a5;"
+                    f"border-radius:10px;padding:14px 16px;margin-bottom:12px'>"
+                    f"<div style='font-weight:700;color:#991b1b;margin-bottom:6px'>"
+                    f"🗑️ Supprimer cette entrée ?</div>"
+                    f"<div style='font-size:.8rem;color:#7f1d1d'>"
+                    f"📍 {r.get('prelevement','—')} &nbsp;·&nbsp; "
+                    f"🦠 {germ_r or '—'} &nbsp;·&nbsp; "
+                    f"📅 {r.get('date_prelevement', r.get('date','—'))} &nbsp;·&nbsp; "
+                    f"Cette action est <strong>irréversible</strong> et mettra à jour "
+                    f"toutes les statistiques.</div>"
+                    f"</div>",
+                    unsafe_allow_html=True,
+                )
+                # APRÈS
+                _confirm_key = f"confirm_del_{_k}"
+                if not st.session_state.get(_confirm_key, False):
+                    # APRÈS
+                    if st.button(
+                        "🗑️ Supprimer cette entrée",
+                        key=f"del_btn_{_k}",
+                        use_container_width=True,
+                    ):
+                        st.session_state[_confirm_key] = True
+                        st.rerun()
+                else:
+                    st.error("⚠️ Confirmer la suppression définitive ?")
+                    _dc1, _dc2 = st.columns(2)
+                    with _dc1:
+                        # APRÈS
+                        if st.button(
+                            "✅ OUI — Supprimer définitivement",
+                            key=f"del_confirm_{_k}",
+                            type="primary",
+                            use_container_width=True,
+                        ):
+                            st.session_state.surveillance.pop(_real_idx)
+                            save_surveillance(st.session_state.surveillance)
+                            st.session_state[_confirm_key] = False
+                            st.success("🗑️ Entrée supprimée — stats recalculées.")
+                            st.rerun()
+                    with _dc2:
+                        # APRÈS
+                        if st.button(
+                            "❌ Annuler",
+                            key=f"del_cancel_{_k}",
+                            use_container_width=True,
+                        ):
+                            st.session_state[_confirm_key] = False
+                            st.rerun()
+
+    # ── fin helpers ───────────────────────────────────────────────────────────
+
+    if surv or any((st.session_state.get("_surv_index") or {}).values()):
+        with st.expander("⚙️ Export, filtres & métriques", expanded=False):
+
+            # ── Export / Vider ────────────────────────────────────────────────
+            c_dl, c_cl = st.columns(2)
+            with c_dl:
+                csv_str  = io.StringIO()
+                all_keys = list(dict.fromkeys(k for r in surv for k in r.keys()))
+                writer   = csv.DictWriter(csv_str, fieldnames=all_keys, extrasaction="ignore")
+                writer.writeheader()
+                writer.writerows(surv)
+                st.download_button(
+                    "⬇️ Télécharger CSV (mois chargés)", csv_str.getvalue(),
+                    "surveillance.csv", "text/csv",
+                    use_container_width=True)
+            with c_cl:
+                if st.button("🗑️ Vider l'historique", use_container_width=True):
+                    st.session_state.surveillance = []
+                    _surv_replace_all()
+                    save_surveillance([])
+                    st.rerun()
+
+            from datetime import date as dt_date
+
+            # ── Bornes ────────────────────────────────────────────────────────
+            all_dates_ok = [d for d in (
+                _parse_date(r.get("date_prelevement", r.get("date", ""))) for r in surv
+            ) if d]
+            d_min = min(all_dates_ok) if all_dates_ok else dt_date.today()
+            d_max = max(all_dates_ok) if all_dates_ok else dt_date.today()
+            d_min_charge = d_min
+            # Les mois non chargés restent sélectionnables (index des partitions)
+            _idx_months = sorted(
+                m for m in (st.session_state.get("_surv_index") or {})
+                if re.match(r"^\d{4}-\d{2}$", m))
+            if _idx_months:
+                d_min = min(d_min, datetime.strptime(_idx_months[0] + "-01", "%Y-%m-%d").date())
+
+            if "hist_date_debut_val" not in st.session_state:
+                st.session_state["hist_date_debut_val"] = d_min_charge
+            if "hist_date_fin_val" not in st.session_state:
+                st.session_state["hist_date_fin_val"] = d_max
+
+            st.session_state["hist_date_debut_val"] = max(
+                d_min, min(st.session_state["hist_date_debut_val"], d_max))
+            st.session_state["hist_date_fin_val"] = max(
+                d_min, min(st.session_state["hist_date_fin_val"], d_max))
+            if st.session_state["hist_date_debut_val"] > st.session_state["hist_date_fin_val"]:
+                st.session_state["hist_date_fin_val"] = st.session_state["hist_date_debut_val"]
+
+            st.markdown(
+                "<div style='background:#f0f9ff;border:1px solid #bae6fd;border-radius:10px;"
+                "padding:12px 16px;margin:10px 0 6px 0'>"
+                "<div style='font-size:.8rem;font-weight:700;color:#0369a1;margin-bottom:8px'>"
+                "🗓️ Filtrer par période</div>",
+                unsafe_allow_html=True)
+            cf1, cf2, cf3 = st.columns([2, 2, 1])
+            with cf1:
+                date_debut = st.date_input(
+                    "Du", value=st.session_state["hist_date_debut_val"],
+                    min_value=d_min, max_value=d_max, key="hist_date_debut_input")
+                st.session_state["hist_date_debut_val"] = date_debut
+            with cf2:
+                date_fin = st.date_input(
+                    "Au", value=st.session_state["hist_date_fin_val"],
+                    min_value=d_min, max_value=d_max, key="hist_date_fin_input")
+                st.session_state["hist_date_fin_val"] = date_fin
+            with cf3:
+                st.markdown("<div style='height:22px'></div>", unsafe_allow_html=True)
+                if st.button("↺ Reset", use_container_width=True):
+                    st.session_state["hist_date_debut_val"] = d_min
+                    st.session_state["hist_date_fin_val"]   = d_max
+                    st.rerun()
+            st.markdown("</div>", unsafe_allow_html=True)
+
+            # Période qui remonte avant les mois chargés : chargement à la demande
+            if ensure_surveillance_months(_months_between(date_debut, date_fin)):
+                st.rerun()
+
+            # ── Métriques ─────────────────────────────────────────────────────
+            with _profiled("agrégation stats"):
+                surv_f  = _records_in_period(surv, date_debut, date_fin)
+                total_f = len(surv_f)
+                alerts  = sum(1 for r in surv_f if r.get("status") == "alert")
+                actions = sum(1 for r in surv_f if r.get("status") == "action")
+            if total_f < total:
+                st.caption(f"🔍 {total_f} résultat(s) sur {total} — "
+                           f"{date_debut.strftime('%d/%m/%Y')} → {date_fin.strftime('%d/%m/%Y')}")
+
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("Total",        total_f)
+            c2.metric("✅ Conformes", total_f - alerts - actions)
+            c3.metric("⚠️ Alertes",  alerts)
+            c4.metric("🚨 Actions",   actions)
+
+        # ── Tabs (en dehors de l'expander) ────────────────────────────────────
+        st.divider()
+        hist_tab_pts, hist_tab_germs, hist_tab_prev, hist_tab_liste = st.tabs([
+            "📍 Stats par point",
+            "🦠 Stats par germe",
+            "👤 Répartition par préleveur",
+            "📋 Liste des entrées",
+        ])
+
+        # ══════════════════════════════════════════════════════════════════════
+        # ONGLET 1 : STATS PAR POINT
+        # ══════════════════════════════════════════════════════════════════════
+        with hist_tab_pts:
+            import json as _json_pts
+
+            pts_stats = _stats_par_point(surv_f)
+
+            sorted_pts   = sorted(pts_stats.items(), key=lambda x: -x[1]["positives"])
+            chart_labels = [p[:22]+"…" if len(p)>22 else p for p,_ in sorted_pts]
+            chart_data   = {
+                "labels": chart_labels,
+                "neg": [d["negatives"] for _,d in sorted_pts],
+                "pos": [d["positives"] for _,d in sorted_pts],
+            }
+            chart_html = f"""
+            <script src="https://cdnjs.cloudflare.com/ajax/libs/Chart.js/4.4.0/chart.umd.min.js"></script>
+            <div style="background:#f8fafc;border:1px solid #e2e8f0;border-radius:12px;
+                        padding:16px;margin-bottom:18px">
+              <div style="font-size:.8rem;font-weight:700;color:#1e40af;margin-bottom:10px">
+                📊 Résultats par point de prélèvement
+              </div>
+              <div style="width:100%;height:420px"><canvas id="ptChart"></canvas></div>
+            </div>
+            <script>
+            (function(){{
+              const d = {_json_pts.dumps(chart_data)};
+              new Chart(document.getElementById('ptChart'), {{
+                type:'bar',
+                data:{{
+                  labels:d.labels,
+                  datasets:[
+                    {{label:'✅ Négatifs',data:d.neg,backgroundColor:'#22c55e88',borderColor:'#22c55e',borderWidth:1}},
+                    {{label:'🦠 Positifs',data:d.pos,backgroundColor:'#ef444488',borderColor:'#ef4444',borderWidth:1}}
+                  ]
+                }},
+                options:{{
+                  responsive:true,maintainAspectRatio:false,
+                  plugins:{{legend:{{position:'top',labels:{{font:{{size:11}}}}}}}},
+                  scales:{{
+                    x:{{stacked:true,ticks:{{font:{{size:10}},maxRotation:45}}}},
+                    y:{{stacked:true,beginAtZero:true,ticks:{{stepSize:1,font:{{size:10}}}}}}
+                  }}
+                }}
+              }});
+            }})();
+            </script>"""
+            st.components.v1.html(chart_html, height=500)
+
+            with st.expander("📍 Détail par point de prélèvement", expanded=False):
+                st.markdown(
+                    "<div style='display:grid;"
+                    "grid-template-columns:2fr 0.55fr 0.55fr 0.55fr 0.7fr 0.7fr 0.7fr 1.8fr;"
+                    "gap:4px;background:#1e40af;border-radius:10px 10px 0 0;padding:10px 14px'>"
+                    "<div style='font-size:.72rem;font-weight:800;color:#fff'>Point</div>"
+                    "<div style='font-size:.72rem;font-weight:800;color:#fff;text-align:center'>Total</div>"
+                    "<div style='font-size:.72rem;font-weight:800;color:#fff;text-align:center'>✅</div>"
+                    "<div style='font-size:.72rem;font-weight:800;color:#fff;text-align:center'>🦠</div>"
+                    "<div style='font-size:.72rem;font-weight:800;color:#fff;text-align:center'>Taux+</div>"
+                    "<div style='font-size:.72rem;font-weight:800;color:#7dd3fc;text-align:center'>Moy J2</div>"
+                    "<div style='font-size:.72rem;font-weight:800;color:#c4b5fd;text-align:center'>Moy J7</div>"
+                    "<div style='font-size:.72rem;font-weight:800;color:#fff'>Germes détectés</div>"
+                    "</div>",
+                    unsafe_allow_html=True)
+                for ri,(pt_name,pt_data) in enumerate(sorted_pts):
+                    t     = pt_data["total"]
+                    pos   = pt_data["positives"]
+                    taux  = pos/t*100 if t>0 else 0
+                    tc    = "#ef4444" if taux>=50 else "#f59e0b" if taux>0 else "#22c55e"
+                    germes_str = ", ".join(
+                        g+"("+str(n)+"x)"
+                        for g,n in sorted(pt_data["germes"].items(),key=lambda x:-x[1])[:3]
+                    ) or "—"
+                    j2_list = pt_data["ufc_j2_list"]
+                    j7_list = pt_data["ufc_j7_list"]
+                    moy_j2  = str(round(sum(j2_list)/len(j2_list))) if j2_list else "—"
+                    moy_j7  = str(round(sum(j7_list)/len(j7_list))) if j7_list else "—"
+                    row_bg  = "#f8fafc" if ri%2==0 else "#ffffff"
+                    st.markdown(
+                        "<div style='display:grid;"
+                        "grid-template-columns:2fr 0.55fr 0.55fr 0.55fr 0.7fr 0.7fr 0.7fr 1.8fr;"
+                        "gap:4px;background:"+row_bg+";border:1px solid #e2e8f0;border-top:none;"
+                        "padding:9px 14px;align-items:center'>"
+                        "<div style='font-size:.88rem;font-weight:700;color:#0f172a'>📍 "+pt_name+"</div>"
+                        "<div style='font-size:1rem;font-weight:800;color:#1e40af;text-align:center'>"+str(t)+"</div>"
+                        "<div style='font-size:1rem;font-weight:800;color:#22c55e;text-align:center'>"+str(pt_data["negatives"])+"</div>"
+                        "<div style='text-align:center'><span style='background:"+tc+"22;color:"+tc+";"
+                        "border:1px solid "+tc+"55;border-radius:6px;padding:2px 7px;"
+                        "font-size:.8rem;font-weight:700'>"+str(pos)+"</span></div>"
+                        "<div style='font-size:.85rem;font-weight:700;color:"+tc+";text-align:center'>"+str(round(taux))+"%</div>"
+                        "<div style='font-size:.82rem;font-weight:700;color:#0369a1;text-align:center'>"+moy_j2+"</div>"
+                        "<div style='font-size:.82rem;font-weight:700;color:#7c3aed;text-align:center'>"+moy_j7+"</div>"
+                        "<div style='font-size:.72rem;color:#475569;font-style:italic'>"+germes_str+"</div>"
+                        "</div>",
+                        unsafe_allow_html=True)
+                st.markdown(
+                    "<div style='background:#1e293b;border-radius:0 0 10px 10px;padding:8px 14px'>"
+                    "<div style='font-size:.78rem;color:#94a3b8'>"
+                    +str(len(pts_stats))+" point(s) — "+str(total_f)+" résultats"
+                    +" &nbsp;|&nbsp; <span style='color:#7dd3fc'>J2 = 48h</span>"
+                    +" &nbsp;|&nbsp; <span style='color:#c4b5fd'>J7 = 5 jours</span>"
+                    "</div></div>",
+                    unsafe_allow_html=True)
+
+            st.divider()
+            st.markdown(
+                "<div style='font-size:.85rem;font-weight:700;color:#1e40af;margin-bottom:8px'>"
+                "📈 Évolution UFC dans le temps</div>",
+                unsafe_allow_html=True)
+            pt_choices = [p for p,_ in sorted_pts]
+            if pt_choices:
+                selected_pt = st.selectbox("Point", options=pt_choices,
+                    key="hist_pt_evol", label_visibility="collapsed")
+                pt_records = sorted(
+                    [r for r in surv_f if r.get("prelevement")==selected_pt],
+                    key=lambda x: _parse_date(x.get("date_prelevement", x.get("date",""))) or dt_date.min)
+                evol_dates=[]; evol_j2=[]; evol_j7=[]
+                seuil_alerte=None; seuil_action=None
+                for r in pt_records:
+                    d = _parse_date(r.get("date_prelevement", r.get("date","")))
+                    if not d: continue
+                    evol_dates.append(d.strftime("%d/%m/%y"))
+                    evol_j2.append(int(r.get("ufc_48h",r.get("ufc",0)) or 0))
+                    evol_j7.append(int(r.get("ufc_5j", r.get("ufc",0)) or 0))
+                    if seuil_alerte is None:
+                        try: seuil_alerte=int(float(r.get("alert_threshold",50) or 50))
+                        except: seuil_alerte=50
+                        try: seuil_action=int(float(r.get("action_threshold",100) or 100))
+                        except: seuil_action=100
+                if evol_dates:
+                    evol_data={"dates":evol_dates,"j2":evol_j2,"j7":evol_j7,
+                               "alerte":seuil_alerte,"action":seuil_action}
+                    evol_html = f"""
+                    <script src="https://cdnjs.cloudflare.com/ajax/libs/Chart.js/4.4.0/chart.umd.min.js"></script>
+                    <div style="background:#f8fafc;border:1px solid #e2e8f0;border-radius:12px;
+                                padding:16px;margin-bottom:8px">
+                      <div style="font-size:.78rem;font-weight:700;color:#334155;margin-bottom:10px">
+                        📍 {selected_pt} — UFC/m³ au fil du temps
+                      </div>
+                      <div style="width:100%;height:220px"><canvas id="evolChart"></canvas></div>
+                    </div>
+                    <script>
+                    (function(){{
+                      const d={_json_pts.dumps(evol_data)};
+                      const thr={{id:'thr',afterDraw(chart){{
+                        const {{ctx,chartArea:{{left,right}},scales:{{y}}}}=chart;
+                        if(!y)return;
+                        function dl(val,color,lbl){{
+                          const yp=y.getPixelForValue(val);
+                          ctx.save();ctx.beginPath();ctx.setLineDash([6,4]);
+                          ctx.strokeStyle=color;ctx.lineWidth=1.5;
+                          ctx.moveTo(left,yp);ctx.lineTo(right,yp);ctx.stroke();
+                          ctx.setLineDash([]);ctx.fillStyle=color;
+                          ctx.font='bold 10px sans-serif';
+                          ctx.fillText(lbl,right-56,yp-4);ctx.restore();
+                        }}
+                        dl(d.alerte,'#f59e0b','⚠ Alerte');
+                        dl(d.action,'#ef4444','🚨 Action');
+                      }}}};
+                      new Chart(document.getElementById('evolChart'),{{
+                        type:'line',plugins:[thr],
+                        data:{{labels:d.dates,datasets:[
+                            {{
+                                label:'🔵 J2',data:d.j2,borderColor:'#0ea5e9',
+                                backgroundColor:'#0ea5e922',borderWidth:2,tension:0.3,fill:false,
+                                pointRadius:d.j2.map((v,i)=>(v===0&&d.j7[i]>0)?6:4),
+                                pointStyle:d.j2.map((v,i)=>(v===0&&d.j7[i]>0)?'crossRot':'circle'),
+                                pointBorderColor:'#0ea5e9',pointBorderWidth:d.j2.map((v,i)=>(v===0&&d.j7[i]>0)?2.5:1.5),
+                            }},
+                            {{
+                                label:'🟣 J7',data:d.j7,borderColor:'#8b5cf6',
+                                backgroundColor:'#8b5cf622',borderWidth:2,tension:0.3,fill:false,
+                                pointRadius:d.j7.map((v,i)=>(v>0&&d.j2[i]===0)?7:4),
+                                pointStyle:d.j7.map((v,i)=>(v>0&&d.j2[i]===0)?'star':'circle'),
+                                pointBorderColor:'#8b5cf6',pointBorderWidth:1.5,
+                            }}
+                        ]}},
+                        options:{{
+                            responsive:true,maintainAspectRatio:false,
+                            interaction:{{mode:'index',intersect:false}},
+                            plugins:{{
+                                legend:{{position:'top',labels:{{font:{{size:11}},boxWidth:14}}}},
+                                tooltip:{{callbacks:{{
+                                    label:function(item){{
+                                        const label=item.dataset.label;
+                                        const val=item.parsed.y;
+                                        const note=(val===0&&label.includes('J2'))?' (négatif J2)':(val===0?'':' UFC/m³');
+                                        return label+': '+val+note;
+                                    }},
+                                    footer:items=>{{
+                                        const v=Math.max(...items.map(i=>i.parsed.y));
+                                        return v>=d.action?'🚨 ACTION':v>=d.alerte?'⚠️ ALERTE':'✅ Conforme';
+                                    }}
+                                }}}}
+                            }},
+                            scales:{{
+                                x:{{ticks:{{font:{{size:10}},maxRotation:45}}}},
+                                y:{{beginAtZero:true,title:{{display:true,text:'UFC/m³',font:{{size:10}}}},ticks:{{font:{{size:10}}}}}}
+                            }}
+                        }}
+                      }});
+                    }})();
+                    </script>"""
+                    st.components.v1.html(evol_html, height=290)
+                    st.caption(f"⚠️ Alerte ≥ {seuil_alerte} · 🚨 Action ≥ {seuil_action} · {len(evol_dates)} mesure(s)")
+                else:
+                    st.info("Aucune donnée datée pour ce point.")
+
+            st.divider()
+
+        # ══════════════════════════════════════════════════════════════════════
+        # ONGLET 2 : STATS PAR GERME
+        # ══════════════════════════════════════════════════════════════════════
+        with hist_tab_germs:
+            import json as _json_germs
+
+            germs_stats, total_pos = _stats_par_germe(surv_f, _get_criticite)
+
+            if not germs_stats:
+                st.info("Aucun germe positif dans l'historique.")
+            else:
+                sorted_germs=sorted(germs_stats.items(),key=lambda x:-x[1]["count"])
+                palette=["#ef4444","#f97316","#f59e0b","#84cc16","#22c55e",
+                         "#06b6d4","#6366f1","#a855f7","#ec4899","#14b8a6"]
+                g_labels=[g[:28] for g,_ in sorted_germs]
+                g_counts=[d["count"] for _,d in sorted_germs]
+                g_colors=[palette[i%len(palette)] for i in range(len(g_labels))]
+                gchart_html=f"""
+                <script src="https://cdnjs.cloudflare.com/ajax/libs/Chart.js/4.4.0/chart.umd.min.js"></script>
+                <div style="background:#f8fafc;border:1px solid #e2e8f0;border-radius:12px;
+                            padding:16px;margin-bottom:18px">
+                  <div style="font-size:.8rem;font-weight:700;color:#1e40af;margin-bottom:10px">
+                    📊 Distribution des germes positifs
+                  </div>
+                  <div style="width:100%;max-width:400px;height:280px;margin:0 auto">
+                    <canvas id="germDoughnut"></canvas>
+                  </div>
+                </div>
+                <script>
+                (function(){{
+                  const d={_json_germs.dumps({"labels":g_labels,"counts":g_counts,"colors":g_colors})};
+                  new Chart(document.getElementById('germDoughnut'),{{
+                    type:'doughnut',
+                    data:{{labels:d.labels,datasets:[{{data:d.counts,backgroundColor:d.colors,borderWidth:2}}]}},
+                    options:{{responsive:true,maintainAspectRatio:false,
+                      plugins:{{legend:{{position:'bottom',labels:{{font:{{size:11}},boxWidth:14,padding:10}}}}}}}}
+                  }});
+                }})();
+                </script>"""
+                st.components.v1.html(gchart_html, height=360)
+                st.markdown(
+                    "<div style='display:grid;"
+                    "grid-template-columns:2fr 0.6fr 1fr 0.9fr 0.9fr 1.5fr;"
+                    "gap:4px;background:#1e40af;border-radius:10px 10px 0 0;padding:10px 14px'>"
+                    "<div style='font-size:.72rem;font-weight:800;color:#fff'>Germe</div>"
+                    "<div style='font-size:.72rem;font-weight:800;color:#fff;text-align:center'>Cas</div>"
+                    "<div style='font-size:.72rem;font-weight:800;color:#fff;text-align:center'>% positifs</div>"
+                    "<div style='font-size:.72rem;font-weight:800;color:#fff;text-align:center'>Moy. UFC</div>"
+                    "<div style='font-size:.72rem;font-weight:800;color:#fff;text-align:center'>Criticité</div>"
+                    "<div style='font-size:.72rem;font-weight:800;color:#fff'>Points touchés</div>"
+                    "</div>",
+                    unsafe_allow_html=True)
+                for gi,(gname,gdata) in enumerate(sorted_germs):
+                    pct=gdata["count"]/total_pos*100 if total_pos>0 else 0
+                    avg_ufc=gdata["ufc_sum"]/gdata["count"] if gdata["count"]>0 else 0
+                    pts_str=", ".join(list(gdata["points"])[:3])
+                    crit=gdata["criticite"]; cc=_crit_color(crit)
+                    row_bg="#f8fafc" if gi%2==0 else "#ffffff"
+                    crit_cell=(
+                        "<span style='background:"+cc+"22;color:"+cc+";border:1px solid "+cc+"55;"
+                        "border-radius:5px;padding:1px 7px;font-size:.72rem;font-weight:700'>"
+                        +str(crit)+" – "+_crit_label(crit)+"</span>"
+                        if crit>0 else "<span style='color:#94a3b8'>—</span>")
+                    st.markdown(
+                        "<div style='display:grid;"
+                        "grid-template-columns:2fr 0.6fr 1fr 0.9fr 0.9fr 1.5fr;"
+                        "gap:4px;background:"+row_bg+";border:1px solid #e2e8f0;border-top:none;"
+                        "padding:9px 14px;align-items:center'>"
+                        "<div style='font-size:.88rem;font-weight:700;color:#0f172a'>🦠 "+gname+"</div>"
+                        "<div style='font-size:1rem;font-weight:800;color:#1e40af;text-align:center'>"+str(gdata["count"])+"</div>"
+                        "<div style='text-align:center'>"
+                        "<div style='background:#e2e8f0;border-radius:4px;height:8px;margin-bottom:2px'>"
+                        "<div style='background:#ef4444;border-radius:4px;height:8px;width:"+str(int(pct))+"%'></div></div>"
+                        "<span style='font-size:.75rem;font-weight:700;color:#ef4444'>"+str(round(pct,1))+"%</span></div>"
+                        "<div style='font-size:.85rem;font-weight:700;color:#475569;text-align:center'>"+str(round(avg_ufc))+"</div>"
+                        "<div style='text-align:center'>"+crit_cell+"</div>"
+                        "<div style='font-size:.72rem;color:#475569;font-style:italic'>"+pts_str+"</div>"
+                        "</div>",
+                        unsafe_allow_html=True)
+                st.divider()
+                st.markdown(
+                    "<div style='font-size:.85rem;font-weight:700;color:#1e40af;margin-bottom:8px'>"
+                    "🔧 Suivi des mesures correctives par germe</div>",
+                    unsafe_allow_html=True,
+                )
+
+                from collections import defaultdict as _dfd
+                mc_by_germ = _dfd(lambda: {"en_attente": 0, "fait": 0, "details": []})
+
+                for r in surv_f:
+                    germ   = r.get("germ_saisi", "") or r.get("germ_match","") or ""
+                    status = r.get("status", "ok")
+                    mc     = r.get("mc_statut", "")
+                    if status not in ("alert", "action") or germ in ("Négatif", "—", ""):
+                        continue
+                    if mc == "fait":
+                        mc_by_germ[germ]["fait"] += 1
+                        if r.get("mc_detail", "").strip():
+                            mc_by_germ[germ]["details"].append({
+                                "date":    r.get("date", "—"),
+                                "point":   r.get("prelevement", "—"),
+                                "detail":  r.get("mc_detail", ""),
+                                "mc_date": r.get("mc_date", ""),
+                            })
+                    else:
+                        mc_by_germ[germ]["en_attente"] += 1
+
+                if not mc_by_germ:
+                    st.info("Aucun dépassement de seuil sur la période.")
+                else:
+                    for germ_mc, gd in sorted(mc_by_germ.items(),
+                                              key=lambda x: -(x[1]["en_attente"] + x[1]["fait"])):
+                        total_mc = gd["en_attente"] + gd["fait"]
+                        pct_fait = gd["fait"] / total_mc * 100 if total_mc > 0 else 0
+                        with st.expander(
+                            f"🦠 {germ_mc}  —  "
+                            f"{'✅' if gd['en_attente'] == 0 else '⚠️'} "
+                            f"{gd['fait']}/{total_mc} mesures validées "
+                            f"({round(pct_fait)}%)",
+                            expanded=(gd["en_attente"] > 0),
+                        ):
+                            ca, cb = st.columns(2)
+                            ca.metric("✅ Mesures faites", gd["fait"])
+                            cb.metric("⏳ En attente",     gd["en_attente"])
+                            if gd["details"]:
+                                st.markdown(
+                                    "<div style='font-size:.78rem;font-weight:700;"
+                                    "color:#0369a1;margin:10px 0 6px'>📝 Actions réalisées</div>",
+                                    unsafe_allow_html=True,
+                                )
+                                for det in gd["details"]:
+                                    st.markdown(
+                                        f"<div style='background:#f0f9ff;border-left:3px solid #0ea5e9;"
+                                        f"border-radius:6px;padding:8px 12px;margin-bottom:6px;"
+                                        f"font-size:.78rem'>"
+                                        f"<span style='color:#0369a1;font-weight:700'>"
+                                        f"📍 {det['point']} · {det['date']}</span>"
+                                        f"<span style='color:#64748b;font-size:.7rem'>"
+                                        f" — validé le {det['mc_date']}</span><br>"
+                                        f"<span style='color:#0f172a'>{det['detail']}</span>"
+                                        f"</div>",
+                                        unsafe_allow_html=True,
+                                    )
+
+                st.markdown(
+                    "<div style='background:#1e293b;border-radius:0 0 10px 10px;padding:8px 14px'>"
+                    "<div style='font-size:.78rem;color:#94a3b8'>"
+                    +str(len(germs_stats))+" germe(s) — "+str(total_pos)+" positifs"
+                    "</div></div>",
+                    unsafe_allow_html=True)
+
+        # ══════════════════════════════════════════════════════════════════════
+        # ONGLET 3 : RÉPARTITION PAR PRÉLEVEUR
+        # ══════════════════════════════════════════════════════════════════════
+        with hist_tab_prev:
+            prev_stats = _stats_par_preleveur(surv_f)
+
+            op_list=sorted(prev_stats.items(),key=lambda x:-x[1]["total"])
+            card_cols=st.columns(min(len(op_list),4))
+            for ci,(op_name,op_data) in enumerate(op_list):
+                t=op_data["total"]; pos=op_data["positives"]
+                taux_pos=pos/t*100 if t>0 else 0
+                tc="#ef4444" if taux_pos>=30 else "#f59e0b" if taux_pos>0 else "#22c55e"
+                ini=op_name[0].upper() if op_name!="Non renseigné" else "?"
+                with card_cols[ci%len(card_cols)]:
+                    st.markdown(
+                        "<div style='background:#fff;border:1.5px solid #e2e8f0;border-radius:14px;"
+                        "padding:18px 14px;text-align:center;margin-bottom:12px'>"
+                        "<div style='background:#2563eb;color:#fff;border-radius:50%;width:48px;height:48px;"
+                        "display:flex;align-items:center;justify-content:center;font-weight:800;"
+                        "font-size:1.2rem;margin:0 auto 10px auto'>"+ini+"</div>"
+                        "<div style='font-size:.92rem;font-weight:700;color:#0f172a;margin-bottom:6px'>"+op_name+"</div>"
+                        "<div style='font-size:2rem;font-weight:900;color:#1e40af'>"+str(t)+"</div>"
+                        "<div style='font-size:.68rem;color:#64748b;margin-bottom:10px'>prélèvement(s)</div>"
+                        "<div style='display:grid;grid-template-columns:1fr 1fr;gap:6px'>"
+                        "<div style='background:#f0fdf4;border-radius:8px;padding:6px'>"
+                        "<div style='font-size:1rem;font-weight:800;color:#22c55e'>"+str(op_data["negatives"])+"</div>"
+                        "<div style='font-size:.6rem;color:#166534'>✅ Nég.</div></div>"
+                        "<div style='background:#fef2f2;border-radius:8px;padding:6px'>"
+                        "<div style='font-size:1rem;font-weight:800;color:#ef4444'>"+str(pos)+"</div>"
+                        "<div style='font-size:.6rem;color:#991b1b'>🦠 Pos.</div></div>"
+                        "<div style='background:#fffbeb;border-radius:8px;padding:6px'>"
+                        "<div style='font-size:1rem;font-weight:800;color:#f59e0b'>"+str(op_data["alertes"])+"</div>"
+                        "<div style='font-size:.6rem;color:#92400e'>⚠️ Alerte</div></div>"
+                        "<div style='background:#fef2f2;border-radius:8px;padding:6px'>"
+                        "<div style='font-size:1rem;font-weight:800;color:#dc2626'>"+str(op_data["actions"])+"</div>"
+                        "<div style='font-size:.6rem;color:#991b1b'>🚨 Action</div></div></div>"
+                        "<div style='margin-top:10px;background:"+tc+"22;border:1px solid "+tc+"55;"
+                        "border-radius:8px;padding:5px'>"
+                        "<div style='font-size:.8rem;font-weight:800;color:"+tc+"'>"
+                        +str(round(taux_pos))+"% positifs</div></div></div>",
+                        unsafe_allow_html=True)
+            st.divider()
+            st.markdown(
+                "<div style='display:grid;grid-template-columns:2fr 0.7fr 0.7fr 0.7fr 0.7fr 0.7fr 2fr;"
+                "gap:4px;background:#1e40af;border-radius:10px 10px 0 0;padding:10px 14px'>"
+                "<div style='font-size:.72rem;font-weight:800;color:#fff'>Préleveur</div>"
+                "<div style='font-size:.72rem;font-weight:800;color:#fff;text-align:center'>Total</div>"
+                "<div style='font-size:.72rem;font-weight:800;color:#fff;text-align:center'>✅</div>"
+                "<div style='font-size:.72rem;font-weight:800;color:#fff;text-align:center'>🦠</div>"
+                "<div style='font-size:.72rem;font-weight:800;color:#fff;text-align:center'>⚠️</div>"
+                "<div style='font-size:.72rem;font-weight:800;color:#fff;text-align:center'>🚨</div>"
+                "<div style='font-size:.72rem;font-weight:800;color:#fff'>Germes fréquents</div>"
+                "</div>",
+                unsafe_allow_html=True)
+            for ri,(op_name,op_data) in enumerate(op_list):
+                t=op_data["total"]; pos=op_data["positives"]
+                taux_pos=pos/t*100 if t>0 else 0
+                tc="#ef4444" if taux_pos>=30 else "#f59e0b" if taux_pos>0 else "#22c55e"
+                top_g=", ".join(
+                    g+"("+str(n)+"x)"
+                    for g,n in sorted(op_data["germes"].items(),key=lambda x:-x[1])[:3]
+                ) or "—"
+                row_bg="#f8fafc" if ri%2==0 else "#ffffff"
+                st.markdown(
+                    "<div style='display:grid;grid-template-columns:2fr 0.7fr 0.7fr 0.7fr 0.7fr 0.7fr 2fr;"
+                    "gap:4px;background:"+row_bg+";border:1px solid #e2e8f0;border-top:none;"
+                    "padding:9px 14px;align-items:center'>"
+                    "<div style='font-size:.88rem;font-weight:700;color:#0f172a'>👤 "+op_name+"</div>"
+                    "<div style='font-size:1rem;font-weight:800;color:#1e40af;text-align:center'>"+str(t)+"</div>"
+                    "<div style='font-size:1rem;font-weight:800;color:#22c55e;text-align:center'>"+str(op_data["negatives"])+"</div>"
+                    "<div style='text-align:center'><span style='background:"+tc+"22;color:"+tc+";"
+                    "border-radius:6px;padding:2px 8px;font-size:.8rem;font-weight:700'>"+str(pos)+"</span></div>"
+                    "<div style='font-size:1rem;font-weight:800;color:#f59e0b;text-align:center'>"+str(op_data["alertes"])+"</div>"
+                    "<div style='font-size:1rem;font-weight:800;color:#ef4444;text-align:center'>"+str(op_data["actions"])+"</div>"
+                    "<div style='font-size:.72rem;color:#475569;font-style:italic'>"+top_g+"</div>"
+                    "</div>",
+                    unsafe_allow_html=True)
+            st.markdown(
+                "<div style='background:#1e293b;border-radius:0 0 10px 10px;padding:8px 14px'>"
+                "<div style='font-size:.78rem;color:#94a3b8'>"
+                +str(len(op_list))+" préleveur(s)</div></div>",
+                unsafe_allow_html=True)
+
+        # ══════════════════════════════════════════════════════════════════════
+        # ONGLET 4 : LISTE DES ENTRÉES
+        # ══════════════════════════════════════════════════════════════════════
+        with hist_tab_liste:
+            # ── Filtre par point ──────────────────────────────────────────────
+            all_points = sorted(set(r.get("prelevement","—") for r in surv_f))
+            selected_points = st.multiselect(
+                "📍 Filtrer par point de prélèvement",
+                options=all_points,
+                default=[],
+                placeholder="Tous les points",
+                key="liste_filter_points",
+            )
+            surv_f_liste = [r for r in surv_f if r.get("prelevement","—") in selected_points] \
+                           if selected_points else list(surv_f)
+
+            # ── Tri ───────────────────────────────────────────────────────────
+            col_tri1, col_tri2 = st.columns([2,1])
+            with col_tri1:
+                tri_choix = st.selectbox(
+                    "Trier par",
+                    ["Date (récent → ancien)", "Date (ancien → récent)",
+                     "Point A→Z", "Point Z→A", "UFC décroissant"],
+                    key="liste_tri",
+                    label_visibility="collapsed",
+                )
+            with col_tri2:
+                st.caption(f"{len(surv_f_liste)} entrée(s) affichée(s)")
+
+            if tri_choix == "Date (récent → ancien)":
+                surv_f_liste = sorted(surv_f_liste,
+                    key=lambda x: _parse_date(x.get("date_prelevement", x.get("date",""))) or dt_date.min, reverse=True)
+            elif tri_choix == "Date (ancien → récent)":
+                surv_f_liste = sorted(surv_f_liste,
+                    key=lambda x: _parse_date(x.get("date_prelevement", x.get("date",""))) or dt_date.min)
+            elif tri_choix == "Point A→Z":
+                surv_f_liste = sorted(surv_f_liste, key=lambda x: x.get("prelevement",""))
+            elif tri_choix == "Point Z→A":
+                surv_f_liste = sorted(surv_f_liste, key=lambda x: x.get("prelevement",""), reverse=True)
+            elif tri_choix == "UFC décroissant":
+                surv_f_liste = sorted(surv_f_liste,
+                    key=lambda x: int(x.get("ufc",0) or 0), reverse=True)
+
+            # ── Affichage groupé ou plat ──────────────────────────────────────
+            if selected_points:
+                grouped = {}
+                for r in surv_f_liste:
+                    pt = r.get("prelevement","—")
+                    grouped.setdefault(pt, []).append(r)
+
+                for pt_name, pt_entries in grouped.items():
+                    pt_pos = sum(
+                        1 for r in pt_entries
+                        if r.get("status") in ("alert","action")
+                        or (int(r.get("ufc",0) or 0) > 0
+                            and (r.get("germ_saisi","") or r.get("germ_match",""))
+                            not in ("Négatif","—",""))
+                    )
+                    with st.expander(
+                        f"📍 {pt_name}  —  {len(pt_entries)} prélèvement(s)  ·  "
+                        f"{'🦠 '+str(pt_pos)+' positif(s)' if pt_pos else '✅ Tous conformes'}",
+                        expanded=True,
+                    ):
+                        _render_liste_entries(pt_entries, surv)
+            else:
+                _render_liste_entries(surv_f_liste, surv)
+
+    else:
+        st.info("Aucun prélèvement enregistré.")
+
+    # ── Requêtes ad hoc (stockage SQLite) ─────────────────────────────────────
+    if _use_sqlite():
+        with st.expander("🗄️ Requête SQL sur la base locale (lecture seule)"):
+            st.caption(
+                "Vues : surveillance, prelevements, schedules, pending_identifications, "
+                "archived_samples, points, operators, plans — colonnes id, sample_id, date, "
+                "label, status, data (JSON : json_extract(data, '$.germ_match'))."
+            )
+            _sql = st.text_area(
+                "Requête",
+                value="SELECT label, status, COUNT(*) AS n FROM surveillance "
+                      "GROUP BY label, status ORDER BY n DESC",
+                key="analyse_sql", height=100,
+            )
+            if st.button("▶️ Exécuter", key="analyse_sql_run"):
+                try:
+                    _cols, _rows = local_sql_query(_sql)
+                    st.dataframe([dict(zip(_cols, r)) for r in _rows], use_container_width=True)
+                    st.caption(f"{len(_rows)} ligne(s) — 500 au maximum")
+                except Exception as e:
+                    st.error(f"❌ {e}")
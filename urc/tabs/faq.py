@@ -0,0 +1,107 @@
+"""Onglet FAQ : questions fréquentes par catégorie, avec recherche."""
+import streamlit as st
+
+from urc.constants import DEFAULT_FAQ
+
+def render():
+    from collections import defaultdict
+    import re as _re
+
+    faq_items = sorted(
+        st.session_state.get("faq_items", DEFAULT_FAQ),
+        key=lambda x: x.get("order", 999),
+    )
+
+    if st.button("← Retour", key="faq_back"):
+        st.session_state.active_tab = "Base de données"
+        st.rerun()
+
+    st.markdown(
+        "<div style='background:linear-gradient(135deg,#7c3aed,#a855f7);"
+        "border-radius:14px;padding:20px 28px;margin:12px 0 16px 0'>"
+        "<div style='color:#fff;font-size:1.3rem;font-weight:900'>🍄 Centre d'aide — FAQ</div>"
+        f"<div style='color:#e9d5ff;font-size:.8rem;margin-top:3px'>"
+        f"{len(faq_items)} questions & réponses disponibles</div>"
+        "</div>",
+        unsafe_allow_html=True)
+
+    fc1, fc2 = st.columns([3, 1])
+    with fc1:
+        faq_query = st.text_input(
+            "search", placeholder="🔍 Rechercher...",
+            label_visibility="collapsed", key="faq_page_search")
+    with fc2:
+        all_cats_p = ["Toutes les catégories"] + sorted(
+            set(f.get("category", "Général") for f in faq_items))
+        sel_cat_p = st.selectbox(
+            "cat", all_cats_p,
+            label_visibility="collapsed", key="faq_page_cat")
+
+    st.markdown(
+        "<hr style='margin:8px 0 16px;border-color:#e2e8f0'>",
+        unsafe_allow_html=True)
+
+    q_p = faq_query.strip().lower()
+
+    def _faq_match(item):
+        if sel_cat_p != "Toutes les catégories" and item.get("category") != sel_cat_p:
+            return False
+        if q_p:
+            return (q_p in item["question"].lower()
+                    or q_p in item["answer"].lower()
+                    or q_p in item.get("category", "").lower())
+        return True
+
+    filtered = [f for f in faq_items if _faq_match(f)]
+
+    if not filtered:
+        st.markdown(
+            "<div style='text-align:center;padding:48px 0;color:#94a3b8'>"
+            "<div style='font-size:2.5rem;margin-bottom:10px'>🔍</div>"
+            f"<div style='font-size:.9rem'>Aucun résultat pour "
+            f"<strong>« {faq_query} »</strong></div></div>",
+            unsafe_allow_html=True)
+    else:
+        CAT_COLORS = {
+            "Général":            "#2563eb",
+            "Score & Seuils":     "#7c3aed",
+            "Prélèvements":       "#0891b2",
+            "Paramètres":         "#059669",
+            "Données":            "#d97706",
+            "Mesures correctives":"#dc2626",
+        }
+        grouped = defaultdict(list)
+        for item in filtered:
+            grouped[item.get("category", "Général")].append(item)
+
+        cats_sorted = sorted(grouped.keys())
+        mid = (len(cats_sorted) + 1) // 2
+        col_left, col_right = st.columns(2)
+
+        for ci, cat in enumerate(cats_sorted):
+            col = col_left if ci < mid else col_right
+            c   = CAT_COLORS.get(cat, "#475569")
+            with col:
+                st.markdown(
+                    f"<div style='display:inline-block;background:{c}12;color:{c};"
+                    f"border:1px solid {c}44;border-radius:20px;padding:3px 14px;"
+                    f"font-size:.68rem;font-weight:700;text-transform:uppercase;"
+                    f"letter-spacing:.06em;margin:12px 0 6px'>📂 {cat}</div>",
+                    unsafe_allow_html=True)
+                for item in grouped[cat]:
+                    q_display = item["question"]
+                    if q_p:
+                        q_display = _re.sub(
+                            f"({_re.escape(faq_query)})",
+                            r"<mark style='background:#fef08a;border-radius:3px;"
+                            r"padding:0 2px'>\1</mark>",
+                            q_display, flags=_re.IGNORECASE)
+                    with st.expander(item["question"]):
+                        st.markdown(item["answer"])
+
+    st.markdown(
+        "<div style='margin-top:24px;padding:12px 16px;background:#f8fafc;"
+        "border:1px solid #e2e8f0;border-radius:10px;"
+        "font-size:.72rem;color:#94a3b8;text-align:center'>"
+        "Vous ne trouvez pas votre réponse ? Contactez votre pharmacien référent.</div>",
+        unsafe_allow_html=True)
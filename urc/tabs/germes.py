@@ -0,0 +1,565 @@
+"""Onglet Base de données : référentiel des germes et de leurs scores."""
+import json
+
+import streamlit as st
+
+from urc.constants import DEFAULT_GERMS, DEFAULT_GERM_NAMES
+from urc.storage import save_germs
+from urc.tabs.access import check_access_protege
+
+def render():
+    can_edit = check_access_protege("Base de données")
+
+    PATHO_OPTS = [
+        "1 — Non pathogène",
+        "2 — Pathogène opportuniste",
+        "3 — Pathogène opportuniste multirésistant / Pathogène primaire",
+    ]
+    RESIST_OPTS = [
+        "1 — Sensible",
+        "2 — Résistant au Surfa'Safe",
+        "3 — Résistant au Surfa'Safe et Acide Peracétique",
+    ]
+    DISSEM_OPTS = [
+        "1 — Environnemental",
+        "2 — Manuporté",
+        "3 — Aéroporté",
+    ]
+
+    def _risk_color(score):
+        if score <= 4:   return "#22c55e"
+        if score <= 8:   return "#84cc16"
+        if score <= 12:  return "#f59e0b"
+        if score <= 18:  return "#f97316"
+        return "#ef4444"
+
+    def _risk_label(score):
+        if score <= 4:   return "Faible"
+        if score <= 8:   return "Modéré"
+        if score <= 12:  return "Important"
+        if score <= 18:  return "Majeur"
+        return "Critique"
+
+    def _infer_resistance(surfa, apa):
+        s = (surfa or "").lower()
+        a = (apa  or "").lower()
+        if "risque" in s and "risque" in a:
+            return 3
+        if "risque" in s:
+            return 2
+        return 1
+
+    def _germ_score(g):
+        if all(k in g for k in ("pathogenicity", "resistance", "dissemination")):
+            return int(g["pathogenicity"]) * int(g["resistance"]) * int(g["dissemination"])
+        old = g.get("risk", 1)
+        return {1: 1, 2: 2, 3: 6, 4: 12, 5: 18}.get(old, old)
+
+    _synced        = st.session_state.get("germs_synced_count", 0)
+    _total_default = len(DEFAULT_GERMS)
+    _total_germs   = len(st.session_state.germs)
+    _custom_count  = max(0, _total_germs - _total_default)
+
+    st.markdown(f"""
+    <div style="background:linear-gradient(135deg,#eff6ff,#dbeafe);border:1.5px solid #93c5fd;
+    border-radius:12px;padding:12px 18px;margin-bottom:14px;display:flex;align-items:center;
+    justify-content:space-between;flex-wrap:wrap;gap:10px">
+      <div style="display:flex;align-items:center;gap:14px;flex-wrap:wrap">
+        <span style="font-size:1.4rem">🦠</span>
+        <div>
+          <div style="font-weight:800;color:#1e40af;font-size:.88rem">Base de données germes</div>
+          <div style="font-size:.7rem;color:#3b82f6;margin-top:2px">
+            {_total_default} standards · {_custom_count} personnalisé(s) · {_total_germs} au total
+          </div>
+          <div style="font-size:.65rem;color:#64748b;margin-top:1px">
+            Score criticité = Pathogénicité × Résistance × Dissémination (1–27)
+          </div>
+        </div>
+      </div>
+      <div style="display:flex;gap:8px;flex-wrap:wrap">
+        <div style="background:#fff;border:1px solid #93c5fd;border-radius:8px;padding:6px 12px;text-align:center">
+          <div style="font-size:.6rem;color:#1e40af;text-transform:uppercase;font-weight:700">Standard</div>
+          <div style="font-size:1.1rem;font-weight:800;color:#1e40af">{_total_default}</div>
+        </div>
+        <div style="background:#fff;border:1px solid #86efac;border-radius:8px;padding:6px 12px;text-align:center">
+          <div style="font-size:.6rem;color:#166534;text-transform:uppercase;font-weight:700">Custom</div>
+          <div style="font-size:1.1rem;font-weight:800;color:#166534">{_custom_count}</div>
+        </div>
+        <div style="background:#fff;border:1px solid #fcd34d;border-radius:8px;padding:6px 12px;text-align:center">
+          <div style="font-size:.6rem;color:#92400e;text-transform:uppercase;font-weight:700">Total</div>
+          <div style="font-size:1.1rem;font-weight:800;color:#92400e">{_total_germs}</div>
+        </div>
+      </div>
+    </div>""", unsafe_allow_html=True)
+
+    if _synced > 0:
+        st.success(f"✅ Synchronisation : {_synced} germe(s) mis à jour depuis la base de référence.")
+
+    col_btn1, col_btn2 = st.columns(2)
+    with col_btn1:
+        if can_edit:
+            if st.button("➕ Ajouter un germe", use_container_width=True):
+                st.session_state.show_add = not st.session_state.show_add
+                st.session_state.edit_idx = None
+    with col_btn2:
+        if can_edit:
+            if st.button("💾 Sauvegarder", use_container_width=True, key="save_germs_btn"):
+                save_germs(st.session_state.germs)
+                st.success("✅ Germes sauvegardés !")
+
+    if not can_edit:
+        st.info("👁️ Mode lecture seule — connectez-vous pour modifier les germes.")
+
+    def germ_form(existing=None, idx=None):
+        is_edit = existing is not None
+        with st.container():
+            st.markdown(
+                "<div style='background:#f8fafc;border:1.5px solid #e2e8f0;border-radius:12px;"
+                "padding:18px;margin-bottom:12px'>",
+                unsafe_allow_html=True)
+            st.markdown(f"### {'✏️ Modifier' if is_edit else '➕ Ajouter'} un germe")
+
+            c1, c2, c3 = st.columns(3)
+
+            with c1:
+                st.markdown(
+                    "<div style='font-size:.72rem;font-weight:800;color:#1e40af;"
+                    "letter-spacing:.06em;text-transform:uppercase;margin-bottom:6px'>"
+                    "📋 Identification</div>", unsafe_allow_html=True)
+
+                new_name = st.text_input(
+                    "Nom du germe *",
+                    value=existing["name"] if is_edit else "",
+                    placeholder="Ex: Listeria spp.",
+                    disabled=not can_edit)
+
+                new_famille = st.selectbox(
+                    "Famille *", ["Bactéries", "Champignons"],
+                    index=["Bactéries", "Champignons"].index(existing["path"][1])
+                          if is_edit else 0,
+                    disabled=not can_edit)
+
+                new_origine = st.selectbox(
+                    "Origine *", ["Humains ", "Environnemental"],
+                    index=0 if (not is_edit or existing["path"][2] in ["Humains", "Humain"]) else 1,
+                    disabled=not can_edit)
+
+                if new_famille == "Bactéries":
+                    cats = (["Peau / Muqueuse", "Oropharynx / Gouttelettes", "Flore fécale"]
+                            if "Humain" in new_origine
+                            else ["Humidité", "Sol / Carton / Surface sèche"])
+                else:
+                    cats = (["Peau / Muqueuse"]
+                            if "Humain" in new_origine
+                            else ["Humidité", "Sol / Carton / Surface sèche", "Air"])
+
+                cur_cat = existing["path"][3] if is_edit and existing["path"][3] in cats else cats[0]
+                new_cat = st.selectbox(
+                    "Catégorie *", cats,
+                    index=cats.index(cur_cat) if cur_cat in cats else 0,
+                    disabled=not can_edit)
+
+            with c2:
+                st.markdown(
+                    "<div style='font-size:.72rem;font-weight:800;color:#1e40af;"
+                    "letter-spacing:.06em;text-transform:uppercase;margin-bottom:6px'>"
+                    "🔬 Critères de criticité</div>", unsafe_allow_html=True)
+
+                cur_patho = int(existing.get("pathogenicity", 1)) if is_edit else 1
+                patho_lbl = st.selectbox(
+                    "🧬 Pathogénicité *", PATHO_OPTS,
+                    index=min(cur_patho - 1, 2),
+                    key="form_patho", disabled=not can_edit)
+                patho_num = int(patho_lbl[0])
+
+                if is_edit:
+                    cur_resist = int(existing.get(
+                        "resistance",
+                        _infer_resistance(existing.get("surfa"), existing.get("apa"))))
+                else:
+                    cur_resist = 1
+                resist_lbl = st.selectbox(
+                    "🧴 Résistance aux désinfectants *", RESIST_OPTS,
+                    index=min(cur_resist - 1, 2),
+                    key="form_resist", disabled=not can_edit)
+                resist_num = int(resist_lbl[0])
+
+                cur_dissem = int(existing.get("dissemination", 1)) if is_edit else 1
+                dissem_lbl = st.selectbox(
+                    "💨 Mode de dissémination *", DISSEM_OPTS,
+                    index=min(cur_dissem - 1, 2),
+                    key="form_dissem", disabled=not can_edit)
+                dissem_num = int(dissem_lbl[0])
+
+                risk_num = patho_num * resist_num * dissem_num
+                rc = _risk_color(risk_num)
+                rl = _risk_label(risk_num)
+
+                if risk_num > 36:
+                    status_txt = "🚨 Action probable si lieu ≥ critique"
+                    status_bg  = "#fef2f2"
+                    status_c   = "#991b1b"
+                elif risk_num >= 24:
+                    status_txt = "⚠️ Alerte probable si lieu ≥ modéré"
+                    status_bg  = "#fffbeb"
+                    status_c   = "#92400e"
+                else:
+                    status_txt = "✅ Conforme selon lieu de prélèvement"
+                    status_bg  = "#f0fdf4"
+                    status_c   = "#166534"
+
+                st.markdown(f"""
+                <div style="background:{rc}12;border:2px solid {rc}55;border-radius:12px;
+                padding:14px;margin-top:8px;text-align:center">
+                  <div style="font-size:.62rem;color:#475569;text-transform:uppercase;
+                  letter-spacing:.1em;margin-bottom:6px;font-weight:700">Score de criticité</div>
+                  <div style="font-size:2.8rem;font-weight:900;color:{rc};line-height:1">
+                    {risk_num}
+                  </div>
+                  <div style="font-size:.78rem;font-weight:700;color:{rc};margin-top:4px">
+                    {rl}
+                  </div>
+                  <div style="font-size:.62rem;color:#64748b;margin-top:8px;
+                  background:#fff;border-radius:6px;padding:5px 8px;display:inline-block">
+                    {patho_num} (patho) × {resist_num} (résist.) × {dissem_num} (dissém.) = {risk_num}
+                  </div>
+                  <div style="font-size:.65rem;font-weight:600;padding:5px 8px;border-radius:6px;
+                  margin-top:8px;background:{status_bg};color:{status_c}">
+                    {status_txt}
+                  </div>
+                </div>""", unsafe_allow_html=True)
+
+            with c3:
+                st.markdown(
+                    "<div style='font-size:.72rem;font-weight:800;color:#1e40af;"
+                    "letter-spacing:.06em;text-transform:uppercase;margin-bottom:6px'>"
+                    "Information supplémentaire</div>", unsafe_allow_html=True)
+
+                new_notes = st.text_area(
+                    "📝 Notes",
+                    value=existing.get("notes", "") or "" if is_edit else "",
+                    height=70, disabled=not can_edit)
+
+                new_comment = st.text_area(
+                    "💬 Commentaire détaillé",
+                    value=existing.get("comment", "") or "" if is_edit else "",
+                    height=70, disabled=not can_edit)
+
+            st.markdown("</div>", unsafe_allow_html=True)
+            cb1, cb2 = st.columns(2)
+            with cb1:
+                if can_edit:
+                    if st.button(
+                        "✅ " + ("Modifier" if is_edit else "Ajouter"),
+                        use_container_width=True, key="form_submit"):
+                        if not new_name.strip():
+                            st.error("Le nom est obligatoire.")
+                            return
+                        origine_node = (
+                            ("Humains" if new_famille == "Bactéries" else "Humain")
+                            if "Humain" in new_origine else "Environnemental")
+                        new_germ = dict(
+                            name=new_name.strip(),
+                            path=["Germes", new_famille, origine_node, new_cat],
+                            pathogenicity=patho_num,
+                            resistance=resist_num,
+                            dissemination=dissem_num,
+                            risk=risk_num,
+                            notes=new_notes.strip() or None,
+                            comment=new_comment.strip() or None,
+                        )
+                        if is_edit:
+                            st.session_state.germs[idx] = new_germ
+                            st.session_state.edit_idx   = None
+                        else:
+                            if any(g["name"].lower() == new_name.strip().lower()
+                                   for g in st.session_state.germs):
+                                st.error("Ce germe existe déjà.")
+                                return
+                            st.session_state.germs.append(new_germ)
+                            st.session_state.show_add = False
+                        save_germs(st.session_state.germs)
+                        st.rerun()
+            with cb2:
+                if can_edit:
+                    if st.button("Annuler", use_container_width=True, key="form_cancel"):
+                        st.session_state.show_add = False
+                        st.session_state.edit_idx = None
+                        st.rerun()
+
+    if can_edit and st.session_state.show_add and st.session_state.edit_idx is None:
+        germ_form()
+    if can_edit and st.session_state.edit_idx is not None:
+        germ_form(
+            existing=st.session_state.germs[st.session_state.edit_idx],
+            idx=st.session_state.edit_idx)
+
+    st.divider()
+
+    germs_json         = json.dumps(st.session_state.germs, ensure_ascii=False)
+    default_names_json = json.dumps(sorted(DEFAULT_GERM_NAMES), ensure_ascii=False)
+
+    tree_html = f"""<!DOCTYPE html><html><head><meta charset="utf-8">
+<style>
+*{{box-sizing:border-box;margin:0;padding:0}}
+body{{background:#f8fafc;color:#1e293b;font-family:'Segoe UI',sans-serif;height:95vh;overflow:hidden}}
+.app{{display:flex;height:95vh}}
+.tree-wrap{{flex:1;overflow:auto;padding:8px;scrollbar-width:thin;scrollbar-color:#cbd5e1 transparent}}
+svg{{min-width:900px;width:100%;height:100%}}
+.node rect{{fill:#fff;stroke:#e2e8f0;stroke-width:1.5;transition:all .2s;cursor:pointer}}
+.node.highlighted rect{{stroke-width:2.5;filter:drop-shadow(0 0 4px rgba(0,0,0,.15))}}
+.node text{{font-size:11px;fill:#0f172a;pointer-events:none;font-family:'Courier New',monospace}}
+.link{{fill:none;stroke:#e2e8f0;stroke-width:1.5;transition:all .3s}}
+.link.highlighted{{stroke-width:2.5}}
+.right-panel{{width:490px;border-left:2px solid #e2e8f0;display:flex;flex-direction:column;background:#f1f5f9;flex-shrink:0}}
+.sbox{{padding:12px 14px;border-bottom:1px solid #e2e8f0}}
+.sbox input{{width:100%;background:#fff;border:1.5px solid #e2e8f0;border-radius:10px;padding:10px 14px;color:#1e293b;font-size:.9rem;outline:none}}
+.sbox input:focus{{border-color:#2563eb;box-shadow:0 0 0 3px rgba(37,99,235,.1)}}
+.germ-list{{flex:1;overflow-y:auto;padding:6px;scrollbar-width:thin}}
+.germ-item{{display:flex;align-items:center;gap:10px;padding:9px 12px;border-radius:8px;cursor:pointer;transition:background .15s;font-size:.85rem;color:#0f172a;border:1px solid transparent;margin-bottom:3px}}
+.germ-item:hover{{background:#fff;box-shadow:0 1px 4px rgba(0,0,0,.08)}}
+.germ-item.active{{background:#fff;border-color:#2563eb;box-shadow:0 1px 6px rgba(37,99,235,.2)}}
+.risk-dot{{width:10px;height:10px;border-radius:50%;flex-shrink:0}}
+.germ-count{{font-size:.72rem;color:#64748b;padding:6px 14px;text-align:center;border-bottom:1px solid #e2e8f0;background:#f8fafc;font-weight:600}}
+.group-header{{font-size:.65rem;font-weight:800;letter-spacing:.12em;text-transform:uppercase;color:#475569;padding:8px 12px 3px;background:#e2e8f0;margin:4px -6px 3px;border-radius:3px}}
+.info-panel{{border-top:2px solid #e2e8f0;padding:14px;background:#fff;display:none;max-height:600px;overflow-y:auto}}
+.info-panel.visible{{display:block}}
+.info-name{{font-size:.92rem;font-weight:700;font-style:italic;color:#1e293b;margin-bottom:3px}}
+.info-path{{font-size:.6rem;color:#2563eb;opacity:.85;margin-bottom:8px;font-family:monospace}}
+.info-badge{{display:inline-flex;align-items:center;gap:5px;font-size:.7rem;padding:3px 10px;border-radius:20px;border:1px solid;margin-bottom:10px;font-weight:600}}
+.info-lbl{{font-size:.58rem;letter-spacing:.1em;text-transform:uppercase;color:#64748b;margin-bottom:2px;margin-top:8px;font-weight:700}}
+.info-val{{font-size:.78rem;color:#1e293b;line-height:1.4}}
+.score-grid{{display:grid;grid-template-columns:1fr 1fr 1fr;gap:5px;margin-top:6px}}
+.score-cell{{background:#f8fafc;border:1px solid #e2e8f0;border-radius:7px;padding:7px 5px;text-align:center}}
+.score-cell .lbl{{font-size:.52rem;color:#64748b;text-transform:uppercase;margin-bottom:3px;line-height:1.3}}
+.score-cell .val{{font-size:1.2rem;font-weight:900}}
+.score-total{{background:#1e293b;border-radius:8px;padding:8px;text-align:center;margin-top:6px}}
+.alert-row{{padding:5px 10px;border-radius:6px;font-size:.68rem;font-weight:700;margin-top:5px}}
+.notes-box{{margin-top:6px;padding:7px 10px;border-radius:6px;background:rgba(37,99,235,.04);border:1px solid rgba(37,99,235,.18);font-size:.72rem;color:#0f172a;line-height:1.5}}
+</style></head><body>
+<div class="app">
+  <div class="tree-wrap"><svg id="svg"></svg></div>
+  <div class="right-panel">
+    <div class="sbox"><input type="text" id="sbox" placeholder="🔍 Rechercher un germe..." oninput="filterList()"></div>
+    <div class="germ-count" id="germCount">Chargement...</div>
+    <div class="germ-list" id="germList"></div>
+    <div class="info-panel" id="infoPanel"></div>
+  </div>
+</div>
+<script>
+const GERMS={germs_json};
+const DEFAULT_NAMES=new Set({default_names_json});
+const NODE_W=190,NODE_H=28,H_GAP=28,V_GAP=10;
+const LEVEL_COLS=["#38bdf8","#818cf8","#fb923c","#34d399","#a3e635"];
+const PATHO_LBL=["","Non pathogène","Pathogène opportuniste","Pathogène opp. MR / Primaire"];
+const RESIST_LBL=["","Sensible","Résistant Surfa'Safe","Résistant Surfa'Safe + APA"];
+const DISSEM_LBL=["","Environnemental","Manuporté","Aéroporté"];
+
+function riskColor(s){{
+  if(s<=4)return"#22c55e";if(s<=8)return"#84cc16";
+  if(s<=12)return"#f59e0b";if(s<=18)return"#f97316";return"#ef4444";
+}}
+function riskLabel(s){{
+  if(s<=4)return"Faible";if(s<=8)return"Modéré";
+  if(s<=12)return"Important";if(s<=18)return"Majeur";return"Critique";
+}}
+function germScore(g){{
+  if(g.pathogenicity&&g.resistance&&g.dissemination)
+    return g.pathogenicity*g.resistance*g.dissemination;
+  const m={{1:1,2:2,3:6,4:12,5:18}};return m[g.risk]||g.risk||1;
+}}
+
+function buildTree(){{
+  const root={{name:"Germes",children:[]}};
+  GERMS.forEach(g=>{{
+    let cur=root;
+    g.path.slice(1).forEach(n=>{{
+      let c=cur.children&&cur.children.find(x=>x.name===n);
+      if(!c){{c={{name:n,children:[]}};if(!cur.children)cur.children=[];cur.children.push(c);}}
+      cur=c;
+    }});
+  }});
+  function clean(n){{if(n.children&&!n.children.length)delete n.children;else if(n.children)n.children.forEach(clean);}}
+  clean(root);return root;
+}}
+function computeLayout(node,depth=0,y=0){{
+  node.depth=depth;node.x=depth*(NODE_W+H_GAP);
+  if(!node.children||!node.children.length){{node.y=y;return y+NODE_H;}}
+  let cy=y;node.children.forEach(c=>{{cy=computeLayout(c,depth+1,cy);cy+=V_GAP;}});
+  cy-=V_GAP;node.y=(y+cy)/2;return cy+V_GAP;
+}}
+function allNodes(n){{return[n,...(n.children||[]).flatMap(allNodes)];}}
+function allLinks(n){{return(n.children||[]).flatMap(c=>[{{source:n,target:c}},...allLinks(c)]);}}
+function buildPaths(n,p=[]){{n.fullPath=[...p,n.name];(n.children||[]).forEach(c=>buildPaths(c,n.fullPath));}}
+
+function renderTree(){{
+  const tree=buildTree();computeLayout(tree);buildPaths(tree);
+  const nodes=allNodes(tree),links=allLinks(tree);
+  const maxY=Math.max(...nodes.map(n=>n.y))+NODE_H+20;
+  const maxX=Math.max(...nodes.map(n=>n.x))+NODE_W+20;
+  const svg=document.getElementById('svg');
+  svg.innerHTML='';
+  svg.setAttribute('viewBox',`0 0 ${{maxX}} ${{maxY}}`);
+  svg.setAttribute('height',maxY);svg.setAttribute('width',maxX);
+  links.forEach(l=>{{
+    const p=document.createElementNS('http://www.w3.org/2000/svg','path');
+    const x1=l.source.x+NODE_W,y1=l.source.y+NODE_H/2,x2=l.target.x,y2=l.target.y+NODE_H/2,mx=(x1+x2)/2;
+    p.setAttribute('d',`M${{x1}},${{y1}} C${{mx}},${{y1}} ${{mx}},${{y2}} ${{x2}},${{y2}}`);
+    p.setAttribute('class','link');
+    p.dataset.sourcefull=l.source.fullPath.join('|||');
+    p.dataset.targetfull=l.target.fullPath.join('|||');
+    svg.appendChild(p);
+  }});
+  nodes.forEach(node=>{{
+    const g=document.createElementNS('http://www.w3.org/2000/svg','g');
+    g.setAttribute('class','node');
+    g.setAttribute('transform',`translate(${{node.x}},${{node.y}})`);
+    g.dataset.fullpath=node.fullPath.join('|||');
+    const col=LEVEL_COLS[node.depth]||"#0f172a";
+    const rect=document.createElementNS('http://www.w3.org/2000/svg','rect');
+    rect.setAttribute('width',NODE_W);rect.setAttribute('height',NODE_H);
+    rect.setAttribute('rx',5);rect.setAttribute('stroke',col);
+    const text=document.createElementNS('http://www.w3.org/2000/svg','text');
+    text.setAttribute('x',NODE_W/2);text.setAttribute('y',NODE_H/2+4);
+    text.setAttribute('text-anchor','middle');
+    text.textContent=node.name.length>27?node.name.substring(0,25)+'...':node.name;
+    g.appendChild(rect);g.appendChild(text);
+    g.addEventListener('mouseenter',()=>highlightPath(node.fullPath));
+    g.addEventListener('mouseleave',clearHighlight);
+    svg.appendChild(g);
+  }});
+}}
+let selectedPath=null;
+function highlightPath(exactPath){{
+  const vp=new Set();for(let i=1;i<=exactPath.length;i++)vp.add(exactPath.slice(0,i).join('|||'));
+  document.querySelectorAll('.node').forEach(n=>n.classList.toggle('highlighted',vp.has(n.dataset.fullpath||'')));
+  document.querySelectorAll('.link').forEach(l=>{{
+    const on=vp.has(l.dataset.sourcefull||'')&&vp.has(l.dataset.targetfull||'');
+    l.classList.toggle('highlighted',on);
+    if(on){{const d=(l.dataset.sourcefull||'').split('|||').length-1;l.style.stroke=LEVEL_COLS[d]||'#38bdf8';}}
+    else l.style.stroke='';
+  }});
+}}
+function clearHighlight(){{
+  if(selectedPath){{highlightPath(selectedPath);return;}}
+  document.querySelectorAll('.node').forEach(n=>n.classList.remove('highlighted'));
+  document.querySelectorAll('.link').forEach(l=>{{l.classList.remove('highlighted');l.style.stroke=''}});
+}}
+function renderList(filter=''){{
+  const list=document.getElementById('germList');
+  const countEl=document.getElementById('germCount');
+  list.innerHTML='';
+  const filtered=GERMS.filter(g=>g.name.toLowerCase().includes(filter.toLowerCase()));
+  countEl.textContent=filter?`${{filtered.length}} / ${{GERMS.length}} germe(s)`:`${{GERMS.length}} germe(s) — cliquez pour détails`;
+  const groups={{}};
+  filtered.forEach(g=>{{const cat=(g.path&&g.path[3])||'Autres';if(!groups[cat])groups[cat]=[];groups[cat].push(g);}});
+  Object.keys(groups).sort().forEach(cat=>{{
+    const header=document.createElement('div');header.className='group-header';header.textContent=cat;list.appendChild(header);
+    groups[cat].forEach(g=>{{
+      const score=germScore(g);const col=riskColor(score);
+      const isCustom=!DEFAULT_NAMES.has(g.name);
+      const isAir=(g.dissemination||0)===3;
+      const hasResist=(g.resistance||0)>=2;
+      let badges='';
+      if(isAir)badges+='<span style="font-size:.48rem;background:#eff6ff;color:#1e40af;border-radius:3px;padding:0 4px;margin-left:2px">✈</span>';
+      if(hasResist)badges+='<span style="font-size:.48rem;background:#fee2e2;color:#991b1b;border-radius:3px;padding:0 4px;margin-left:2px">⚠</span>';
+      if(isCustom)badges+='<span style="font-size:.48rem;background:rgba(56,189,248,.15);color:#2563eb;border-radius:3px;padding:0 4px;margin-left:2px">★</span>';
+      const div=document.createElement('div');div.className='germ-item';div.dataset.name=g.name;
+      div.innerHTML=`<span class="risk-dot" style="background:${{col}}"></span><span style="flex:1;line-height:1.3">${{g.name}}${{badges}}</span><span style="font-size:.62rem;color:${{col}};font-weight:800;flex-shrink:0">${{score}}</span>`;
+      div.addEventListener('click',()=>selectGerm(g));
+      list.appendChild(div);
+    }});
+  }});
+}}
+function filterList(){{renderList(document.getElementById('sbox').value);}}
+function selectGerm(g){{
+  selectedPath=g.path;highlightPath(g.path);
+  document.querySelectorAll('.germ-item').forEach(el=>el.classList.toggle('active',el.dataset.name===g.name));
+  showInfo(g);
+}}
+function showInfo(g){{
+  const panel=document.getElementById('infoPanel');panel.classList.add('visible');
+  const score=germScore(g);const col=riskColor(score);
+  const alertRow=score>24?`<div class="alert-row" style="background:#fef2f2;color:#991b1b">🚨 Action (score germe seul &gt; 24)</div>`
+    :score>=16?`<div class="alert-row" style="background:#fffbeb;color:#92400e">⚠️ Alerte probable selon criticité du lieu</div>`
+    :`<div class="alert-row" style="background:#f0fdf4;color:#166534">✅ Conforme à score germe seul</div>`;
+  const nh=g.notes?`<div class="info-lbl">📝 Notes</div><div class="notes-box">${{g.notes}}</div>`:'';
+  const ch=g.comment?`<div class="info-lbl" style="color:#fb923c">💬 Commentaire</div><div class="notes-box" style="color:#ea580c;background:rgba(251,146,60,.06);border-color:rgba(251,146,60,.3)">${{g.comment}}</div>`:'';
+  panel.innerHTML=`
+    <div class="info-name">${{g.name}}</div>
+    <div class="info-path">${{g.path.join(' › ')}}</div>
+    <div class="info-badge" style="color:${{col}};background:${{col}}22;border-color:${{col}}55">
+      <span style="width:8px;height:8px;border-radius:50%;background:${{col}};display:inline-block"></span>
+      Score ${{score}} — ${{riskLabel(score)}}
+    </div>
+    <div class="info-lbl">Critères de criticité</div>
+    <div class="score-grid">
+      <div class="score-cell">
+        <div class="lbl">🧬 Pathogénicité</div>
+        <div class="val" style="color:${{riskColor(g.pathogenicity||1)}}">${{g.pathogenicity||1}}</div>
+        <div style="font-size:.5rem;color:#64748b;margin-top:2px">${{PATHO_LBL[g.pathogenicity||1]||'—'}}</div>
+      </div>
+      <div class="score-cell">
+        <div class="lbl">🧴 Résistance</div>
+        <div class="val" style="color:${{riskColor(g.resistance||1)}}">${{g.resistance||1}}</div>
+        <div style="font-size:.5rem;color:#64748b;margin-top:2px">${{RESIST_LBL[g.resistance||1]||'—'}}</div>
+      </div>
+      <div class="score-cell">
+        <div class="lbl">💨 Dissémination</div>
+        <div class="val" style="color:${{riskColor(g.dissemination||1)}}">${{g.dissemination||1}}</div>
+        <div style="font-size:.5rem;color:#64748b;margin-top:2px">${{DISSEM_LBL[g.dissemination||1]||'—'}}</div>
+      </div>
+    </div>
+    <div class="score-total">
+      <div style="font-size:.58rem;color:#94a3b8;text-transform:uppercase;letter-spacing:.1em">Score calculé</div>
+      <div style="font-size:1.8rem;font-weight:900;color:${{col}};line-height:1.1">${{score}}</div>
+      <div style="font-size:.6rem;color:#94a3b8">${{g.pathogenicity||'?'}} × ${{g.resistance||'?'}} × ${{g.dissemination||'?'}}</div>
+    </div>
+    ${{alertRow}}
+    ${{nh}}${{ch}}`;
+}}
+renderTree();
+renderList();
+</script></body></html>"""
+
+    st.components.v1.html(tree_html, height=1200, scrolling=False)
+
+    st.markdown("### ✏️ Gérer les germes")
+    search_edit = st.text_input(
+        "Filtrer", placeholder="Rechercher un germe...", label_visibility="collapsed")
+    filtered = ([g for g in st.session_state.germs
+                 if search_edit.lower() in g["name"].lower()]
+                if search_edit else st.session_state.germs)
+
+    for i, g in enumerate(filtered):
+        real_idx = st.session_state.germs.index(g)
+        score    = _germ_score(g)
+        c        = _risk_color(score)
+        rl       = _risk_label(score)
+
+        col_n, col_s, col_rl, col_e, col_d = st.columns([4, 0.6, 1, 0.6, 0.6])
+        with col_n:
+            st.markdown(
+                f'<span style="color:{c};font-size:.75rem">●</span> '
+                f'<span style="font-size:.82rem;font-style:italic">{g["name"]}</span>',
+                unsafe_allow_html=True)
+        with col_s:
+            st.markdown(
+                f'<span style="font-size:.75rem;color:{c};font-weight:800">{score}</span>',
+                unsafe_allow_html=True)
+        with col_rl:
+            st.markdown(
+                f'<span style="font-size:.65rem;color:{c};font-weight:700">{rl}</span>',
+                unsafe_allow_html=True)
+        with col_e:
+            if can_edit:
+                if st.button("✏️", key=f"edit_{real_idx}_{i}"):
+                    st.session_state.edit_idx = real_idx
+                    st.session_state.show_add = False
+                    st.rerun()
+        with col_d:
+            if can_edit:
+                if st.button("🗑️", key=f"del_{real_idx}_{i}"):
+                    st.session_state.germs.pop(real_idx)
+                    save_germs(st.session_state.germs)
+                    st.rerun()
@@ -0,0 +1,424 @@
+"""Mesures correctives d'une entrée de l'historique, partagées par les onglets
+Surveillance et Analyse."""
+import streamlit as st
+
+from urc.storage import _repo, save_surveillance
+from urc.documents import _generate_mc_pdf
+
+# ── Helper criticité lieu ──────────────────────────────────────────────────────
+def _get_location_criticality(smp: dict) -> int:
+    label = smp.get("label", "")
+    if label:
+        pt = _repo().point(label)
+        if pt:
+            try:
+                return int(pt.get("location_criticality", 1))
+            except (ValueError, TypeError):
+                pass
+    raw = smp.get("location_criticality") or smp.get("criticality")
+    if raw is not None:
+        try:
+            return int(raw)
+        except (ValueError, TypeError):
+            pass
+    return 1
+
+
+def _loc_crit_label(lc: int) -> str:
+    return {1: "Limité", 2: "Modéré", 3: "Important", 4: "Critique"}.get(lc, "?")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# FONCTION UNIFIÉE — _render_mesures_correctives
+#
+# Appelée depuis :
+#   • la liste surveillance  → _render_mesures_correctives(entry, entry_idx)
+#   • le popup post-ident    → _render_mesures_correctives(pop_data,
+#                                                           entry_idx=None,
+#                                                           popup_mode=True)
+#   • l'historique (Analyse) → _render_mesures_correctives(entry, entry_idx)
+# ═══════════════════════════════════════════════════════════════════════════════
+def _render_mesures_correctives(
+    entry: dict,
+    entry_idx: int | None = None,
+    popup_mode: bool = False,
+):
+    from datetime import datetime as _dt
+
+    STATUS    = entry.get("status", "ok")
+    MC_STATUT = entry.get("mc_statut", "")
+    MC_DATE   = entry.get("mc_date",   "")
+
+    if STATUS not in ("alert", "action"):
+        return
+
+    # ══════════════════════════════════════════════════════════════════════
+    # RÉSOLUTION AUTOMATIQUE DES FILTRES MC selon le germe de l'entrée
+    # ══════════════════════════════════════════════════════════════════════
+
+    # ── 1. Germe le plus critique ─────────────────────────────────────────
+    _gd_mc = entry.get("germs_detail", [])
+    if _gd_mc:
+        _worst_mc     = next((g for g in _gd_mc if g.get("is_worst")), None) or _gd_mc[0]
+        _germ_name_mc = (_worst_mc.get("name") or "").strip()
+    else:
+        _germ_name_mc = (
+            entry.get("germ_saisi") or entry.get("germ_match") or ""
+        ).strip()
+
+    _germ_obj_mc = next(
+        (g for g in st.session_state.get("germs", [])
+         if g.get("name") == _germ_name_mc),
+        None,
+    )
+
+    # ── 2. Scope = path[3] (Air, Humidité, Peau/Muqueuse…) ───────────────
+    _germ_scope_mc = None
+    if _germ_obj_mc:
+        _path_mc       = _germ_obj_mc.get("path", [])
+        _germ_scope_mc = _path_mc[3] if len(_path_mc) > 3 else None
+
+    # ── 3. Germ type = path[1] → bacteria / fungi ─────────────────────────
+    _germ_type_mc = None
+    if _germ_obj_mc:
+        _fam = (_germ_obj_mc.get("path") or ["", ""])[1]
+        _germ_type_mc = {"Bactéries": "bacteria", "Champignons": "fungi"}.get(_fam)
+
+    # ── 4. Mode de dissémination → environmental / manual / aerial ────────
+    _dissem_mc = int(_germ_obj_mc.get("dissemination", 0) or 0) if _germ_obj_mc else 0
+    _dissem_key_mc = {1: "environmental", 2: "manual", 3: "aerial"}.get(_dissem_mc)
+
+    # ── 5. Score de l'entrée ──────────────────────────────────────────────
+    try:
+        _score_mc = int(entry.get("total_score") or entry.get("risk_level") or 0)
+    except (TypeError, ValueError):
+        _score_mc = 0
+
+    # ── Helpers filtre risk ───────────────────────────────────────────────
+    def _risk_matches(mc_risk):
+        if not mc_risk or mc_risk == "all":
+            return True
+        if str(mc_risk).startswith("["):
+            try:
+                import json as _j
+                return _score_mc in _j.loads(str(mc_risk))
+            except Exception:
+                return True
+        try:
+            return _score_mc == int(mc_risk)
+        except (TypeError, ValueError):
+            return True
+
+    # ── Fonction de filtrage globale ──────────────────────────────────────
+    def _mc_applicable(mc):
+        # scope (catégorie du germe)
+        mc_scope = mc.get("scope", "all")
+        if mc_scope != "all" and _germ_scope_mc:
+            if mc_scope != _germ_scope_mc:
+                return False
+
+        # type bactérie / champignon
+        mc_germ_type = mc.get("germ_type", "all")
+        if mc_germ_type not in ("all", "both") and _germ_type_mc:
+            if mc_germ_type != _germ_type_mc:
+                return False
+
+        # mode de dissémination
+        mc_dissem = mc.get("dissemination", "all")
+        if mc_dissem not in ("all", None) and _dissem_key_mc:
+            if mc_dissem != _dissem_key_mc:
+                return False
+
+        # alert / action / both
+        mc_type = mc.get("type", "both")
+        if mc_type != "both":
+            if mc_type != STATUS:
+                return False
+
+        # niveau de risque
+        if not _risk_matches(mc.get("risk", "all")):
+            return False
+
+        return True
+
+    # ── Liste filtrée — à utiliser partout dans cette fonction ────────────
+    available_measures = [
+        mc for mc in st.session_state.get("origin_measures", [])
+        if _mc_applicable(mc)
+    ]
+
+    # ══════════════════════════════════════════════════════════════════════
+    # SUITE INCHANGÉE — palette, badge, helper index
+    # ══════════════════════════════════════════════════════════════════════
+
+    key_suffix = (
+        str(entry_idx)
+        if entry_idx is not None
+        else str(entry.get("sample_id", entry.get("label", "pop")))
+    )
+
+    if MC_STATUT == "fait":
+        _brd       = "#86efac"; _bg = "#f0fdf4"; _title_col = "#166534"
+        _badge_bg  = "#22c55e"; _badge_txt = "MESURES CORRECTIVES FAITES ✅"
+    else:
+        _brd       = "#fca5a5" if STATUS == "action" else "#fcd34d"
+        _bg        = "#fef2f2" if STATUS == "action" else "#fffbeb"
+        _title_col = "#991b1b" if STATUS == "action" else "#92400e"
+        _badge_bg  = "#ef4444" if STATUS == "action" else "#f59e0b"
+        _badge_txt = "MESURES CORRECTIVES EN ATTENTE"
+
+    st.markdown(
+        f"<div style='background:{_bg};border:1.5px solid {_brd};"
+        f"border-radius:12px;padding:14px 18px;margin-top:10px'>"
+        f"<div style='font-size:.82rem;font-weight:800;color:{_title_col};"
+        f"margin-bottom:10px;display:flex;justify-content:space-between;align-items:center'>"
+        f"<span>🔧 Mesures correctives</span>"
+        f"<span style='background:{_badge_bg};color:#fff;border-radius:6px;"
+        f"padding:2px 10px;font-size:.68rem;font-weight:700'>{_badge_txt}</span>"
+        f"</div>",
+        unsafe_allow_html=True,
+    )
+    # ── Mise en cache du PDF pour récupération externe ────────────────────
+    try:
+        _pdf_cached = _generate_mc_pdf(
+            entry,
+            available_measures,   # ← filtrées, pas origin_measures brutes
+            st.session_state.get("germs", []),
+        )
+        st.session_state[f"pdf_mc_cache_{key_suffix}"] = {
+            "data":  _pdf_cached,
+            "fname": (
+                f"MC_{entry.get('prelevement','point').replace(' ','_')[:20]}"
+                f"_{entry.get('date_prelevement', entry.get('date',''))}.pdf"
+            ),
+        }
+    except Exception:
+        st.session_state.pop(f"pdf_mc_cache_{key_suffix}", None)
+
+    def _find_surv_index() -> int | None:
+        if entry_idx is not None and 0 <= entry_idx < len(st.session_state.surveillance):
+            return entry_idx
+        _sid  = entry.get("sample_id") or entry.get("label") or entry.get("prelevement")
+        _date = entry.get("date", "")
+        _germ = (entry.get("germ_saisi", "")
+                 or entry.get("germ_match", "")
+                 or entry.get("germ", ""))
+        _ufc  = entry.get("ufc")
+        for _i, _sr in enumerate(st.session_state.surveillance):
+            if (
+                (_sr.get("prelevement") == _sid
+                 or _sr.get("sample_id") == _sid
+                 or _sr.get("label")     == _sid)
+                and ((not _date) or _sr.get("date", "") == _date)
+                and ((not _germ) or _sr.get("germ_saisi", "") == _germ
+                     or _sr.get("germ_match", "") == _germ)
+                and (_ufc is None or _sr.get("ufc") == _ufc)
+                and _sr.get("status") in ("alert", "action")
+            ):
+                return _i
+        return None
+    def _persist():
+        save_surveillance(st.session_state.surveillance)
+
+    def _valider_mc():
+        _i = _find_surv_index()
+        if _i is not None:
+            st.session_state.surveillance[_i]["mc_statut"] = "fait"
+            st.session_state.surveillance[_i]["mc_detail"] = ""
+            st.session_state.surveillance[_i]["mc_date"]   = _dt.now().strftime("%d/%m/%Y %H:%M")
+        _persist()
+
+    def _annuler_mc():
+        _i = _find_surv_index()
+        if _i is not None:
+            st.session_state.surveillance[_i]["mc_statut"] = ""
+            st.session_state.surveillance[_i]["mc_detail"] = ""
+            st.session_state.surveillance[_i]["mc_date"]   = ""
+        _persist()
+
+    # ── Génération PDF ────────────────────────────────────────────────────────
+    def _gen_pdf_mesures(data: dict, mesures: list) -> bytes:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units     import cm as rl_cm
+        from reportlab.lib           import colors as rlc
+        from reportlab.platypus      import (
+            BaseDocTemplate, Frame, PageTemplate,
+            Paragraph, Spacer, HRFlowable, Table, TableStyle,
+        )
+        from reportlab.lib.styles import ParagraphStyle
+        from io import BytesIO
+
+        buf    = BytesIO()
+        A4_W, A4_H = A4
+        MARGIN = 1.8 * rl_cm
+
+        s_title  = ParagraphStyle("mc_t",  fontName="Helvetica-Bold", fontSize=14,
+                                  leading=18, textColor=rlc.HexColor("#1e40af"), spaceAfter=6)
+        s_sub    = ParagraphStyle("mc_s",  fontName="Helvetica",      fontSize=9,
+                                  leading=12, textColor=rlc.HexColor("#64748b"), spaceAfter=10)
+        s_val    = ParagraphStyle("mc_v",  fontName="Helvetica",      fontSize=9,
+                                  leading=12, textColor=rlc.HexColor("#475569"), spaceAfter=8)
+        s_mhead  = ParagraphStyle("mc_mh", fontName="Helvetica-Bold", fontSize=10,
+                                  leading=13, textColor=rlc.HexColor("#991b1b"),
+                                  spaceBefore=12, spaceAfter=6)
+        s_item   = ParagraphStyle("mc_i",  fontName="Helvetica",      fontSize=9,
+                                  leading=13, textColor=rlc.HexColor("#0f172a"),
+                                  leftIndent=10, spaceAfter=5)
+        s_footer = ParagraphStyle("mc_f",  fontName="Helvetica",      fontSize=7,
+                                  leading=9,  textColor=rlc.HexColor("#94a3b8"))
+
+        doc   = BaseDocTemplate(buf, pagesize=A4,
+                                leftMargin=MARGIN, rightMargin=MARGIN,
+                                topMargin=MARGIN,  bottomMargin=MARGIN)
+        frame = Frame(MARGIN, MARGIN, A4_W - 2*MARGIN, A4_H - 2*MARGIN,
+                      leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0)
+        doc.addPageTemplates([PageTemplate(id="main", frames=[frame])])
+
+        _is_action  = data.get("status") == "action"
+        _status_txt = "🚨 ACTION REQUISE" if _is_action else "⚠️ ALERTE"
+        _status_col = rlc.HexColor("#dc2626") if _is_action else rlc.HexColor("#d97706")
+        _now_str    = _dt.now().strftime("%d/%m/%Y %H:%M")
+
+        story = [
+            Paragraph("FICHE MESURES CORRECTIVES", s_title),
+            Paragraph(f"MicroSurveillance URC — Généré le {_now_str}", s_sub),
+            HRFlowable(width="100%", thickness=1.5, color=_status_col, spaceAfter=10),
+        ]
+
+        tbl_data = [
+            ["Statut",   _status_txt],
+            ["Point",    data.get("label",   "—")],
+            ["Germe",    data.get("germ",    data.get("germ_match", "—"))],
+            ["UFC",      str(data.get("ufc", "—"))],
+            ["Score",    str(data.get("total_score", "—"))],
+            ["Lieu Nv.", str(data.get("loc_criticality",
+                                      data.get("location_criticality", "—")))],
+        ]
+        tbl = Table(tbl_data, colWidths=[4*rl_cm, A4_W - 2*MARGIN - 4*rl_cm])
+        tbl.setStyle(TableStyle([
+            ("FONTNAME",       (0, 0), (0, -1), "Helvetica-Bold"),
+            ("FONTNAME",       (1, 0), (1, -1), "Helvetica"),
+            ("FONTSIZE",       (0, 0), (-1, -1), 9),
+            ("TEXTCOLOR",      (0, 0), (0, -1), rlc.HexColor("#64748b")),
+            ("TEXTCOLOR",      (1, 0), (1,  0), _status_col),
+            ("FONTNAME",       (1, 0), (1,  0), "Helvetica-Bold"),
+            ("ROWBACKGROUNDS", (0, 0), (-1, -1), [rlc.HexColor("#f8fafc"), rlc.white]),
+            ("LEFTPADDING",    (0, 0), (-1, -1), 8),
+            ("RIGHTPADDING",   (0, 0), (-1, -1), 8),
+            ("TOPPADDING",     (0, 0), (-1, -1), 5),
+            ("BOTTOMPADDING",  (0, 0), (-1, -1), 5),
+            ("GRID",           (0, 0), (-1, -1), 0.5, rlc.HexColor("#e2e8f0")),
+        ]))
+        story += [tbl, Spacer(1, 14)]
+
+        story.append(Paragraph("📋 Mesures correctives applicables", s_mhead))
+        if mesures:
+            for idx_m, m in enumerate(mesures, 1):
+                story.append(Paragraph(f"{idx_m}. {m['text']}", s_item))
+        else:
+            story.append(Paragraph("Aucune mesure corrective configurée.", s_val))
+
+        story += [
+            Spacer(1, 20),
+            HRFlowable(width="100%", thickness=0.5,
+                       color=rlc.HexColor("#cbd5e1"), spaceAfter=8),
+            Paragraph("Préleveur / Responsable : ________________________________", s_val),
+            Spacer(1, 6),
+            Paragraph("Date de traitement :    ________________________________",   s_val),
+            Spacer(1, 6),
+            Paragraph("Signature :              ________________________________",  s_val),
+            Spacer(1, 20),
+            Paragraph("URC — MicroSurveillance · Document généré automatiquement", s_footer),
+        ]
+        doc.build(story)
+        buf.seek(0)
+        return buf.getvalue()
+
+    # ── Rendu selon mc_statut ─────────────────────────────────────────────────
+    if MC_STATUT == "fait":
+        st.markdown(
+            f"<div style='font-size:.78rem;color:#166534;margin-bottom:6px'>"
+            f"✅ Validé le <b>{MC_DATE}</b></div>",
+            unsafe_allow_html=True,
+        )
+        if st.button("↩️ Annuler la validation",
+                     key=f"mc_annuler_{key_suffix}",
+                     use_container_width=False):
+            _annuler_mc()
+            st.rerun()
+
+    else:
+        mesures = getattr(st.session_state, "mesures_correctives", [])
+
+        # Résumé compact en mode popup
+        if popup_mode:
+            _germ  = entry.get("germ", entry.get("germ_match", "—"))
+            _ufc_v = entry.get("ufc", "—")
+            _score = entry.get("total_score", "—")
+            _label = entry.get("label", "—")
+            _trig  = entry.get("triggered_by", "")
+            st.markdown(
+                f"<div style='font-size:.75rem;color:{_title_col};"
+                f"margin-bottom:10px;line-height:1.6'>"
+                f"<b>Point :</b> {_label} &nbsp;·&nbsp; "
+                f"<b>Germe :</b> {_germ} &nbsp;·&nbsp; "
+                f"<b>UFC :</b> {_ufc_v} &nbsp;·&nbsp; "
+                f"<b>Score :</b> {_score}"
+                + (f"<br><span style='font-size:.7rem;color:#64748b'>{_trig}</span>"
+                   if _trig else "")
+                + "</div>",
+                unsafe_allow_html=True,
+            )
+
+        _pdf_key = f"_pdf_mc_{key_suffix}"
+        cols = st.columns([3, 2, 1]) if popup_mode else st.columns([3, 2])
+        _b1, _b2 = cols[0], cols[1]
+        _b3 = cols[2] if popup_mode else None
+
+        with _b1:
+            btn_label = (
+                "✅ Compris — Mesures prises en charge"
+                if popup_mode
+                else "✅ Prise en compte des mesures correctives"
+            )
+            if st.button(btn_label, key=f"mc_valider_{key_suffix}",
+                         type="primary", use_container_width=True):
+                _valider_mc()
+                if popup_mode:
+                    st.session_state["_last_mesures_popup"] = entry
+                    st.session_state["_show_mesures_popup"] = None
+                else:
+                    st.session_state["mc_success"] = True
+                st.rerun()
+
+        with _b2:
+            if st.button("🖨️ Imprimer (PDF)", use_container_width=True,
+                         key=f"mc_print_{key_suffix}"):
+                try:
+                    st.session_state[_pdf_key] = _gen_pdf_mesures(entry, mesures)
+                except ImportError:
+                    st.error("❌ ReportLab non installé.")
+                except Exception as _pe:
+                    st.error(f"Erreur PDF : {_pe}")
+            if st.session_state.get(_pdf_key):
+                _fname = (
+                    entry.get("label", entry.get("prelevement", "mesures"))[:20]
+                    .replace(" ", "_")
+                )
+                st.download_button(
+                    "⬇️ Télécharger la fiche PDF",
+                    data=st.session_state[_pdf_key],
+                    file_name=f"mesures_correctives_{_fname}.pdf",
+                    mime="application/pdf",
+                    use_container_width=True,
+                    key=f"mc_dl_{key_suffix}",
+                )
+
+        if popup_mode and _b3:
+            with _b3:
+                if st.button("✕ Ignorer", use_container_width=True,
+                             key=f"mc_dismiss_{key_suffix}"):
+                    st.session_state["_show_mesures_popup"] = None
+                    st.rerun(scope="fragment")   # le popup est rendu dans un fragment
+
+    st.markdown("</div>", unsafe_allow_html=True)
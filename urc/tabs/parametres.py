@@ -0,0 +1,1681 @@
+"""Onglet Paramètres & Seuils : mesures correctives, points, seuils, opérateurs,
+calendrier, sauvegarde, base de données et FAQ."""
+import json
+from datetime import date as date_type, datetime, timedelta
+
+import streamlit as st
+
+from urc.perf import (
+    PROFILE_LOG_BACKUPS, PROFILE_LOG_FILE, PROFILE_LOG_MAX_BYTES, _metrics,
+)
+from urc.constants import DEFAULT_FAQ, DEFAULT_ORIGIN_MEASURES, FAQ_CATEGORIES
+from urc.workdays import REGIONAL_HOLIDAYS, get_working_calendar
+from urc.storage import (
+    ROW_COLLECTIONS, _adopt_shared, _export_widget, _flush_pending_writes, _outbox,
+    _publish_shared, _refresh_rows, _rows_share_baseline, _rows_sync_ids, _run_scratch,
+    _snapshot, _supa_prefetch, _supa_upsert, _surv_assemble, _surv_bootstrap,
+    _surv_loaded_months, get_supabase_client, import_all_data, load_archived_samples,
+    load_faq, load_germs, load_operators, load_origin_measures,
+    load_pending_identifications, load_plans, load_points, load_prelevements,
+    load_schedules, read_backup_file, save_archived_samples, save_faq, save_germs,
+    save_operators, save_origin_measures, save_pending_identifications, save_plans,
+    save_points, save_prelevements, save_schedules, save_surveillance,
+)
+from urc.readings import _realign_due_dates
+from urc.tabs.access import check_access_protege
+
+def render():
+    can_edit = check_access_protege("Paramètres & Seuils")
+    if not can_edit:
+        st.info("👁️ Mode lecture seule — connectez-vous pour modifier les paramètres.")
+    st.markdown("### ⚙️ Paramètres")
+
+    (subtab_mesures,
+    subtab_points,
+    subtab_seuils,
+    subtab_operateurs,
+    subtab_calendrier,
+    subtab_backup,
+    subtab_supabase,
+    subtab_faq) = st.tabs([
+        "📋 Mesures correctives",
+        "📍 Points de prélèvement",
+        "⚖️ Seuils d'alerte",
+        "👤 Opérateurs",
+        "📅 Calendrier",
+        "💾 Sauvegarde",
+        "☁️ Base de données",
+        "❓ FAQ"
+    ])
+
+
+
+    # ── Constantes Points ──────────────────────────────────────────────────────
+    LOC_CRIT_OPTS = [
+        "1 — Limité",
+        "2 — Modéré",
+        "3 — Important",
+        "4 — Critique",
+    ]
+    LOC_CRIT_COLORS = {"1": "#22c55e", "2": "#0babf5", "3": "#ee811a", "4": "#f50b0b"}
+    LOC_CRIT_LABELS = {"1": "Limité", "2": "Modéré", "3": "Important", "4": "Critique"}
+    PT_FREQ_UNIT_OPTS = ["/ jour", "/ semaine", "/ mois"]
+
+    def _freq_en_semaine(pt: dict, jours_par_semaine: int = 5) -> float:
+        """Convertit la fréquence d'un point de prélèvement en nombre de fois par semaine."""
+        freq  = float(pt.get("frequence", 1) or 1)
+        unite = (pt.get("frequence_unit") or "/ semaine").strip()
+
+        if unite == "/ jour":
+            return freq * jours_par_semaine
+        elif unite == "/ semaine":
+            return freq
+        elif unite == "/ mois":
+            return freq / 4.33          # ≈ semaines par mois
+        else:
+            return freq                 # fallback : on suppose hebdomadaire
+        
+# MESURES CORRECTIVES #
+    with subtab_mesures:
+        om = st.session_state.origin_measures
+
+        # ── Mappings ───────────────────────────────────────────────────────────────
+        scope_labels = {
+            "all":                          "🌐 Toutes",
+            "Air":                          "💨 Air",
+            "Humidité":                     "💧 Humidité",
+            "Flore fécale":                 "🦠 Flore fécale",
+            "Oropharynx / Gouttelettes":   "😷 Oropharynx",
+            "Peau / Muqueuse":             "🖐️ Peau / Muqueuse",
+            "Sol / Carton / Surface sèche":"📦 Sol / Surface sèche",
+        }
+        scope_r_map = {v: k for k, v in scope_labels.items()}
+
+        type_labels = {"alert": "⚠️ Alerte", "action": "🚨 Action", "both": "⚠️🚨 Alerte & Action"}
+        type_colors = {"alert": "#f59e0b", "action": "#ef4444", "both": "#818cf8"}
+        type_r_map  = {v: k for k, v in type_labels.items()}
+
+        risk_opts_map = {
+            "all": "🌐 Toutes", "1": "🟢 1", "2": "🟢 2", "3": "🟡 3",
+            "4": "🟠 4", "5": "🔴 5", "[3,4,5]": "3-4-5", "[4,5]": "4-5", "[1,2,3]": "1-2-3",
+        }
+        risk_opts_rev = {v: k for k, v in risk_opts_map.items()}
+
+        risk_display = {
+            "all": ("🌐", "#64748b"), "1": ("🟢 1", "#16a34a"), "2": ("🟢 2", "#16a34a"),
+            "3": ("🟡 3", "#ca8a04"), "4": ("🟠 4", "#ea580c"), "5": ("🔴 5", "#dc2626"),
+        }
+
+        germ_type_labels = {
+            "all":      "🌐 Tous germes",
+            "bacteria": "🦠 Bactéries",
+            "fungi":    "🍄 Champignons",
+            "both":     "🦠🍄 Bactéries & Champignons",
+        }
+        germ_type_r_map  = {v: k for k, v in germ_type_labels.items()}
+        germ_type_colors = {
+            "all":      "#64748b",
+            "bacteria": "#0284c7",
+            "fungi":    "#7c3aed",
+            "both":     "#0f766e",
+        }
+
+        # ── Filtres ────────────────────────────────────────────────────────────────
+        col_f1, col_f2, col_f3, col_f4, col_f5 = st.columns([2, 1.5, 1.5, 1.5, 1])
+        with col_f1:
+            filter_scope = st.selectbox(
+                "Origine", ["Tout afficher"] + list(scope_labels.values()),
+                label_visibility="collapsed", key="filter_scope")
+        with col_f2:
+            filter_risk_lbl = st.selectbox(
+                "Criticité", ["🌐 Tout", "🟢 1", "🟢 2", "🟡 3", "🟠 4", "🔴 5"],
+                label_visibility="collapsed", key="filter_risk")
+        with col_f3:
+            filter_type = st.selectbox(
+                "Type", ["Tout", "⚠️ Alerte", "🚨 Action"],
+                label_visibility="collapsed", key="filter_type")
+        with col_f4:
+            filter_germ_type = st.selectbox(
+                "Germe", list(germ_type_labels.values()),
+                label_visibility="collapsed", key="filter_germ_type")
+        with col_f5:
+            if can_edit:
+                if st.button("➕ Nouvelle", use_container_width=True, key="btn_new_mesure"):
+                    st.session_state.show_new_measure    = True
+                    st.session_state["_edit_mesure_idx"] = None
+                    st.rerun()
+
+        active_scope     = scope_r_map.get(filter_scope) if filter_scope != "Tout afficher" else None
+        active_risk      = filter_risk_lbl.split()[-1]   if filter_risk_lbl != "🌐 Tout"    else None
+        active_type      = ("alert" if "Alerte" in filter_type else "action") if filter_type != "Tout" else None
+        active_germ_type = germ_type_r_map.get(filter_germ_type, "all")
+
+        # ── Formulaire nouvelle mesure ─────────────────────────────────────────────
+        if can_edit and st.session_state.get("show_new_measure", False):
+            st.markdown(
+                "<div style='background:#f0fdf4;border:1.5px solid #86efac;"
+                "border-radius:10px;padding:16px;margin-bottom:12px'>",
+                unsafe_allow_html=True)
+            st.markdown("#### ➕ Nouvelle mesure")
+
+            # Ligne 1 : Texte + Origine + Criticité + Type
+            nmc1, nmc2, nmc3, nmc4 = st.columns([3, 2, 1.5, 1.5])
+            with nmc1:
+                nm_text = st.text_input("Texte *", key="nm_text")
+            with nmc2:
+                nm_scope_label = st.selectbox("Origine", list(scope_labels.values()), key="nm_scope")
+                nm_scope = scope_r_map.get(nm_scope_label, "all")
+            with nmc3:
+                nm_risk_lbl = st.selectbox("Criticité", list(risk_opts_map.values()), key="nm_risk")
+                nm_risk_key = risk_opts_rev.get(nm_risk_lbl, "all")
+                nm_risk = ("all" if nm_risk_key == "all"
+                        else json.loads(nm_risk_key) if nm_risk_key.startswith("[")
+                        else int(nm_risk_key))
+            with nmc4:
+                nm_type_label = st.selectbox("Type", list(type_labels.values()), key="nm_type")
+                nm_type = type_r_map.get(nm_type_label, "alert")
+
+            # Ligne 2 : Germe seul (large)
+            ng1, ng2 = st.columns([3, 6])
+            with ng1:
+                nm_germ_lbl  = st.selectbox("Type de germe", list(germ_type_labels.values()), key="nm_germ_type")
+                nm_germ_type = germ_type_r_map.get(nm_germ_lbl, "all")
+
+            nb1, nb2 = st.columns(2)
+            with nb1:
+                if st.button("✅ Ajouter", use_container_width=True, key="nm_submit"):
+                    if nm_text.strip():
+                        om.append({
+                            "id":        f"m{len(om)+1:03d}_custom",
+                            "text":      nm_text.strip(),
+                            "scope":     nm_scope,
+                            "risk":      nm_risk,
+                            "type":      nm_type,
+                            "germ_type": nm_germ_type,
+                        })
+                        save_origin_measures(om, supa=False)
+                        st.session_state.origin_measures  = om
+                        st.session_state.show_new_measure = False
+                        st.rerun()
+                    else:
+                        st.error("Le texte est obligatoire.")
+            with nb2:
+                if st.button("Annuler", use_container_width=True, key="nm_cancel"):
+                    st.session_state.show_new_measure = False
+                    st.rerun()
+            st.markdown("</div>", unsafe_allow_html=True)
+
+        # ── Fonction filtre ────────────────────────────────────────────────────────
+        def _passes_filter(m):
+            if active_scope and m.get("scope") != active_scope:
+                return False
+            if active_type:
+                mt = m.get("type", "alert")
+                if mt != "both" and mt != active_type:
+                    return False
+            if active_risk:
+                mr = m.get("risk", "all")
+                if mr != "all":
+                    if isinstance(mr, list):
+                        if int(active_risk) not in mr:
+                            return False
+                    else:
+                        if str(mr) != active_risk:
+                            return False
+            if active_germ_type != "all":
+                mgt = m.get("germ_type", "all")
+                if mgt != "all" and mgt != "both" and mgt != active_germ_type:
+                    return False
+            return True
+
+        # ── Bandeau modifications non sauvegardées ─────────────────────────────────
+        if st.session_state.get("_mesures_modifiees"):
+            st.markdown(
+                "<div style='background:#fffbeb;border:1.5px solid #fcd34d;border-radius:8px;"
+                "padding:8px 14px;margin-bottom:10px;font-size:.78rem;color:#92400e'>"
+                "⚠️ Modifications non sauvegardées — cliquez sur <strong>💾 Sauvegarder</strong>."
+                "</div>", unsafe_allow_html=True)
+
+        # ── Liste des mesures ──────────────────────────────────────────────────────
+        for real_idx, m in enumerate(om):
+            if not _passes_filter(m):
+                continue
+
+            tcol  = type_colors.get(m.get("type", "alert"), "#0f172a")
+            tlbl  = type_labels.get(m.get("type", "alert"), m.get("type", ""))
+            gtkey = m.get("germ_type", "all")
+            gtlbl = germ_type_labels.get(gtkey, "🌐 Tous germes")
+            gtcol = germ_type_colors.get(gtkey, "#64748b")
+
+            # Criticité badge
+            mr = m.get("risk", "all")
+            if mr == "all":
+                risk_lbl, risk_col = "🌐", "#64748b"
+            elif isinstance(mr, list):
+                risk_lbl, risk_col = "-".join(str(x) for x in mr), "#94a3b8"
+            else:
+                _rd = risk_display.get(str(mr), ("?", "#94a3b8"))
+                risk_lbl, risk_col = _rd
+
+            # ── Mode édition ───────────────────────────────────────────────────────
+            if st.session_state.get("_edit_mesure_idx") == real_idx:
+                st.markdown(
+                    "<div style='background:#eff6ff;border:1.5px solid #93c5fd;"
+                    "border-radius:10px;padding:14px;margin-bottom:8px'>",
+                    unsafe_allow_html=True)
+                st.markdown("**✏️ Modifier la mesure**")
+
+                ec1, ec2, ec3, ec4, ec5 = st.columns([3, 2, 1.5, 1.5, 1.5])
+                with ec1:
+                    new_text = st.text_input("Texte *", value=m.get("text", ""), key=f"em_text_{real_idx}")
+                with ec2:
+                    cur_scope_lbl = scope_labels.get(m.get("scope", "all"), "🌐 Toutes")
+                    scope_opts    = list(scope_labels.values())
+                    new_scope_lbl = st.selectbox(
+                        "Origine", scope_opts,
+                        index=scope_opts.index(cur_scope_lbl) if cur_scope_lbl in scope_opts else 0,
+                        key=f"em_scope_{real_idx}")
+                    new_scope = scope_r_map.get(new_scope_lbl, "all")
+                with ec3:
+                    cur_risk     = m.get("risk", "all")
+                    cur_risk_key = (str(cur_risk) if not isinstance(cur_risk, list)
+                                    else json.dumps(cur_risk, separators=(',', ':')))
+                    cur_risk_lbl  = risk_opts_map.get(cur_risk_key, "🌐 Toutes")
+                    risk_opts_list = list(risk_opts_map.values())
+                    new_risk_lbl  = st.selectbox(
+                        "Criticité", risk_opts_list,
+                        index=risk_opts_list.index(cur_risk_lbl) if cur_risk_lbl in risk_opts_list else 0,
+                        key=f"em_risk_{real_idx}")
+                    new_risk_key = risk_opts_rev.get(new_risk_lbl, "all")
+                    new_risk     = ("all"                   if new_risk_key == "all"
+                                    else json.loads(new_risk_key) if new_risk_key.startswith("[")
+                                    else int(new_risk_key))
+                with ec4:
+                    cur_type_lbl = type_labels.get(m.get("type", "alert"), "⚠️ Alerte")
+                    type_opts    = list(type_labels.values())
+                    new_type_lbl = st.selectbox(
+                        "Type", type_opts,
+                        index=type_opts.index(cur_type_lbl) if cur_type_lbl in type_opts else 0,
+                        key=f"em_type_{real_idx}")
+                    new_type = type_r_map.get(new_type_lbl, "alert")
+                with ec5:
+                    cur_gt_lbl = germ_type_labels.get(m.get("germ_type", "all"), "🌐 Tous germes")
+                    gt_opts    = list(germ_type_labels.values())
+                    new_gt_lbl = st.selectbox(
+                        "Germe", gt_opts,
+                        index=gt_opts.index(cur_gt_lbl) if cur_gt_lbl in gt_opts else 0,
+                        key=f"em_germ_type_{real_idx}")
+                    new_germ_type = germ_type_r_map.get(new_gt_lbl, "all")
+
+                sb1, sb2 = st.columns(2)
+                with sb1:
+                    if st.button("✔️ Valider", key=f"em_save_{real_idx}",
+                                use_container_width=True, type="primary"):
+                        if new_text.strip():
+                            om[real_idx].update({
+                                "text":      new_text.strip(),
+                                "scope":     new_scope,
+                                "risk":      new_risk,
+                                "type":      new_type,
+                                "germ_type": new_germ_type,
+                            })
+                            save_origin_measures(om, supa=False)
+                            st.session_state.origin_measures       = om
+                            st.session_state["_edit_mesure_idx"]   = None
+                            st.session_state["_mesures_modifiees"] = True
+                            st.rerun()
+                        else:
+                            st.error("Le texte est obligatoire.")
+                with sb2:
+                    if st.button("✕ Annuler", key=f"em_cancel_{real_idx}", use_container_width=True):
+                        st.session_state["_edit_mesure_idx"] = None
+                        st.rerun()
+                st.markdown("</div>", unsafe_allow_html=True)
+
+            # ── Mode lecture ───────────────────────────────────────────────────────
+            else:
+                rc1, rc2, rc3, rc4, rc5, rc6 = st.columns([4, 1.2, 1.2, 1.2, 0.8, 0.8])
+                with rc1:
+                    st.markdown(
+                        f'<div style="padding:6px 0;font-size:.8rem;color:#1e293b">• {m.get("text","")}</div>',
+                        unsafe_allow_html=True)
+                with rc2:
+                    st.markdown(
+                        f'<div style="padding:6px 0;font-size:.65rem;color:{gtcol};'
+                        f'font-weight:600;text-align:center">{gtlbl}</div>',
+                        unsafe_allow_html=True)
+                with rc3:
+                    st.markdown(
+                        f'<div style="padding:6px 0;font-size:.65rem;color:{tcol};'
+                        f'font-weight:600;text-align:center">{tlbl}</div>',
+                        unsafe_allow_html=True)
+                with rc4:
+                    st.markdown(
+                        f'<div style="padding:6px 0;font-size:.65rem;color:{risk_col};'
+                        f'font-weight:600;text-align:center">{risk_lbl}</div>',
+                        unsafe_allow_html=True)
+                with rc5:
+                    if can_edit:
+                        if st.button("✏️", key=f"edit_btn_{real_idx}"):
+                            st.session_state["_edit_mesure_idx"] = real_idx
+                            st.session_state["show_new_measure"] = False
+                            st.rerun()
+                with rc6:
+                    if can_edit:
+                        if st.button("🗑️", key=f"del_m_{real_idx}"):
+                            om.pop(real_idx)
+                            save_origin_measures(om, supa=False)
+                            st.session_state.origin_measures       = om
+                            st.session_state["_mesures_modifiees"] = True
+                            st.rerun()
+
+        # ── Boutons sauvegarde / réinitialisation ──────────────────────────────────
+        col_sr, col_def = st.columns(2)
+        with col_sr:
+            if can_edit:
+                if st.button("💾 Sauvegarder", use_container_width=True, key="save_mesures"):
+                    save_origin_measures(om, supa=True)
+                    st.session_state["_mesures_modifiees"] = False
+                    st.success("✅ Mesures sauvegardées et synchronisées !")
+        with col_def:
+            if can_edit:
+                if st.button("↩️ Réinitialiser", use_container_width=True, key="reinit_mesures"):
+                    st.session_state.origin_measures = [dict(m) for m in DEFAULT_ORIGIN_MEASURES]
+                    save_origin_measures(st.session_state.origin_measures, supa=True)
+                    st.session_state["_mesures_modifiees"] = False
+                    st.rerun()
+    # ══════════════════════════════════════════════════════════════════════════
+    # POINTS DE PRÉLÈVEMENT
+    # ══════════════════════════════════════════════════════════════════════════
+    with subtab_points:
+        st.markdown("""
+        <div style="background:#eff6ff;border:1px solid #bfdbfe;border-radius:10px;
+        padding:12px 16px;margin-bottom:16px;font-size:.82rem;color:#1e40af">
+        ℹ️ Le <strong>niveau de criticité du lieu</strong> (1–3) est automatiquement repris
+        lors de l'identification microbiologique.<br>
+        Score total = criticité lieu × score germe · ⚠️ Alerte : 16–24 · 🚨 Action : &gt; 24
+        </div>""", unsafe_allow_html=True)
+
+        if not st.session_state.points:
+            st.info("Aucun point défini.")
+        else:
+            st.markdown("""
+            <div style="display:grid;
+            grid-template-columns:2.2fr 0.7fr 0.7fr 1.3fr 0.9fr 1.1fr 0.5fr 0.5fr;
+            gap:4px;background:#1e40af;border-radius:10px 10px 0 0;padding:10px 14px">
+              <div style="font-size:.72rem;font-weight:800;color:#fff">Point</div>
+              <div style="font-size:.72rem;font-weight:800;color:#fff;text-align:center">Type</div>
+              <div style="font-size:.72rem;font-weight:800;color:#fff;text-align:center">Classe</div>
+              <div style="font-size:.72rem;font-weight:800;color:#fff;text-align:center">Criticité lieu</div>
+              <div style="font-size:.72rem;font-weight:800;color:#fff;text-align:center">Gélose</div>
+              <div style="font-size:.72rem;font-weight:800;color:#fff;text-align:center">Fréquence</div>
+              <div></div><div></div>
+            </div>""", unsafe_allow_html=True)
+
+            for i, pt in enumerate(list(st.session_state.points)):
+                pt_type    = pt.get('type', '—')
+                type_icon  = "💨" if pt_type == "Air" else "🧴"
+                loc_crit   = str(pt.get('location_criticality', 1))
+                lc_color   = LOC_CRIT_COLORS.get(loc_crit, "#94a3b8")
+                lc_label   = LOC_CRIT_LABELS.get(loc_crit, "—")
+                room_cl    = pt.get('room_class', '—') or '—'
+                freq       = pt.get('frequency', 1)
+                freq_unit  = pt.get('frequency_unit', '/ semaine')
+                freq_short = (str(freq) + "x/" +
+                              ("j" if "jour" in freq_unit else
+                               "sem" if "sem" in freq_unit else "mois"))
+                row_bg = "#f8fafc" if i % 2 == 0 else "#ffffff"
+
+                c1, c2 = st.columns([8, 1])
+                with c1:
+                    st.markdown(
+                        f"<div style='display:grid;"
+                        f"grid-template-columns:2.2fr 0.7fr 0.7fr 1.3fr 0.9fr 1.1fr;"
+                        f"gap:4px;background:{row_bg};border:1px solid #e2e8f0;"
+                        f"border-top:none;padding:9px 14px;align-items:center'>"
+                        f"<div style='font-size:.88rem;font-weight:700;color:#0f172a'>"
+                        f"{type_icon} {pt['label']}</div>"
+                        f"<div style='font-size:.75rem;color:#475569;text-align:center'>{pt_type}</div>"
+                        f"<div style='text-align:center'>"
+                        f"<span style='background:#dbeafe;color:#1e40af;"
+                        f"border:1px solid #93c5fd;border-radius:6px;"
+                        f"padding:2px 8px;font-size:.78rem;font-weight:800'>{room_cl}</span></div>"
+                        f"<div style='text-align:center'>"
+                        f"<span style='background:{lc_color}22;color:{lc_color};"
+                        f"border:1px solid {lc_color}55;border-radius:6px;"
+                        f"padding:3px 8px;font-size:.68rem;font-weight:700'>"
+                        f"Nv.{loc_crit} — {lc_label}</span></div>"
+                        f"<div style='font-size:.72rem;color:#1d4ed8;text-align:center'>"
+                        f"🧫 {pt.get('gelose', '—')[:12]}</div>"
+                        f"<div style='text-align:center'>"
+                        f"<span style='background:#eff6ff;color:#1e40af;"
+                        f"border:1px solid #bfdbfe;border-radius:6px;"
+                        f"padding:2px 8px;font-size:.75rem;font-weight:700'>"
+                        f"🔁 {freq_short}</span></div>"
+                        f"</div>", unsafe_allow_html=True)
+                with c2:
+                    be, bd = st.columns(2)
+                    with be:
+                        if can_edit:
+                            if st.button("✏️", key=f"edit_pt_{i}"):
+                                st.session_state._edit_point = i
+                                st.rerun()
+                    with bd:
+                        if can_edit:
+                            if st.button("🗑️", key=f"del_pt_{i}"):
+                                st.session_state.points.pop(i)
+                                save_points(st.session_state.points, supa=True)
+                                st.rerun()
+
+            st.markdown(
+                f"<div style='background:#1e293b;border-radius:0 0 10px 10px;"
+                f"padding:8px 14px;margin-bottom:16px'>"
+                f"<div style='font-size:.78rem;font-weight:700;color:#94a3b8'>"
+                f"{len(st.session_state.points)} point(s)</div></div>",
+                unsafe_allow_html=True)
+
+        st.divider()
+
+        # ── Formulaire édition ────────────────────────────────────────────────
+        if st.session_state.get('_edit_point') is not None:
+            idx = st.session_state._edit_point
+            pt  = st.session_state.points[idx]
+            st.markdown(f"### ✏️ Modifier — {pt['label']}")
+
+            er1, er2, er3, er_room = st.columns([3, 1.5, 1.5, 1.5])
+            with er1:
+                new_label = st.text_input("Nom", value=pt['label'], key="pt_edit_label")
+            with er2:
+                new_type = st.selectbox(
+                    "Type", ["Air", "Surface"],
+                    index=["Air", "Surface"].index(pt.get('type', 'Air'))
+                          if pt.get('type', 'Air') in ["Air", "Surface"] else 0,
+                    key="pt_edit_type")
+            with er3:
+                # ── CORRECTION : selectbox criticité lieu (édition) ──
+                cur_lc_val = str(pt.get('location_criticality', 1))
+                lc_edit_idx = next(
+                    (i for i, o in enumerate(LOC_CRIT_OPTS) if o.startswith(cur_lc_val)), 0)
+                new_lc_label = st.selectbox(
+                    "Criticité lieu",
+                    LOC_CRIT_OPTS,
+                    index=lc_edit_idx,
+                    key="pt_edit_loc_crit")
+                new_lc = int(new_lc_label[0])          # extrait "1", "2" ou "3"
+            with er_room:
+                new_room = st.text_input(
+                    "Classe ISO / GMP",
+                    value=pt.get('room_class', ''),
+                    placeholder="Ex: A, B, C, D…",
+                    key="pt_edit_room")
+
+            # ── Poste type si Classe A (édition) ─────────────────────────────
+            if new_room and new_room.strip().upper() == "A":
+                st.markdown(
+                    "<div style='background:#fef9c3;border:1px solid #fde047;"
+                    "border-radius:8px;padding:10px 14px;margin:6px 0'>"
+                    "<div style='font-size:.7rem;font-weight:700;color:#854d0e;margin-bottom:6px'>"
+                    "🔬 Configuration poste — Classe A</div>",
+                    unsafe_allow_html=True)
+                _cur_ptype = pt.get("poste_type", "commun")
+                _cur_index = 0 if _cur_ptype == "commun" else 1
+                new_poste_type = st.radio(
+                    "Type de poste *",
+                    ["commun", "specifique"],
+                    format_func=lambda x: (
+                        "🔵 Poste commun"
+                        if x == "commun"
+                        else "🔀 Poste spécifique (alternance Poste 1 / Poste 2)"
+                    ),
+                    index=_cur_index,
+                    key="pt_edit_poste_type")
+                st.markdown("</div>", unsafe_allow_html=True)
+            else:
+                new_poste_type = "non_applicable"
+
+            er4, er5, er6 = st.columns([2, 1, 2])
+            with er4:
+                g_opts = (["Gélose de sédimentation", "Gélose TSA", "Gélose Columbia", "Autre"]
+                          if new_type == "Air"
+                          else ["Gélose contact TSA", "Ecouvillonnage", "Autre"])
+                cur_g  = pt.get('gelose', g_opts[0])
+                g_idx  = g_opts.index(cur_g) if cur_g in g_opts else 0
+                new_gel = st.selectbox("Gélose", g_opts, index=g_idx, key="pt_edit_gelose")
+            with er5:
+                new_freq = st.number_input(
+                    "🔁 Fréquence", min_value=1, max_value=31,
+                    value=int(pt.get('frequency', 1)), step=1, key="pt_edit_freq")
+            with er6:
+                cur_unit = pt.get('frequency_unit', '/ semaine')
+                unit_idx = PT_FREQ_UNIT_OPTS.index(cur_unit) if cur_unit in PT_FREQ_UNIT_OPTS else 1
+                new_fu   = st.selectbox("Unité", PT_FREQ_UNIT_OPTS, index=unit_idx, key="pt_edit_freq_unit")
+
+            # Aperçu grille seuils (utilise new_lc défini ci-dessus)
+            st.markdown(f"""
+            <div style="background:#f8fafc;border:1px solid #e2e8f0;border-radius:8px;
+            padding:10px 14px;margin-top:6px">
+              <div style="font-size:.65rem;color:#475569;text-transform:uppercase;
+              font-weight:700;margin-bottom:8px">
+                Grille d'alerte — criticité lieu {new_lc} (score = lieu × germe)
+              </div>
+              <div style="display:flex;gap:8px">
+                <div style="flex:1;background:#f0fdf4;border-radius:6px;padding:8px;
+                text-align:center;border:1px solid #86efac">
+                  <div style="font-size:.6rem;color:#166534;font-weight:700">✅ Conforme</div>
+                  <div style="font-size:.78rem;color:#166534;font-weight:800;margin-top:2px">Score &lt; 16</div>
+                  <div style="font-size:.58rem;color:#94a3b8;margin-top:2px">
+                    Germe ≤ {int(15/new_lc)}</div>
+                </div>
+                <div style="flex:1;background:#fffbeb;border-radius:6px;padding:8px;
+                text-align:center;border:1px solid #fcd34d">
+                  <div style="font-size:.6rem;color:#92400e;font-weight:700">⚠️ Alerte</div>
+                  <div style="font-size:.78rem;color:#92400e;font-weight:800;margin-top:2px">Score 16–24</div>
+                  <div style="font-size:.58rem;color:#94a3b8;margin-top:2px">
+                    Germe {round(16/new_lc,1)}–{round(24/new_lc,1)}</div>
+                </div>
+                <div style="flex:1;background:#fef2f2;border-radius:6px;padding:8px;
+                text-align:center;border:1px solid #fca5a5">
+                  <div style="font-size:.6rem;color:#991b1b;font-weight:700">🚨 Action</div>
+                  <div style="font-size:.78rem;color:#dc2626;font-weight:800;margin-top:2px">Score &gt; 24</div>
+                  <div style="font-size:.58rem;color:#94a3b8;margin-top:2px">
+                    Germe &gt; {round(24/new_lc,1)}</div>
+                </div>
+              </div>
+            </div>""", unsafe_allow_html=True)
+
+            eb1, eb2 = st.columns(2)
+            with eb1:
+                if st.button("✅ Enregistrer", key="pt_save_edit"):
+                    _edit_pt_poste = (
+                        new_poste_type
+                        if new_room and new_room.strip().upper() == "A"
+                        else "non_applicable"
+                    )
+                    st.session_state.points[idx] = {
+                        "id":                   pt.get('id', f"p{idx+1}"),
+                        "label":                new_label,
+                        "type":                 new_type,
+                        "gelose":               new_gel,
+                        "location_criticality": new_lc,
+                        "frequency":            new_freq,
+                        "frequency_unit":       new_fu,
+                        "room_class":           new_room.strip(),
+                        "poste_type":           _edit_pt_poste,
+                    }
+                    save_points(st.session_state.points, supa=True)
+                    st.session_state._edit_point = None
+                    st.success("✅ Point mis à jour")
+                    st.rerun()
+            with eb2:
+                if st.button("Annuler", key="pt_cancel_edit"):
+                    st.session_state._edit_point = None
+                    st.rerun()
+
+        # ── Formulaire ajout ──────────────────────────────────────────────────
+        elif can_edit:
+            st.markdown("### ➕ Ajouter un point de prélèvement")
+
+            np1, np2, np3, np_room_col = st.columns([3, 1.5, 1.5, 1.5])
+            with np1:
+                np_label = st.text_input(
+                    "Nom *", placeholder="Ex: Salle 3 — Poste A", key="np_label")
+            with np2:
+                np_type = st.selectbox("Type", ["Air", "Surface"], key="np_type")
+            with np3:
+                # ── CORRECTION : selectbox criticité lieu (ajout) ──
+                np_lc_label = st.selectbox(
+                    "Criticité lieu",
+                    LOC_CRIT_OPTS,
+                    index=0,
+                    key="np_loc_crit")
+                np_lc = int(np_lc_label[0])             # extrait "1", "2" ou "3"
+            with np_room_col:
+                np_room = st.text_input(
+                    "Classe ISO / GMP", placeholder="Ex: A, B, C, D…", key="np_room")
+
+            # ── Poste type si Classe A ────────────────────────────────────────
+            if np_room and np_room.strip().upper() == "A":
+                st.markdown(
+                    "<div style='background:#fef9c3;border:1px solid #fde047;"
+                    "border-radius:8px;padding:10px 14px;margin:6px 0'>"
+                    "<div style='font-size:.7rem;font-weight:700;color:#854d0e;margin-bottom:6px'>"
+                    "🔬 Configuration poste — Classe A</div>",
+                    unsafe_allow_html=True)
+                np_poste_type = st.radio(
+                    "Type de poste *",
+                    ["commun", "specifique"],
+                    format_func=lambda x: (
+                        "🔵 Poste commun (un seul poste, identique chaque jour)"
+                        if x == "commun"
+                        else "🔀 Poste spécifique (alternance Poste 1 / Poste 2 chaque jour)"
+                    ),
+                    key="np_poste_type")
+                st.markdown("</div>", unsafe_allow_html=True)
+            else:
+                np_poste_type = "non_applicable"
+
+            np4, np5, np6 = st.columns([2, 1, 2])
+            with np4:
+                g_opts_new = (["Gélose de sédimentation", "Gélose TSA", "Gélose Columbia", "Autre"]
+                              if np_type == "Air"
+                              else ["Gélose contact TSA", "Ecouvillonnage", "Autre"])
+                np_gel = st.selectbox("Gélose", g_opts_new, key="np_gelose")
+            with np5:
+                np_freq = st.number_input(
+                    "🔁 Fréquence", min_value=1, max_value=31, value=1, step=1, key="np_freq")
+            with np6:
+                np_fu = st.selectbox("Unité", PT_FREQ_UNIT_OPTS, index=0, key="np_freq_unit")
+            
+
+            # Aperçu grille (utilise np_lc défini ci-dessus)
+            st.markdown(f"""
+            <div style="background:#f8fafc;border:1px solid #e2e8f0;border-radius:8px;
+            padding:10px 14px;margin-top:4px;margin-bottom:10px">
+              <div style="font-size:.65rem;color:#475569;text-transform:uppercase;
+              font-weight:700;margin-bottom:8px">
+                Aperçu grille (criticité lieu {np_lc} × score germe)
+              </div>
+              <div style="display:flex;gap:8px">
+                <div style="flex:1;background:#f0fdf4;border-radius:6px;padding:7px;
+                text-align:center;border:1px solid #86efac">
+                  <div style="font-size:.6rem;color:#166534;font-weight:700">✅ Conforme</div>
+                  <div style="font-size:.72rem;color:#166534;font-weight:800">Score &lt; 16</div>
+                </div>
+                <div style="flex:1;background:#fffbeb;border-radius:6px;padding:7px;
+                text-align:center;border:1px solid #fcd34d">
+                  <div style="font-size:.6rem;color:#92400e;font-weight:700">⚠️ Alerte</div>
+                  <div style="font-size:.72rem;color:#92400e;font-weight:800">Score 16–24</div>
+                </div>
+                <div style="flex:1;background:#fef2f2;border-radius:6px;padding:7px;
+                text-align:center;border:1px solid #fca5a5">
+                  <div style="font-size:.6rem;color:#991b1b;font-weight:700">🚨 Action</div>
+                  <div style="font-size:.72rem;color:#dc2626;font-weight:800">Score &gt; 24</div>
+                </div>
+              </div>
+            </div>""", unsafe_allow_html=True)
+
+            if st.button("➕ Ajouter", key="np_add"):
+                if not np_label.strip():
+                    st.error("Le nom est requis")
+                else:
+                    nid = f"p{len(st.session_state.points)+1}_{int(datetime.now().timestamp())}"
+                    _save_pt = (
+                        np_poste_type
+                        if np_room and np_room.strip().upper() == "A"
+                        else "non_applicable"
+                    )
+                    st.session_state.points.append({
+                        "id":                   nid,
+                        "label":                np_label.strip(),
+                        "type":                 np_type,
+                        "gelose":               np_gel,
+                        "location_criticality": np_lc,
+                        "frequency":            np_freq,
+                        "frequency_unit":       np_fu,
+                        "room_class":           np_room.strip(),
+                        "poste_type":           _save_pt,
+                    })
+                    save_points(st.session_state.points, supa=True)
+                    st.success(f"✅ Point **{np_label}** ajouté")
+                    st.rerun()
+
+
+   # ══════════════════════════════════════════════════════════════════════════
+    # SEUILS D'ALERTE ET D'ACTION
+    # ══════════════════════════════════════════════════════════════════════════
+    with subtab_seuils:
+        st.markdown("### ⚖️ Seuils d'alerte et d'action")
+
+        st.markdown("""
+        <div style="background:linear-gradient(135deg,#eff6ff,#dbeafe);border:1.5px solid #93c5fd;
+        border-radius:14px;padding:20px 24px;margin-bottom:20px">
+        <div style="font-size:1rem;font-weight:800;color:#1e40af;margin-bottom:14px">
+            🧮 Comment est calculé le score de criticité ?
+        </div>
+        <div style="display:grid;grid-template-columns:1fr 1fr 1fr;gap:12px;margin-bottom:16px">
+            <div style="background:#fff;border-radius:10px;padding:14px;border:1px solid #bfdbfe;text-align:center">
+            <div style="font-size:1.4rem;margin-bottom:4px">🧬</div>
+            <div style="font-weight:800;color:#1e40af;font-size:.88rem">Pathogénicité</div>
+            <div style="font-size:.72rem;color:#475569;margin-top:6px;line-height:1.6">
+                <b>1</b> — Non pathogène<br>
+                <b>2</b> — Pathogène opportuniste<br>
+                <b>3</b> — Pathogène MR / primaire
+            </div>
+            </div>
+            <div style="background:#fff;border-radius:10px;padding:14px;border:1px solid #bfdbfe;text-align:center">
+            <div style="font-size:1.4rem;margin-bottom:4px">🧴</div>
+            <div style="font-weight:800;color:#1e40af;font-size:.88rem">Résistance désinfectants</div>
+            <div style="font-size:.72rem;color:#475569;margin-top:6px;line-height:1.6">
+                <b>1</b> — Sensible<br>
+                <b>2</b> — Résistant Surfa'Safe<br>
+                <b>3</b> — Résistant Surfa'Safe + APA
+            </div>
+            </div>
+            <div style="background:#fff;border-radius:10px;padding:14px;border:1px solid #bfdbfe;text-align:center">
+            <div style="font-size:1.4rem;margin-bottom:4px">💨</div>
+            <div style="font-weight:800;color:#1e40af;font-size:.88rem">Dissémination</div>
+            <div style="font-size:.72rem;color:#475569;margin-top:6px;line-height:1.6">
+                <b>1</b> — Environnemental<br>
+                <b>2</b> — Manuporté<br>
+                <b>3</b> — Aéroporté
+            </div>
+            </div>
+        </div>
+        <div style="background:#1e293b;border-radius:10px;padding:14px;text-align:center;margin-bottom:14px">
+            <div style="font-size:.7rem;color:#94a3b8;text-transform:uppercase;letter-spacing:.1em;margin-bottom:6px">
+            Formule du score total
+            </div>
+            <div style="font-size:1rem;color:#e2e8f0;font-weight:700">
+            Score total = <span style="color:#60a5fa">Criticité lieu (1–4)</span>
+            × <span style="color:#34d399">Pathogénicité (1–3)</span>
+            × <span style="color:#fbbf24">Résistance (1–3)</span>
+            × <span style="color:#f87171">Dissémination (1–3)</span>
+            </div>
+            <div style="font-size:.72rem;color:#64748b;margin-top:8px">
+            Score minimum : 1×1×1×1 = <b style="color:#94a3b8">1</b>
+            &nbsp;·&nbsp;
+            Score maximum : 4×3×3×3 = <b style="color:#f87171">108</b>
+            </div>
+        </div>
+        <div style="display:grid;grid-template-columns:1fr 1fr 1fr;gap:10px">
+            <div style="background:#f0fdf4;border:1.5px solid #86efac;border-radius:8px;padding:12px;text-align:center">
+            <div style="font-size:1.1rem">✅</div>
+            <div style="font-weight:800;color:#166534;font-size:.85rem;margin-top:4px">CONFORME</div>
+            <div style="font-size:.78rem;color:#166534;margin-top:4px">Score &lt; seuil alerte</div>
+            </div>
+            <div style="background:#fffbeb;border:1.5px solid #fcd34d;border-radius:8px;padding:12px;text-align:center">
+            <div style="font-size:1.1rem">⚠️</div>
+            <div style="font-weight:800;color:#92400e;font-size:.85rem;margin-top:4px">ALERTE</div>
+            <div style="font-size:.78rem;color:#92400e;margin-top:4px">Seuil alerte ≤ Score ≤ seuil action</div>
+            </div>
+            <div style="background:#fef2f2;border:1.5px solid #fca5a5;border-radius:8px;padding:12px;text-align:center">
+            <div style="font-size:1.1rem">🚨</div>
+            <div style="font-weight:800;color:#991b1b;font-size:.85rem;margin-top:4px">ACTION</div>
+            <div style="font-size:.78rem;color:#991b1b;margin-top:4px">Score &gt; seuil action</div>
+            </div>
+        </div>
+        </div>""", unsafe_allow_html=True)
+
+        _seuil_alerte = st.session_state.get("_seuil_alerte", 24)
+        _seuil_action = st.session_state.get("_seuil_action", 36)
+
+        st.markdown("#### ⚙️ Modifier les seuils")
+        if not can_edit:
+            st.info("👁️ Mode lecture seule — connectez-vous pour modifier les seuils.")
+
+        sc1, sc2, sc3 = st.columns([2, 2, 3])
+        with sc1:
+            new_seuil_alerte = st.number_input(
+                "⚠️ Seuil ALERTE",
+                min_value=1, max_value=80, value=int(_seuil_alerte), step=1,
+                disabled=not can_edit,
+                help="En dessous : conforme. À partir de ce score : alerte.",
+                key="input_seuil_alerte")
+        with sc2:
+            new_seuil_action = st.number_input(
+                "🚨 Seuil ACTION",
+                min_value=1, max_value=108, value=int(_seuil_action), step=1,
+                disabled=not can_edit,
+                help="Au-dessus de ce score : action immédiate requise.",
+                key="input_seuil_action")
+        with sc3:
+            st.markdown("<div style='height:28px'></div>", unsafe_allow_html=True)
+            if can_edit:
+                if st.button("💾 Sauvegarder les seuils", use_container_width=True,
+                            key="save_seuils", type="primary"):
+                    if new_seuil_alerte >= new_seuil_action:
+                        st.error("❌ Le seuil d'alerte doit être strictement inférieur au seuil d'action.")
+                    else:
+                        st.session_state["_seuil_alerte"] = new_seuil_alerte
+                        st.session_state["_seuil_action"] = new_seuil_action
+                        _supa_upsert('seuils', json.dumps({
+                            "alerte": new_seuil_alerte,
+                            "action": new_seuil_action
+                        }, ensure_ascii=False))
+                        st.success(
+                            f"✅ Seuils sauvegardés — Alerte : {new_seuil_alerte} · Action : {new_seuil_action}")
+                        st.rerun()
+
+        if new_seuil_alerte >= new_seuil_action:
+            st.error("❌ Le seuil d'alerte doit être strictement inférieur au seuil d'action.")
+        else:
+            st.markdown(f"""
+            <div style="background:#f8fafc;border:1.5px solid #e2e8f0;border-radius:10px;
+            padding:14px 18px;margin-top:8px">
+            <div style="font-size:.78rem;font-weight:700;color:#475569;margin-bottom:10px">
+                Aperçu de la grille avec ces seuils
+            </div>
+            <div style="display:flex;gap:0;border-radius:8px;overflow:hidden;border:1px solid #e2e8f0">
+                <div style="flex:1;background:#f0fdf4;padding:10px;text-align:center;border-right:1px solid #e2e8f0">
+                <div style="font-size:.65rem;color:#166534;font-weight:700;text-transform:uppercase">✅ Conforme</div>
+                <div style="font-size:1.1rem;font-weight:900;color:#166534;margin-top:2px">
+                    Score &lt; {new_seuil_alerte}
+                </div>
+                </div>
+                <div style="flex:1;background:#fffbeb;padding:10px;text-align:center;border-right:1px solid #e2e8f0">
+                <div style="font-size:.65rem;color:#92400e;font-weight:700;text-transform:uppercase">⚠️ Alerte</div>
+                <div style="font-size:1.1rem;font-weight:900;color:#92400e;margin-top:2px">
+                    {new_seuil_alerte} – {new_seuil_action}
+                </div>
+                </div>
+                <div style="flex:1;background:#fef2f2;padding:10px;text-align:center">
+                <div style="font-size:.65rem;color:#991b1b;font-weight:700;text-transform:uppercase">🚨 Action</div>
+                <div style="font-size:1.1rem;font-weight:900;color:#dc2626;margin-top:2px">
+                    Score &gt; {new_seuil_action}
+                </div>
+                </div>
+            </div>
+            </div>""", unsafe_allow_html=True)
+
+        st.divider()
+
+        st.markdown("#### 📊 Tableau de référence — scores limites par criticité de lieu")
+        st.caption(
+            "Montre à quel score germe (pathogénicité × résistance × dissémination) "
+            "les seuils sont déclenchés selon la criticité du lieu.")
+
+        _sa     = new_seuil_alerte
+        _sc_val = new_seuil_action
+
+        st.markdown(
+            "<div style='display:grid;grid-template-columns:1.5fr 1fr 1fr 1fr 2fr;"
+            "gap:4px;background:#1e40af;border-radius:10px 10px 0 0;padding:10px 14px'>"
+            "<div style='font-size:.72rem;font-weight:800;color:#fff'>Criticité lieu</div>"
+            "<div style='font-size:.72rem;font-weight:800;color:#fff;text-align:center'>Score lieu</div>"
+            "<div style='font-size:.72rem;font-weight:800;color:#fff;text-align:center'>Germe → ⚠️ Alerte</div>"
+            "<div style='font-size:.72rem;font-weight:800;color:#fff;text-align:center'>Germe → 🚨 Action</div>"
+            "<div style='font-size:.72rem;font-weight:800;color:#fff'>Exemples de lieux</div>"
+            "</div>",
+            unsafe_allow_html=True)
+
+        # ── MISE À JOUR : criticité 1 à 4 ──────────────────────────────────────
+        lc_examples = {
+            1: "Couloirs, locaux techniques, zones administratives",
+            2: "Préparations non stériles, zones annexes ZAC, vestiaires",
+            3: "ZAC, salles blanches ISO C/D, zones de remplissage",
+            4: "Salles blanches ISO A/B, isolateurs, zones aseptiques critiques",
+        }
+        lc_colors_ref = {
+            1: "#22c55e",   # vert
+            2: "#f59e0b",   # orange
+            3: "#ef4444",   # rouge
+            4: "#7c3aed",   # violet (criticité maximale)
+        }
+
+        for lci, loc_crit_val in enumerate([1, 2, 3, 4]):
+            lc_lbl       = f"Nv.{loc_crit_val} — {LOC_CRIT_LABELS[str(loc_crit_val)]}"
+            germe_alerte = _sa / loc_crit_val
+            germe_action = _sc_val / loc_crit_val
+            lc_col = lc_colors_ref[loc_crit_val]
+            row_bg = "#f8fafc" if lci % 2 == 0 else "#ffffff"
+            # Arrondir le bas uniquement sur la dernière ligne
+            border_radius = "0 0 10px 10px" if loc_crit_val == 4 else "0"
+            st.markdown(
+                "<div style='display:grid;grid-template-columns:1.5fr 1fr 1fr 1fr 2fr;"
+                f"gap:4px;background:{row_bg};border:1px solid #e2e8f0;border-top:none;"
+                f"padding:10px 14px;align-items:center;border-radius:{border_radius}'>"
+                f"<div style='font-size:.85rem;font-weight:700'>"
+                f"<span style='color:{lc_col}'>●</span> {lc_lbl}</div>"
+                f"<div style='text-align:center'>"
+                f"<span style='background:{lc_col}22;color:{lc_col};"
+                f"border:1px solid {lc_col}55;border-radius:6px;"
+                f"padding:2px 10px;font-size:.82rem;font-weight:800'>× {loc_crit_val}</span></div>"
+                f"<div style='text-align:center;font-size:.82rem;font-weight:700;color:#92400e'>"
+                f"Score germe ≥ {germe_alerte:.1f}</div>"
+                f"<div style='text-align:center;font-size:.82rem;font-weight:700;color:#dc2626'>"
+                f"Score germe &gt; {germe_action:.1f}</div>"
+                f"<div style='font-size:.7rem;color:#64748b;font-style:italic'>"
+                f"{lc_examples[loc_crit_val]}</div>"
+                "</div>",
+                unsafe_allow_html=True)
+
+        st.markdown(
+            "<div style='background:#1e293b;border-radius:0 0 10px 10px;padding:8px 14px'>"
+            f"<div style='font-size:.75rem;color:#94a3b8'>"
+            f"Score germe = Pathogénicité × Résistance × Dissémination (min 1 · max 27) "
+            f"· Seuil alerte : <b style='color:#fbbf24'>{_sa}</b> "
+            f"· Seuil action : <b style='color:#f87171'>{_sc_val}</b>"
+            f"</div></div>",
+            unsafe_allow_html=True)
+
+        st.divider()
+
+        st.markdown("#### ↩️ Réinitialiser aux valeurs par défaut")
+        st.markdown(
+            "<div style='background:#f8fafc;border:1px solid #e2e8f0;border-radius:8px;"
+            "padding:10px 14px;font-size:.78rem;color:#475569;margin-bottom:8px'>"
+            "Les valeurs par défaut sont <b>Alerte : 24</b> et <b>Action : 36</b>.<br>"
+            "Ces seuils correspondent à :<br>"
+            "• Alerte dès qu'un germe de score 8 est trouvé en zone critique (3×8=24)<br>"
+            "• Action dès qu'un germe de score 9 est trouvé en zone critique (4×9=36)"
+            "</div>",
+            unsafe_allow_html=True)
+        if can_edit:
+            if st.button("↩️ Remettre Alerte=24 / Action=36", key="reset_seuils"):
+                st.session_state["_seuil_alerte"] = 24
+                st.session_state["_seuil_action"] = 36
+                _supa_upsert('seuils', json.dumps({"alerte": 24, "action": 36}, ensure_ascii=False))
+                st.success("✅ Seuils réinitialisés — Alerte : 24 · Action : 36")
+                st.rerun()
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # OPÉRATEURS
+    # ══════════════════════════════════════════════════════════════════════════
+    with subtab_operateurs:
+        ops = st.session_state.operators
+        if not ops:
+            st.info("Aucun opérateur enregistré.")
+        else:
+            st.markdown(
+                f'<div style="background:#f0f9ff;border:1px solid #bae6fd;border-radius:10px;'
+                f'padding:12px 16px;margin-bottom:16px">'
+                f'<span style="font-size:.75rem;color:#0369a1;font-weight:700">'
+                f'👥 {len(ops)} opérateur(s)</span></div>',
+                unsafe_allow_html=True)
+            for i, op in enumerate(ops):
+                nom        = op.get('nom', '—')
+                profession = op.get('profession', '—')
+                oc1, oc2, oc3 = st.columns([5, 1, 1])
+                with oc1:
+                    st.markdown(f"""
+                    <div style="background:#f8fafc;border:1px solid #e2e8f0;border-radius:8px;
+                    padding:10px 14px;display:flex;gap:16px;align-items:center">
+                      <div style="background:#2563eb;color:#fff;border-radius:50%;
+                      width:36px;height:36px;display:flex;align-items:center;justify-content:center;
+                      font-weight:700;font-size:.9rem;flex-shrink:0">
+                        {nom[0].upper() if nom else '?'}
+                      </div>
+                      <div>
+                        <div style="font-weight:700;font-size:.9rem;color:#0f172a">{nom}</div>
+                        <div style="font-size:.72rem;color:#475569;margin-top:2px">👔 {profession}</div>
+                      </div>
+                    </div>""", unsafe_allow_html=True)
+                with oc2:
+                    if can_edit:
+                        if st.button("✏️", key=f"edit_op_{i}"):
+                            st.session_state._edit_operator = i
+                            st.rerun()
+                with oc3:
+                    if can_edit:
+                        if st.button("🗑️", key=f"del_op_{i}"):
+                            ops.pop(i)
+                            save_operators(ops, supa=True)
+                            st.session_state.operators = ops
+                            st.rerun()
+
+        st.divider()
+        p_opts = ["Préparateur en pharmacie hospitalière", "Pharmacien", "Interne de pharmacie"]
+
+        if st.session_state.get('_edit_operator') is not None:
+            idx = st.session_state._edit_operator
+            op  = st.session_state.operators[idx]
+            st.markdown(f"### ✏️ Modifier — {op.get('nom', '')}")
+            ec1, ec2 = st.columns(2)
+            with ec1:
+                edit_nom = st.text_input("Nom *", value=op.get('nom', ''), key="op_edit_nom")
+            with ec2:
+                cur_p    = op.get('profession', '')
+                p_idx    = p_opts.index(cur_p) if cur_p in p_opts else 0
+                edit_pro = st.selectbox("Profession *", p_opts, index=p_idx, key="op_edit_prof")
+            eb1, eb2 = st.columns(2)
+            with eb1:
+                if st.button("✅ Enregistrer", use_container_width=True, key="op_save_edit"):
+                    if edit_nom.strip():
+                        st.session_state.operators[idx] = {
+                            "nom": edit_nom.strip(), "profession": edit_pro}
+                        save_operators(st.session_state.operators, supa=True)
+                        st.session_state._edit_operator = None
+                        st.success("✅ Mis à jour")
+                        st.rerun()
+                    else:
+                        st.error("Le nom est obligatoire.")
+            with eb2:
+                if st.button("Annuler", use_container_width=True, key="op_cancel_edit"):
+                    st.session_state._edit_operator = None
+                    st.rerun()
+        elif can_edit:
+            st.markdown("### ➕ Ajouter un opérateur")
+            nc1, nc2 = st.columns(2)
+            with nc1:
+                new_nom = st.text_input("Nom *", placeholder="Ex: Marie Dupont", key="op_new_nom")
+            with nc2:
+                new_pro = st.selectbox("Profession *", p_opts, key="op_new_prof")
+            if st.button("➕ Ajouter", key="op_add"):
+                if not new_nom.strip():
+                    st.error("Le nom est obligatoire.")
+                elif any(o['nom'].lower() == new_nom.strip().lower() for o in st.session_state.operators):
+                    st.error("Cet opérateur existe déjà.")
+                else:
+                    st.session_state.operators.append({"nom": new_nom.strip(), "profession": new_pro})
+                    save_operators(st.session_state.operators, supa=True)
+                    st.success(f"✅ **{new_nom}** ajouté")
+                    st.rerun()
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # CALENDRIER DES JOURS OUVRÉS
+    # ══════════════════════════════════════════════════════════════════════════
+    with subtab_calendrier:
+        st.markdown("### 📅 Calendrier des jours ouvrés")
+        st.caption("Utilisé pour les échéances J2/J7, le planning et les exports : "
+                   "hors week-ends, jours fériés nationaux, fériés régionaux et fermetures du site.")
+        wc_jours    = ["Lundi", "Mardi", "Mercredi", "Jeudi", "Vendredi", "Samedi", "Dimanche"]
+        wc_cfg      = dict(st.session_state.get("working_calendar") or {})
+        wc_closures = sorted({str(c)[:10] for c in wc_cfg.get("closures") or ()})
+
+        def _save_working_calendar(cfg):
+            st.session_state["working_calendar"] = cfg
+            st.session_state.pop("_working_calendar", None)
+            _supa_upsert('working_calendar', json.dumps(cfg, ensure_ascii=False))
+            n = _realign_due_dates(pending_only=True)
+            if n:
+                st.session_state["_wc_realigned"] = n
+
+        if st.session_state.get("_wc_realigned"):
+            st.success(f"✅ {st.session_state.pop('_wc_realigned')} échéance(s) J2/J7 recalée(s) sur le nouveau calendrier")
+
+        wc_regions = list(REGIONAL_HOLIDAYS)
+        wc_region  = wc_cfg.get("region") or ""
+        new_region = st.selectbox(
+            "Jours fériés régionaux", wc_regions,
+            index=wc_regions.index(wc_region) if wc_region in wc_regions else 0,
+            format_func=lambda k: REGIONAL_HOLIDAYS[k][0],
+            disabled=not can_edit, key="wc_region")
+        if can_edit and new_region != wc_region:
+            _save_working_calendar({**wc_cfg, "region": new_region, "closures": wc_closures})
+            st.rerun()
+
+        _wc_cal   = get_working_calendar()
+        _wc_today = datetime.today().date()
+        _wc_next  = sorted(d for y in (_wc_today.year, _wc_today.year + 1)
+                           for d in _wc_cal.holidays(y) if d >= _wc_today)[:8]
+        if _wc_next:
+            st.markdown("**Prochains jours non travaillés :** " + " · ".join(
+                f"{wc_jours[d.weekday()][:3]} {d.strftime('%d/%m/%Y')}" for d in _wc_next))
+
+        st.divider()
+        st.markdown("#### 🏭 Fermetures du site")
+        if not wc_closures:
+            st.info("Aucune fermeture enregistrée.")
+        for i, c in enumerate(wc_closures):
+            cc1, cc2 = st.columns([6, 1])
+            with cc1:
+                try:
+                    _cd = date_type.fromisoformat(c)
+                    st.markdown(f"📅 {wc_jours[_cd.weekday()]} {_cd.strftime('%d/%m/%Y')}")
+                except ValueError:
+                    st.markdown(f"📅 {c}")
+            with cc2:
+                if can_edit and st.button("🗑️", key=f"del_wc_{i}"):
+                    _save_working_calendar({**wc_cfg, "region": wc_region,
+                                            "closures": [x for x in wc_closures if x != c]})
+                    st.rerun()
+
+        if can_edit:
+            wa1, wa2 = st.columns([3, 1])
+            with wa1:
+                wc_range = st.date_input("Ajouter une fermeture (jour ou période)",
+                                         value=(_wc_today, _wc_today), format="DD/MM/YYYY",
+                                         key="wc_new_range")
+            with wa2:
+                st.markdown("<div style='height:28px'></div>", unsafe_allow_html=True)
+                wc_add = st.button("➕ Ajouter", use_container_width=True, key="wc_add")
+            if wc_add:
+                _rng = wc_range if isinstance(wc_range, (list, tuple)) else (wc_range,)
+                _rng = [d for d in _rng if d]
+                if not _rng:
+                    st.error("Choisissez au moins une date.")
+                else:
+                    _d, _end = _rng[0], _rng[-1]
+                    added = set(wc_closures)
+                    while _d <= _end:
+                        if _d.weekday() < 5:
+                            added.add(_d.isoformat())
+                        _d += timedelta(days=1)
+                    _save_working_calendar({**wc_cfg, "region": wc_region, "closures": sorted(added)})
+                    st.rerun()
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # SAUVEGARDE
+    # ══════════════════════════════════════════════════════════════════════════
+    with subtab_backup:
+        st.markdown("### 💾 Sauvegarde & Restauration")
+        supa_connected = get_supabase_client() is not None
+        if supa_connected:
+            st.success("✅ **Supabase actif** — données persistantes dans le cloud.")
+        else:
+            st.warning("⚠️ **Supabase non configuré** — données perdues au redémarrage.")
+
+        st.markdown("""
+        <div style="background:#fffbeb;border:1.5px solid #fcd34d;border-radius:12px;
+        padding:16px 20px;margin:12px 0">
+          <div style="font-weight:800;color:#92400e;font-size:.95rem;margin-bottom:8px">
+            📋 Pourquoi sauvegarder ?
+          </div>
+          <div style="font-size:.82rem;color:#78350f;line-height:1.8">
+            Chaque modification du code provoque un redémarrage. Sans Supabase, toutes
+            les données locales sont <strong>effacées</strong>.<br>
+            ✅ <strong>Solution 1</strong> : configurer Supabase (onglet ☁️).<br>
+            ✅ <strong>Solution 2</strong> : exporter avant chaque update, réimporter après.
+          </div>
+        </div>""", unsafe_allow_html=True)
+
+        st.divider()
+        st.markdown("#### ⬇️ Exporter toutes les données")
+        _surv_idx = st.session_state.get("_surv_index")
+        b1, b2, b3, b4 = st.columns(4)
+        b1.metric("🦠 Germes",          len(st.session_state.germs))
+        b2.metric("🧪 Prélèvements",    len(st.session_state.prelevements))
+        b3.metric("📅 Lectures planif.", len(st.session_state.schedules))
+        b4.metric("📋 Analyse",       sum(_surv_idx.values()) if _surv_idx is not None
+                                      else len(st.session_state.surveillance))
+        _gz = st.checkbox("Compresser (.json.gz)", key="export_gzip",
+                          help="Fichier bien plus petit, surtout avec des plans ; "
+                               "la restauration accepte les deux formats.")
+        _export_widget("main_export_btn", compress=_gz, label="⬇️ Télécharger")
+
+        st.divider()
+        st.markdown("#### ⬆️ Restaurer depuis une sauvegarde")
+        st.markdown("""
+        <div style="background:#fef2f2;border:1.5px solid #fca5a5;border-radius:10px;
+        padding:12px 16px;margin-bottom:12px">
+          <span style="color:#dc2626;font-weight:700;font-size:.82rem">
+            ⚠️ La restauration remplace TOUTES les données sans possibilité d'annulation.
+          </span>
+        </div>""", unsafe_allow_html=True)
+
+        uploaded_backup = st.file_uploader(
+            "Fichier de sauvegarde (.json, .json.gz)", type=["json", "gz"], key="backup_uploader")
+        if uploaded_backup is not None:
+            try:
+                backup_content = read_backup_file(uploaded_backup.read())
+                meta = backup_content.get("_meta", {})
+                st.markdown(f"""
+                <div style="background:#f0fdf4;border:1px solid #86efac;border-radius:10px;
+                padding:14px 18px;margin-bottom:12px">
+                  <div style="font-weight:700;color:#166534;font-size:.85rem;margin-bottom:8px">
+                    📁 Contenu détecté
+                  </div>
+                  <div style="display:grid;grid-template-columns:repeat(3,1fr);gap:8px;
+                  font-size:.75rem;color:#0f172a">
+                    <div>🦠 Germes : <strong>{len(backup_content.get("germs",[]))}</strong></div>
+                    <div>🧪 Prélèvements : <strong>{len(backup_content.get("prelevements",[]))}</strong></div>
+                    <div>📅 Lectures : <strong>{len(backup_content.get("schedules",[]))}</strong></div>
+                    <div>👤 Opérateurs : <strong>{len(backup_content.get("operators",[]))}</strong></div>
+                    <div>📍 Points : <strong>{len(backup_content.get("points",[]))}</strong></div>
+                    <div>📋 Analyse : <strong>{len(backup_content.get("surveillance",[]))}</strong></div>
+                  </div>
+                  <div style="font-size:.68rem;color:#475569;margin-top:8px">
+                    Exporté le : {meta.get("exported_at","—")[:19].replace("T"," ")}
+                    | Version : {meta.get("version","?")}
+                  </div>
+                </div>""", unsafe_allow_html=True)
+
+                if st.session_state.get("confirm_restore", False):
+                    st.error("🚨 Dernière confirmation — toutes les données seront remplacées.")
+                    rc1, rc2 = st.columns(2)
+                    with rc1:
+                        if st.button("✅ OUI — Restaurer maintenant",
+                                     use_container_width=True, key="confirm_restore_yes"):
+                            ok, msg = import_all_data(backup_content)
+                            st.session_state.confirm_restore = False
+                            if ok: st.success(f"✅ {msg}"); st.rerun()
+                            else:  st.error(msg)
+                    with rc2:
+                        if st.button("❌ Annuler", use_container_width=True, key="confirm_restore_no"):
+                            st.session_state.confirm_restore = False
+                            st.rerun()
+                else:
+                    if can_edit:
+                        if st.button("⬆️ Restaurer ces données",
+                                     use_container_width=True, key="restore_btn"):
+                            st.session_state.confirm_restore = True
+                            st.rerun()
+            except json.JSONDecodeError:
+                st.error("❌ Fichier JSON invalide.")
+            except Exception as e:
+                st.error(f"❌ Erreur : {e}")
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # SUPABASE
+    # ══════════════════════════════════════════════════════════════════════════
+    with subtab_supabase:
+        st.markdown("### ☁️ Configuration Supabase")
+        supa_ok = get_supabase_client() is not None
+        if supa_ok:
+            st.success("✅ **Supabase connecté** — modifications synchronisées en temps réel.")
+        else:
+            st.error("🔴 **Supabase non connecté** — sauvegarde locale uniquement.")
+
+        _boot = st.session_state.get("_boot_timings", {})
+        if _boot:
+            with st.expander(f"⏱️ Démarrage de cette session : {_boot.get('total', 0):.0f} ms"):
+                _rows_html = "".join(
+                    f"<div style='display:flex;justify-content:space-between;"
+                    f"border-bottom:1px solid #f1f5f9;padding:2px 0'>"
+                    f"<span>{k}</span><span style='font-family:DM Mono,monospace'>{v:.0f} ms</span></div>"
+                    for k, v in _boot.items()
+                )
+                st.markdown(
+                    f"<div style='font-size:.75rem;color:#1e293b'>{_rows_html}</div>",
+                    unsafe_allow_html=True,
+                )
+
+        # ── Profil du dernier rendu ───────────────────────────────────────────
+        _prof = st.session_state.get("_prof_last")
+        _total_txt = (f"{_prof['total_ms']:.0f} ms" if _prof and _prof.get("total_ms") is not None
+                      else "interrompu" if _prof else "—")
+        with st.expander(f"📈 Profil du dernier rendu : {_total_txt}"):
+            _on = st.toggle(
+                "Profilage détaillé (octets + journal)", value=_metrics().enabled,
+                key="prof_toggle",
+                help=f"Mesure les octets échangés et consigne chaque rendu dans {PROFILE_LOG_FILE} "
+                     f"(rotation à {PROFILE_LOG_MAX_BYTES // 1000} ko, {PROFILE_LOG_BACKUPS} archives). "
+                     f"Vaut pour tout le serveur jusqu'au redémarrage.")
+            _metrics().enabled = _on
+
+            def _prof_rows(title, items):
+                if not items:
+                    return ""
+                return (
+                    f"<div style='font-weight:700;color:#1e40af;margin:8px 0 2px'>{title}</div>"
+                    + "".join(
+                        f"<div style='display:flex;justify-content:space-between;"
+                        f"border-bottom:1px solid #f1f5f9;padding:2px 0'>"
+                        f"<span>{k}</span><span style='font-family:DM Mono,monospace'>{v}</span></div>"
+                        for k, v in items)
+                )
+
+            if _prof:
+                _html = (
+                    _prof_rows("Sections", [
+                        (k, f"{v:.0f} ms") for k, v in
+                        sorted(_prof["sections"].items(), key=lambda kv: -kv[1])])
+                    + _prof_rows("Supabase", [
+                        (op, f"{c['appels']} × · {c['octets'] / 1024:.1f} ko · {c['ms']:.0f} ms")
+                        for op, c in sorted(_prof["supabase"].items())])
+                    + _prof_rows("Fichiers", [
+                        (op, f"{c['opérations']} × · {c['octets'] / 1024:.1f} ko")
+                        for op, c in sorted(_prof["fichiers"].items())])
+                )
+                st.markdown(f"<div style='font-size:.75rem;color:#1e293b'>{_html}</div>",
+                            unsafe_allow_html=True)
+            else:
+                st.caption("Aucun rendu mesuré pour l'instant.")
+
+        st.markdown("""
+        <div style="background:#f8fafc;border:1.5px solid #e2e8f0;border-radius:12px;
+        padding:20px;margin-top:16px">
+          <div style="font-size:.95rem;font-weight:700;color:#0f172a;margin-bottom:12px">
+            📋 Comment configurer Supabase
+          </div>
+          <div style="font-size:.82rem;color:#1e293b;line-height:1.8">
+            <strong>1.</strong> Créez un compte sur <strong>supabase.com</strong><br>
+            <strong>2.</strong> Créez un nouveau projet<br>
+            <strong>3.</strong> Dans l'éditeur SQL, exécutez le code ci-dessous
+          </div>
+        </div>""", unsafe_allow_html=True)
+
+        st.code("""CREATE TABLE IF NOT EXISTS app_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+ALTER TABLE app_state ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "allow_all" ON app_state FOR ALL USING (true) WITH CHECK (true);
+
+-- Une table par collection, une ligne par enregistrement
+DO $$
+DECLARE t TEXT;
+BEGIN
+  FOREACH t IN ARRAY ARRAY['prelevements','schedules','surveillance',
+                           'pending_identifications','archived_samples',
+                           'points','operators','plans'] LOOP
+    EXECUTE format('CREATE TABLE IF NOT EXISTS rec_%s (
+        id TEXT PRIMARY KEY,
+        data JSONB NOT NULL,
+        seq BIGSERIAL,
+        updated_at TIMESTAMP DEFAULT NOW())', t);
+    -- Version de la ligne : contrôle des écritures concurrentes
+    EXECUTE format('ALTER TABLE rec_%s ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1', t);
+    EXECUTE format('ALTER TABLE rec_%s ENABLE ROW LEVEL SECURITY', t);
+    EXECUTE format('DROP POLICY IF EXISTS "allow_all" ON rec_%s', t);
+    EXECUTE format('CREATE POLICY "allow_all" ON rec_%s FOR ALL USING (true) WITH CHECK (true)', t);
+  END LOOP;
+END $$;
+
+-- Historique partitionné par mois (date de prélèvement, sinon date de lecture)
+ALTER TABLE rec_surveillance ADD COLUMN IF NOT EXISTS month TEXT
+  GENERATED ALWAYS AS (left(coalesce(nullif(data->>'date_prelevement', ''), data->>'date', ''), 7)) STORED;
+CREATE INDEX IF NOT EXISTS rec_surveillance_month ON rec_surveillance(month);
+
+-- Images des plans (Supabase Storage), rangées par empreinte
+INSERT INTO storage.buckets (id, name, public) VALUES ('plans', 'plans', false)
+  ON CONFLICT (id) DO NOTHING;
+DROP POLICY IF EXISTS "allow_all_plans" ON storage.objects;
+CREATE POLICY "allow_all_plans" ON storage.objects FOR ALL
+  USING (bucket_id = 'plans') WITH CHECK (bucket_id = 'plans');
+
+-- Journal des changements : propagation entre instances de l'application
+CREATE TABLE IF NOT EXISTS rec_changes (
+  seq BIGSERIAL PRIMARY KEY,
+  collection TEXT NOT NULL,
+  id TEXT NOT NULL,
+  op TEXT NOT NULL,
+  version INTEGER,
+  at TIMESTAMP DEFAULT NOW()
+);
+ALTER TABLE rec_changes ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "allow_all" ON rec_changes;
+CREATE POLICY "allow_all" ON rec_changes FOR ALL USING (true) WITH CHECK (true);
+CREATE OR REPLACE FUNCTION rec_log_change() RETURNS trigger AS $$
+BEGIN
+  IF random() < 0.001 THEN
+    DELETE FROM rec_changes WHERE at < NOW() - INTERVAL '2 days';
+  END IF;
+  IF TG_OP = 'DELETE' THEN
+    INSERT INTO rec_changes(collection, id, op) VALUES (substr(TG_TABLE_NAME, 5), OLD.id, 'del');
+    RETURN OLD;
+  END IF;
+  INSERT INTO rec_changes(collection, id, op, version)
+    VALUES (substr(TG_TABLE_NAME, 5), NEW.id, 'put', NEW.version);
+  RETURN NEW;
+END $$ LANGUAGE plpgsql;
+DO $$
+DECLARE t TEXT;
+BEGIN
+  FOREACH t IN ARRAY ARRAY['prelevements','schedules','surveillance',
+                           'pending_identifications','archived_samples',
+                           'points','operators','plans'] LOOP
+    EXECUTE format('DROP TRIGGER IF EXISTS rec_%s_changes ON rec_%s', t, t);
+    EXECUTE format('CREATE TRIGGER rec_%s_changes AFTER INSERT OR UPDATE OR DELETE ON rec_%s
+        FOR EACH ROW EXECUTE FUNCTION rec_log_change()', t, t);
+  END LOOP;
+END $$;
+CREATE OR REPLACE VIEW rec_surveillance_months AS
+  SELECT month, COUNT(*) AS n FROM rec_surveillance GROUP BY month;""",
+                language="sql")
+
+        st.markdown("""
+        <div style="background:#f8fafc;border:1.5px solid #e2e8f0;border-radius:12px;
+        padding:20px;margin-top:12px">
+          <div style="font-size:.82rem;color:#1e293b;line-height:1.8">
+            <strong>4.</strong> Dans <em>Project Settings → API</em>, copiez :<br>
+            &nbsp;&nbsp;• <strong>Project URL</strong> → <code>SUPABASE_URL</code><br>
+            &nbsp;&nbsp;• <strong>anon/public key</strong> → <code>SUPABASE_KEY</code>
+          </div>
+        </div>""", unsafe_allow_html=True)
+
+        st.code("""SUPABASE_URL = "https://xxxxx.supabase.co"
+SUPABASE_KEY = "eyJhbGci..."  # votre clé anon""", language="toml")
+
+        if supa_ok:
+            st.divider()
+            st.markdown("### 🔄 Actions Supabase")
+            syn1, syn2 = st.columns(2)
+            with syn1:
+                if can_edit:
+                    if st.button("🔄 Forcer la synchronisation", use_container_width=True):
+                        for _coll in ROW_COLLECTIONS:
+                            _rows_sync_ids(_coll)
+                        save_germs(st.session_state.germs)
+                        save_prelevements(st.session_state.prelevements, supa=True)
+                        save_schedules(st.session_state.schedules, supa=True)
+                        save_surveillance(st.session_state.surveillance)
+                        save_points(st.session_state.points, supa=True)
+                        save_operators(st.session_state.operators, supa=True)
+                        save_pending_identifications(st.session_state.pending_identifications, supa=True)
+                        save_archived_samples(st.session_state.archived_samples, supa=True)
+                        save_plans(st.session_state.plans, supa=True)
+                        save_origin_measures(st.session_state.origin_measures, supa=True)
+                        save_faq(st.session_state.faq_items, supa=True)
+                        _flush_pending_writes()
+                        st.session_state["_mesures_modifiees"] = False
+                        if _outbox().flush(timeout=5):
+                            st.success("✅ Toutes les données synchronisées !")
+                        else:
+                            st.warning(f"⏳ {_outbox().pending()} écriture(s) en attente d'envoi — "
+                                       "elles partiront automatiquement dès que Supabase répondra.")
+            with syn2:
+                if can_edit:
+                    if st.button("🔃 Recharger depuis Supabase", use_container_width=True):
+                        _flush_pending_writes()
+                        _supa_prefetch(['germs', 'measures', 'faq'])
+                        st.session_state.germs                   = load_germs()[0]
+                        st.session_state.origin_measures         = load_origin_measures()
+                        st.session_state.faq_items               = load_faq()
+                        # Collections : seules les lignes dont la version a changé sont relues
+                        _n_relues = 0
+                        for _coll, _loader in (("prelevements", load_prelevements),
+                                               ("schedules", load_schedules),
+                                               ("points", load_points),
+                                               ("operators", load_operators),
+                                               ("pending_identifications", load_pending_identifications),
+                                               ("archived_samples", load_archived_samples),
+                                               ("plans", load_plans)):
+                            _n = _refresh_rows(_coll)
+                            if _n is None:
+                                st.session_state[_coll] = _loader()
+                                _publish_shared(_coll, _snapshot(st.session_state[_coll]))
+                                _rows_share_baseline(_coll)
+                            else:
+                                _n_relues += _n
+                                st.session_state[_coll] = _adopt_shared(_coll)
+                        _n = _refresh_rows("surveillance")
+                        if _n is None:
+                            st.session_state.surveillance = _surv_bootstrap(force=True)
+                        else:
+                            _n_relues += _n
+                            st.session_state.surveillance = _surv_assemble(_surv_loaded_months())
+                        _run_scratch("app_state").clear()
+                        st.success(f"✅ Données rechargées depuis Supabase ({_n_relues} ligne(s) modifiée(s) relue(s)).")
+                        st.rerun()
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # FAQ
+    # ══════════════════════════════════════════════════════════════════════════
+    with subtab_faq:
+        faq_items = st.session_state.get("faq_items", [])
+
+        cats_count = {}
+        for f in faq_items:
+            c = f.get("category", "Général")
+            cats_count[c] = cats_count.get(c, 0) + 1
+
+        cols_stat = st.columns(min(len(cats_count) + 1, 5))
+        with cols_stat[0]:
+            st.metric("Total Q&R", len(faq_items))
+        for i, (cat, cnt) in enumerate(list(cats_count.items())[:4], 1):
+            with cols_stat[i]:
+                st.metric(cat[:14], cnt)
+
+        st.divider()
+
+        edit_idx = st.session_state.get("_faq_edit_idx")
+
+        if can_edit and st.session_state.get("_faq_show_form", False):
+            is_edit  = edit_idx is not None
+            existing = faq_items[edit_idx] if is_edit else {}
+            form_bg  = "#eff6ff" if is_edit else "#f0fdf4"
+            form_bdr = "#93c5fd" if is_edit else "#86efac"
+            form_ttl = "✏️ Modifier la question" if is_edit else "➕ Nouvelle question"
+
+            st.markdown(
+                f"<div style='background:{form_bg};border:1.5px solid {form_bdr};"
+                f"border-radius:12px;padding:18px;margin-bottom:16px'>",
+                unsafe_allow_html=True)
+            st.markdown(f"#### {form_ttl}")
+
+            fc1, fc2 = st.columns([3, 1])
+            with fc1:
+                faq_q = st.text_input(
+                    "Question *", value=existing.get("question", ""),
+                    placeholder="Ex: Comment ajouter un point de prélèvement ?",
+                    key="faq_form_question")
+            with fc2:
+                cur_cat = existing.get("category", "Général")
+                faq_c = st.selectbox(
+                    "Catégorie", FAQ_CATEGORIES,
+                    index=FAQ_CATEGORIES.index(cur_cat) if cur_cat in FAQ_CATEGORIES else 0,
+                    key="faq_form_category")
+
+            faq_a = st.text_area(
+                "Réponse * (Markdown supporté)", value=existing.get("answer", ""),
+                height=150,
+                placeholder="Décrivez la réponse. **Gras**, *italique*, listes…",
+                key="faq_form_answer")
+            if faq_a.strip():
+                with st.expander("👁️ Aperçu", expanded=False):
+                    st.markdown(faq_a)
+
+            fb1, fb2 = st.columns(2)
+            with fb1:
+                if st.button(
+                    "✔️ Mettre à jour" if is_edit else "✅ Ajouter",
+                    use_container_width=True, type="primary", key="faq_form_submit"):
+                    if not faq_q.strip():
+                        st.error("La question est obligatoire.")
+                    elif not faq_a.strip():
+                        st.error("La réponse est obligatoire.")
+                    else:
+                        if is_edit:
+                            faq_items[edit_idx].update(
+                                question=faq_q.strip(), answer=faq_a.strip(), category=faq_c)
+                        else:
+                            faq_items.append({
+                                "id":       f"faq_{int(datetime.now().timestamp())}",
+                                "category": faq_c,
+                                "question": faq_q.strip(),
+                                "answer":   faq_a.strip(),
+                                "order":    len(faq_items),
+                            })
+                        save_faq(faq_items, supa=True)
+                        st.session_state["faq_items"]      = faq_items
+                        st.session_state["_faq_show_form"] = False
+                        st.session_state["_faq_edit_idx"]  = None
+                        st.success("✅ FAQ mise à jour !")
+                        st.rerun()
+            with fb2:
+                if st.button("✕ Annuler", use_container_width=True, key="faq_form_cancel"):
+                    st.session_state["_faq_show_form"] = False
+                    st.session_state["_faq_edit_idx"]  = None
+                    st.rerun()
+            st.markdown("</div>", unsafe_allow_html=True)
+
+        elif can_edit and not st.session_state.get("_faq_show_form", False):
+            if st.button("➕ Ajouter une question", key="faq_add_btn", use_container_width=True):
+                st.session_state["_faq_show_form"] = True
+                st.session_state["_faq_edit_idx"]  = None
+                st.rerun()
+
+        if not faq_items:
+            st.markdown(
+                "<div style='background:#f8fafc;border:1.5px dashed #cbd5e1;"
+                "border-radius:12px;padding:32px;text-align:center;margin-top:12px'>"
+                "<div style='font-size:2.5rem;margin-bottom:8px'>❓</div>"
+                "<div style='font-weight:700;color:#475569'>Aucune question définie</div>"
+                "<div style='font-size:.8rem;color:#94a3b8;margin-top:4px'>"
+                "Cliquez sur ➕ Ajouter une question ci-dessus</div></div>",
+                unsafe_allow_html=True)
+        else:
+            all_cats_tab = ["Toutes"] + sorted(set(f.get("category", "Général") for f in faq_items))
+            faq_filter_cat = st.selectbox(
+                "Filtrer", all_cats_tab, key="faq_tab_cat_filter", label_visibility="collapsed")
+
+            st.markdown(
+                "<div style='display:grid;grid-template-columns:2fr 1fr;"
+                "gap:4px;background:#1e40af;border-radius:10px 10px 0 0;"
+                "padding:10px 14px;margin-top:8px'>"
+                "<div style='font-size:.72rem;font-weight:800;color:#fff'>Question</div>"
+                "<div style='font-size:.72rem;font-weight:800;color:#fff;text-align:center'>Catégorie</div>"
+                "</div>",
+                unsafe_allow_html=True)
+
+            CAT_COL = {
+                "Général":             "#2563eb",
+                "Score & Seuils":      "#7c3aed",
+                "Prélèvements":        "#0891b2",
+                "Paramètres":          "#059669",
+                "Données":             "#d97706",
+                "Mesures correctives": "#dc2626",
+            }
+
+            displayed = [
+                (i, f) for i, f in enumerate(faq_items)
+                if faq_filter_cat == "Toutes" or f.get("category") == faq_filter_cat
+            ]
+
+            if not displayed:
+                st.markdown(
+                    "<div style='background:#f8fafc;border:1px solid #e2e8f0;border-top:none;"
+                    "border-radius:0 0 10px 10px;padding:20px;text-align:center;"
+                    "color:#94a3b8;font-size:.82rem'>Aucune question dans cette catégorie</div>",
+                    unsafe_allow_html=True)
+            else:
+                for dp, (ri, item) in enumerate(displayed):
+                    cc     = CAT_COL.get(item.get("category", "Général"), "#475569")
+                    row_bg = "#f8fafc" if dp % 2 == 0 else "#ffffff"
+
+                    rc1, rc2 = st.columns([6, 1])
+                    with rc1:
+                        st.markdown(
+                            f"<div style='display:grid;grid-template-columns:2fr 1fr;"
+                            f"gap:4px;background:{row_bg};border:1px solid #e2e8f0;"
+                            f"border-top:none;padding:10px 14px;align-items:center'>"
+                            f"<div style='font-size:.82rem;font-weight:600;color:#0f172a'>"
+                            f"{item['question']}</div>"
+                            f"<div style='text-align:center'>"
+                            f"<span style='background:{cc}18;color:{cc};"
+                            f"border:1px solid {cc}44;border-radius:12px;"
+                            f"padding:2px 10px;font-size:.65rem;font-weight:700'>"
+                            f"{item.get('category','Général')}</span></div></div>",
+                            unsafe_allow_html=True)
+                    with rc2:
+                        a1, a2, a3, a4 = st.columns(4)
+                        with a1:
+                            if can_edit and ri > 0:
+                                if st.button("↑", key=f"faq_up_{ri}", help="Monter"):
+                                    faq_items[ri], faq_items[ri-1] = faq_items[ri-1], faq_items[ri]
+                                    for k, f in enumerate(faq_items): f["order"] = k
+                                    save_faq(faq_items, supa=True)
+                                    st.session_state["faq_items"] = faq_items
+                                    st.rerun()
+                        with a2:
+                            if can_edit and ri < len(faq_items) - 1:
+                                if st.button("↓", key=f"faq_dn_{ri}", help="Descendre"):
+                                    faq_items[ri], faq_items[ri+1] = faq_items[ri+1], faq_items[ri]
+                                    for k, f in enumerate(faq_items): f["order"] = k
+                                    save_faq(faq_items, supa=True)
+                                    st.session_state["faq_items"] = faq_items
+                                    st.rerun()
+                        with a3:
+                            if can_edit:
+                                if st.button("✏️", key=f"faq_edit_{ri}"):
+                                    st.session_state["_faq_edit_idx"]  = ri
+                                    st.session_state["_faq_show_form"] = True
+                                    st.rerun()
+                        with a4:
+                            if can_edit:
+                                if st.button("🗑️", key=f"faq_del_{ri}"):
+                                    faq_items.pop(ri)
+                                    for k, f in enumerate(faq_items): f["order"] = k
+                                    save_faq(faq_items, supa=True)
+                                    st.session_state["faq_items"] = faq_items
+                                    st.rerun()
+
+                st.markdown(
+                    f"<div style='background:#1e293b;border-radius:0 0 10px 10px;"
+                    f"padding:8px 14px'><div style='font-size:.75rem;color:#94a3b8'>"
+                    f"{len(faq_items)} question(s) · {len(displayed)} affichée(s)"
+                    f"</div></div>",
+                    unsafe_allow_html=True)
+
+        st.divider()
+
+        if can_edit:
+            st.markdown("#### ↩️ Réinitialiser la FAQ")
+            st.caption("Recharge les questions prédéfinies (efface les modifications personnalisées).")
+            if st.button("↩️ Remettre les questions par défaut", key="faq_reset"):
+                st.session_state["faq_items"] = [dict(f) for f in DEFAULT_FAQ]
+                save_faq(st.session_state["faq_items"], supa=True)
+                st.success("✅ FAQ réinitialisée.")
+                st.rerun()
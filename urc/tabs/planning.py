@@ -0,0 +1,715 @@
+"""Onglet Planning : charge hebdomadaire, planning mensuel et exports (Excel,
+étiquettes)."""
+import importlib.util
+import json
+from datetime import date as date_type, datetime, timedelta
+
+import streamlit as st
+
+from urc.perf import _profiled
+from urc.workdays import is_working_day
+from urc.storage import _supa_get, _supa_upsert, load_points
+from urc.planning import (
+    PLANNING_HORIZONS, _capacity_overflows, _class_capacities, _plan_moves,
+    _planning_range,
+)
+from urc.documents import _generate_excel_planning, _generate_pdf_etiquettes
+
+def render():
+    st.markdown("### 📅 Planning des prélèvements & lectures")
+
+    _today_dt     = datetime.today().date()
+    MOIS_FR       = ["","Janvier","Février","Mars","Avril","Mai","Juin",
+                     "Juillet","Août","Septembre","Octobre","Novembre","Décembre"]
+    JOURS_FR_LONG = ["Lundi","Mardi","Mercredi","Jeudi","Vendredi","Samedi","Dimanche"]
+
+    # ── Initialisation planning_skips ─────────────────────────────────────────
+    if "planning_skips" not in st.session_state:
+        _raw_skips = _supa_get('planning_skips')
+        st.session_state["planning_skips"] = json.loads(_raw_skips) if _raw_skips else {}
+
+    # ── Initialisation planning_frozen_weeks ──────────────────────────────────
+    # Stocke le snapshot figé de chaque semaine gelée au moment du clic Non-faits.
+    # Structure : { "lundi_iso": { "jour_iso": [tâches], ... }, ... }
+    if "planning_frozen_weeks" not in st.session_state:
+        _raw_frozen = _supa_get('planning_frozen_weeks')
+        st.session_state["planning_frozen_weeks"] = json.loads(_raw_frozen) if _raw_frozen else {}
+
+    # ── Initialisation planning_overrides ─────────────────────────────────────
+    if "planning_overrides_loaded" not in st.session_state:
+        for k, v in st.session_state.get("planning_overrides", {}).items():
+            if k not in st.session_state:
+                try:
+                    st.session_state[k] = int(v)
+                except Exception:
+                    pass
+        st.session_state["planning_overrides_loaded"] = True
+
+    # ════════════════════════════════════════════════════════════════════════
+    # HELPERS UTILITAIRES
+    # ════════════════════════════════════════════════════════════════════════
+    def get_week_start(d):
+        return d - timedelta(days=d.weekday())
+
+    def fmt_week(ws):
+        we = ws + timedelta(days=6)
+        return ws.strftime('%d/%m') + ' – ' + we.strftime('%d/%m/%Y')
+
+    # ════════════════════════════════════════════════════════════════════════
+    # GEL D'UNE SEMAINE
+    # ════════════════════════════════════════════════════════════════════════
+    def _freeze_week_snapshot(week_monday, plan, force=False):
+        """
+        Gèle le snapshot d'une semaine.
+        force=True : écrase même si déjà gelée (utilisé après recalcul Non-faits).
+        """
+        wk_key    = week_monday.isoformat()
+        wk_friday = week_monday + timedelta(days=4)
+        frozen    = st.session_state.get("planning_frozen_weeks", {})
+
+        if wk_key in frozen and not force:
+            return  # idempotent sauf forçage explicite
+
+        snap = {
+            d.isoformat(): list(tasks)
+            for d, tasks in plan.items()
+            if week_monday <= d <= wk_friday
+        }
+        if snap:
+            frozen[wk_key] = snap
+            st.session_state["planning_frozen_weeks"] = frozen
+            _supa_upsert('planning_frozen_weeks', json.dumps(frozen))
+
+    # ════════════════════════════════════════════════════════════════════════
+    # ONGLETS
+    # ════════════════════════════════════════════════════════════════════════
+    plan_tab_charge, plan_tab_export = st.tabs([
+        "📊 Charge hebdo & Planning mensuel",
+        "📥 Export Excel",
+    ])
+
+    # ════════════════════════════════════════════════════════════════════════
+    # ONGLET 1 — Charge hebdo & Planning mensuel
+    # ════════════════════════════════════════════════════════════════════════
+    with plan_tab_charge:
+        if not st.session_state.get("points"):
+            st.session_state.points = load_points()
+
+        col_y, col_m, col_h = st.columns(3)
+        with col_y:
+            _ch_year = st.number_input(
+                "Année", min_value=2020, max_value=2030,
+                value=st.session_state.cal_year, step=1,
+                key="cal_year_sel",
+            )
+            st.session_state.cal_year = _ch_year
+        with col_m:
+            _ch_month = st.selectbox(
+                "Mois", range(1, 13),
+                format_func=lambda m: MOIS_FR[m],
+                index=st.session_state.cal_month - 1,
+                key="cal_month_sel",
+            )
+            st.session_state.cal_month = _ch_month
+        with col_h:
+            st.selectbox(
+                "Horizon de planification", PLANNING_HORIZONS,
+                format_func=lambda n: f"{n} mois",
+                key="planning_horizon",
+                help="Mois planifiés ensemble à partir du mois en cours : "
+                     "reports de fin de mois et espacement suivis d'un mois à l'autre.",
+            )
+
+        import calendar as _cal_pm
+        _, _pm_ndays = _cal_pm.monthrange(_ch_year, _ch_month)
+        _pm_start    = date_type(_ch_year, _ch_month, 1)
+        _pm_end      = date_type(_ch_year, _ch_month, _pm_ndays)
+        cur_pm       = _pm_start - timedelta(days=_pm_start.weekday())
+        pm_mondays   = []
+        while cur_pm <= _pm_end:
+            pm_mondays.append(cur_pm)
+            cur_pm += timedelta(weeks=1)
+
+        for _pt in st.session_state.points:
+            if not _pt.get("room_class"):
+                _pt["room_class"] = _pt.get("class", "")
+            if "frequency" not in _pt or _pt.get("frequency") is None:
+                _pt["frequency"] = _pt.get("freq", None)
+            if "frequency_unit" not in _pt or not _pt.get("frequency_unit"):
+                _pt["frequency_unit"] = _pt.get("unit", "/ semaine")
+
+        st.divider()
+
+        st.markdown("#### 📅 Planning mensuel automatique")
+        st.caption(
+            "Fréquence strictement respectée selon le paramétrage de chaque point. "
+            "Un point n'apparaît jamais 2× le même jour sauf fréquence ≥ 1/jour. "
+            "La capacité journalière de chaque classe de salle est respectée dès que les fréquences le permettent. "
+            "Les skips sont redistribués dans leur mois ; en fin de mois, sur les premiers "
+            "jours ouvrés de M+1 quand il est dans l'horizon de planification. "
+            "Le gel de S+1 se déclenche uniquement au clic ⬜ Non-faits. "
+            "Utilisez 🔄 Annuler pour effacer les non-faits et dégeler S+1."
+        )
+
+        with _profiled("calcul planning"):
+            monthly_plan_raw, monthly_plan = _planning_range(_pm_start, _pm_end)
+
+        _overflows = _capacity_overflows(monthly_plan, _class_capacities())
+        if _overflows:
+            st.warning(
+                f"⚠️ Capacité journalière de classe dépassée sur "
+                f"{len({o[0] for o in _overflows})} jour(s) — fréquences impossibles à "
+                f"tenir autrement : "
+                + ", ".join(f"{d.strftime('%d/%m')} classe {c} ({n}/{cap})"
+                            for d, c, n, cap in _overflows[:6])
+                + ("…" if len(_overflows) > 6 else "")
+            )
+
+        # ── Déplacements depuis le dernier planning affiché dans cette session ──
+        _pm_key   = f"{_ch_year:04d}-{_ch_month:02d}"
+        _pm_shown = st.session_state.setdefault("_planning_shown", {})
+        _pm_prev  = _pm_shown.get(_pm_key)
+        if _pm_prev is not None:
+            _pm_diff = _plan_moves(_pm_prev, monthly_plan)
+            if _pm_diff:
+                st.session_state.setdefault("_planning_moves", {})[_pm_key] = _pm_diff
+        _pm_shown[_pm_key] = monthly_plan
+        _pm_moves = st.session_state.get("_planning_moves", {}).get(_pm_key)
+        if _pm_moves:
+            with st.expander(f"🔀 Dernière mise à jour du planning : "
+                             f"{len(_pm_moves)} prélèvement(s) déplacé(s)"):
+                for _lbl, _src, _dst in _pm_moves[:50]:
+                    _src_txt = _src.strftime("%d/%m") if _src else "—"
+                    _dst_txt = _dst.strftime("%d/%m") if _dst else "retiré"
+                    st.markdown(f"- **{_lbl}** : {_src_txt} → {_dst_txt}")
+                if len(_pm_moves) > 50:
+                    st.caption(f"… et {len(_pm_moves) - 50} autre(s).")
+
+        if "pm_selected_day" not in st.session_state:
+            st.session_state["pm_selected_day"] = None
+
+        @st.fragment
+        def _planning_day_cell(wd, tasks, week_passed, week_frozen):
+            """Case d'un jour du planning : cocher les non-faits ne relance que la case ;
+            l'enregistrement (re-planification) et le détail relancent la page."""
+            done_labels = {
+                p["label"]
+                for p in st.session_state.prelevements
+                if p.get("date")
+                and datetime.fromisoformat(p["date"]).date() == wd
+            }
+            skipped          = set(st.session_state["planning_skips"].get(wd.isoformat(), []))
+            non_faits        = [
+                t for t in tasks
+                if t["label"] not in done_labels and t["label"] not in skipped
+            ]
+            skipped_this_day = skipped - done_labels
+
+            st.markdown(f"**{JOURS_FR_LONG[wd.weekday()][:3]} {wd.strftime('%d/%m')}**")
+
+            if st.button("🔍", key=f"detail_{wd}"):
+                st.session_state["pm_selected_day"] = wd
+                st.rerun()
+
+            for t in tasks:
+                _dn     = t["label"] in done_labels
+                _sk     = t["label"] in skipped
+                _ic     = "💨" if t.get("type") == "Air" else "🧴"
+                _col    = "#22c55e" if _dn else "#94a3b8" if _sk else "#1e40af"
+                _strike = "line-through" if _sk else "none"
+                st.markdown(
+                    f"<div style='font-size:.72rem;color:{_col};"
+                    f"text-decoration:{_strike};padding:2px 0'>"
+                    f"{_ic} {t['label'][:25]}</div>",
+                    unsafe_allow_html=True,
+                )
+
+            if non_faits and not week_passed and not week_frozen:
+                with st.popover(f"⬜ {len(non_faits)} Non faits"):
+                    selections = []
+                    for ti, t in enumerate(non_faits):
+                        key = (
+                            f"skip_{wd.isoformat()}_{ti}_"
+                            f"{t['label'][:20].replace(' ', '_').replace('/', '_')}"
+                        )
+                        checked = st.checkbox(t["label"], key=key)
+                        if checked:
+                            selections.append(t["label"])
+
+                    if st.button("💾 Enregistrer", key=f"save_skips_{wd}"):
+                        _skips = st.session_state["planning_skips"]
+                        dk     = wd.isoformat()
+                        _skips.setdefault(dk, [])
+                        for label in selections:
+                            if label not in _skips[dk]:
+                                _skips[dk].append(label)
+                        st.session_state["planning_skips"] = _skips
+                        _supa_upsert('planning_skips', json.dumps(_skips))
+                        st.rerun()
+
+            elif week_frozen and non_faits:
+                st.markdown(
+                    "<div style='font-size:.65rem;color:#f59e0b;margin-top:2px'>"
+                    "🔒 Semaine figée</div>",
+                    unsafe_allow_html=True,
+                )
+            elif week_passed and skipped_this_day:
+                st.markdown(
+                    f"<div style='font-size:.65rem;color:#dc2626;margin-top:2px'>"
+                    f"⏭️ {len(skipped_this_day)} non-fait(s)</div>",
+                    unsafe_allow_html=True,
+                )
+            elif not non_faits:
+                st.button("✅", disabled=True, key=f"done_{wd}")
+
+        # ── Rendu calendrier semaine par semaine ──────────────────────────
+        for week_monday in pm_mondays:
+            wd_week = [
+                week_monday + timedelta(days=i)
+                for i in range(5)
+                if is_working_day(week_monday + timedelta(days=i))
+                and _pm_start <= (week_monday + timedelta(days=i)) <= _pm_end
+            ]
+            if not wd_week:
+                continue
+
+            _total_sem    = sum(len(monthly_plan.get(wd, [])) for wd in wd_week)
+            _friday_sem   = week_monday + timedelta(days=4)
+            _week_passed  = _friday_sem < _today_dt
+            _week_current = week_monday <= _today_dt <= _friday_sem
+            _week_frozen  = week_monday.isoformat() in st.session_state.get("planning_frozen_weeks", {})
+
+            # ── En-tête semaine ───────────────────────────────────────────
+            # ── FIX 1 : 4 colonnes pour accueillir le bouton Annuler ──────
+            c1, c2, c3, c4 = st.columns([4, 1.5, 1.5, 1.5])
+            with c1:
+                if _week_passed:
+                    _sem_badge = "<span style='color:#94a3b8;font-size:.72rem'>✅ Semaine passée</span>"
+                elif _week_frozen:
+                    _sem_badge = "<span style='color:#f59e0b;font-size:.72rem'>🔒 Charge figée</span>"
+                elif _week_current:
+                    _sem_badge = "<span style='color:#22c55e;font-size:.72rem'>▶ Semaine en cours</span>"
+                else:
+                    _sem_badge = ""
+                st.markdown(
+                    f"<div style='background:#1e293b;padding:10px;border-radius:10px;"
+                    f"display:flex;justify-content:space-between;align-items:center'>"
+                    f"<div><b style='color:white'>Semaine {week_monday.isocalendar()[1]}</b>"
+                    f"&nbsp;&nbsp;{_sem_badge}</div>"
+                    f"<span style='color:#93c5fd'>{_total_sem} prélèv.</span>"
+                    f"</div>",
+                    unsafe_allow_html=True,
+                )
+
+            # ── Bouton Non-faits ──────────────────────────────────────────
+            with c2:
+                if st.button(
+                    "⬜ Non-faits", key=f"nonfaits_{week_monday}",
+                    help="Marquer les non-réalisés et figer la charge de S+1",
+                ):
+                    _skips = st.session_state["planning_skips"]
+
+                    # 1) Enregistrer tous les non-réalisés de la semaine N
+                    for wd in wd_week:
+                        done_lbls = {
+                            p["label"]
+                            for p in st.session_state.prelevements
+                            if p.get("date")
+                            and datetime.fromisoformat(p["date"]).date() == wd
+                        }
+                        tasks_wd = monthly_plan.get(wd, [])
+                        dk       = wd.isoformat()
+                        _skips.setdefault(dk, [])
+                        for t in tasks_wd:
+                            if t["label"] not in done_lbls and t["label"] not in _skips[dk]:
+                                _skips[dk].append(t["label"])
+
+                    st.session_state["planning_skips"] = _skips
+                    _supa_upsert('planning_skips', json.dumps(_skips))
+
+                    # ── FIX 2 : Gel S+1 avec snapshot recalculé ───────────
+                    # Problème original : si S+1 était déjà gelée, _redistribute_skips
+                    # l'excluait → les nouvelles tâches reportées ne l'atteignaient jamais.
+                    # Solution : dégeler temporairement S+1 pour que la redistribution
+                    # puisse l'alimenter, puis regeler avec le snapshot à jour (force=True).
+                    _next_monday = week_monday + timedelta(weeks=1)
+                    _next_key    = _next_monday.isoformat()
+
+                    # Dégeler S+1 temporairement pour le recalcul
+                    _frozen_state = st.session_state.get("planning_frozen_weeks", {})
+                    if _next_key in _frozen_state:
+                        del _frozen_state[_next_key]
+                        st.session_state["planning_frozen_weeks"] = _frozen_state
+
+                    # Mise à jour du planning avec les nouveaux skips : les reports
+                    # peuvent maintenant atteindre S+1
+                    _, _snap_plan = _planning_range(
+                        _next_monday, _next_monday + timedelta(days=4), skips=_skips
+                    )
+
+                    # Geler S+1 avec le nouveau snapshot (force=True car on vient
+                    # de la dégeler, l'idempotence est gérée manuellement ici)
+                    _freeze_week_snapshot(_next_monday, _snap_plan, force=True)
+
+                    st.rerun()
+
+            # ── Bouton Imprimer ───────────────────────────────────────────
+            with c3:
+                if st.button("🖨️ Imprimer", key=f"print_{week_monday}"):
+                    week_days = [(wd, monthly_plan.get(wd, [])) for wd in wd_week]
+
+                    def filt(tasks, cls, iso=None):
+                        out = []
+                        for t in tasks:
+                            if (t.get("room_class") or "").upper() == cls:
+                                t2 = dict(t)
+                                if iso:
+                                    t2["_isolateur"] = iso
+                                out.append(t2)
+                        return out
+
+                    days_D  = [(d, filt(t, "D"))                 for d, t in week_days if filt(t, "D")]
+                    days_14 = [(d, filt(t, "A", "Iso 14/07169")) for d, t in week_days if filt(t, "A")]
+                    days_16 = [(d, filt(t, "A", "Iso 16/0724"))  for d, t in week_days if filt(t, "A")]
+
+                    if days_D:
+                        st.session_state[f"pdf_D_{week_monday}"]  = _generate_pdf_etiquettes(days_D, days_D)
+                    if days_14:
+                        st.session_state[f"pdf_14_{week_monday}"] = _generate_pdf_etiquettes(days_14, days_14)
+                    if days_16:
+                        st.session_state[f"pdf_16_{week_monday}"] = _generate_pdf_etiquettes(days_16, days_16)
+                    st.rerun()
+
+            # ── FIX 1 : Bouton Annuler Non-faits ─────────────────────────
+            _has_skips_this_week = any(
+                st.session_state["planning_skips"].get(wd.isoformat())
+                for wd in wd_week
+            )
+            _next_monday_check = week_monday + timedelta(weeks=1)
+            _next_week_frozen  = _next_monday_check.isoformat() in st.session_state.get("planning_frozen_weeks", {})
+
+            with c4:
+                if _has_skips_this_week or _next_week_frozen:
+                    if st.button(
+                        "🔄 Annuler",
+                        key=f"undo_nonfaits_{week_monday}",
+                        help="Annuler les non-faits de cette semaine et dégeler S+1",
+                    ):
+                        _skips = st.session_state["planning_skips"]
+                        for wd in wd_week:
+                            _skips.pop(wd.isoformat(), None)
+                        st.session_state["planning_skips"] = _skips
+                        _supa_upsert('planning_skips', json.dumps(_skips))
+
+                        _frozen = st.session_state.get("planning_frozen_weeks", {})
+                        _changed = False
+                        if _next_monday_check.isoformat() in _frozen:
+                            del _frozen[_next_monday_check.isoformat()]
+                            _changed = True
+                        _this_key = week_monday.isoformat()
+                        if _this_key in _frozen:
+                            del _frozen[_this_key]
+                            _changed = True
+                        if _changed:
+                            st.session_state["planning_frozen_weeks"] = _frozen
+                            _supa_upsert('planning_frozen_weeks', json.dumps(_frozen))
+
+                        st.success(f"✅ Non-faits de la semaine {week_monday.isocalendar()[1]} annulés.")
+                        st.rerun()
+
+            for suffix, label in [("D", "Classe D"), ("14", "Iso 14"), ("16", "Iso 16")]:
+                key_pdf = f"pdf_{suffix}_{week_monday}"
+                if key_pdf in st.session_state:
+                    st.download_button(
+                        f"⬇️ {label}",
+                        data=st.session_state[key_pdf],
+                        file_name=f"etiquettes_{suffix}_{week_monday}.pdf",
+                        mime="application/pdf",
+                        key=f"dl_{suffix}_{week_monday}",
+                    )
+
+            # ── Grille des jours ──────────────────────────────────────────
+            cols = st.columns(len(wd_week))
+            for i, wd in enumerate(wd_week):
+                with cols[i]:
+                    _planning_day_cell(wd, monthly_plan.get(wd, []), _week_passed, _week_frozen)
+
+            st.divider()
+
+        # ── Panel détail jour ─────────────────────────────────────────────
+        sel = st.session_state.get("pm_selected_day")
+
+        if sel:
+            st.markdown("---")
+            _day_lbl = JOURS_FR_LONG[sel.weekday()] + " " + sel.strftime("%d/%m/%Y")
+            st.markdown(f"## 📋 {_day_lbl}")
+
+            if st.button("✖️ Fermer", key="close_detail"):
+                st.session_state["pm_selected_day"] = None
+                st.rerun()
+
+            tasks = monthly_plan.get(sel, [])
+
+            if not tasks:
+                st.info("Aucun prélèvement planifié ce jour.")
+            else:
+                done_labels    = {
+                    p["label"]
+                    for p in st.session_state.prelevements
+                    if p.get("date")
+                    and datetime.fromisoformat(p["date"]).date() == sel
+                }
+                skipped_labels = set(
+                    st.session_state["planning_skips"].get(sel.isoformat(), [])
+                )
+
+                rcp_fix = {
+                    "1": "#22c55e", "2": "#84cc16", "3": "#f59e0b",
+                    "4": "#f97316", "5": "#ef4444",
+                }
+
+                st.markdown(
+                    "<div style='background:#eff6ff;border:1px solid #bfdbfe;"
+                    "border-radius:8px;padding:8px 14px;margin-bottom:8px'>"
+                    "<span style='font-size:.88rem;font-weight:800;color:#1e40af'>"
+                    "🏷️ Générer les étiquettes pour ce jour</span></div>",
+                    unsafe_allow_html=True,
+                )
+
+                col_sa, col_sn, col_sk, _ = st.columns([1, 1, 1, 3])
+                with col_sa:
+                    if st.button("☑️ Tout sélectionner",
+                                 key=f"etiq_all_{sel.isoformat()}",
+                                 use_container_width=True):
+                        for _ti, _t in enumerate(tasks):
+                            st.session_state[f"etiq_chk_{sel.isoformat()}_{_ti}"] = True
+                        st.rerun()
+                with col_sn:
+                    if st.button("⬜ Tout désélectionner",
+                                 key=f"etiq_none_{sel.isoformat()}",
+                                 use_container_width=True):
+                        for _ti, _t in enumerate(tasks):
+                            st.session_state[f"etiq_chk_{sel.isoformat()}_{_ti}"] = False
+                        st.rerun()
+                with col_sk:
+                    if st.button("🚫 Tout reporter",
+                                 key=f"all_skip_{sel.isoformat()}",
+                                 use_container_width=True):
+                        dk     = sel.isoformat()
+                        _skips = st.session_state["planning_skips"]
+                        _skips[dk] = list(set(
+                            _skips.get(dk, []) + [t["label"] for t in tasks]
+                        ))
+                        st.session_state["planning_skips"] = _skips
+                        _supa_upsert('planning_skips', json.dumps(_skips))
+                        st.success("Tous les prélèvements reportés dans le mois.")
+                        st.rerun()
+
+                _chk_cols       = st.columns(3)
+                _selected_tasks = []
+
+                for _ti, _t in enumerate(tasks):
+                    _chk_key = f"etiq_chk_{sel.isoformat()}_{_ti}"
+                    if _chk_key not in st.session_state:
+                        st.session_state[_chk_key] = True
+                    _rc = rcp_fix.get(str(_t.get("risk", "1")), "#94a3b8")
+                    _ic = "💨" if _t.get("type") == "Air" else "🧴"
+                    _dn = _t["label"] in done_labels
+                    _sk = _t["label"] in skipped_labels
+                    bg  = "#f0fdf4" if _dn else "#fff8f1" if _sk else "#fff"
+
+                    with _chk_cols[_ti % 3]:
+                        st.markdown(
+                            f"<div style='background:{bg};"
+                            f"border:1px solid {_rc}44;border-left:3px solid {_rc};"
+                            f"border-radius:7px;padding:4px 8px;margin-bottom:4px'>"
+                            f"<span style='font-size:.72rem;font-weight:700;color:#0f172a'>"
+                            f"{_ic} {'✅ ' if _dn else '⏭️ ' if _sk else ''}"
+                            f"{_t['label'][:28]}</span><br>"
+                            f"<span style='font-size:.6rem;color:#64748b'>"
+                            f"Cl.{_t.get('room_class') or '—'} · "
+                            f"Nv.{_t.get('risk', '—')}</span></div>",
+                            unsafe_allow_html=True,
+                        )
+                        if st.checkbox(
+                            "Inclure",
+                            value=st.session_state[_chk_key],
+                            key=_chk_key,
+                            label_visibility="collapsed",
+                        ):
+                            _selected_tasks.append(_t)
+
+                _n_sel_etiq = len(_selected_tasks)
+                st.markdown(
+                    f"<div style='font-size:.8rem;color:#475569;margin:6px 0'>"
+                    f"{_n_sel_etiq} / {len(tasks)} point(s) sélectionné(s)</div>",
+                    unsafe_allow_html=True,
+                )
+
+                if _n_sel_etiq > 0:
+                    if st.button(
+                        f"📄 Générer {_n_sel_etiq} "
+                        f"étiquette{'s' if _n_sel_etiq > 1 else ''} — {_day_lbl}",
+                        use_container_width=True,
+                        key=f"etiq_gen_{sel.isoformat()}",
+                        type="primary",
+                    ):
+                        try:
+                            _pdf_bytes = _generate_pdf_etiquettes(_selected_tasks, sel)
+                            fname_etiq = f"etiquettes_{sel.strftime('%Y%m%d')}.pdf"
+                            st.session_state[f"pdf_quick_{sel.isoformat()}"] = {
+                                "data":  _pdf_bytes,
+                                "fname": fname_etiq,
+                            }
+                            st.rerun()
+                        except ImportError:
+                            st.error("❌ ReportLab non installé.")
+                        except Exception as _e:
+                            st.error(f"Erreur génération PDF : {_e}")
+                            import traceback
+                            st.code(traceback.format_exc())
+
+                    _pdf_cache = st.session_state.get(f"pdf_quick_{sel.isoformat()}")
+                    if _pdf_cache:
+                        st.download_button(
+                            label=f"⬇️ Télécharger {_pdf_cache['fname']}",
+                            data=_pdf_cache["data"],
+                            file_name=_pdf_cache["fname"],
+                            mime="application/pdf",
+                            use_container_width=True,
+                            key=f"etiq_dl_{sel.isoformat()}",
+                        )
+                        st.success(
+                            f"✅ {_n_sel_etiq} étiquette"
+                            f"{'s' if _n_sel_etiq > 1 else ''} prête"
+                            f"{'s' if _n_sel_etiq > 1 else ''} — {_day_lbl}"
+                        )
+
+    # ════════════════════════════════════════════════════════════════════════
+    # ONGLET 2 — Export Excel
+    # ════════════════════════════════════════════════════════════════════════
+    with plan_tab_export:
+        st.markdown("#### 📥 Exporter le planning en Excel")
+
+        # openpyxl n'est importé qu'à la génération du classeur (bouton d'export)
+        if importlib.util.find_spec("openpyxl") is None:
+            st.error(
+                "❌ **openpyxl** n'est pas installé.\n\n"
+                "Ajoutez `openpyxl` dans votre fichier **requirements.txt** "
+                "puis redémarrez l'application."
+            )
+            st.stop()
+
+        exp_scope = st.selectbox(
+            "Période",
+            ["Semaine en cours", "Semaine choisie", "Mois en cours",
+             "4 semaines à venir", "Tout le planning"],
+            key="exp_scope",
+        )
+
+        if exp_scope == "Semaine choisie":
+            _today_ref   = _today_dt
+            _cur_monday  = _today_ref - timedelta(days=_today_ref.weekday())
+            _week_opts   = [_cur_monday + timedelta(weeks=i) for i in range(-4, 13)]
+            _week_labels = []
+            for _wm in _week_opts:
+                _we     = _wm + timedelta(days=4)
+                _marker = " ← semaine en cours" if _wm == _cur_monday else ""
+                _week_labels.append(
+                    f"Sem. {_wm.isocalendar()[1]} — "
+                    f"{_wm.strftime('%d/%m/%Y')} → {_we.strftime('%d/%m/%Y')}{_marker}"
+                )
+            _sel_week_idx = st.selectbox(
+                "Choisir la semaine",
+                range(len(_week_labels)),
+                format_func=lambda i: _week_labels[i],
+                index=4,
+                key="exp_chosen_week",
+            )
+            _chosen_monday = _week_opts[_sel_week_idx]
+        else:
+            _chosen_monday = None
+
+        only_working = st.checkbox("Inclure uniquement les jours ouvrés", value=True)
+
+        include_nonfaits = st.checkbox(
+            "Inclure les prélèvements redistribués (non-faits des semaines passées)",
+            value=True,
+            help="Affiche dans l'Excel les prélèvements reportés depuis des semaines passées.",
+        )
+
+        if st.button("📊 Générer Excel", use_container_width=True, key="gen_xlsx"):
+            exp_today = _today_dt
+
+            if exp_scope == "Semaine en cours":
+                _monday   = exp_today - timedelta(days=exp_today.weekday())
+                exp_dates = [_monday + timedelta(days=i) for i in range(7)]
+
+            elif exp_scope == "Semaine choisie":
+                exp_dates = [_chosen_monday + timedelta(days=i) for i in range(7)]
+
+            elif exp_scope == "Mois en cours":
+                import calendar as cal_module
+                first     = exp_today.replace(day=1)
+                last      = exp_today.replace(
+                    day=cal_module.monthrange(exp_today.year, exp_today.month)[1])
+                exp_dates = [
+                    first + timedelta(days=i)
+                    for i in range((last - first).days + 1)
+                ]
+
+            elif exp_scope == "4 semaines à venir":
+                ws_e      = exp_today - timedelta(days=exp_today.weekday())
+                exp_dates = [ws_e + timedelta(days=i) for i in range(28)]
+
+            else:
+                all_d = []
+                for p in st.session_state.prelevements:
+                    try:
+                        all_d.append(datetime.fromisoformat(p["date"]).date())
+                    except Exception:
+                        pass
+                for s in st.session_state.schedules:
+                    try:
+                        all_d.append(datetime.fromisoformat(s["due_date"]).date())
+                    except Exception:
+                        pass
+                exp_dates = (
+                    [min(all_d) + timedelta(days=i)
+                     for i in range((max(all_d) - min(all_d)).days + 1)]
+                    if all_d
+                    else [exp_today + timedelta(days=i) for i in range(7)]
+                )
+
+            if only_working:
+                exp_dates = [d for d in exp_dates if is_working_day(d)]
+
+            # ── Construction du plan Excel ────────────────────────────────
+            # ── FIX 3 : cohérence des comptages inter-périodes ────────────
+            # Avant : les clés de planning_skips étaient converties en date objects
+            # → _redistribute_skips faisait day.isoformat() comme clé → zéro match
+            # → aucun skip appliqué → comptages divergents selon la période choisie.
+            # Fix : on passe planning_skips avec ses clés ISO string d'origine.
+            # Même modèle que le calendrier : horizon glissant pour les mois qu'il
+            # couvre (reports de fin de mois compris), mois par mois au-delà
+            if exp_dates:
+                xl_plan_raw, xl_plan = _planning_range(min(exp_dates), max(exp_dates))
+            else:
+                xl_plan_raw, xl_plan = {}, {}
+
+            xlsx_bytes = _generate_excel_planning(
+                exp_dates, xl_plan, xl_plan_raw, exp_today,
+                only_working=only_working, include_nonfaits=include_nonfaits,
+            )
+            fname = f"planning_URC_{exp_today.strftime('%Y%m%d')}.xlsx"
+            st.download_button(
+                "⬇️ Télécharger le planning Excel",
+                data=xlsx_bytes,
+                file_name=fname,
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                use_container_width=True,
+            )
+            st.success(
+                f"✅ Fichier **{fname}** généré — "
+                f"Onglets : **Planning Semaine** (matriciel) · **Non-faits** (récapitulatif)"
+            )
@@ -0,0 +1,1612 @@
+"""Onglet Identification & Surveillance : nouveau prélèvement, lectures J2/J7 et
+identifications en attente."""
+import uuid
+from datetime import date, datetime
+
+import streamlit as st
+
+from urc.perf import _profiled
+from urc.constants import LIST_PAGE_SIZES
+from urc.workdays import next_working_day_offset
+from urc.storage import (
+    _repo, find_germ_match, save_archived_samples, save_pending_identifications,
+    save_prelevements, save_schedules, save_surveillance,
+)
+from urc.readings import _reading_badges, _reschedule_sample, _schedule_due
+from urc.analysis import _evaluate_score, _get_germ_score
+from urc.tabs.mesures import _loc_crit_label, _render_mesures_correctives
+
+def render():
+    today = datetime.today().date()
+    st.markdown("### 🔍 Identification & Surveillance microbiologique")
+
+    # ── Helper : jours depuis le prélèvement ─────────────────────────────────
+    def _days_since_sample(s):
+        smp = _repo().prelevement(s["sample_id"])
+        if not smp or not smp.get("date"):
+            return 999
+        return (today - date.fromisoformat(smp["date"])).days
+
+    _j2_red, _j2_orange, _j7_red, _j7_orange, _id_red = _reading_badges(today)
+
+    _dot_j2 = " 🔴" if _j2_red > 0 else (" 🟠" if _j2_orange > 0 else "")
+    _dot_j7 = " 🔴" if _j7_red > 0 else (" 🟠" if _j7_orange > 0 else "")
+    _dot_id = " 🔴" if _id_red > 0 else ""
+
+    tab_nouveau, tab_j2, tab_j7, tab_ident = st.tabs([
+        "🧪 Nouveau prélèvement",
+        f"📖 Lecture J2{_dot_j2}",
+        f"📗 Lecture J7{_dot_j7}",
+        f"🔴 Identifications en attente{_dot_id}",
+    ])
+
+    # ──────────────────────────────────────────────────────────────────────────
+    # HELPERS GLOBAUX
+    # ──────────────────────────────────────────────────────────────────────────
+    def _fix_qr_input(text: str) -> str:
+        def _fix_encoding(s):
+            try:
+                return s.encode("latin-1").decode("utf-8")
+            except (UnicodeDecodeError, UnicodeEncodeError):
+                return s
+
+        def _fix_azerty(s):
+            AZERTY_MAP = {
+                "q": "a", "z": "w", "a": "q", "w": "z",
+                "Q": "A", "Z": "W", "A": "Q", "W": "Z",
+                "M": ":", ";": "m",
+                "&": "1", "é": "2", '"': "3", "'": "4",
+                "(": "5", "-": "6", "è": "7", "_": "8",
+                "ç": "9", "à": "0",
+            }
+            return "".join(AZERTY_MAP.get(c, c) for c in s)
+
+        text = _fix_encoding(text)
+        if not text.startswith("{"):
+            text = _fix_azerty(text)
+        return text
+
+    def _paginate(items, key, first_late=None, reset_on=None):
+        """Tranche visible d'une liste longue : seuls ces éléments créent des widgets.
+        first_late : position du premier élément en retard (bouton de saut) ;
+        reset_on : tri/filtre courant, la pagination revient en page 1 s'il change."""
+        if len(items) <= LIST_PAGE_SIZES[0]:
+            return items
+        page_key, size_key, first_key = f"page_{key}", f"page_size_{key}", f"page_first_{key}"
+        if st.session_state.get(f"page_reset_{key}") != reset_on:
+            st.session_state[f"page_reset_{key}"] = reset_on
+            st.session_state[first_key] = 0
+        if size_key not in st.session_state:
+            st.session_state[size_key] = LIST_PAGE_SIZES[1]
+        size    = st.session_state[size_key]
+        n_pages = (len(items) - 1) // size + 1
+        # la page suit le premier élément visible (stable si la taille de page change)
+        page = min(st.session_state.get(first_key, 0) // size, n_pages - 1)
+        c_prev, c_info, c_next, c_late, c_size = st.columns([1, 2, 1, 2, 1.5])
+        with c_prev:
+            if st.button("◀", key=f"{page_key}_prev", disabled=page == 0,
+                         use_container_width=True):
+                page -= 1
+        with c_next:
+            if st.button("▶", key=f"{page_key}_next", disabled=page >= n_pages - 1,
+                         use_container_width=True):
+                page += 1
+        with c_late:
+            if first_late is not None and st.button("⏭️ Premier retard", key=f"{page_key}_late",
+                                                    use_container_width=True):
+                page = first_late // size
+        with c_size:
+            st.selectbox("Par page", LIST_PAGE_SIZES, key=size_key,
+                         format_func=lambda v: f"{v} / page", label_visibility="collapsed")
+        page = max(0, min(page, n_pages - 1))
+        st.session_state[first_key] = page * size
+        with c_info:
+            st.markdown(
+                f"<div style='text-align:center;font-size:.8rem;color:#475569;margin-top:8px'>"
+                f"Page {page + 1} / {n_pages} · {page * size + 1}–{min((page + 1) * size, len(items))}"
+                f" sur {len(items)}</div>", unsafe_allow_html=True)
+        return items[page * size:(page + 1) * size]
+
+    if "prelev_mode" not in st.session_state:
+        st.session_state["prelev_mode"] = "manuel"
+    if "qr_counter" not in st.session_state:
+        st.session_state["qr_counter"] = 0
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # ONGLET 1 — NOUVEAU PRÉLÈVEMENT
+    # ══════════════════════════════════════════════════════════════════════════
+    with tab_nouveau:
+        tog1, tog2 = st.columns(2)
+        with tog1:
+            if st.button("✏️  Saisie manuelle", use_container_width=True,
+                         type="primary" if st.session_state["prelev_mode"] == "manuel" else "secondary",
+                         key="tog_manuel"):
+                st.session_state["prelev_mode"] = "manuel"
+                st.rerun()
+        with tog2:
+            if st.button("📷  Scan QR code", use_container_width=True,
+                         type="primary" if st.session_state["prelev_mode"] == "scan" else "secondary",
+                         key="tog_scan"):
+                st.session_state["prelev_mode"] = "scan"
+                st.rerun()
+
+        st.markdown("<div style='height:8px'></div>", unsafe_allow_html=True)
+
+        # ── MODE MANUEL ───────────────────────────────────────────────────────
+        if st.session_state["prelev_mode"] == "manuel":
+
+            # ── compteur de réinitialisation (même mécanique que le scan QR) ──
+            if "manuel_counter" not in st.session_state:
+                st.session_state["manuel_counter"] = 0
+            _mc = st.session_state["manuel_counter"]   # alias court
+
+            if not st.session_state.points:
+                st.info("Aucun point de prélèvement défini — allez dans **Paramètres → Points de prélèvement**.")
+            else:
+                p_col1, p_col2 = st.columns([3, 2])
+                with p_col1:
+                    point_labels = [
+                        f"{pt['label']} — {pt.get('type','?')} — "
+                        f"{'Critique' if pt.get('location_criticality',1)==4 else 'Important' if pt.get('location_criticality',1)==3 else 'Modéré' if pt.get('location_criticality',1)==2 else 'Limité'}"
+                        for pt in st.session_state.points
+                    ]
+                    sel_idx = st.selectbox(
+                        "Point de prélèvement",
+                        list(range(len(point_labels))),
+                        format_func=lambda i: point_labels[i],
+                        key=f"new_prelev_point_{_mc}")
+                    selected_point = st.session_state.points[sel_idx]
+                    pt_type     = selected_point.get("type", "—")
+                    pt_loc_crit = int(selected_point.get("location_criticality", 1))
+                    pt_gelose   = selected_point.get("gelose", "—")
+                    pt_room     = selected_point.get("room_class", "—")
+                    type_icon   = "💨" if pt_type == "Air" else "🧴"
+                    lc_col      = {"1": "#22c55e", "2": "#f59e0b", "3": "#ef4444"}.get(str(pt_loc_crit), "#94a3b8")
+                    lc_lbl      = _loc_crit_label(pt_loc_crit)
+                    st.markdown(f"""
+                    <div style="background:#f0f9ff;border:1px solid #bae6fd;border-radius:8px;padding:12px;margin-top:4px">
+                    <div style="font-size:.75rem;font-weight:700;color:#0369a1;margin-bottom:8px">{type_icon} Détails du point sélectionné</div>
+                    <div style="display:grid;grid-template-columns:1fr 1fr;gap:6px">
+                        <div style="background:#fff;border-radius:6px;padding:8px;border:1px solid #e0f2fe">
+                        <div style="font-size:.6rem;color:#64748b;text-transform:uppercase">Type</div>
+                        <div style="font-size:.85rem;font-weight:700;color:#0f172a;margin-top:2px">{pt_type}</div>
+                        </div>
+                        <div style="background:#dbeafe;border-radius:6px;padding:8px;border:1px solid #93c5fd">
+                        <div style="font-size:.6rem;color:#1e40af;text-transform:uppercase">Classe ISO / GMP</div>
+                        <div style="font-size:.85rem;font-weight:800;color:#1e40af;margin-top:2px">{pt_room if pt_room and pt_room != '—' else '—'}</div>
+                        </div>
+                        <div style="background:{lc_col}11;border-radius:6px;padding:8px;border:1px solid {lc_col}44">
+                        <div style="font-size:.6rem;color:#64748b;text-transform:uppercase">Criticité lieu</div>
+                        <div style="font-size:.85rem;font-weight:700;color:{lc_col};margin-top:2px">Nv.{pt_loc_crit} — {lc_lbl}</div>
+                        </div>
+                        <div style="background:#fff;border-radius:6px;padding:8px;border:1px solid #e0f2fe">
+                        <div style="font-size:.6rem;color:#64748b;text-transform:uppercase">Gélose</div>
+                        <div style="font-size:.85rem;font-weight:700;color:#1d4ed8;margin-top:2px">🧫 {pt_gelose}</div>
+                        </div>
+                    </div>
+                    </div>""", unsafe_allow_html=True)
+
+                with p_col2:
+                    oper_list = [
+                        o["nom"] + (" — " + o.get("profession", "") if o.get("profession") else "")
+                        for o in st.session_state.operators
+                    ]
+                    if oper_list:
+                        oper_sel = st.selectbox("Opérateur", ["— Sélectionner —"] + oper_list,
+                                                key=f"new_prelev_oper_sel_{_mc}")
+                        p_oper = oper_sel if oper_sel != "— Sélectionner —" else ""
+                    else:
+                        st.info("Aucun opérateur — ajoutez-en dans Paramètres")
+                        p_oper = st.text_input("Opérateur (manuel)", placeholder="Nom",
+                                               key=f"new_prelev_oper_manual_{_mc}")
+                    p_date = st.date_input("Date prélèvement", value=datetime.today(),
+                                           key=f"new_prelev_date_{_mc}")
+                    j2_date_calc = next_working_day_offset(p_date, 2)
+                    j7_date_calc = next_working_day_offset(p_date, 7)
+                    st.markdown(f"""
+                    <div style="background:#f0fdf4;border:1px solid #86efac;border-radius:8px;padding:8px;margin-top:6px;font-size:.7rem;color:#166534">
+                    📅 J2 (2 jours ouvrés) : <strong>{j2_date_calc.strftime('%d/%m/%Y')}</strong><br>
+                    📅 J7 (7 jours calendaires) : <strong>{j7_date_calc.strftime('%d/%m/%Y')}</strong>
+                    </div>""", unsafe_allow_html=True)
+                    p_commentaire = st.text_area("💬 Commentaire", placeholder="Remarque, contexte...",
+                                                 height=70, key=f"new_prelev_commentaire_{_mc}")
+
+                p_isolateur = ""
+                p_poste     = "Poste 1"
+                if str(pt_room).strip().upper() == "A":
+                    st.markdown(
+                        "<div style='background:#fef9c3;border:1px solid #fde047;border-radius:8px;"
+                        "padding:10px 14px;margin-top:8px'>"
+                        "<div style='font-size:.7rem;font-weight:700;color:#854d0e;margin-bottom:8px'>"
+                        "🔬 Paramètres Zone Classe A</div>",
+                        unsafe_allow_html=True)
+                    iso_col, poste_col = st.columns(2)
+                    with iso_col:
+                        p_isolateur = st.radio("Isolateur",
+                                               ["Iso 16/0724", "Iso 14/07169"],
+                                               index=None, horizontal=True,
+                                               key=f"new_prelev_isolateur_{_mc}")
+                    with poste_col:
+                        p_poste = st.radio("Poste",
+                                           ["Poste 1", "Poste 2", "Commun"],
+                                           index=None, horizontal=True,
+                                           key=f"new_prelev_poste_{_mc}")
+                    st.markdown("</div>", unsafe_allow_html=True)
+
+                if st.button("💾 Enregistrer le prélèvement", use_container_width=True,
+                            key=f"save_prelev_{_mc}", type="primary"):
+                    if not p_oper:
+                        st.error("⚠️ Veuillez sélectionner un opérateur.")
+                    elif str(pt_room).strip().upper() == "A" and not p_isolateur:
+                        st.error("⚠️ Veuillez sélectionner un isolateur.")
+                    elif str(pt_room).strip().upper() == "A" and not p_poste:
+                        st.error("⚠️ Veuillez sélectionner un poste.")
+                    else:
+                        pid = f"s{len(st.session_state.prelevements)+1}_{int(datetime.now().timestamp())}"
+                        is_zone_a = str(pt_room).strip().upper() == "A"
+
+                        sample = {
+                            "id":                   pid,
+                            "label":                selected_point["label"],
+                            "type":                 selected_point.get("type"),
+                            "gelose":               selected_point.get("gelose", "—"),
+                            "room_class":           selected_point.get("room_class", ""),
+                            "location_criticality": pt_loc_crit,
+                            "operateur":            p_oper if p_oper else "Non renseigné",
+                            "date":                 str(p_date) if p_date else str(today),
+                            "archived":             False,
+                            "num_isolateur":        p_isolateur if is_zone_a else "",
+                            "poste":                p_poste     if is_zone_a else "",
+                            "commentaire":          p_commentaire if p_commentaire else "",
+                            "created_via":          "manuel",
+                        }
+                        st.session_state.prelevements.append(sample)
+                        save_prelevements(st.session_state.prelevements)
+                        for when, due in [("J2", j2_date_calc), ("J7", j7_date_calc)]:
+                            st.session_state.schedules.append({
+                                "id":        f"sch_{pid}_{when}",
+                                "sample_id": pid,
+                                "label":     sample["label"],
+                                "due_date":  due.isoformat(),
+                                "when":      when,
+                                "status":    "pending",
+                            })
+                        save_schedules(st.session_state.schedules)
+                        iso_info = f" · {p_isolateur} · {p_poste}" if is_zone_a else ""
+                        st.success(
+                            f"✅ **{sample['label']}** enregistré{iso_info} !\n"
+                            f"J2 → {j2_date_calc.strftime('%d/%m/%Y')} | "
+                            f"J7 → {j7_date_calc.strftime('%d/%m/%Y')}"
+                        )
+                        # ── réinitialisation du formulaire ──────────────────
+                        st.session_state["manuel_counter"] += 1
+                        st.rerun()
+                        
+                # ── FORMULAIRE D'ÉDITION ──────────────────────────────────────
+                _edit_id = st.session_state.get("edit_prelev_id")
+                if _edit_id:
+                    _edit_smp = _repo().prelevement(_edit_id)
+                    if _edit_smp:
+                        st.markdown(
+                            "<div style='background:#fffbeb;border:2px solid #fcd34d;"
+                            "border-radius:12px;padding:16px 20px;margin-top:12px'>",
+                            unsafe_allow_html=True)
+                        st.markdown(
+                            f"<div style='font-size:.8rem;font-weight:700;color:#92400e;"
+                            f"margin-bottom:12px'>✏️ Modifier — {_edit_smp['label']}</div>",
+                            unsafe_allow_html=True)
+
+                        e_col1, e_col2 = st.columns([3, 2])
+
+                        with e_col1:
+                            # point de prélèvement
+                            _edit_pt_idx = next(
+                                (i for i, pt in enumerate(st.session_state.points)
+                                 if pt["label"] == _edit_smp.get("label")), 0)
+                            e_sel_idx = st.selectbox(
+                                "Point de prélèvement",
+                                list(range(len(point_labels))),
+                                format_func=lambda i: point_labels[i],
+                                index=_edit_pt_idx,
+                                key=f"edit_point_{_edit_id}")
+                            e_pt       = st.session_state.points[e_sel_idx]
+                            e_room     = e_pt.get("room_class", "")
+                            e_loc_crit = int(e_pt.get("location_criticality", 1))
+                            e_is_a     = str(e_room).strip().upper() == "A"
+
+                        with e_col2:
+                            # opérateur
+                            if oper_list:
+                                # trouver l'index actuel dans la liste
+                                _cur_oper = _edit_smp.get("operateur", "")
+                                _oper_options = ["— Sélectionner —"] + oper_list
+                                _oper_idx = next(
+                                    (i for i, o in enumerate(_oper_options) if o == _cur_oper),
+                                    0)
+                                e_oper_sel = st.selectbox(
+                                    "Opérateur", _oper_options,
+                                    index=_oper_idx,
+                                    key=f"edit_oper_{_edit_id}")
+                                e_oper = e_oper_sel if e_oper_sel != "— Sélectionner —" else ""
+                            else:
+                                e_oper = st.text_input(
+                                    "Opérateur", value=_edit_smp.get("operateur", ""),
+                                    key=f"edit_oper_manual_{_edit_id}")
+
+                            # date
+                            try:
+                                _cur_date = date.fromisoformat(_edit_smp.get("date", str(today)))
+                            except (ValueError, TypeError):
+                                _cur_date = today
+                            e_date = st.date_input(
+                                "Date prélèvement", value=_cur_date,
+                                key=f"edit_date_{_edit_id}")
+
+                            # commentaire
+                            e_comment = st.text_area(
+                                "💬 Commentaire",
+                                value=_edit_smp.get("commentaire", ""),
+                                height=60,
+                                key=f"edit_comment_{_edit_id}")
+
+                        # isolateur / poste si classe A
+                        e_isolateur = _edit_smp.get("num_isolateur", "")
+                        e_poste     = _edit_smp.get("poste", "")
+                        if e_is_a:
+                            st.markdown(
+                                "<div style='background:#fef9c3;border:1px solid #fde047;"
+                                "border-radius:8px;padding:8px 12px;margin-top:6px;"
+                                "font-size:.7rem;font-weight:700;color:#854d0e;"
+                                "margin-bottom:6px'>🔬 Paramètres Zone Classe A</div>",
+                                unsafe_allow_html=True)
+                            _iso_opts   = ["Iso 16/0724", "Iso 14/07169"]
+                            _poste_opts = ["Poste 1", "Poste 2", "Commun"]
+                            iso_c, poste_c = st.columns(2)
+                            with iso_c:
+                                _iso_idx = _iso_opts.index(e_isolateur) if e_isolateur in _iso_opts else None
+                                e_isolateur = st.radio(
+                                    "Isolateur", _iso_opts,
+                                    index=_iso_idx, horizontal=True,
+                                    key=f"edit_iso_{_edit_id}")
+                            with poste_c:
+                                _poste_idx = _poste_opts.index(e_poste) if e_poste in _poste_opts else None
+                                e_poste = st.radio(
+                                    "Poste", _poste_opts,
+                                    index=_poste_idx, horizontal=True,
+                                    key=f"edit_poste_{_edit_id}")
+
+                        # recalcul des dates J2/J7 si la date change
+                        e_j2 = next_working_day_offset(e_date, 2)
+                        e_j7 = next_working_day_offset(e_date, 7)
+                        if e_date != _cur_date:
+                            st.markdown(
+                                f"<div style='background:#fff7ed;border:1px solid #fed7aa;"
+                                f"border-radius:8px;padding:6px 12px;font-size:.7rem;"
+                                f"color:#9a3412;margin-top:4px'>"
+                                f"⚠️ La date change — les échéances seront recalculées :<br>"
+                                f"J2 → <strong>{e_j2.strftime('%d/%m/%Y')}</strong> &nbsp;·&nbsp; "
+                                f"J7 → <strong>{e_j7.strftime('%d/%m/%Y')}</strong></div>",
+                                unsafe_allow_html=True)
+
+                        eb1, eb2 = st.columns([3, 1])
+                        with eb1:
+                            if st.button("💾 Sauvegarder les modifications",
+                                         type="primary", use_container_width=True,
+                                         key=f"edit_save_{_edit_id}"):
+                                if not e_oper:
+                                    st.error("⚠️ Veuillez sélectionner un opérateur.")
+                                elif e_is_a and not e_isolateur:
+                                    st.error("⚠️ Veuillez sélectionner un isolateur.")
+                                elif e_is_a and not e_poste:
+                                    st.error("⚠️ Veuillez sélectionner un poste.")
+                                else:
+                                    # mise à jour du prélèvement
+                                    _edit_smp["label"]                = e_pt["label"]
+                                    _edit_smp["type"]                 = e_pt.get("type")
+                                    _edit_smp["gelose"]               = e_pt.get("gelose", "—")
+                                    _edit_smp["room_class"]           = e_room
+                                    _edit_smp["location_criticality"] = e_loc_crit
+                                    _edit_smp["operateur"]            = e_oper
+                                    _edit_smp["date"]                 = str(e_date)
+                                    _edit_smp["commentaire"]          = e_comment
+                                    _edit_smp["num_isolateur"]        = e_isolateur if e_is_a else ""
+                                    _edit_smp["poste"]                = e_poste     if e_is_a else ""
+                                    save_prelevements(st.session_state.prelevements)
+
+                                    # recalcul schedules si la date a changé
+                                    if e_date != _cur_date:
+                                        if _reschedule_sample(_edit_smp, e_pt["label"]):
+                                            save_schedules(st.session_state.schedules)
+
+                                    st.session_state.pop("edit_prelev_id", None)
+                                    st.success(f"✅ Prélèvement **{e_pt['label']}** mis à jour.")
+                                    st.rerun()
+                        with eb2:
+                            if st.button("✕ Annuler", use_container_width=True,
+                                         key=f"edit_cancel_{_edit_id}"):
+                                st.session_state.pop("edit_prelev_id", None)
+                                st.rerun()
+
+                        st.markdown("</div>", unsafe_allow_html=True)
+
+                st.divider()
+                
+                st.markdown("#### 📋 Prélèvements en cours")
+                actifs = [s for s in st.session_state.prelevements if not s.get("archived")]
+                with st.expander(f"📋 Prélèvements en cours ({len(actifs)})", expanded=False):
+                    if not actifs:
+                        st.info("Aucun prélèvement en cours.")
+                    for samp in _paginate(actifs, "actifs"):
+                        col_info, col_edit, col_del = st.columns([5, 1, 1])
+                        with col_info:
+                            loc_c    = int(samp.get("location_criticality", 1))
+                            lc_col_r = {"1": "#22c55e", "2": "#f59e0b", "3": "#ef4444"}.get(str(loc_c), "#94a3b8")
+                            room_cl  = samp.get("room_class", "") or ""
+                            room_badge = (
+                                f"<span style='background:#dbeafe;color:#1e40af;border:1px solid #93c5fd;"
+                                f"border-radius:4px;padding:1px 6px;font-size:.72rem;font-weight:800;"
+                                f"margin-left:4px'>Cl.{room_cl}</span>"
+                                if room_cl else ""
+                            )
+                            via_badge = (
+                                "<span style='background:#ede9fe;color:#5b21b6;border-radius:4px;"
+                                "padding:1px 6px;font-size:.65rem;margin-left:4px'>QR</span>"
+                                if samp.get("created_via") == "qr_scan" else ""
+                            )
+                            # badge isolateur/poste pour classe A
+                            _iso = samp.get("num_isolateur", "")
+                            _poste = samp.get("poste", "")
+                            iso_badge = (
+                                f"<span style='background:#fef9c3;color:#854d0e;border:1px solid #fde047;"
+                                f"border-radius:4px;padding:1px 6px;font-size:.65rem;margin-left:4px'>"
+                                f"🔬 {_iso} · {_poste}</span>"
+                                if _iso else ""
+                            )
+                            _comment_html = (
+                                f"<div style='font-size:.72rem;color:#6366f1;margin-top:3px'>"
+                                f"💬 {samp['commentaire']}</div>"
+                                if samp.get("commentaire") else ""
+                            )
+                            st.markdown(
+                                f"<div style='background:#fff;border:1.5px solid #e2e8f0;"
+                                f"border-radius:10px;padding:10px 16px;margin-bottom:6px'>"
+                                f"<span style='font-weight:700'>{samp['label']}</span>"
+                                f"{room_badge}{via_badge}{iso_badge} "
+                                f"<span style='color:#64748b;font-size:.8rem'>— {samp.get('type','—')} · "
+                                f"<span style='color:{lc_col_r};font-weight:600'>Nv.{loc_c}</span> · "
+                                f"{samp.get('date','—')} · {samp.get('operateur','—')}</span>"
+                                f"{_comment_html}</div>",
+                                unsafe_allow_html=True)
+                        with col_edit:
+                            if st.button("✏️", key=f"edit_prelev_btn_{samp['id']}",
+                                         use_container_width=True):
+                                st.session_state["edit_prelev_id"] = samp["id"]
+                                st.rerun()
+                        with col_del:
+                            if st.button("🗑️", key=f"del_prelev_btn_{samp['id']}",
+                                         use_container_width=True):
+                                sid = samp["id"]
+                                st.session_state.schedules    = [x for x in st.session_state.schedules    if x.get("sample_id") != sid]
+                                st.session_state.prelevements = [x for x in st.session_state.prelevements if x["id"] != sid]
+                                st.session_state.pending_identifications = [
+                                    x for x in st.session_state.pending_identifications
+                                    if x.get("sample_id") != sid
+                                ]
+                                save_schedules(st.session_state.schedules)
+                                save_prelevements(st.session_state.prelevements)
+                                save_pending_identifications(st.session_state.pending_identifications)
+                                st.success(f"🗑️ Prélèvement **{samp['label']}** supprimé.")
+                                st.rerun()
+
+        # ── MODE SCAN QR ──────────────────────────────────────────────────────
+        else:
+            st.markdown("""
+            <div style="background:linear-gradient(135deg,#eff6ff,#dbeafe);border:1.5px solid #93c5fd;
+            border-radius:14px;padding:14px 18px;margin-bottom:14px">
+            <div style="font-weight:700;color:#1e40af;font-size:.9rem;margin-bottom:6px">🔳 Comment scanner</div>
+            <div style="font-size:.8rem;color:#1e293b;line-height:1.8">
+                <strong>1.</strong> Imprimez les étiquettes depuis <em>Planning → Planning mensuel</em> 🖨️<br>
+                <strong>2.</strong> Cliquez dans le champ ci-dessous, puis scannez l'étiquette<br>
+                <strong>3.</strong> Le formulaire se pré-remplit — confirmez et enregistrez
+            </div></div>""", unsafe_allow_html=True)
+
+            qr_raw_input = st.text_input(
+                "Zone de scan",
+                key=f"qr_scan_input_{st.session_state['qr_counter']}",
+                placeholder="Cliquez ici puis scannez l'étiquette QR...",
+                label_visibility="collapsed",
+                help="Si des caractères spéciaux apparaissent, configurez la douchette en layout EN-US.")
+
+            qr_raw = qr_raw_input.strip() if qr_raw_input else ""
+            if qr_raw:
+                qr_fixed = _fix_qr_input(qr_raw)
+                if qr_fixed != qr_raw:
+                    st.caption("🔄 Correction automatique appliquée.")
+                
+
+            _scanned_data = None
+            if qr_raw:
+                _found = next((p for p in st.session_state.points
+                               if str(p["id"]) == qr_raw), None)
+                if _found:
+                    _scanned_data = _found
+                else:
+                    st.markdown(
+                        "<div style='background:#fffbeb;border:1.5px solid #fcd34d;"
+                        "border-radius:10px;padding:12px 16px;margin-top:8px'>"
+                        "<div style='font-weight:700;color:#92400e'>⚠️ Numéro non reconnu</div>"
+                        "</div>", unsafe_allow_html=True)
+
+            if _scanned_data:
+                _lbl        = _scanned_data.get("label", "")
+                _type       = _scanned_data.get("type", "")
+                _rc         = _scanned_data.get("room_class", "")
+                _lc         = int(_scanned_data.get("location_criticality", 1))
+                _gel        = _scanned_data.get("gelose", "")
+                _is_classea = _rc.strip().upper() == "A"
+                lc_col_s    = {"1": "#22c55e", "2": "#f59e0b", "3": "#ef4444"}.get(str(_lc), "#94a3b8")
+
+                st.markdown(
+                    f"<div style='background:linear-gradient(135deg,#f0fdf4,#dcfce7);"
+                    f"border:2.5px solid #22c55e;border-radius:14px;padding:16px 20px;margin:10px 0'>"
+                    f"<div style='font-size:1rem;font-weight:700;color:#166534;margin-bottom:10px'>"
+                    f"✅ Point reconnu — {_lbl}</div>"
+                    f"<div style='display:grid;grid-template-columns:repeat(4,1fr);gap:8px'>"
+                    f"<div style='background:#fff;border-radius:8px;padding:8px;text-align:center;"
+                    f"border:1px solid #86efac'><div style='font-size:.58rem;color:#64748b;"
+                    f"text-transform:uppercase'>Type</div>"
+                    f"<div style='font-size:.85rem;font-weight:700'>{'💨' if _type=='Air' else '🧴'} {_type}</div></div>"
+                    f"<div style='background:#dbeafe;border-radius:8px;padding:8px;text-align:center;"
+                    f"border:1px solid #93c5fd'><div style='font-size:.58rem;color:#1e40af;"
+                    f"text-transform:uppercase'>Classe</div>"
+                    f"<div style='font-size:.85rem;font-weight:800;color:#1e40af'>{_rc or '—'}</div></div>"
+                    f"<div style='background:{lc_col_s}11;border-radius:8px;padding:8px;text-align:center;"
+                    f"border:1px solid {lc_col_s}44'><div style='font-size:.58rem;color:#64748b;"
+                    f"text-transform:uppercase'>Criticité</div>"
+                    f"<div style='font-size:.85rem;font-weight:700;color:{lc_col_s}'>Nv.{_lc}</div></div>"
+                    f"<div style='background:#fff;border-radius:8px;padding:8px;text-align:center;"
+                    f"border:1px solid #86efac'><div style='font-size:.58rem;color:#64748b;"
+                    f"text-transform:uppercase'>Gélose</div>"
+                    f"<div style='font-size:.85rem;font-weight:700;color:#1d4ed8'>🧫 {_gel[:14]}</div></div>"
+                    f"</div></div>", unsafe_allow_html=True)
+
+                sf1, sf2 = st.columns(2)
+                with sf1:
+                    oper_list_s = [
+                        o["nom"] + (" — " + o.get("profession", "") if o.get("profession") else "")
+                        for o in st.session_state.operators
+                    ]
+                    if oper_list_s:
+                        scan_oper = st.selectbox("👤 Opérateur *",
+                                                 ["— Sélectionner —"] + oper_list_s,
+                                                 key="scan_oper_sel")
+                        scan_oper = scan_oper if scan_oper != "— Sélectionner —" else ""
+                    else:
+                        scan_oper = st.text_input("👤 Opérateur *", placeholder="Nom",
+                                                  key="scan_oper_manual")
+                    scan_date = st.date_input("📅 Date", value=datetime.today(), key="scan_date")
+
+                with sf2:
+                    scan_isolateur = ""
+                    scan_poste     = ""
+                    if _is_classea:
+                        st.markdown(
+                            "<div style='background:#fef9c3;border:1px solid #fde047;"
+                            "border-radius:8px;padding:8px 12px;margin-bottom:6px;"
+                            "font-size:.7rem;font-weight:700;color:#854d0e'>🔬 Classe A</div>",
+                            unsafe_allow_html=True)
+                        scan_isolateur = st.radio("Isolateur",
+                                                  ["Iso 16/0724", "Iso 14/07169"],
+                                                  index=None, horizontal=True,
+                                                  key="scan_iso_sel")
+                        scan_poste = st.radio("Poste",
+                                              ["Poste 1", "Poste 2", "Commun"],
+                                              index=None, horizontal=True,
+                                              key="scan_poste_sel")
+                    scan_comment = st.text_area("💬 Commentaire", placeholder="Remarques...",
+                                               height=80, key="scan_comment")
+
+                _scan_j2 = next_working_day_offset(scan_date, 2)
+                _scan_j7 = next_working_day_offset(scan_date, 7)
+                st.markdown(
+                    f"<div style='background:#f0fdf4;border:1px solid #86efac;border-radius:8px;"
+                    f"padding:8px 14px;font-size:.72rem;color:#166534;margin-bottom:10px'>"
+                    f"📅 J2 → <strong>{_scan_j2.strftime('%d/%m/%Y')}</strong> &nbsp;·&nbsp; "
+                    f"📅 J7 → <strong>{_scan_j7.strftime('%d/%m/%Y')}</strong></div>",
+                    unsafe_allow_html=True)
+
+                sbc1, sbc2 = st.columns([3, 1])
+                with sbc1:
+                    if st.button(f"💾 Enregistrer — {_lbl}", use_container_width=True,
+                                 type="primary", key="scan_save_btn"):
+                        if not scan_oper:
+                            st.error("⚠️ Veuillez sélectionner un opérateur.")
+                        elif _is_classea and not scan_isolateur:
+                            st.error("⚠️ Veuillez sélectionner un isolateur.")
+                        elif _is_classea and not scan_poste:
+                            st.error("⚠️ Veuillez sélectionner un poste.")
+                        else:
+                            _pid = f"s{len(st.session_state.prelevements)+1}_{int(datetime.now().timestamp())}"
+                            _sample_scan = {
+                                "id": _pid, "label": _lbl, "type": _type, "gelose": _gel,
+                                "room_class": _rc, "location_criticality": _lc,
+                                "operateur": scan_oper, "date": str(scan_date),
+                                "archived": False,
+                                "num_isolateur": scan_isolateur if _is_classea else "",
+                                "poste":         scan_poste     if _is_classea else "",
+                                "commentaire": scan_comment or "",
+                                "created_via": "qr_scan",
+                            }
+                            st.session_state.prelevements.append(_sample_scan)
+                            save_prelevements(st.session_state.prelevements)
+                            for _when, _due in [("J2", _scan_j2), ("J7", _scan_j7)]:
+                                st.session_state.schedules.append({
+                                    "id": f"sch_{_pid}_{_when}", "sample_id": _pid,
+                                    "label": _lbl, "due_date": _due.isoformat(),
+                                    "when": _when, "status": "pending",
+                                })
+                            save_schedules(st.session_state.schedules)
+                            iso_info = f" · {scan_isolateur} · {scan_poste}" if _is_classea else ""
+                            st.success(
+                                f"✅ **{_lbl}** enregistré{iso_info}\n"
+                                f"J2 → {_scan_j2.strftime('%d/%m/%Y')} · "
+                                f"J7 → {_scan_j7.strftime('%d/%m/%Y')}"
+                            )
+                            st.session_state["qr_counter"] += 1
+                            st.rerun()
+                with sbc2:
+                    if st.button("✕ Annuler", use_container_width=True, key="scan_cancel_btn"):
+                        st.session_state["qr_counter"] += 1
+                        st.rerun()
+
+    # ──────────────────────────────────────────────────────────────────────────
+    # HELPERS LECTURES
+    # ──────────────────────────────────────────────────────────────────────────
+    def _sort_schedules(schedule_list, sort_key):
+        def _get_smp(s):
+            return _repo().prelevement(s["sample_id"]) or {}
+        if sort_key == "label":
+            return sorted(schedule_list, key=lambda s: s.get("label", "").lower())
+        elif sort_key == "operateur":
+            return sorted(schedule_list, key=lambda s: _get_smp(s).get("operateur", "").lower())
+        elif sort_key == "date_prelevement":
+            return sorted(schedule_list, key=lambda s: _get_smp(s).get("date", "9999-12-31"))
+        elif sort_key == "echeance":
+            return sorted(schedule_list, key=lambda s: s.get("due_date", "9999-12-31"))
+        return schedule_list
+
+    def _render_lecture_card(s, tab_prefix=""):
+        sched_date = _schedule_due(s) or date.max
+        days_since = _days_since_sample(s)
+        min_days   = 7 if s["when"] == "J7" else 0
+        is_late    = sched_date <= today and days_since >= min_days
+
+        border_col = "#ef4444" if is_late else "#3b82f6"
+        bg_col     = "#fef2f2" if is_late else "#eff6ff"
+        badge_col  = "#dc2626" if is_late else "#1d4ed8"
+
+        if is_late:
+            status_txt = "EN RETARD"
+        elif s["when"] == "J7" and days_since < 7:
+            status_txt = f"disponible dans {7 - days_since}j"
+        else:
+            status_txt = f"dans {(sched_date - today).days}j"
+
+        smp          = _repo().prelevement(s["sample_id"])
+        pt_type      = smp.get("type",       "?") if smp else "?"
+        pt_gelose    = smp.get("gelose",     "?") if smp else "?"
+        pt_oper      = smp.get("operateur",  "?") if smp else "?"
+        pt_date_p    = smp.get("date",       "—") if smp else "—"
+        pt_comment   = smp.get("commentaire","") if smp else ""
+        comment_short = (pt_comment[:40] + "…") if len(pt_comment) > 40 else (pt_comment or "—")
+
+        with st.container():
+            st.markdown(f"""
+            <div style="background:{bg_col};border:1.5px solid {border_col};border-radius:10px;
+                        padding:14px 16px;margin-bottom:8px">
+            <div style="display:flex;align-items:center;justify-content:space-between;margin-bottom:8px">
+                <div>
+                <span style="font-weight:700;font-size:.9rem;color:#0f172a">{s['label']}</span>
+                <span style="background:{border_col};color:#fff;font-size:.6rem;font-weight:700;
+                            padding:2px 8px;border-radius:10px;margin-left:8px">{s['when']}</span>
+                <span style="color:{badge_col};font-size:.65rem;font-weight:600;margin-left:6px">{status_txt}</span>
+                </div>
+                <span style="font-size:.75rem;color:#475569">📅 Échéance : {(s.get('due_date') or '—')[:10]}</span>
+            </div>
+            <div style="display:grid;grid-template-columns:repeat(5,1fr);gap:6px">
+                <div style="background:#fff;border-radius:6px;padding:6px 8px;border:1px solid #e2e8f0">
+                <div style="font-size:.55rem;color:#64748b;text-transform:uppercase">Type</div>
+                <div style="font-size:.75rem;font-weight:600;color:#0f172a">{pt_type}</div>
+                </div>
+                <div style="background:#f0fdf4;border-radius:6px;padding:6px 8px;border:1px solid #86efac">
+                <div style="font-size:.55rem;color:#166534;text-transform:uppercase">Date prélèv.</div>
+                <div style="font-size:.75rem;font-weight:700;color:#166534">📅 {pt_date_p}</div>
+                </div>
+                <div style="background:#fff;border-radius:6px;padding:6px 8px;border:1px solid #e2e8f0">
+                <div style="font-size:.55rem;color:#64748b;text-transform:uppercase">Gélose</div>
+                <div style="font-size:.75rem;font-weight:600;color:#1d4ed8">🧫 {pt_gelose}</div>
+                </div>
+                <div style="background:#fff;border-radius:6px;padding:6px 8px;border:1px solid #e2e8f0">
+                <div style="font-size:.55rem;color:#64748b;text-transform:uppercase">Opérateur</div>
+                <div style="font-size:.75rem;font-weight:600;color:#0f172a">{pt_oper}</div>
+                </div>
+                <div style="background:#fffbeb;border-radius:6px;padding:6px 8px;border:1px solid #fde047">
+                <div style="font-size:.55rem;color:#92400e;text-transform:uppercase">Commentaire</div>
+                <div style="font-size:.72rem;font-weight:600;color:#78350f"
+                    title="{pt_comment}">💬 {comment_short}</div>
+                </div>
+            </div>
+            </div>""", unsafe_allow_html=True)
+
+            bc1, bc2 = st.columns([3, 1])
+            with bc1:
+                if st.button(f"🔬 Traiter cette lecture ({s['when']})",
+                             key=f"{tab_prefix}proc_{s['id']}", use_container_width=True):
+                    _prev_process = st.session_state.get("current_process")
+                    st.session_state.current_process = s["id"]
+                    if _prev_process not in (None, s["id"]):
+                        st.rerun()   # referme le formulaire ouvert sur une autre carte
+            with bc2:
+                if st.button("🗑️ Supprimer", key=f"{tab_prefix}del_sch_{s['id']}",
+                             use_container_width=True):
+                    sid = s.get("sample_id")
+                    st.session_state.schedules    = [x for x in st.session_state.schedules    if x["sample_id"] != sid]
+                    st.session_state.prelevements = [x for x in st.session_state.prelevements if x["id"]         != sid]
+                    st.session_state.pending_identifications = [
+                        x for x in st.session_state.pending_identifications
+                        if x.get("sample_id") != sid
+                    ]
+                    save_schedules(st.session_state.schedules)
+                    save_prelevements(st.session_state.prelevements)
+                    save_pending_identifications(st.session_state.pending_identifications)
+                    st.success("Prélèvement supprimé.")
+                    st.rerun()
+
+    def _render_traitement_lecture(proc_id):
+        proc = _repo().schedule(proc_id)
+        if not proc:
+            return
+        smp      = _repo().prelevement(proc["sample_id"])
+
+        if proc["when"] == "J7":
+            st.markdown(
+                "<div style='background:#fff7ed;border:1px solid #fed7aa;border-radius:8px;"
+                "padding:8px 14px;margin-bottom:8px;font-size:.78rem;color:#9a3412'>"
+                "💡 Vous traitez la lecture <b>J7</b>.</div>",
+                unsafe_allow_html=True)
+            if st.button("↩️ Revenir à la lecture J2", key=f"back_j2_{proc_id}"):
+                _j2 = _repo().schedule_for(proc["sample_id"], "J2")
+                if _j2:
+                    _j2["status"] = "pending"
+                proc["status"] = "pending"
+                save_schedules(st.session_state.schedules)
+                st.session_state.pending_identifications = [
+                    x for x in st.session_state.pending_identifications
+                    if x.get("sample_id") != proc["sample_id"]
+                ]
+                save_pending_identifications(st.session_state.pending_identifications)
+                if smp and smp.get("archived"):
+                    smp["archived"] = False
+                    st.session_state.archived_samples = [
+                        x for x in st.session_state.archived_samples if x.get("id") != smp["id"]
+                    ]
+                    save_archived_samples(st.session_state.archived_samples)
+                    save_prelevements(st.session_state.prelevements)
+                st.session_state.current_process = None
+                st.success("↩️ J2 et J7 remises en attente.")
+                st.rerun()
+            st.markdown("---")
+
+        lc1, lc2 = st.columns([2, 2])
+        with lc1:
+            res = st.radio(
+                "Résultat",
+                ["✅ Négatif (0 colonie)", "🔴 Positif (colonies détectées)"],
+                index=0, key=f"res_{proc_id}")
+        with lc2:
+            ncol = st.number_input("Nombre de colonies (UFC)", min_value=1, value=1,
+                                   key=f"ncol_{proc_id}") if "Positif" in res else 0
+
+        btn1, _, btn3 = st.columns([3, 1, 1])
+        with btn1:
+            if st.button("💾 Valider la lecture", use_container_width=True,
+                         type="primary", key=f"valider_{proc_id}"):
+                proc["status"]    = "done"
+                proc["colonies"]  = ncol
+                proc["date_read"] = str(datetime.today().date())
+                save_schedules(st.session_state.schedules)
+
+                if "Positif" in res and ncol > 0:
+                    label_smp = smp.get("label", "?") if smp else "?"
+                    st.session_state.pending_identifications.append({
+                        "id":        str(uuid.uuid4()),
+                        "sample_id": proc["sample_id"],
+                        "label":     label_smp,
+                        "when":      proc["when"],
+                        "colonies":  ncol,
+                        "date":      str(datetime.today().date()),
+                        "status":    "pending",
+                    })
+                    save_pending_identifications(st.session_state.pending_identifications)
+
+                    if proc["when"] == "J2":
+                        _j7 = _repo().schedule_for(proc["sample_id"], "J7")
+                        if _j7:
+                            _j7["status"] = "skipped"
+                            save_schedules(st.session_state.schedules)
+                        st.success(f"🔴 J2 positive — {ncol} UFC · identification en attente.")
+                    elif proc["when"] == "J7" and smp and not smp.get("archived"):
+                        smp["archived"] = True
+                        st.session_state.archived_samples.append(smp)
+                        save_archived_samples(st.session_state.archived_samples)
+                        save_prelevements(st.session_state.prelevements)
+                        st.success(f"🔴 J7 positive — {ncol} UFC · identification en attente.")
+
+                else:
+                    if proc["when"] == "J2":
+                        j7_sch = _repo().schedule_for(proc["sample_id"], "J7")
+                        st.success(
+                            f"✅ J2 négative — J7 prévue le "
+                            f"{(j7_sch.get('due_date') or '?')[:10] if j7_sch else '?'}."
+                        )
+                    elif proc["when"] == "J7" and smp and not smp.get("archived"):
+                        smp["archived"] = True
+                        st.session_state.archived_samples.append(smp)
+                        save_archived_samples(st.session_state.archived_samples)
+                        save_prelevements(st.session_state.prelevements)
+                        _lc_neg = 1
+                        try:
+                            _lc_neg = int(smp.get("location_criticality", 1) or 1)
+                        except (ValueError, TypeError):
+                            pass
+                        st.session_state.surveillance.append({
+                            "date":                 str(datetime.today().date()),   # date de lecture (inchangé)
+                            "date_prelevement":     smp.get("date", ""),            # ← AJOUTER cette ligne
+                            "prelevement":          smp.get("label", "?"),
+                            "sample_id":            proc["sample_id"],
+                            "germ_match":           "Négatif",
+                            "germ_saisi":           "Négatif",
+                            "ufc":                  0,
+                            "ufc_total":            0,
+                            "germ_score":           0,
+                            "location_criticality": _lc_neg,
+                            "total_score":          0,
+                            "status":               "ok",
+                            "operateur":            smp.get("operateur", "?"),
+                            "remarque":             "",
+                            "readings":             "J7",
+                            "room_class":           smp.get("room_class", ""),
+                        })
+                        save_surveillance(st.session_state.surveillance)
+                        st.success("✅ J7 négative — prélèvement archivé.")
+
+                st.session_state.current_process = None
+                st.rerun()
+
+        with btn3:
+            if st.button("✕ Annuler", use_container_width=True, key=f"cancel_{proc_id}"):
+                st.session_state.current_process = None
+                st.rerun(scope="fragment")
+
+    def _valider_negatif(sch_id):
+        proc = _repo().schedule(sch_id)
+        if not proc:
+            return
+        smp = _repo().prelevement(proc["sample_id"])
+        proc["status"]    = "done"
+        proc["colonies"]  = 0
+        proc["date_read"] = str(datetime.today().date())
+        save_schedules(st.session_state.schedules)
+        if proc["when"] == "J7" and smp and not smp.get("archived"):
+            smp["archived"] = True
+            st.session_state.archived_samples.append(smp)
+            save_archived_samples(st.session_state.archived_samples)
+            save_prelevements(st.session_state.prelevements)
+            _lc_neg = 1
+            try:
+                _lc_neg = int(smp.get("location_criticality", 1) or 1)
+            except (ValueError, TypeError):
+                pass
+            st.session_state.surveillance.append({
+                "date":                 str(datetime.today().date()),   # date de lecture (inchangé)
+                "date_prelevement":     smp.get("date", ""),            # ← AJOUTER cette ligne
+                "prelevement":          smp.get("label", "?"),
+                "sample_id":            proc["sample_id"],
+                "germ_match":           "Négatif",
+                "germ_saisi":           "Négatif",
+                "ufc":                  0,
+                "ufc_total":            0,
+                "germ_score":           0,
+                "location_criticality": _lc_neg,
+                "total_score":          0,
+                "status":               "ok",
+                "operateur":            smp.get("operateur", "?"),
+                "remarque":             "",
+                "readings":             "J7",
+                "room_class":           smp.get("room_class", ""),
+            })
+            save_surveillance(st.session_state.surveillance)
+
+    def _render_batch_negatif_section(pending_list, tab_key):
+        if not pending_list:
+            return
+        batch_mode_key = f"batch_mode_{tab_key}"
+        if batch_mode_key not in st.session_state:
+            st.session_state[batch_mode_key] = False
+        col_a, col_b = st.columns([2, 3])
+        with col_a:
+            btn_label = "✕ Fermer sélection" if st.session_state[batch_mode_key] else "☑️ Sélection multiple — tout négatif"
+            if st.button(btn_label, key=f"toggle_batch_{tab_key}", use_container_width=True):
+                st.session_state[batch_mode_key] = not st.session_state[batch_mode_key]
+                for s in pending_list:
+                    st.session_state.pop(f"batch_chk_{tab_key}_{s['id']}", None)
+                st.session_state.pop(f"sel_all_{tab_key}", None)
+                _batch_selection(tab_key).clear()
+                st.rerun()
+        if not st.session_state[batch_mode_key]:
+            return
+        with col_b:
+            if st.checkbox("✅ Tout sélectionner", key=f"sel_all_{tab_key}"):
+                for s in pending_list:
+                    st.session_state[f"batch_chk_{tab_key}_{s['id']}"] = True
+                _batch_selection(tab_key).update(s["id"] for s in pending_list)
+
+    def _batch_selection(tab_key):
+        # Sélection conservée hors widgets : les cases des autres pages ne sont pas rendues
+        return st.session_state.setdefault(f"batch_sel_{tab_key}", set())
+
+    def _batch_checkbox(s, tab_key):
+        sel     = _batch_selection(tab_key)
+        chk_key = f"batch_chk_{tab_key}_{s['id']}"
+        if chk_key not in st.session_state:
+            st.session_state[chk_key] = s["id"] in sel
+        if st.checkbox("", key=chk_key):
+            sel.add(s["id"])
+        else:
+            sel.discard(s["id"])
+
+    def _render_batch_confirm(pending_list, tab_key):
+        if not st.session_state.get(f"batch_mode_{tab_key}"):
+            return
+        # Les cases sont cochées dans les fragments des cartes : le compte affiché peut
+        # dater du dernier rendu complet, la sélection est relue au clic.
+        sel = _batch_selection(tab_key)
+        st.markdown(
+            f"<div style='font-size:.78rem;color:#475569;margin:6px 0'>"
+            f"{sum(1 for s in pending_list if s['id'] in sel)} / {len(pending_list)} "
+            f"lecture(s) sélectionnée(s)</div>",
+            unsafe_allow_html=True)
+        if st.button("✅ Valider la sélection comme négative",
+                     key=f"batch_confirm_{tab_key}", type="primary",
+                     use_container_width=True):
+            selected_ids = [s["id"] for s in pending_list if s["id"] in sel]
+            n_sel = len(selected_ids)
+            pl = "s" if n_sel > 1 else ""
+            if not selected_ids:
+                st.warning("Aucune lecture sélectionnée.")
+            else:
+                for sch_id in selected_ids:
+                    _valider_negatif(sch_id)
+                    st.session_state.pop(f"batch_chk_{tab_key}_{sch_id}", None)
+                st.session_state[f"batch_mode_{tab_key}"] = False
+                st.session_state.pop(f"sel_all_{tab_key}", None)
+                sel.clear()
+                st.success(f"✅ {n_sel} lecture{pl} validée{pl} comme négative{pl} !")
+                st.rerun()
+
+    @st.fragment
+    def _lecture_fragment(sch_id, tab_key):
+        """Carte de lecture et son formulaire de traitement. Ouvrir, cocher ou saisir ne
+        relance que ce fragment ; une lecture enregistrée relance la page (listes, badges)."""
+        s = _repo().schedule(sch_id)
+        if s is None or s.get("status") != "pending":
+            return
+        if st.session_state.get(f"batch_mode_{tab_key}", False):
+            chk_col, card_col = st.columns([0.35, 9.65])
+            with chk_col:
+                st.markdown("<div style='margin-top:28px'>", unsafe_allow_html=True)
+                _batch_checkbox(s, tab_key)
+                st.markdown("</div>", unsafe_allow_html=True)
+            with card_col:
+                _render_lecture_card(s, f"{tab_key}_")
+        else:
+            _render_lecture_card(s, f"{tab_key}_")
+            if st.session_state.get("current_process") == s["id"]:
+                _render_traitement_lecture(s["id"])
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # ONGLET 2 — LECTURE J2
+    # ══════════════════════════════════════════════════════════════════════════
+    with tab_j2:
+        st.markdown("#### 📖 Lectures J2 en attente")
+        _active_sids = {p["id"] for p in st.session_state.prelevements if not p.get("archived")}
+        pending_j2   = [s for s in st.session_state.schedules
+                        if s["when"] == "J2" and s["status"] == "pending"
+                        and s.get("sample_id") in _active_sids]
+        overdue_j2   = [s for s in pending_j2
+                        if (_schedule_due(s) or date.max) <= today]
+        upcoming_j2  = [s for s in pending_j2
+                        if (_schedule_due(s) or date.max) > today]
+
+        if not pending_j2:
+            st.success("✅ Aucune lecture J2 en attente — tout est à jour !")
+        else:
+            if overdue_j2:
+                st.markdown(
+                    f'<div style="background:#fef2f2;border:1.5px solid #fca5a5;border-radius:10px;'
+                    f'padding:12px 16px;margin-bottom:12px">'
+                    f'<span style="color:#dc2626;font-weight:700">'
+                    f'🔔 {len(overdue_j2)} lecture(s) J2 en retard</span></div>',
+                    unsafe_allow_html=True)
+            if upcoming_j2:
+                st.markdown(
+                    f'<div style="background:#f0fdf4;border:1px solid #86efac;border-radius:10px;'
+                    f'padding:10px 16px;margin-bottom:12px">'
+                    f'<span style="color:#16a34a;font-size:.8rem">'
+                    f'📆 {len(upcoming_j2)} lecture(s) J2 à venir</span></div>',
+                    unsafe_allow_html=True)
+
+            _render_batch_negatif_section(pending_j2, "j2")
+            st.divider()
+
+            sort_col_j2, filter_col_j2 = st.columns(2)
+            with sort_col_j2:
+                sort_j2 = st.selectbox(
+                    "🔃 Trier par",
+                    options=["echeance", "label", "operateur", "date_prelevement"],
+                    format_func=lambda x: {
+                        "echeance": "📅 Échéance", "label": "📍 Lieu (A→Z)",
+                        "operateur": "👤 Opérateur (A→Z)", "date_prelevement": "🗓️ Date prélèvement",
+                    }[x], key="sort_j2")
+            with filter_col_j2:
+                all_labels_j2 = sorted({s.get("label", "—") for s in overdue_j2 + upcoming_j2})
+                filter_j2 = st.multiselect("🔍 Filtrer par point", options=all_labels_j2,
+                                           default=[], key="filter_j2",
+                                           placeholder="Tous les points…")
+
+            filtered_j2 = [s for s in overdue_j2 + upcoming_j2
+                           if not filter_j2 or s.get("label") in filter_j2]
+            sorted_j2 = _sort_schedules(filtered_j2, sort_j2)
+            _late_j2  = {s["id"] for s in overdue_j2}
+            _first_late_j2 = next((i for i, s in enumerate(sorted_j2) if s["id"] in _late_j2), None)
+
+            with _profiled("liste J2"):
+                for s in _paginate(sorted_j2, "j2", _first_late_j2, (sort_j2, tuple(filter_j2))):
+                    _lecture_fragment(s["id"], "j2")
+
+            _render_batch_confirm(pending_j2, "j2")
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # ONGLET 3 — LECTURE J7
+    # ══════════════════════════════════════════════════════════════════════════
+    with tab_j7:
+        st.markdown("#### 📗 Lectures J7 en attente")
+        _active_sids_j7 = {p["id"] for p in st.session_state.prelevements if not p.get("archived")}
+
+        def _j2_done_for(sample_id):
+            j2 = _repo().schedule_for(sample_id, "J2")
+            return j2 is None or j2["status"] == "done"
+
+        all_pending_j7 = [s for s in st.session_state.schedules
+                          if s["when"] == "J7" and s["status"] == "pending"
+                          and s.get("sample_id") in _active_sids_j7
+                          and _j2_done_for(s["sample_id"])]
+
+        overdue_j7  = [s for s in all_pending_j7
+                       if (_schedule_due(s) or date.max) <= today
+                       and _days_since_sample(s) >= 7]
+        _late_j7    = {s["id"] for s in overdue_j7}
+        upcoming_j7 = [s for s in all_pending_j7 if s["id"] not in _late_j7]
+        pending_j7  = all_pending_j7
+
+        if not all_pending_j7:
+            st.success("✅ Aucune lecture J7 en attente — tout est à jour !")
+        else:
+            if overdue_j7:
+                st.markdown(
+                    f'<div style="background:#fef2f2;border:1.5px solid #fca5a5;border-radius:10px;'
+                    f'padding:12px 16px;margin-bottom:12px">'
+                    f'<span style="color:#dc2626;font-weight:700">'
+                    f'🔔 {len(overdue_j7)} lecture(s) J7 en retard</span></div>',
+                    unsafe_allow_html=True)
+            if upcoming_j7:
+                not_ready   = [s for s in upcoming_j7 if _days_since_sample(s) < 7]
+                truly_ahead = [s for s in upcoming_j7 if _days_since_sample(s) >= 7]
+                if not_ready:
+                    st.markdown(
+                        f'<div style="background:#fef9c3;border:1px solid #fde047;border-radius:10px;'
+                        f'padding:10px 16px;margin-bottom:8px">'
+                        f'<span style="color:#92400e;font-size:.8rem">'
+                        f'⏳ {len(not_ready)} lecture(s) J7 pas encore disponible(s) (< 7 jours)'
+                        f'</span></div>', unsafe_allow_html=True)
+                if truly_ahead:
+                    st.markdown(
+                        f'<div style="background:#eff6ff;border:1px solid #93c5fd;border-radius:10px;'
+                        f'padding:10px 16px;margin-bottom:12px">'
+                        f'<span style="color:#1d4ed8;font-size:.8rem">'
+                        f'📆 {len(truly_ahead)} lecture(s) J7 à venir</span></div>',
+                        unsafe_allow_html=True)
+
+            _render_batch_negatif_section(pending_j7, "j7")
+            st.divider()
+
+            sort_col_j7, filter_col_j7 = st.columns(2)
+            with sort_col_j7:
+                sort_j7 = st.selectbox(
+                    "🔃 Trier par",
+                    options=["echeance", "label", "operateur", "date_prelevement"],
+                    format_func=lambda x: {
+                        "echeance": "📅 Échéance", "label": "📍 Lieu (A→Z)",
+                        "operateur": "👤 Opérateur (A→Z)", "date_prelevement": "🗓️ Date prélèvement",
+                    }[x], key="sort_j7")
+            with filter_col_j7:
+                all_labels_j7 = sorted({s.get("label", "—") for s in all_pending_j7})
+                filter_j7 = st.multiselect("🔍 Filtrer par point", options=all_labels_j7,
+                                           default=[], key="filter_j7",
+                                           placeholder="Tous les points…")
+
+            filtered_j7 = [s for s in overdue_j7 + upcoming_j7
+                           if not filter_j7 or s.get("label") in filter_j7]
+            sorted_j7 = _sort_schedules(filtered_j7, sort_j7)
+            _first_late_j7 = next((i for i, s in enumerate(sorted_j7) if s["id"] in _late_j7), None)
+
+            with _profiled("liste J7"):
+                for s in _paginate(sorted_j7, "j7", _first_late_j7, (sort_j7, tuple(filter_j7))):
+                    _lecture_fragment(s["id"], "j7")
+
+            _render_batch_confirm(pending_j7, "j7")
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # ONGLET 4 — IDENTIFICATIONS EN ATTENTE
+    # ══════════════════════════════════════════════════════════════════════════
+
+    with tab_ident:
+
+        st.markdown("#### 🔴 Identifications en attente")
+
+        # ── Popup mesures correctives ─────────────────────────────
+        @st.fragment
+        def _mesures_popup():
+            """Impression ou fermeture du popup sans relancer la page."""
+            if st.session_state.get("_show_mesures_popup"):
+                _render_mesures_correctives(
+                    st.session_state["_show_mesures_popup"],
+                    entry_idx=None,
+                    popup_mode=True,
+                )
+
+        _mesures_popup()
+
+        # ── sécurité germes ───────────────────────────────────────
+        germ_names = sorted([g["name"] for g in st.session_state.get("germs", [])])
+
+        # ── couleurs criticité ────────────────────────────────────
+        LOC_CRIT_COLORS = {
+            "1": "#22c55e",
+            "2": "#0babf5",
+            "3": "#ee811a",
+            "4": "#f50b0b",
+        }
+
+        LOC_CRIT_LABELS = {
+            "1": "Limité",
+            "2": "Modéré",
+            "3": "Important",
+            "4": "Critique",
+        }
+
+        def _j7_done_or_absent(sample_id):
+            j7 = _repo().schedule_for(sample_id, "J7")
+            return j7 is None or j7["status"] in ("done", "skipped")
+
+        # ── filtrage ──────────────────────────────────────────────
+        _all_pending = [
+            p for p in st.session_state.pending_identifications
+            if p.get("status") == "pending"
+            and _j7_done_or_absent(p["sample_id"])
+        ]
+
+        @st.fragment
+        def _identification_card(_sid):
+            """Identification en attente d'un prélèvement : ajouter/retirer un germe ou
+            saisir ne relance que cette carte ; l'enregistrement relance la page."""
+            _pending = [p for p in _repo().pending_for(_sid) if p.get("status") == "pending"]
+            if not _pending:
+                return
+            pg = {
+                "sample_id": _sid,
+                "label":     _pending[0]["label"],
+                "date":      _pending[0]["date"],
+                "entries":   _pending,
+                "when_list": [p["when"] for p in _pending],
+                "colonies":  0,
+            }
+            for p in _pending:
+                if p["when"] == "J7" or pg["colonies"] == 0:
+                    pg["colonies"] = p["colonies"]
+
+            _when_str  = " + ".join(sorted(set(pg["when_list"])))
+            _ufc       = pg["colonies"]
+            _label     = pg["label"]
+
+            # ── prélèvement SAFE ───────────────────────────────
+            smp = _repo().prelevement(_sid)
+
+            pt_oper  = smp.get("operateur", "?") if smp else "?"
+            pt_class = smp.get("room_class", "") if smp else ""
+
+            _comment_prelev = (
+                smp.get("commentaire", "").strip()
+                if smp else ""
+            )
+
+            _date_prelev = (
+                date.fromisoformat(smp["date"])
+                if smp and smp.get("date")
+                else date.today()
+            )
+
+            _key          = _sid.replace("-", "_")
+            germs_list_key = f"germs_list_{_key}"
+
+            if germs_list_key not in st.session_state:
+                st.session_state[germs_list_key] = [
+                    {"germ": "— Sélectionner un germe —", "ufc": 0}
+                ]
+
+            # ── expander ───────────────────────────────────────
+            with st.expander(
+                f"🔴 {_label} — {_when_str} — {_ufc} UFC — Prélevé le {_date_prelev}",
+                expanded=True
+            ):
+
+                # ── COMMENTAIRE (uniquement si existe) ─────────
+                if _comment_prelev:
+                    st.markdown(
+                        f"""
+                        <div style='background:#f0f9ff;border:1px solid #bae6fd;
+                        border-radius:8px;padding:8px 12px;margin-bottom:8px;
+                        font-size:.75rem;color:#0369a1'>
+                        💬 <b>Commentaire prélèvement :</b><br>{_comment_prelev}
+                        </div>
+                        """,
+                        unsafe_allow_html=True
+                    )
+
+                # ── criticité ───────────────────────────────────
+                loc_crit = int(
+                    smp.get("location_criticality", 1) if smp else 1
+                )
+
+                _lc_col = LOC_CRIT_COLORS.get(str(loc_crit), "#94a3b8")
+                _lc_lbl = LOC_CRIT_LABELS.get(str(loc_crit), "?")
+
+                st.markdown(
+                    f"<div style='background:{_lc_col}11;border:1px solid {_lc_col}44;"
+                    f"border-radius:8px;padding:8px 12px;margin-bottom:10px;"
+                    f"font-size:.75rem;font-weight:700;color:{_lc_col}'>"
+                    f"🏷️ Criticité : Niveau {loc_crit} — {_lc_lbl}</div>",
+                    unsafe_allow_html=True
+                )
+
+                # ── germes ─────────────────────────────────────
+                current_germs  = st.session_state[germs_list_key]
+                germs_to_remove = []
+
+                for gi, g in enumerate(current_germs):
+
+                    cols = st.columns([3, 1, 0.4])
+
+                    with cols[0]:
+                        selected = st.selectbox(
+                            f"Germe {gi+1}",
+                            ["— Sélectionner un germe —"] + germ_names,
+                            index=(
+                                ["— Sélectionner un germe —"] + germ_names
+                            ).index(g["germ"])
+                            if g["germ"] in germ_names else 0,
+                            key=f"germ_{_key}_{gi}"
+                        )
+                        current_germs[gi]["germ"] = selected
+
+                    with cols[1]:
+                        current_germs[gi]["ufc"] = st.number_input(
+                            "UFC",
+                            min_value=0,
+                            value=int(g["ufc"]),
+                            step=1,
+                            key=f"ufc_{_key}_{gi}"
+                        )
+
+                    with cols[2]:
+                        if gi > 0 and st.button("🗑️", key=f"del_{_key}_{gi}"):
+                            germs_to_remove.append(gi)
+
+                for i in reversed(germs_to_remove):
+                    st.session_state[germs_list_key].pop(i)
+                    st.rerun(scope="fragment")
+
+                if st.button("➕ Ajouter un germe", key=f"add_{_key}"):
+                    st.session_state[germs_list_key].append(
+                        {"germ": "— Sélectionner un germe —", "ufc": 0}
+                    )
+                    st.rerun(scope="fragment")
+                # ── APERÇU SCORE (preview dynamique) ───────────────────
+                valid_germs_preview = [
+                    g for g in current_germs
+                    if g["germ"] and g["germ"] != "— Sélectionner un germe —"
+                ]
+
+                if valid_germs_preview:
+                    scored_preview = []
+                    for vg in valid_germs_preview:
+                        gobj = _repo().germ(vg["germ"])
+                        if gobj:
+                            gs = (
+                                int(gobj.get("pathogenicity", 1))
+                                * int(gobj.get("resistance", 1))
+                                * int(gobj.get("dissemination", 1))
+                            )
+                            scored_preview.append({
+                                "name": vg["germ"],
+                                "score": gs,
+                                "ufc": vg["ufc"],
+                            })
+
+                    if scored_preview:
+                        worst_prev     = max(scored_preview, key=lambda x: x["score"])
+                        ts_prev        = loc_crit * worst_prev["score"]
+                        st_prev, _, sc_prev = _evaluate_score(ts_prev)
+                        ufc_total_prev = sum(s["ufc"] for s in scored_preview)
+
+                        preview_rows = "".join(
+                            f"<tr>"
+                            f"<td style='padding:2px 8px;color:#475569'>{s['name']}</td>"
+                            f"<td style='padding:2px 8px;text-align:center;color:#475569'>{s['ufc']} UFC</td>"
+                            f"<td style='padding:2px 8px;text-align:center;font-weight:700;"
+                            f"color:{'#ef4444' if s['name'] == worst_prev['name'] else '#64748b'}'>"
+                            f"{s['score']}{'  👑' if s['name'] == worst_prev['name'] else ''}</td>"
+                            f"</tr>"
+                            for s in scored_preview
+                        )
+
+                        st.markdown(
+                            f"""<div style="background:{sc_prev}11;border:1.5px solid {sc_prev}44;
+                            border-radius:8px;padding:10px 14px;margin-top:8px;margin-bottom:10px">
+                            <div style="font-size:.6rem;color:#475569;text-transform:uppercase;
+                            font-weight:700;margin-bottom:6px">
+                            Aperçu score — germe le plus critique 👑</div>
+                            <table style="width:100%;border-collapse:collapse;font-size:.72rem;margin-bottom:8px">
+                                <tr style="border-bottom:1px solid #e2e8f0">
+                                    <th style="padding:2px 8px;text-align:left;color:#94a3b8">Germe</th>
+                                    <th style="padding:2px 8px;text-align:center;color:#94a3b8">UFC</th>
+                                    <th style="padding:2px 8px;text-align:center;color:#94a3b8">Score germe</th>
+                                </tr>
+                                {preview_rows}
+                                <tr style="border-top:2px solid #e2e8f0;background:#f0fdf4">
+                                    <td style="padding:4px 8px;font-weight:800;color:#166534">Σ UFC TOTAL</td>
+                                    <td style="padding:4px 8px;text-align:center;font-weight:900;
+                                    color:#166534;font-size:.85rem">{ufc_total_prev}</td>
+                                    <td style="padding:4px 8px;text-align:center;font-size:.65rem;
+                                    color:#64748b">somme des germes</td>
+                                </tr>
+                            </table>
+                            <div style="display:flex;align-items:center;gap:12px">
+                                <div style="font-size:1.6rem;font-weight:900;color:{sc_prev}">{ts_prev}</div>
+                                <div style="font-size:.72rem;color:#475569">
+                                    Lieu {loc_crit} × Germe le + critique {worst_prev['score']}<br>
+                                    <span style="font-weight:700;color:{sc_prev}">
+                                    {'🚨 ACTION' if st_prev == 'action' else '⚠️ ALERTE' if st_prev == 'alert' else '✅ Conforme'}
+                                    </span>
+                                </div>
+                            </div>
+                            </div>""",
+                            unsafe_allow_html=True
+                        )
+                # ── REMARQUE ────────────────────────────────────
+                remarque = st.text_area(
+                    "Remarque",
+                    key=f"rem_{_key}",
+                    height=60
+                )
+
+                _when_set = set(pg["when_list"])
+                _has_j7   = "J7" in _when_set
+
+                idc1, idc2, idc3, idc4 = st.columns([2, 1.5, 1.5, 0.6])
+
+                with idc1:
+                    if st.button("🔍 Analyser & Enregistrer", use_container_width=True,
+                                 key=f"submit_id_{_key}"):
+
+                        # ✅ CORRECTION Bug 2 : real_indices calculé ici
+                        real_indices = [
+                            i for i, p in enumerate(st.session_state.pending_identifications)
+                            if p["sample_id"] == _sid
+                        ]
+
+                        valid_entries = [
+                            g for g in st.session_state[germs_list_key]
+                            if g["germ"] and g["germ"] != "— Sélectionner un germe —"
+                        ]
+
+                        if not valid_entries:
+                            st.error("Veuillez sélectionner au moins un germe.")
+                        else:
+                            scored_entries = []
+                            for ve in valid_entries:
+                                match, score_fuzzy = find_germ_match(ve["germ"],
+                                                                     st.session_state.germs)
+                                if match and score_fuzzy > 0.4:
+                                    gs = _get_germ_score(match)
+                                    scored_entries.append({
+                                        "germ_saisi":  ve["germ"],
+                                        "germ_match":  match["name"],
+                                        "match_score": f"{int(score_fuzzy * 100)}%",
+                                        "ufc":         ve["ufc"],
+                                        "germ_score":  gs,
+                                        "match_obj":   match,
+                                    })
+
+                            if not scored_entries:
+                                st.warning("⚠️ Aucune correspondance trouvée.")
+                            else:
+                                worst_entry  = max(scored_entries, key=lambda x: x["germ_score"])
+                                total_sc     = loc_crit * worst_entry["germ_score"]
+                                status, status_lbl, status_col = _evaluate_score(total_sc)
+                                ufc_total    = sum(e["ufc"] for e in scored_entries)
+                                triggered_by = (
+                                    f"lieu {loc_crit} × germe {worst_entry['germ_score']}"
+                                    f" ({worst_entry['germ_match']})"
+                                    if status in ("alert", "action") else None
+                                )
+                                germs_detail = [
+                                    {
+                                        "name":        e["germ_match"],
+                                        "germ_saisi":  e["germ_saisi"],
+                                        "match_score": e["match_score"],
+                                        "ufc":         e["ufc"],
+                                        "germ_score":  e["germ_score"],
+                                        "is_worst":    e["germ_match"] == worst_entry["germ_match"],
+                                    }
+                                    for e in scored_entries
+                                ]
+
+                                st.session_state.surveillance.append({
+                                    "date":                 str(_date_prelev),   # ✅ CORRECTION Bug 1
+                                    "date_prelevement":     str(_date_prelev),
+                                    "prelevement":          _label,
+                                    "sample_id":            _sid,
+                                    "germ_saisi":           worst_entry["germ_saisi"],
+                                    "germ_match":           worst_entry["germ_match"],
+                                    "match_score":          worst_entry["match_score"],
+                                    "ufc":                  worst_entry["ufc"],
+                                    "ufc_total":            ufc_total,
+                                    "germ_score":           worst_entry["germ_score"],
+                                    "germs_detail":         germs_detail,
+                                    "multi_germ":           len(scored_entries) > 1,
+                                    "location_criticality": loc_crit,
+                                    "total_score":          total_sc,
+                                    "risk":                 worst_entry["match_obj"].get("risk", worst_entry["germ_score"]),
+                                    "room_class":           pt_class,
+                                    "alert_threshold":      "Score ≥ 24",
+                                    "action_threshold":     "Score > 36",
+                                    "triggered_by":         triggered_by,
+                                    "status":               status,
+                                    "operateur":            pt_oper,
+                                    "remarque":             remarque,
+                                    "readings":             _when_str,
+                                })
+                                save_surveillance(st.session_state.surveillance)
+
+                                for _ri in real_indices:
+                                    st.session_state.pending_identifications[_ri]["status"] = "done"
+                                save_pending_identifications(st.session_state.pending_identifications)
+
+                                if smp and not smp.get("archived"):
+                                    smp["archived"] = True
+                                    st.session_state.archived_samples.append(smp)
+                                    save_archived_samples(st.session_state.archived_samples)
+                                    save_prelevements(st.session_state.prelevements)
+
+                                st.session_state.pop(germs_list_key, None)
+
+                                if status in ("alert", "action"):
+                                    st.session_state["_show_mesures_popup"] = {
+                                        "status":               status,
+                                        "germ":                 worst_entry["germ_match"],
+                                        "germ_saisi":           worst_entry["germ_saisi"],
+                                        "germ_match":           worst_entry["germ_match"],
+                                        "ufc":                  worst_entry["ufc"],
+                                        "risk":                 worst_entry["match_obj"].get("risk", worst_entry["germ_score"]),
+                                        "label":                _label,
+                                        "room_class":           pt_class,
+                                        "triggered_by":         triggered_by,
+                                        "germ_score":           worst_entry["germ_score"],
+                                        "loc_criticality":      loc_crit,
+                                        "location_criticality": loc_crit,
+                                        "total_score":          total_sc,
+                                        "germs_detail":         germs_detail,
+                                        "date":                 str(_date_prelev),   # ✅ CORRECTION Bug 1
+                                        "sample_id":            _sid,
+                                    }
+                                else:
+                                    germs_summary = ", ".join(
+                                        f"{e['name']} ({e['ufc']} UFC)"
+                                        for e in germs_detail)
+                                    st.success(
+                                        f"✅ {germs_summary} — **Conforme** (score {total_sc})")
+                                st.rerun()
+
+                with idc2:
+                    _back_lbl = (
+                        "↩️ Corriger J7" if _when_set == {"J7"}
+                        else "↩️ Corriger J2" if _when_set == {"J2"}
+                        else "↩️ Corriger lecture"
+                    )
+                    if st.button(_back_lbl, use_container_width=True,
+                                 key=f"cancel_id_{_key}"):
+
+                        # ✅ CORRECTION Bug 3 : _entries remplacé par pg["entries"]
+                        for _e in pg["entries"]:
+                            sch = next((x for x in _repo().schedules_for(_sid, _e["when"])
+                                        if x["status"] == "done"), None)
+                            if sch:
+                                sch["status"] = "pending"
+                        save_schedules(st.session_state.schedules)
+
+                        real_indices = [
+                            i for i, p in enumerate(st.session_state.pending_identifications)
+                            if p["sample_id"] == _sid
+                        ]
+                        for _ri in sorted(real_indices, reverse=True):
+                            st.session_state.pending_identifications.pop(_ri)
+                        save_pending_identifications(st.session_state.pending_identifications)
+                        if germs_list_key in st.session_state:
+                            del st.session_state[germs_list_key]
+                        st.rerun()
+
+                with idc3:
+                    if _has_j7:
+                        if st.button("↩️ Revenir à J2", use_container_width=True,
+                                     key=f"back_j2_id_{_key}"):
+                            _j2_back = _repo().schedule_for(_sid, "J2")
+                            if _j2_back:
+                                _j2_back["status"] = "pending"
+                            _j7_back = _repo().schedule_for(_sid, "J7")
+                            if _j7_back:
+                                _j7_back["status"] = "pending"
+                            save_schedules(st.session_state.schedules)
+                            st.session_state.pending_identifications = [
+                                x for x in st.session_state.pending_identifications
+                                if x.get("sample_id") != _sid
+                            ]
+                            save_pending_identifications(st.session_state.pending_identifications)
+                            if germs_list_key in st.session_state:
+                                del st.session_state[germs_list_key]
+                            st.success("↩️ J2 et J7 remises en attente.")
+                            st.rerun()
+
+                with idc4:
+                    if st.button("🗑️", use_container_width=True, key=f"del_id_{_key}"):
+                        real_indices = [
+                            i for i, p in enumerate(st.session_state.pending_identifications)
+                            if p["sample_id"] == _sid
+                        ]
+                        for _ri in sorted(real_indices, reverse=True):
+                            st.session_state.pending_identifications.pop(_ri)
+                        save_pending_identifications(st.session_state.pending_identifications)
+                        if germs_list_key in st.session_state:
+                            del st.session_state[germs_list_key]
+                        st.rerun()
+
+        # un prélèvement par carte, dans l'ordre des identifications en attente
+        pending_sids = list(dict.fromkeys(p["sample_id"] for p in _all_pending))
+
+        # ── affichage ─────────────────────────────────────────────
+        if not pending_sids:
+            st.success("✅ Aucune identification en attente.")
+
+        else:
+            for _sid in pending_sids:
+                _identification_card(_sid)
@@ -0,0 +1,168 @@
+"""Jours fériés (nationaux et régionaux) et calendrier des jours ouvrés du site."""
+import threading
+from datetime import date as date_type, timedelta
+
+import streamlit as st
+
+# ── JOURS FÉRIÉS & JOURS TRAVAILLÉS ───────────────────────────────────────────
+def _easter(year):
+    """Dimanche de Pâques (calendrier grégorien)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    hh = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - hh - k) % 7
+    m = (a + 11 * hh + 22 * l) // 451
+    month = (hh + l - 7 * m + 114) // 31
+    day = ((hh + l - 7 * m + 114) % 31) + 1
+    return date_type(year, month, day)
+
+def get_french_holidays(year):
+    h = set()
+    h.add(date_type(year, 1, 1))
+    h.add(date_type(year, 5, 1))
+    h.add(date_type(year, 5, 8))
+    h.add(date_type(year, 7, 14))
+    h.add(date_type(year, 8, 15))
+    h.add(date_type(year, 11, 1))
+    h.add(date_type(year, 11, 11))
+    h.add(date_type(year, 12, 25))
+    easter = _easter(year)
+    h.add(easter + timedelta(days=1))
+    h.add(easter + timedelta(days=39))
+    h.add(easter + timedelta(days=50))
+    return h
+
+# Jours fériés propres à une région, en plus des fériés nationaux
+REGIONAL_HOLIDAYS = {
+    "":               ("Aucun (fériés nationaux)", lambda y: set()),
+    "alsace_moselle": ("Alsace-Moselle",
+                       lambda y: {_easter(y) - timedelta(days=2), date_type(y, 12, 26)}),
+    "guadeloupe":     ("Guadeloupe", lambda y: {date_type(y, 5, 27)}),
+    "guyane":         ("Guyane",     lambda y: {date_type(y, 6, 10)}),
+    "martinique":     ("Martinique", lambda y: {date_type(y, 5, 22)}),
+    "mayotte":        ("Mayotte",    lambda y: {date_type(y, 4, 27)}),
+    "reunion":        ("La Réunion", lambda y: {date_type(y, 12, 20)}),
+}
+
+class WorkingDayCalendar:
+    """Jours ouvrés du site : hors week-ends, fériés nationaux, fériés de la
+    région et fermetures configurées. Les jours ouvrés des années couvertes
+    sont numérotés une fois (sommes préfixes) : test d'un jour, report au jour
+    ouvré suivant, ajout de N jours ouvrés et décompte entre deux dates se
+    font en temps constant."""
+
+    def __init__(self, region="", closures=()):
+        self.region   = region if region in REGIONAL_HOLIDAYS else ""
+        self.closures = frozenset(closures)
+        self._closed  = {}   # année → jours fériés ou fermés
+        self._lock    = threading.Lock()
+        # (1re année, dernière année, ordinal du 1er janvier, préfixes, ordinaux ouvrés) ;
+        # préfixes[i] = nombre de jours ouvrés avant le jour i de la plage
+        self._span    = None
+
+    def holidays(self, year):
+        """Jours fériés et fermetures de l'année."""
+        closed = self._closed.get(year)
+        if closed is None:
+            closed = get_french_holidays(year) | REGIONAL_HOLIDAYS[self.region][1](year)
+            closed |= {d for d in self.closures if d.year == year}
+            closed = self._closed.setdefault(year, frozenset(closed))
+        return closed
+
+    def _cover(self, lo, hi):
+        span = self._span
+        if span is not None and span[0] <= lo and hi <= span[1]:
+            return span
+        with self._lock:
+            span = self._span
+            if span is not None:
+                if span[0] <= lo and hi <= span[1]:
+                    return span
+                lo, hi = min(lo, span[0]), max(hi, span[1])
+            base = date_type(lo, 1, 1).toordinal()
+            prefix, days = [0], []
+            for o in range(base, date_type(hi, 12, 31).toordinal() + 1):
+                d = date_type.fromordinal(o)
+                if d.weekday() < 5 and d not in self.holidays(d.year):
+                    days.append(o)
+                prefix.append(len(days))
+            self._span = span = (lo, hi, base, prefix, days)
+        return span
+
+    def is_working_day(self, d):
+        _, _, base, prefix, _ = self._cover(d.year, d.year)
+        i = d.toordinal() - base
+        return prefix[i + 1] > prefix[i]
+
+    def add_working_days(self, d, n):
+        """n-ième jour ouvré après d (avant d si n < 0) ; n = 0 : d, reporté au
+        jour ouvré suivant s'il ne l'est pas."""
+        span = self._cover(d.year, d.year)
+        while True:
+            lo, hi, base, prefix, days = span
+            i = d.toordinal() - base
+            k = prefix[i] + n
+            if n > 0 and prefix[i + 1] == prefix[i]:
+                k -= 1   # d non ouvré : le premier jour ouvré suivant compte déjà
+            if 0 <= k < len(days):
+                return date_type.fromordinal(days[k])
+            # ~250 jours ouvrés par an : on étend d'un coup selon le reste à parcourir
+            years = (-k if k < 0 else k - len(days) + 1) // 250 + 1
+            span = self._cover(lo - years, hi) if k < 0 else self._cover(lo, hi + years)
+
+    def roll_forward(self, d):
+        """d s'il est ouvré, sinon le jour ouvré suivant."""
+        return self.add_working_days(d, 0)
+
+    def working_days_between(self, start, end):
+        """Nombre de jours ouvrés de start à end inclus."""
+        if end < start:
+            return 0
+        _, _, base, prefix, _ = self._cover(start.year, end.year)
+        return prefix[end.toordinal() - base + 1] - prefix[start.toordinal() - base]
+
+    def working_days(self, start, end):
+        """Jours ouvrés de start à end inclus."""
+        if end < start:
+            return []
+        _, _, base, prefix, days = self._cover(start.year, end.year)
+        a, b = prefix[start.toordinal() - base], prefix[end.toordinal() - base + 1]
+        return [date_type.fromordinal(o) for o in days[a:b]]
+
+@st.cache_resource
+def _shared_working_calendar(region, closures):
+    # Un calendrier par (région, fermetures) pour tout le process, pas par rerun
+    dates = []
+    for c in closures:
+        try:
+            dates.append(date_type.fromisoformat(c))
+        except ValueError:
+            continue
+    return WorkingDayCalendar(region, dates)
+
+def get_working_calendar(config=None):
+    """Calendrier partagé de la configuration du site ({"region", "closures"}) ;
+    par défaut celle de la session (clé app_state 'working_calendar'), gardé
+    dans _working_calendar jusqu'au prochain changement de configuration."""
+    if config is None:
+        cal = st.session_state.get("_working_calendar")
+        if cal is None:
+            cal = get_working_calendar(st.session_state.get("working_calendar") or {})
+            st.session_state["_working_calendar"] = cal
+        return cal
+    region   = config.get("region") or ""
+    closures = tuple(sorted({str(c)[:10] for c in config.get("closures") or ()}))
+    return _shared_working_calendar(region, closures)
+
+def get_holidays_cached(year):
+    return get_working_calendar().holidays(year)
+
+def is_working_day(d):
+    return get_working_calendar().is_working_day(d)
+
+def next_working_day_offset(start_date, n_days):
+    return get_working_calendar().roll_forward(start_date + timedelta(days=n_days))